@@ -0,0 +1,277 @@
+"""Scaling benchmarks for the generators, with a regression check.
+
+Builds synthetic projects of growing size (see ``SCENARIOS``) and times every
+``create`` step on its own, a manifest batch, the ``INSTALLED_APPS`` edit,
+``CaseUtils`` and the symbol index in process, plus ``dj-cli create``,
+``manage.py create`` and a multi-app ``dj-cli start_app`` end to end in
+fresh interpreters. Each metric is the best of ``--repeat`` runs.
+
+Results are compared against a baseline file; the run fails when a tracked
+metric is slower than its baseline by more than ``--threshold`` (a ratio)
+and ``--min-delta-ms``, which keeps sub-millisecond noise from failing it.
+
+Usage::
+
+    python benchmarks/bench_generators.py                   # check against baseline.json
+    python benchmarks/bench_generators.py --scenarios 10 1k
+    python benchmarks/bench_generators.py --save-baseline   # record a new baseline
+    python benchmarks/bench_generators.py --json results.json
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from synthetic import bench_command, build_project, pythonpath_env
+
+# name -> (apps, models per app)
+SCENARIOS = {
+    "10": (1, 10),
+    "1k": (10, 100),
+    "10k": (100, 100),
+}
+STEPS = (
+    "_create_model",
+    "_create_serializer",
+    "_create_viewset",
+    "_create_factory",
+    "_register_admin",
+    "_register_urls",
+)
+BATCH_SIZE = 100
+NEW_APPS = 10
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+
+def best_of(repeat: int, run: Callable[[int], float]) -> float:
+    return min(run(i) for i in range(repeat))
+
+
+def timed(func: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def bench_steps(root: Path, repeat: int) -> Dict[str, float]:
+    from dj_cli_tools.utils.project import AppLocation
+
+    app = AppLocation("app0", root / "app0")
+    timings: Dict[str, List[float]] = {step: [] for step in STEPS}
+    for i in range(repeat):
+        # All steps of a run create the same model so the project stays importable.
+        for step in STEPS:
+            command = bench_command(root)
+
+            def create(step=step):
+                getattr(command, step)(app, [f"Step{i}"])
+                command._commit_files()
+            timings[step].append(timed(create))
+    results = {
+        "step." + step.split("_", 2)[2]: min(values) for step, values in timings.items()}
+
+    def batch(i):
+        manifest = root / f"batch{i}.json"
+        manifest.write_text(json.dumps(
+            {"apps": {"app0": [f"Batch{i}x{j}" for j in range(BATCH_SIZE)]}}))
+        command = bench_command(root)
+        return timed(lambda: command._scaffold(
+            {"app_name": None, "model_name": None, "manifest": str(manifest), "no_cache": True}))
+    results[f"batch.create_{BATCH_SIZE}"] = best_of(repeat, batch)
+    return results
+
+
+def bench_settings(root: Path, repeat: int) -> Dict[str, float]:
+    from django.conf import settings
+
+    from dj_cli_tools.management.commands.start_app import Command as StartAppCommand
+    from dj_cli_tools.utils.project import read_installed_apps
+
+    if not settings.configured:
+        settings.configure()
+    settings_path = root / "benchproject" / "settings.py"
+
+    class BenchStartApp(StartAppCommand):
+        def _installed_apps(self):
+            return read_installed_apps(settings_path) or []
+
+    def run(i):
+        command = BenchStartApp(stdout=io.StringIO())
+        command._project_cache = None
+        names = [f"settings{i}app{j}" for j in range(NEW_APPS)]
+        for name in names:
+            # The apps start_app would just have created.
+            (root / name).mkdir()
+            (root / name / "__init__.py").write_text("")
+            (root / name / "apps.py").write_text(
+                "from django.apps import AppConfig\n\n\n"
+                f"class {name.title()}Config(AppConfig):\n    name = '{name}'\n")
+        return timed(lambda: command.add_apps_to_installed_apps(names))
+
+    cwd = os.getcwd()
+    os.chdir(root)
+    try:
+        return {f"settings.add_{NEW_APPS}_apps": best_of(repeat, run)}
+    finally:
+        os.chdir(cwd)
+
+
+def bench_utils(root: Path, app_count: int, model_count: int, repeat: int) -> Dict[str, float]:
+    from dj_cli_tools.utils.case_utils import CaseUtils
+    from dj_cli_tools.utils.symbol_index import ModuleIndex
+
+    names = [f"app{i}_model{j}_record" for i in range(app_count) for j in range(model_count)]
+    converters = (CaseUtils.to_pascal_case, CaseUtils.to_snake_case,
+                  CaseUtils.to_camel_case, CaseUtils.to_kebab_case)
+
+    def convert(_):
+        return timed(lambda: [convert(name) for name in names for convert in converters])
+
+    sources = {
+        name: (root / "app0" / f"{name}.py").read_text()
+        for name in ("models", "urls", "views")
+    }
+    results = {"case_utils.convert_all": best_of(repeat, convert)}
+    for name, source in sources.items():
+        results[f"index.parse_{name}"] = best_of(
+            repeat, lambda _, source=source: timed(lambda: ModuleIndex.from_source(source)))
+    return results
+
+
+def bench_end_to_end(root: Path, repeat: int, skip_manage: bool) -> Dict[str, float]:
+    env = pythonpath_env()
+    commands = {
+        "e2e.dj_cli_create": [sys.executable, "-m", "dj_cli_tools.cli", "create", "app0", "Fast{run}"],
+        "e2e.dj_cli_start_apps": [
+            sys.executable, "-m", "dj_cli_tools.cli", "start_app", "fresh{run}x0",
+            "--apps", *[f"fresh{{run}}x{j}" for j in range(1, NEW_APPS)],
+            "--dj_template", "simple_drf"],
+    }
+    if not skip_manage:
+        commands["e2e.manage_create"] = [
+            sys.executable, "manage.py", "create", "app0", "Managed{run}"]
+
+    results = {}
+    for label, command in commands.items():
+        def run(i, command=command):
+            args = [arg.format(run=i) for arg in command]
+            return timed(lambda: subprocess.run(
+                args, cwd=root, env=env, check=True, stdout=subprocess.DEVNULL))
+        results[label] = best_of(repeat, run)
+    return results
+
+
+def run_scenario(name: str, repeat: int, skip_manage: bool) -> Dict[str, float]:
+    app_count, model_count = SCENARIOS[name]
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        build_start = time.perf_counter()
+        build_project(root, app_count, model_count, scaffold=True)
+        print(f"[{name}] {app_count} apps x {model_count} models built in "
+              f"{time.perf_counter() - build_start:.1f} s", file=sys.stderr)
+
+        results = {}
+        results.update(bench_utils(root, app_count, model_count, repeat))
+        results.update(bench_steps(root, repeat))
+        results.update(bench_settings(root, repeat))
+        results.update(bench_end_to_end(root, repeat, skip_manage))
+        return results
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float,
+    min_delta: float,
+) -> List[str]:
+    """Regressed metrics, formatted for the report."""
+    regressions = []
+    for scenario, metrics in results.items():
+        for metric, value in metrics.items():
+            base = baseline.get(scenario, {}).get(metric)
+            if base is None:
+                continue
+            if value > base * (1 + threshold) and value - base > min_delta:
+                regressions.append(
+                    f"{scenario}/{metric}: {value * 1000:.2f} ms vs baseline "
+                    f"{base * 1000:.2f} ms (+{(value / base - 1) * 100:.0f}%)")
+    return regressions
+
+
+def print_report(results, baseline) -> None:
+    for scenario, metrics in results.items():
+        print(f"\n{scenario} ({SCENARIOS[scenario][0]} apps x {SCENARIOS[scenario][1]} models)")
+        for metric, value in metrics.items():
+            base = baseline.get(scenario, {}).get(metric)
+            change = f"{(value / base - 1) * 100:+6.0f}%" if base else "      "
+            base_text = f"{base * 1000:10.2f} ms" if base else " " * 13
+            print(f"  {metric:<28} {value * 1000:10.2f} ms {base_text} {change}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Write the results to the baseline file instead of checking them.")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed slowdown ratio before a metric counts as a regression.")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0,
+                        help="Ignore slowdowns smaller than this, in milliseconds.")
+    parser.add_argument("--skip-manage", action="store_true",
+                        help="Do not time manage.py create, which boots the whole project.")
+    parser.add_argument("--json", type=Path, help="Also write the results to this file.")
+    args = parser.parse_args(argv)
+
+    results = {name: run_scenario(name, args.repeat, args.skip_manage) for name in args.scenarios}
+
+    try:
+        baseline_data = json.loads(args.baseline.read_text())
+    except (OSError, ValueError):
+        baseline_data = {}
+    baseline = baseline_data.get("scenarios", {})
+    print_report(results, baseline)
+
+    data = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+        },
+        "scenarios": results,
+    }
+    if args.json:
+        args.json.write_text(json.dumps(data, indent=2) + "\n")
+    if args.save_baseline:
+        merged = {**baseline, **{
+            scenario: {metric: round(value, 6) for metric, value in metrics.items()}
+            for scenario, metrics in results.items()}}
+        args.baseline.write_text(json.dumps({**data, "scenarios": merged}, indent=2) + "\n")
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    if not baseline:
+        print(f"\nNo baseline in {args.baseline}; run with --save-baseline to record one.")
+        return 0
+    regressions = compare(results, baseline, args.threshold, args.min_delta_ms / 1000)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("\nNo regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""Startup time of ``manage.py create`` against ``dj-cli create``.
+
+Builds a throwaway Django project with ``--apps`` apps of ``--models`` models
+each, then times both entry points end to end in fresh interpreters, each run
+creating a new model in the first app.
+
+Usage::
+
+    python benchmarks/bench_startup.py --apps 50 --models 20 --runs 7
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from synthetic import build_project, pythonpath_env
+
+
+def time_runs(command, cwd: Path, runs: int, env) -> list:
+    timings = []
+    for run in range(runs):
+        args = [arg.format(run=run) for arg in command]
+        start = time.perf_counter()
+        subprocess.run(args, cwd=cwd, env=env, check=True, stdout=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--apps", type=int, default=50)
+    parser.add_argument("--models", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    env = pythonpath_env()
+
+    commands = {
+        "python -c pass": [sys.executable, "-c", "pass"],
+        "manage.py create": [sys.executable, "manage.py", "create", "app0", "Managed{run}"],
+        "dj-cli create": [sys.executable, "-m", "dj_cli_tools.cli", "create", "app0", "Fast{run}"],
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        build_project(root, args.apps, args.models)
+        print(f"{args.apps} apps x {args.models} models, {args.runs} runs each")
+        for label, command in commands.items():
+            timings = time_runs(command, root, args.runs, env)
+            print(
+                f"{label:<18} min {min(timings) * 1000:7.1f} ms"
+                f"   median {statistics.median(timings) * 1000:7.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
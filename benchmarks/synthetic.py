@@ -0,0 +1,106 @@
+"""Synthetic Django projects for the benchmarks.
+
+``build_project`` writes a project of ``app_count`` apps with
+``model_count`` models each. With ``scaffold=True`` every model is also run
+through the generators, so the serializers, views, factories, admin and
+URL modules hold one entry per model, as in a project grown with ``create``.
+"""
+from __future__ import annotations
+
+import io
+import os
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+MANAGE_PY = """import os
+import sys
+
+if __name__ == "__main__":
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchproject.settings")
+    from django.core.management import execute_from_command_line
+    execute_from_command_line(sys.argv)
+"""
+
+SETTINGS = """SECRET_KEY = "bench"
+DEBUG = True
+USE_TZ = True
+DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+DATABASES = {{"default": {{"ENGINE": "django.db.backends.sqlite3", "NAME": "db.sqlite3"}}}}
+INSTALLED_APPS = [
+    "django.contrib.admin",
+    "django.contrib.auth",
+    "django.contrib.contenttypes",
+    "django.contrib.sessions",
+    "django.contrib.messages",
+    "rest_framework",
+    "dj_cli_tools",
+{apps}]
+SILENCED_SYSTEM_CHECKS = ["admin.E403", "admin.E408", "admin.E409", "admin.E410"]
+"""
+
+MODEL = """
+
+class Model{index}(models.Model):
+    name = models.CharField(max_length=120, db_index=True)
+    created = models.DateTimeField(auto_now_add=True)
+    parent = models.ForeignKey("self", null=True, on_delete=models.CASCADE)
+"""
+
+
+def build_project(root: Path, app_count: int, model_count: int, scaffold: bool = False) -> None:
+    (root / "manage.py").write_text(MANAGE_PY)
+    (root / "benchproject").mkdir()
+    (root / "benchproject" / "__init__.py").write_text("")
+    apps = "".join(f'    "app{i}",\n' for i in range(app_count))
+    (root / "benchproject" / "settings.py").write_text(SETTINGS.format(apps=apps))
+    for i in range(app_count):
+        app_dir = root / f"app{i}"
+        app_dir.mkdir()
+        (app_dir / "__init__.py").write_text("")
+        (app_dir / "apps.py").write_text(
+            "from django.apps import AppConfig\n\n\n"
+            f"class App{i}Config(AppConfig):\n    name = 'app{i}'\n")
+        models = "from django.db import models\n" + "".join(
+            MODEL.format(index=j) for j in range(model_count))
+        (app_dir / "models.py").write_text(models)
+
+    if scaffold:
+        scaffold_project(root, app_count, model_count)
+
+
+def scaffold_project(root: Path, app_count: int, model_count: int) -> None:
+    """Run every model of the project through the generators, one app per pass."""
+    from dj_cli_tools.utils.project import AppLocation
+
+    for i in range(app_count):
+        command = bench_command(root)
+        app = AppLocation(f"app{i}", root / f"app{i}")
+        names = [f"Model{j}" for j in range(model_count)]
+        command._create_serializer(app, names)
+        command._create_viewset(app, names)
+        command._create_factory(app, names)
+        command._register_admin(app, names)
+        command._register_urls(app, names)
+        command._commit_files()
+
+
+def bench_command(root: Path):
+    """A ``dj-cli create`` command for ``root`` with output and cache disabled."""
+    from dj_cli_tools.cli import FastCreate, ProjectContext, _Style
+
+    command = FastCreate(ProjectContext(root, use_cache=False), stdout=io.StringIO(),
+                         style=_Style(False))
+    command._project_cache = None
+    return command
+
+
+def pythonpath_env() -> dict:
+    """The environment for subprocesses importing dj_cli_tools from this checkout."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+        filter(None, [str(REPO_ROOT), os.environ.get("PYTHONPATH")])))
+    env.pop("DJANGO_SETTINGS_MODULE", None)
+    return env
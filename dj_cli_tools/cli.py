@@ -0,0 +1,244 @@
+"""``dj-cli``: run the generators without booting the Django project.
+
+``python manage.py create`` imports the settings, runs ``django.setup()`` and
+imports every installed app only so ``apps.get_app_config`` can return a
+path. ``dj-cli create`` finds the project, its settings file and the app
+directories with :mod:`dj_cli_tools.utils.project` instead, and only falls
+back to ``django.setup()`` when an app cannot be located that way.
+``dj-cli start_app`` still needs Django's template engine, but never loads
+the project settings; ``dj-cli pack_templates`` needs no project at all.
+``dj-cli create`` for a model that models.py already defines sets Django up
+as well, to read its fields, relations and indexes the way ``manage.py create``
+does, and so does ``--from-db``, to read the tables of the database. New
+models are generated from their field specs without it.
+
+Usage::
+
+    dj-cli create <app_name> <ModelName>
+    dj-cli create --manifest models.toml
+    dj-cli create <app_name> --from-db [<database>] [--tables <pattern>]
+    dj-cli start_app <app_name> --dj_template simple_drf
+    dj-cli start_app <app_name> --apps <app_name> ... --dj_template simple_drf
+    dj-cli pack_templates [<template_dir> ...]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from .utils.project import (
+    AppLocation,
+    find_module_path,
+    find_project_root,
+    get_settings_module,
+    read_installed_apps,
+    resolve_app,
+)
+from .utils import timings
+from .utils.instrumentation_mixin import InstrumentationMixin
+from .utils.project_cache import ProjectCache
+from .utils.scaffold_mixin import ScaffoldMixin
+
+COMMANDS = ("create", "start_app", "pack_templates")
+
+
+class _Style:
+    """Minimal stand-in for Django's color_style()."""
+
+    _CODES = {"SUCCESS": "32;1", "WARNING": "33;1", "ERROR": "31;1", "NOTICE": "31"}
+
+    def __init__(self, colorize: bool):
+        self.colorize = colorize
+
+    def __getattr__(self, role):
+        code = self._CODES.get(role)
+        if not self.colorize or code is None:
+            return lambda text: text
+        return lambda text: f"\x1b[{code}m{text}\x1b[0m"
+
+
+class _Output:
+    """Minimal stand-in for Django's OutputWrapper."""
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def write(self, msg: str = "", ending: str = "\n") -> None:
+        if ending and not msg.endswith(ending):
+            msg += ending
+        self._stream.write(msg)
+
+
+class ProjectContext:
+    """Project root, settings and app locations, cached in the project index."""
+
+    def __init__(self, start=None, use_cache: bool = True):
+        self.root: Optional[Path] = find_project_root(start)
+        if self.root is not None and str(self.root) not in sys.path:
+            sys.path.insert(0, str(self.root))
+        self.settings_module = get_settings_module(self.root)
+        if self.settings_module:
+            os.environ.setdefault("DJANGO_SETTINGS_MODULE", self.settings_module)
+        self.use_cache = use_cache
+        self._cache: Optional[ProjectCache] = None
+        self._settings_path: Optional[Path] = None
+
+    @property
+    def cache(self) -> Optional[ProjectCache]:
+        if self.use_cache and self._cache is None:
+            self._cache = ProjectCache.for_project(self.root)
+        return self._cache if self.use_cache else None
+
+    @property
+    def settings_path(self) -> Optional[Path]:
+        if self._settings_path is not None or not self.settings_module:
+            return self._settings_path
+        cache = self.cache
+        cached = cache.get("settings", self.settings_module) if cache else None
+        if cached and Path(cached).is_file():
+            self._settings_path = Path(cached)
+        else:
+            self._settings_path = find_module_path(self.settings_module)
+            if cache is not None and self._settings_path is not None:
+                cache.set("settings", self.settings_module, str(self._settings_path))
+        return self._settings_path
+
+    def installed_apps(self) -> List[str]:
+        settings_path = self.settings_path
+        if settings_path is None:
+            return []
+        cache = self.cache
+        key = str(settings_path)
+        installed_apps = cache.get("installed_apps", key, source=settings_path) if cache else None
+        if installed_apps is None:
+            installed_apps = read_installed_apps(settings_path) or []
+            if cache is not None:
+                cache.set("installed_apps", key, installed_apps, source=settings_path)
+        return installed_apps
+
+    def resolve_app(self, app_name: str) -> Optional[AppLocation]:
+        cache = self.cache
+        settings_path = self.settings_path
+        cached = cache.get("apps", app_name, source=settings_path) if cache else None
+        if cached and Path(cached["path"]).is_dir():
+            return AppLocation(cached["name"], cached["path"], cached["label"])
+        app = resolve_app(app_name, self.root, self.installed_apps())
+        if app is not None and cache is not None:
+            cache.set(
+                "apps", app_name, {"name": app.name, "label": app.label, "path": app.path},
+                source=settings_path)
+        return app
+
+    def save(self) -> None:
+        if self._cache is not None:
+            self._cache.save()
+
+
+class FastCreate(ScaffoldMixin, InstrumentationMixin):
+    """The ``create`` generators with filesystem based app lookup."""
+
+    def __init__(self, context: ProjectContext, stdout=None, style=None):
+        stdout = stdout or sys.stdout
+        self.context = context
+        self.stdout = _Output(stdout)
+        self.stderr = _Output(sys.stderr)
+        self.style = style or _Style(stdout.isatty() and "NO_COLOR" not in os.environ)
+
+    def _get_project_root(self):
+        return self.context.root
+
+    def _get_app_config(self, app_name: str):
+        app = self.context.resolve_app(app_name)
+        if app is not None:
+            return app
+        # Not found on disk: ask Django, which needs the full setup.
+        from django.apps import apps
+
+        self._setup_django()
+        return apps.get_app_config(app_name)
+
+    def _get_model(self, app_config, model_name: str):
+        if not self._defines_model(app_config, model_name):
+            # A new model: planned from its field specs, without Django.
+            return None
+        # Fields and relations are only known once the models are imported.
+        self._setup_django()
+        return super()._get_model(app_config, model_name)
+
+    def _defines_model(self, app_config, model_name: str) -> bool:
+        """Whether the models module on disk may define ``model_name``.
+
+        Models written in this run are not on disk yet. A ``models``
+        package is not indexed, so it may define any model.
+        """
+        if (app_config.name, model_name) in self._created_models:
+            return False
+        models_path = self._get_file_path(app_config, "models")
+        if not self._file_exists(models_path):
+            return os.path.isdir(os.path.join(app_config.path, "models"))
+        index = self._get_index(models_path)
+        return model_name in index.classes or model_name in index.bound_names
+
+
+def _run_create(argv: List[str], context: ProjectContext) -> int:
+    command = FastCreate(context)
+    parser = argparse.ArgumentParser(prog="dj-cli create", description="Create a new model in the specified app")
+    command._add_scaffold_arguments(parser)
+    command._add_instrumentation_arguments(parser)
+    options = vars(parser.parse_args(argv))
+    context.use_cache = not options["no_cache"]
+    command._project_cache = context.cache
+    try:
+        command._run_instrumented(options, lambda: command._scaffold(options))
+    except Exception as e:
+        from django.core.management.base import CommandError
+
+        if not isinstance(e, CommandError):
+            raise
+        sys.stderr.write(f"CommandError: {e}\n")
+        return 1
+    context.save()
+    return 0
+
+
+def _run_start_app(argv: List[str], context: ProjectContext) -> int:
+    from .management.commands.start_app import Command as StartAppCommand
+
+    class FastStartApp(StartAppCommand):
+        # Read INSTALLED_APPS from the settings file instead of importing it.
+        def _installed_apps(self):
+            return context.installed_apps()
+
+    FastStartApp().run_from_argv(["dj-cli", "start_app", *argv])
+    context.save()
+    return 0
+
+
+def _run_pack_templates(argv: List[str], context: ProjectContext) -> int:
+    from .management.commands.pack_templates import Command as PackTemplatesCommand
+
+    PackTemplatesCommand().run_from_argv(["dj-cli", "pack_templates", *argv])
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or argv[0] not in COMMANDS:
+        sys.stderr.write(
+            f"usage: dj-cli {{{','.join(COMMANDS)}}} ...\n"
+            "Run 'dj-cli <command> --help' for the options of a command.\n")
+        return 2
+
+    context = ProjectContext()
+    if argv[0] == "create":
+        return _run_create(argv[1:], context)
+    if argv[0] == "pack_templates":
+        return _run_pack_templates(argv[1:], context)
+    return _run_start_app(argv[1:], context)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""``dj-cli-client``: send a generator request to a running ``cli_tools_server``.
+
+The arguments are those of ``manage.py create`` and ``manage.py start_app``;
+the server runs the command in its warm process and the client prints its
+output and exits with its status. Only the standard library is imported, so
+a request costs the interpreter start and the generation itself.
+
+Usage::
+
+    python manage.py cli_tools_server &
+    dj-cli-client create <app_name> <ModelName> [options]
+    dj-cli-client start_app <app_name> --dj_template simple_drf
+
+The socket is found from the project around the current directory, or
+given with ``DJ_CLI_TOOLS_SOCKET``.
+"""
+from __future__ import annotations
+
+import os
+import sys
+from typing import List, Optional
+
+from .utils.project import find_project_root
+from .utils.server import COMMANDS, send_request, socket_path
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or argv[0] not in COMMANDS:
+        sys.stderr.write(f"usage: dj-cli-client {{{','.join(COMMANDS)}}} ...\n")
+        return 2
+    if "-h" in argv or "--help" in argv:
+        sys.stdout.write(
+            f"dj-cli-client passes its arguments to the server unchanged; "
+            f"run 'python manage.py {argv[0]} --help' for the options.\n")
+        return 0
+
+    path = os.environ.get("DJ_CLI_TOOLS_SOCKET")
+    if not path:
+        root = find_project_root()
+        if root is None:
+            sys.stderr.write("No manage.py found here or above; set DJ_CLI_TOOLS_SOCKET.\n")
+            return 2
+        path = socket_path(root)
+    payload = {
+        "command": argv[0],
+        "args": argv[1:],
+        "cwd": os.getcwd(),
+        "color": sys.stdout.isatty() and "NO_COLOR" not in os.environ,
+    }
+    try:
+        response = send_request(path, payload)
+    except OSError as e:
+        sys.stderr.write(
+            f"No cli_tools_server is listening on {path} ({e.strerror or e}). "
+            f"Start one with 'python manage.py cli_tools_server'.\n")
+        return 2
+    sys.stdout.write(response.get("stdout", ""))
+    sys.stderr.write(response.get("stderr", ""))
+    return int(response.get("returncode", 1))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
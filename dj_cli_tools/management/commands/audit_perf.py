@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from dj_cli_tools.utils.perf_audit import CHECKS, SEVERITIES, audit_app, severity_rank
+from dj_cli_tools.utils.project import find_project_root
+from dj_cli_tools.utils.seeding import init_worker
+
+REPORT_VERSION = 1
+
+
+class Command(BaseCommand):
+    help = ("Check the viewsets, serializers and admins of existing apps for N+1 queries, "
+            "unindexed filters, unpaginated lists and other hot-path problems")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "app_names", nargs="*", metavar="app_name",
+            help="Apps to audit (default: every app inside the project).")
+        parser.add_argument(
+            "--format", choices=["text", "json"], default="text",
+            help="Report format (default: text).")
+        parser.add_argument(
+            "--output", help="Write the report to this file instead of stdout.")
+        parser.add_argument(
+            "--fail-on", choices=[*SEVERITIES, "never"], default="error",
+            help="Exit with status 1 when a finding has this severity or a higher one "
+                 "(default: error).")
+        parser.add_argument(
+            "--ignore", action="append", choices=CHECKS, default=[], metavar="CHECK",
+            help=f"Leave out findings of this check; repeatable. Checks: {', '.join(CHECKS)}.")
+        parser.add_argument(
+            "--jobs", type=int, default=None,
+            help="Worker processes auditing apps in parallel (default: one per CPU).")
+
+    def handle(self, *args, **options):
+        root = find_project_root() or Path.cwd()
+        labels = self._labels(options["app_names"], root)
+        jobs = options["jobs"] if options["jobs"] is not None else os.cpu_count() or 1
+        if jobs < 1:
+            raise CommandError("--jobs must be at least 1.")
+
+        started = time.perf_counter()
+        if jobs == 1 or len(labels) == 1:
+            results = [audit_app(label, str(root)) for label in labels]
+        else:
+            # Forked workers must not share the parent's open connections.
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=min(jobs, len(labels)), initializer=init_worker) as pool:
+                results = list(pool.map(audit_app, labels, repeat(str(root))))
+        elapsed = time.perf_counter() - started
+
+        findings = [finding for result in results for finding in result
+                    if finding.check not in options["ignore"]]
+        counts = Counter(finding.severity for finding in findings)
+        if options["format"] == "json":
+            report = json.dumps({
+                "version": REPORT_VERSION,
+                "apps": labels,
+                "summary": {severity: counts[severity] for severity in SEVERITIES},
+                "findings": [finding._asdict() for finding in findings],
+            }, indent=2) + "\n"
+        else:
+            report = "".join(
+                f"{finding.path}{f':{finding.line}' if finding.line else ''}: {finding.severity} "
+                f"[{finding.check}] {finding.object}: {finding.message}\n" for finding in findings)
+        if options["output"]:
+            try:
+                Path(options["output"]).write_text(report, encoding="utf-8")
+            except OSError as e:
+                raise CommandError(f"Error writing report {options['output']}: {e}")
+        else:
+            self.stdout.write(report, ending="")
+
+        summary = ", ".join(f"{counts[severity]} {severity}" for severity in reversed(SEVERITIES))
+        style = self.style.ERROR if counts["error"] else self.style.WARNING if findings else self.style.SUCCESS
+        # stderr, so stdout holds nothing but the report.
+        self.stderr.write(style(
+            f"Audited {len(labels)} app{'s' if len(labels) != 1 else ''} in {elapsed:.2f}s: {summary}."))
+
+        fail_on = options["fail_on"]
+        if fail_on != "never":
+            failing = sum(count for severity, count in counts.items()
+                          if severity_rank(severity) >= severity_rank(fail_on))
+            if failing:
+                raise CommandError(f"{failing} finding{'s' if failing != 1 else ''} at or above '{fail_on}'.")
+
+    @staticmethod
+    def _labels(app_names, root: Path):
+        if app_names:
+            labels = []
+            for app_name in app_names:
+                try:
+                    labels.append(apps.get_app_config(app_name).label)
+                except LookupError:
+                    raise CommandError(f"App '{app_name}' does not exist.")
+            return list(dict.fromkeys(labels))
+        root = root.resolve()
+        labels = []
+        for app_config in apps.get_app_configs():
+            path = Path(app_config.path).resolve()
+            # Installed packages of a virtualenv kept in the project are not its apps.
+            if path.is_relative_to(root) and "site-packages" not in path.parts:
+                labels.append(app_config.label)
+        if not labels:
+            raise CommandError(f"No apps found inside {root}; name the apps to audit.")
+        return labels
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import os
+import sys
+from contextlib import ExitStack
+from importlib import import_module
+from io import StringIO
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import autoreload
+
+from dj_cli_tools.management.commands.create import Command as CreateCommand
+from dj_cli_tools.management.commands.start_app import Command as StartAppCommand
+from dj_cli_tools.utils.project import find_project_root
+from dj_cli_tools.utils.project_cache import ProjectCache
+from dj_cli_tools.utils.server import (
+    FileConflict,
+    FileLocks,
+    FileWatcher,
+    GeneratorServer,
+    socket_path,
+)
+
+
+class ServerCreateCommand(CreateCommand):
+    """``create`` on the server's warm project cache.
+
+    Requests for the same app take turns: the lock of the app's directory
+    is held from the app lookup to the commit. Files changed on disk in the
+    meantime, e.g. by an editor, raise FileConflict and the server runs the
+    request again.
+    """
+
+    def __init__(self, project_cache, file_locks: FileLocks, **kwargs):
+        super().__init__(**kwargs)
+        self._project_cache = project_cache
+        self._file_locks = file_locks
+        self._held = ExitStack()
+
+    def handle(self, *args, **options):
+        with self._held:
+            super().handle(*args, **options)
+
+    def _get_app_config(self, app_name: str):
+        app_config = super()._get_app_config(app_name)
+        # A single app outside --manifest, whose requests run alone.
+        self._held.enter_context(self._file_locks.hold([app_config.path]))
+        return app_config
+
+    def _commit_files(self) -> None:
+        stale = self._file_buffer.stale_paths()
+        if stale:
+            raise FileConflict(stale)
+        super()._commit_files()
+
+
+class Command(BaseCommand):
+    help = ("Serve create and start_app requests from a warm process over a Unix socket; "
+            "send them with dj-cli-client")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--socket",
+            help="Path of the Unix socket (default: .dj_cli_tools/server.sock in the project).")
+        parser.add_argument(
+            "--noreload", action="store_true",
+            help="Keep running when the settings change instead of restarting.")
+
+    def handle(self, *args, **options):
+        root = find_project_root() or Path.cwd()
+        path = Path(options["socket"]) if options["socket"] else socket_path(root)
+        self.project_cache = ProjectCache.for_project(root)
+        self.file_locks = FileLocks()
+        try:
+            server = GeneratorServer(path, self.run_request, log=self.stdout.write)
+        except OSError as e:
+            raise CommandError(f"Cannot listen on {path}: {e}")
+
+        watcher = None
+        if not options["noreload"]:
+            watcher = FileWatcher(self._settings_files(), server.restart)
+            watcher.start()
+        self.stdout.write(self.style.SUCCESS(
+            f"Serving create and start_app requests on {path}. Quit with CONTROL-C."))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if watcher is not None:
+                watcher.stop()
+            server.server_close()
+            self.project_cache.save()
+
+        if server.restarting:
+            self.stdout.write("Settings changed, restarting.")
+            sys.stdout.flush()
+            os.execv(sys.executable, autoreload.get_child_arguments())
+
+    def run_request(self, command: str, args, color: bool):
+        stdout, stderr = StringIO(), StringIO()
+        if command == "create":
+            instance = ServerCreateCommand(self.project_cache, self.file_locks)
+        else:
+            instance = StartAppCommand()
+        style = {"force_color": True} if color else {"no_color": True}
+        try:
+            call_command(instance, *args, stdout=stdout, stderr=stderr, **style)
+        except CommandError as e:
+            stderr.write(f"CommandError: {e}\n")
+            return 1, stdout.getvalue(), stderr.getvalue()
+        return 0, stdout.getvalue(), stderr.getvalue()
+
+    @staticmethod
+    def _settings_files():
+        """The settings module, or every module of a settings package."""
+        path = Path(import_module(settings.SETTINGS_MODULE).__file__)
+        if path.name == "__init__.py":
+            return sorted(path.parent.glob("*.py"))
+        return [path]
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import ast
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from dj_cli_tools.utils.case_utils import CaseUtils
+from dj_cli_tools.utils.file_handling_mixin import FileHandlingMixin
+from dj_cli_tools.utils.query_plan import (
+    DEFAULT_DEPTH,
+    QueryPlan,
+    fields_code,
+    plan_queries,
+    queryset_chain,
+    queryset_code,
+    serializer_declarations,
+    traversed_lookups,
+)
+from dj_cli_tools.utils.symbol_index import SourceEditor, class_attributes, root_name
+
+
+class Command(FileHandlingMixin, BaseCommand):
+    help = ("Add select_related/prefetch_related to the viewsets of an existing model "
+            "and list its related fields on the serializers")
+
+    def add_arguments(self, parser):
+        parser.add_argument("app_name", help="Name of the Django app the model belongs to.")
+        parser.add_argument("model_name", help="Name of the model.")
+        parser.add_argument(
+            "--depth", type=int, default=DEFAULT_DEPTH,
+            help=f"How many ForeignKey levels to follow with select_related (default: {DEFAULT_DEPTH}).")
+        parser.add_argument(
+            "--include-reverse", action="store_true",
+            help="Also load and serialise reverse relations (read-only).")
+
+    def handle(self, *args, **options):
+        app_name = options["app_name"]
+        try:
+            app_config = apps.get_app_config(app_name)
+        except LookupError:
+            raise CommandError(f"App '{app_name}' does not exist.")
+        model_name = CaseUtils.to_pascal_case(options["model_name"])
+        try:
+            model = app_config.get_model(model_name)
+        except LookupError:
+            raise CommandError(f"Model '{model_name}' does not exist in app '{app_name}'.")
+
+        self._depth, self._include_reverse = options["depth"], options["include_reverse"]
+        plan = plan_queries(model, self._depth, self._include_reverse)
+        changed = self._optimize_viewsets(app_config, model, model_name)
+        changed += self._optimize_serializers(app_config, model_name, plan)
+        self._commit_files()
+        if not changed:
+            self.stdout.write(self.style.WARNING(
+                f"Nothing to change for '{model_name}' in app '{app_config.name}'."))
+
+    def _classes(self, app_config, filename: str):
+        file_path = self._get_file_path(app_config, filename)
+        if not self._file_exists(file_path):
+            return file_path, "", {}
+        source = self._read_file(file_path)
+        try:
+            return file_path, source, class_attributes(source, str(file_path))
+        except SyntaxError as e:
+            raise CommandError(f"Error parsing file {file_path}: {e}")
+
+    def _optimize_viewsets(self, app_config, model, model_name: str) -> int:
+        """Rewrite every ``queryset = <Model>.objects...`` class attribute in views.py
+        to load the relations its ``serializer_class`` reads.
+
+        Only the loading calls are rewritten: filters, orderings and the
+        other calls of the existing chain are kept in front of them.
+        """
+        file_path, source, classes = self._classes(app_config, "views")
+        serializers = self._classes(app_config, "serializers")[2]
+        editor = SourceEditor(source)
+        changed = 0
+        for class_name, attributes in classes.items():
+            queryset = attributes.get("queryset")
+            if queryset is None or root_name(queryset.node.value) != model_name:
+                continue
+            serializer_class = attributes.get("serializer_class")
+            serializer_name = root_name(serializer_class.node.value) if serializer_class else ""
+            if serializer_name not in serializers:
+                self.stdout.write(self.style.WARNING(
+                    f"Cannot tell which relations '{class_name}' serializes: its serializer_class "
+                    f"is not a class of serializers.py. Its queryset is left as it is."))
+                continue
+            chain = queryset_chain(queryset.node.value)
+            if chain is None:
+                self.stdout.write(self.style.WARNING(
+                    f"Cannot add select_related/prefetch_related to the queryset of '{class_name}' "
+                    f"without changing its rows. Its queryset is left as it is."))
+                continue
+            plan = plan_queries(model, self._depth, self._include_reverse,
+                                traversed_lookups(serializers, serializer_name, model))
+            code = queryset_code(model_name, plan, queryset.col_offset, chain)
+            if ast.dump(queryset.node.value) == ast.dump(ast.parse(code, mode="eval").body):
+                continue
+            editor.replace(
+                queryset.lineno, queryset.end_lineno, f"{' ' * queryset.col_offset}queryset = {code}")
+            changed += 1
+            self.stdout.write(self.style.SUCCESS(
+                f"Optimized the queryset of '{class_name}' in app '{app_config.name}'."))
+        if changed:
+            self._write_file(file_path, editor.apply())
+        return changed
+
+    def _optimize_serializers(self, app_config, model_name: str, plan: QueryPlan) -> int:
+        """List the related fields on every serializer whose ``Meta.model`` is the model.
+
+        ``fields = '__all__'`` is replaced by the explicit list; an explicit
+        list only gains the reverse relations that are missing from it.
+        """
+        file_path, source, classes = self._classes(app_config, "serializers")
+        editor = SourceEditor(source)
+        changed = 0
+        for class_name, attributes in classes.items():
+            meta = classes.get(f"{class_name}.Meta", {})
+            if "." in class_name or "model" not in meta:
+                continue
+            if root_name(meta["model"].node.value) != model_name or "fields" not in meta:
+                continue
+            fields = meta["fields"]
+            value = fields.node.value
+            if isinstance(value, ast.Constant) and value.value == "__all__":
+                new_fields = plan.fields
+            elif isinstance(value, (ast.List, ast.Tuple)):
+                current = [e.value for e in value.elts if isinstance(e, ast.Constant)]
+                new_fields = current + [
+                    accessor for accessor, _ in plan.reverse_relations if accessor not in current]
+                if new_fields == current:
+                    new_fields = None
+            else:
+                new_fields = None
+
+            declarations = serializer_declarations(
+                [(accessor, many) for accessor, many in plan.reverse_relations
+                 if accessor not in attributes],
+                attributes["Meta"].col_offset)
+            if new_fields is None and not declarations:
+                continue
+            if new_fields is not None:
+                editor.replace(
+                    fields.lineno, fields.end_lineno,
+                    f"{' ' * fields.col_offset}fields = {fields_code(new_fields, fields.col_offset)}")
+            if declarations:
+                editor.insert_after(attributes["Meta"].lineno - 1, declarations)
+            changed += 1
+            self.stdout.write(self.style.SUCCESS(
+                f"Listed the related fields of '{class_name}' in app '{app_config.name}'."))
+        if changed:
+            self._write_file(file_path, editor.apply())
+        return changed
+
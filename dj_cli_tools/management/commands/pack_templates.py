@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dj_cli_tools.utils.template_packs import PACK_SUFFIX, TemplatePack, TemplateRegistry, build_pack
+
+
+class Command(BaseCommand):
+    help = "Build template packs (.djpack) from app template directories"
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "sources", nargs="*",
+            help="Template directories or template names. Defaults to every "
+                 "template directory shipped in dj_templates.")
+        parser.add_argument(
+            "-o", "--output-dir",
+            help="Directory for the packs. Defaults to the parent of each template directory.")
+
+    def handle(self, *args, **options):
+        registry = TemplateRegistry()
+        sources = options["sources"] or registry.template_directories()
+        if not sources:
+            raise CommandError("No template directories to pack.")
+
+        output_dir = options.get("output_dir")
+        for source in sources:
+            source_dir = Path(source)
+            if not source_dir.is_dir():
+                location = registry.find(source)
+                if location is None or not Path(location).is_dir():
+                    raise CommandError(f"'{source}' is not a template directory.")
+                source_dir = Path(location)
+
+            destination = Path(output_dir) / (source_dir.name + PACK_SUFFIX) if output_dir else None
+            pack_path = build_pack(source_dir, destination)
+            with TemplatePack(pack_path) as pack:
+                count = len(pack.entries)
+            self.stdout.write(self.style.SUCCESS(
+                f"Packed {count} files from {source_dir} into {pack_path}"))
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import sys
+from importlib import import_module, reload
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import clear_url_caches
+
+from dj_cli_tools.utils.code_templates import CodeTemplates
+from dj_cli_tools.utils.file_handling_mixin import FileHandlingMixin
+from dj_cli_tools.utils.url_layout import SHARD_PACKAGE, ShardedUrlsMixin, reshard
+
+
+class Command(ShardedUrlsMixin, FileHandlingMixin, BaseCommand):
+    help = ("Move the router registrations of an app's urls.py to URL shards included by "
+            "prefix, and time URL resolution before and after")
+
+    def add_arguments(self, parser):
+        parser.add_argument("app_name", help="Name of the Django app whose urls.py to reshard.")
+        parser.add_argument(
+            "--no-benchmark", action="store_true",
+            help="Do not write bench_urls.py or time URL resolution.")
+
+    def handle(self, *args, **options):
+        app_name = options["app_name"]
+        try:
+            app_config = apps.get_app_config(app_name)
+        except LookupError:
+            raise CommandError(f"App '{app_name}' does not exist.")
+        urls_path = self._get_file_path(app_config, "urls")
+        if not self._file_exists(urls_path):
+            raise CommandError(f"App '{app_name}' has no urls.py.")
+        urlconf = f"{app_config.name}.urls"
+
+        source = self._read_file(urls_path)
+        if not self._get_index(urls_path).registrations:
+            self.stdout.write(self.style.WARNING(
+                f"urls.py of app '{app_name}' registers no viewsets on a router; nothing to reshard."))
+            return
+        try:
+            new_source, routes = reshard(source, app_config.name)
+        except ValueError as e:
+            raise CommandError(f"Cannot reshard {urls_path}: {e}.")
+
+        benchmark = None
+        if not options["no_benchmark"]:
+            benchmark = self._benchmark(app_config, urlconf)
+            paths = benchmark.route_paths()
+            before = benchmark.time_resolution(paths)
+
+        self._write_file(urls_path, new_source)
+        registered = self._register_sharded_routes(app_config, routes)
+        self._commit_files()
+        shards = sorted({shard_path.name for _, shard_path in registered})
+        self.stdout.write(self.style.SUCCESS(
+            f"Moved {len(registered)} registrations of app '{app_name}' to "
+            f"{SHARD_PACKAGE}/{{{','.join(shards)}}}."))
+
+        if benchmark is not None:
+            self._reload_urlconf(app_config.name)
+            after = benchmark.time_resolution(paths)
+            self.stdout.write(
+                f"Resolving {len(paths)} routes of {urlconf}: {before * 1e6:.1f} us per resolve "
+                f"before, {after * 1e6:.1f} us after ({before / after:.1f}x).")
+
+    def _benchmark(self, app_config, urlconf: str):
+        """Write bench_urls.py for the app unless it exists, and import it."""
+        file_path = self._get_file_path(app_config, "bench_urls")
+        if not self._file_exists(file_path):
+            self._write_file(file_path, CodeTemplates.URL_BENCHMARK.format(
+                urlconf=urlconf, app_name=app_config.name))
+            self._commit_files()
+            self.stdout.write(self.style.SUCCESS(
+                f"Created bench_urls.py for app '{app_config.name}'."))
+        try:
+            return import_module(f"{app_config.name}.bench_urls")
+        except Exception as e:
+            raise CommandError(f"Cannot import {file_path}: {e}")
+
+    @staticmethod
+    def _reload_urlconf(app_name: str) -> None:
+        module = sys.modules.get(f"{app_name}.urls")
+        if module is not None:
+            reload(module)
+        clear_url_caches()
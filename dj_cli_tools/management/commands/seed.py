@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.module_loading import import_string
+
+from dj_cli_tools.utils.case_utils import CaseUtils
+from dj_cli_tools.utils.seeding import (
+    DEFAULT_BATCH_SIZE,
+    init_worker,
+    m2m_through_fields,
+    seed_rows,
+    split_jobs,
+)
+
+
+class Command(BaseCommand):
+    help = "Insert factory-built rows of a model in bulk, optionally across worker processes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("app_name", help="Name of the Django app the model belongs to.")
+        parser.add_argument("model_name", help="Name of the model.")
+        parser.add_argument("--count", type=int, required=True, help="Number of rows to insert.")
+        parser.add_argument(
+            "--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+            help=f"Rows built and inserted per bulk_create (default: {DEFAULT_BATCH_SIZE}).")
+        parser.add_argument(
+            "--workers", type=int, default=1,
+            help="Worker processes, each with its own database connection (default: 1).")
+        parser.add_argument(
+            "--m2m", type=int, default=0, metavar="N",
+            help="Link every new row to N existing rows per ManyToManyField (default: 0).")
+        parser.add_argument(
+            "--factory",
+            help="Dotted path of the factory to use (default: <app>.factories.<Model>Factory).")
+        parser.add_argument(
+            "--database", default=DEFAULT_DB_ALIAS,
+            help=f"Database to seed (default: '{DEFAULT_DB_ALIAS}').")
+
+    def handle(self, *args, **options):
+        self.verbosity = options["verbosity"]
+        app_name = options["app_name"]
+        try:
+            app_config = apps.get_app_config(app_name)
+        except LookupError:
+            raise CommandError(f"App '{app_name}' does not exist.")
+        model_name = CaseUtils.to_pascal_case(options["model_name"])
+        for option in ("count", "batch_size", "workers"):
+            if options[option] < 1:
+                raise CommandError(f"--{option.replace('_', '-')} must be at least 1.")
+
+        factory_path = options["factory"] or f"{app_config.name}.factories.{model_name}Factory"
+        try:
+            factory_class = import_string(factory_path)
+        except ImportError:
+            raise CommandError(
+                f"Factory '{factory_path}' not found. Run 'create {app_name} {model_name}' "
+                f"to generate it, or pass --factory.")
+        model = factory_class._meta.model
+        if model is None or model._meta.label_lower != f"{app_config.label}.{model_name.lower()}":
+            raise CommandError(f"Factory '{factory_path}' does not build '{app_config.label}.{model_name}'.")
+        if model._meta.parents:
+            raise CommandError(
+                f"'{model._meta.label}' uses multi-table inheritance, which bulk_create cannot insert.")
+
+        database = options["database"]
+        connection = connections[database]
+        if options["m2m"] and m2m_through_fields(model) and \
+                not connection.features.can_return_rows_from_bulk_insert:
+            raise CommandError(
+                f"--m2m needs the primary keys of the new rows, which {connection.vendor} "
+                f"does not return from bulk inserts.")
+        workers = options["workers"]
+        if workers > 1 and connection.vendor == "sqlite" and connection.is_in_memory_db():
+            raise CommandError("Worker processes cannot share an in-memory SQLite database.")
+
+        manager = model._default_manager.db_manager(database)
+        jobs = split_jobs(
+            options["count"], workers,
+            factory=factory_path, database=database, batch_size=options["batch_size"],
+            m2m=options["m2m"], sequence_offset=manager.count())
+
+        started = time.perf_counter()
+        try:
+            if len(jobs) == 1:
+                inserted = seed_rows(jobs[0])
+            else:
+                inserted = self._run_pool(jobs)
+        except ValueError as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {inserted} '{model._meta.label}' rows in {elapsed:.2f}s "
+            f"({inserted / elapsed:,.0f} rows/s, {len(jobs)} worker{'s' if len(jobs) > 1 else ''})."))
+
+    def _run_pool(self, jobs) -> int:
+        # Forked workers must not share the parent's open connections.
+        connections.close_all()
+        inserted = 0
+        with ProcessPoolExecutor(max_workers=len(jobs), initializer=init_worker) as pool:
+            futures = [pool.submit(seed_rows, job) for job in jobs]
+            for future in as_completed(futures):
+                inserted += future.result()
+                if self.verbosity > 1:
+                    self.stdout.write(f"{inserted} rows inserted...")
+        return inserted
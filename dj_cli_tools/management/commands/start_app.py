@@ -3,56 +3,197 @@ from __future__ import annotations
 import importlib.util
 import os
 import re
+import shutil
 from pathlib import Path
-from typing import Optional
 
+import django
 from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
 from django.core.management.commands.startapp import Command as StartAppCommand
+from django.core.management.utils import find_formatters, handle_extensions, run_formatters
+from django.utils.version import get_docs_version
 
+from dj_cli_tools.utils import timings
+from dj_cli_tools.utils.app_template import AppTemplate
+from dj_cli_tools.utils.instrumentation_mixin import InstrumentationMixin
+from dj_cli_tools.utils.project import find_project_root
+from dj_cli_tools.utils.project_cache import ProjectCache
+from dj_cli_tools.utils.settings_editor import SettingsEditor
+from dj_cli_tools.utils.template_packs import TemplatePack, TemplateRegistry, is_template_pack
 
-class Command(StartAppCommand):
+# Template files that only hold code for an option, such as pagination.py
+# for --pagination cursor. They are removed when they render empty.
+OPTIONAL_FILES = ("pagination.py",)
+
+
+class Command(InstrumentationMixin, StartAppCommand):
     help = "Create a new Django app from the template"
 
     def find_directory(self, template_name):
-        # Find the local `dj_templates/rest_version_app_template` by walking up the
-        # parent directories from this file. This makes the command robust to
-        # where the package is installed or executed from.
-        current = Path(__file__).resolve()
-        template_dir: Optional[Path] = None
-        for p in current.parents:
-            candidate = p / "dj_templates" / template_name
-            if candidate.exists():
-                template_dir = candidate
-                break
-
-        if template_dir is None:
+        # Look the template up in the registry: the DJ_CLI_TOOLS_TEMPLATE_PACKS
+        # setting, the dj_cli_tools.template_packs entry points, then the packs
+        # and template directories shipped in dj_templates.
+        registry = TemplateRegistry()
+        location = registry.find(template_name)
+        if location is None:
             raise CommandError(
-                f"Could not locate dj_templates/{template_name} in repository parents")
-        return str(template_dir)
+                f"Unknown template '{template_name}'. "
+                f"Available templates: {', '.join(registry.names()) or 'none'}.")
+        return location
 
     def add_arguments(self, parser):
         super().add_arguments(parser)
         parser.add_argument(
             "--dj_template", help="Name of the application or project.")
+        parser.add_argument(
+            "--apps", nargs="+", metavar="NAME",
+            help="More apps to create from the same template in this run.")
+        parser.add_argument(
+            "--jobs", type=int, default=None,
+            help="Number of threads rendering the app files.")
+        parser.add_argument(
+            "--pagination", choices=["none", "cursor"], default="none",
+            help="Pagination strategy for templates that support one (available to "
+                 "templates as {{ pagination }}); simple_drf emits a pagination.py with a "
+                 "CursorPagination class for 'cursor', and no pagination.py otherwise.")
+        self._add_instrumentation_arguments(parser)
 
     def handle(self, *args, **options):
+        self._run_instrumented(options, lambda: self._start(*args, **options))
+
+    def _start(self, *args, **options):
         if options.get("dj_template") and options.get("template"):
             raise CommandError(
                 "Cannot use --dj_template with --template option.")
         dj_template = options.pop("dj_template", None)
         if dj_template:
-            dj_template_path = self.find_directory(dj_template)
+            with timings.phase("template lookup"):
+                dj_template_path = self.find_directory(dj_template)
             options["template"] = dj_template_path
-            
+
+        app_names = list(dict.fromkeys([options["name"], *(options.pop("apps", None) or [])]))
         directory = options.get("directory")
-        if directory and not os.path.exists(directory):
-            os.makedirs(directory)
+        if len(app_names) > 1 and directory:
+            raise CommandError("Cannot use a target directory with --apps.")
 
-        super().handle(*args, **options)
-        
-        if options.get("name"):
-            self.add_app_to_installed_apps(options["name"], options.get("directory"))
+        if len(app_names) > 1 or is_template_pack(options.get("template") or ""):
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            self.start_apps(app_names, **options)
+            with timings.phase("settings"):
+                self.add_apps_to_installed_apps(app_names, directory)
+        else:
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+
+            with timings.phase("render"):
+                super().handle(*args, **options)
+            if options.get("name"):
+                self._remove_empty_optional_files([self._get_app_path(options["name"], directory)])
+
+            if options.get("name"):
+                with timings.phase("settings"):
+                    self.add_app_to_installed_apps(options["name"], options.get("directory"))
+
+        cache = self._get_project_cache()
+        if cache is not None:
+            with timings.phase("cache save"):
+                cache.save()
+
+    def start_apps(self, app_names, **options):
+        """Create apps from one template, compiled once.
+
+        Mirrors ``TemplateCommand.handle`` but compiles the template tree (or
+        template pack) once and renders the files of all apps on a thread
+        pool. A target ``directory`` is only accepted for a single app.
+        """
+        self.app_or_project = "app"
+        self.a_or_an = "an"
+        self.paths_to_remove = []
+        self.verbosity = options["verbosity"]
+
+        target = options.get("directory")
+        top_dirs = {}
+        for name in app_names:
+            self.validate_name(name)
+            if target:
+                top_dir = os.path.abspath(os.path.expanduser(target))
+                self.validate_name(os.path.basename(top_dir), "directory")
+            else:
+                top_dir = os.path.join(os.getcwd(), name)
+                if os.path.exists(top_dir):
+                    raise CommandError("'%s' already exists" % top_dir)
+            top_dirs[name] = top_dir
+
+        formatter_paths = find_formatters()
+        extensions = tuple(handle_extensions(options["extensions"]))
+        extra_files = []
+        for file in options["files"]:
+            extra_files.extend(x.strip() for x in file.split(","))
+        excluded_directories = None
+        if "exclude" in options:
+            excluded_directories = [".git", "__pycache__"]
+            excluded_directories.extend(d.strip() for d in options["exclude"] or [])
+
+        # Setup a stub settings environment for template rendering
+        if not settings.configured:
+            with timings.phase("django.setup"):
+                settings.configure()
+                django.setup()
+
+        with timings.phase("compile"):
+            if is_template_pack(options["template"] or ""):
+                with TemplatePack(options["template"]) as pack:
+                    app_template = AppTemplate.from_pack(
+                        pack, extensions, extra_files, excluded_directories,
+                        self.rewrite_template_suffixes)
+            else:
+                template_dir = self.handle_template(options["template"], "app_template")
+                app_template = AppTemplate.compile(
+                    template_dir, extensions, extra_files, excluded_directories,
+                    self.rewrite_template_suffixes)
+
+        apps = {}
+        for name, top_dir in top_dirs.items():
+            try:
+                os.makedirs(top_dir, exist_ok=bool(target))
+            except OSError as e:
+                raise CommandError(e)
+            apps[name] = (top_dir, {
+                **options,
+                "app_name": name,
+                "app_directory": top_dir,
+                "camel_case_app_name": "".join(x for x in name.title() if x != "_"),
+                "docs_version": get_docs_version(),
+                "django_version": django.__version__,
+            })
+
+        try:
+            with timings.phase("render"):
+                written = app_template.render(apps, max_workers=options.get("jobs"))
+        except FileExistsError as e:
+            raise CommandError(
+                "%s Overlaying an app into an existing directory won't replace "
+                "conflicting files." % e)
+        if self.verbosity >= 2:
+            for path in written:
+                self.stdout.write("Creating %s" % path)
+
+        for path_to_remove in self.paths_to_remove:
+            if os.path.isfile(path_to_remove):
+                os.remove(path_to_remove)
+            else:
+                shutil.rmtree(path_to_remove)
+        self._remove_empty_optional_files(top_dirs.values())
+
+        run_formatters(list(top_dirs.values()), **formatter_paths, stderr=self.stderr)
+
+    def _remove_empty_optional_files(self, top_dirs):
+        for top_dir in top_dirs:
+            for name in OPTIONAL_FILES:
+                path = os.path.join(top_dir, name)
+                if os.path.isfile(path) and not Path(path).read_text().strip():
+                    os.remove(path)
 
     def _get_app_path(self, app_name, directory=None):
         if directory:
@@ -77,57 +218,85 @@ class Command(StartAppCommand):
                  return app_name
         return app_name
 
+    def _get_project_cache(self):
+        if not hasattr(self, "_project_cache"):
+            self._project_cache = ProjectCache.for_project(find_project_root())
+        return self._project_cache
+
     def _get_app_config_name(self, app_path):
         # Try to find apps.py in the created app directory
         apps_py = app_path / "apps.py"
         
         if not apps_py.exists():
             return None
+
+        cache = self._get_project_cache()
+        if cache is not None:
+            cached = cache.get("app_configs", str(apps_py), source=apps_py)
+            if cached is not None:
+                return cached or None
             
         content = apps_py.read_text()
         # Look for class MyAppConfig(AppConfig): or similar
         match = re.search(r"class\s+(\w+)\s*\([^)]*AppConfig[^)]*\):", content)
-        if match:
-            return match.group(1)
-        return None
+        config_name = match.group(1) if match else None
+        if cache is not None:
+            cache.set("app_configs", str(apps_py), config_name or "", source=apps_py)
+        return config_name
+
+    def _installed_apps(self):
+        return settings.INSTALLED_APPS
 
     def check_if_installed(self, app_name, app_config_path):
-        if app_config_path in settings.INSTALLED_APPS:
+        installed_apps = self._installed_apps()
+        if app_config_path in installed_apps:
              self.stdout.write(f"App '{app_config_path}' already in settings.")
              return True
 
-        if app_config_path != app_name and app_name in settings.INSTALLED_APPS:
+        if app_config_path != app_name and app_name in installed_apps:
              self.stdout.write(f"App '{app_name}' already in settings (simple name).")
              return True
         return False
 
     def add_app_to_installed_apps(self, app_name, directory=None):
-        if not settings.configured:
-            return
+        self.add_apps_to_installed_apps([app_name], directory)
 
+    def _get_app_config_path(self, app_name, directory=None):
         app_path = self._get_app_path(app_name, directory)
         dotted_base = self._get_dotted_path(app_name, directory)
         config_name = self._get_app_config_name(app_path)
 
-        if config_name:
-            # Update apps.py to include full dotted path in 'name'
-            apps_py_path = app_path / "apps.py"
-            if apps_py_path.exists():
-                content = apps_py_path.read_text()
-                # Check if name is just 'app_name' or something else
-                # We want name = 'dotted_path'
-                # Replace name = 'app_name' with name = 'dotted_base'
-                # Usually template has name = '{{ app_name }}' which becomes name = 'app_name'
-                new_name_line = f"    name = '{dotted_base}'"
-                # Regex to replace indentation and name assignment
-                content = re.sub(r"^\s*name\s*=\s*['\"][\w\.]+['\"]", new_name_line, content, flags=re.MULTILINE)
-                apps_py_path.write_text(content)
-
-            app_config_path = f"{dotted_base}.apps.{config_name}"
-        else:
-            app_config_path = dotted_base
+        if not config_name:
+            return dotted_base
 
-        if self.check_if_installed(app_name, app_config_path):
+        # Update apps.py to include full dotted path in 'name'
+        apps_py_path = app_path / "apps.py"
+        if apps_py_path.exists():
+            content = apps_py_path.read_text()
+            # Check if name is just 'app_name' or something else
+            # We want name = 'dotted_path'
+            # Replace name = 'app_name' with name = 'dotted_base'
+            # Usually template has name = '{{ app_name }}' which becomes name = 'app_name'
+            new_name_line = f"    name = '{dotted_base}'"
+            # Regex to replace indentation and name assignment
+            content = re.sub(r"^\s*name\s*=\s*['\"][\w\.]+['\"]", new_name_line, content, flags=re.MULTILINE)
+            apps_py_path.write_text(content)
+
+        return f"{dotted_base}.apps.{config_name}"
+
+    def add_apps_to_installed_apps(self, app_names, directory=None):
+        """Register ``app_names`` in INSTALLED_APPS with one parse and one atomic write."""
+        if not settings.configured:
+            return
+
+        app_config_paths = []
+        for app_name in app_names:
+            app_config_path = self._get_app_config_path(app_name, directory)
+            if app_config_path in app_config_paths or self.check_if_installed(app_name, app_config_path):
+                continue
+            app_config_paths.append(app_config_path)
+
+        if not app_config_paths:
              return
 
         settings_module = os.environ.get("DJANGO_SETTINGS_MODULE")
@@ -143,58 +312,12 @@ class Command(StartAppCommand):
 
         if not settings_path.exists():
             return
-        content = settings_path.read_text()
-
-        match = re.search(r"INSTALLED_APPS\s*(?:\+)?=\s*(\[|\()", content)
-        if not match:
-             # If INSTALLED_APPS is not defined in this file (e.g. imported from base),
-             # append it to the end of the file.
-             if isinstance(settings.INSTALLED_APPS, list):
-                 append_str = f"\nINSTALLED_APPS += ['{app_config_path}']\n"
-             else:
-                 append_str = f"\nINSTALLED_APPS += ('{app_config_path}',)\n"
-             
-             settings_path.write_text(content + append_str)
-             self.stdout.write(self.style.SUCCESS(f"Appended \'{app_config_path}\' to INSTALLED_APPS in settings.py"))
-             return
-
-        start_pos = match.end()
-        open_bracket = match.group(1)
-        close_bracket = ']' if open_bracket == '[' else ')'
-
-        depth = 1
-        end_pos = -1
-        for i in range(start_pos, len(content)):
-            if content[i] == open_bracket:
-                depth += 1
-            elif content[i] == close_bracket:
-                depth -= 1
-                if depth == 0:
-                    end_pos = i
-                    break
-
-        if end_pos == -1:
-            return
 
-        last_line_start = content.rfind('\n', 0, end_pos) + 1
-        last_line = content[last_line_start:end_pos]
-        
-        indent = "    "
-        if last_line.strip() == "":
-            indent = last_line + "    "
-        
-        pre_text = content[start_pos:end_pos].rstrip()
-        needs_comma = False
-        if pre_text and pre_text[-1] not in [',', open_bracket]:
-            needs_comma = True
-
-        insertion = ""
-        if needs_comma:
-            insertion += ","
-        
-        insertion += f"\n{indent}'{app_config_path}',"
-
-        new_content = content[:end_pos] + insertion + content[end_pos:]
-        settings_path.write_text(new_content)
-        
-        self.stdout.write(self.style.SUCCESS(f"Added \'{app_config_path}\' to INSTALLED_APPS in settings.py"))
+        # Split settings are followed to the module that assigns INSTALLED_APPS.
+        editor = SettingsEditor(settings_path)
+        sequence = tuple if isinstance(self._installed_apps(), tuple) else list
+        editor.add_to_list("INSTALLED_APPS", app_config_paths, sequence)
+        for edit in editor.apply():
+            verb = "Appended" if edit.appended else "Added"
+            self.stdout.write(self.style.SUCCESS(
+                f"{verb} '{edit.value}' to INSTALLED_APPS in {edit.path.name}"))
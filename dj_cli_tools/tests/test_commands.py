@@ -1,5 +1,15 @@
 
+import ast
+import json
 import os
+import re
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+from contextlib import closing
+from io import StringIO
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
@@ -7,8 +17,16 @@ from django.core.management import call_command
 from django.core.management.base import CommandError
 from django.test import TestCase
 
+from dj_cli_tools import cli, client
+from dj_cli_tools.management.commands.cli_tools_server import Command as ServerCommand
 from dj_cli_tools.management.commands.create import Command as CreateModelCommand
 from dj_cli_tools.management.commands.start_app import Command as StartAppCommand
+from dj_cli_tools.utils.code_templates import CodeTemplates
+from dj_cli_tools.utils.file_buffer import FileBuffer, atomic_write
+from dj_cli_tools.utils.perf_audit import Finding
+from dj_cli_tools.utils.project_cache import ProjectCache
+from dj_cli_tools.utils.server import FileLocks, GeneratorServer, send_request
+from dj_cli_tools.utils.url_layout import API_ROOT_ENTRY
 
 
 class CreateModelCommandTests(TestCase):
@@ -74,28 +92,25 @@ class StartAppCommandTests(TestCase):
         mock_environ_get.return_value = "myproject.settings"
         mock_get_config.return_value = None # Fallback to simple name
         
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        settings_path = Path(tmp_dir.name) / "settings.py"
+        # Case 1: Simple list
+        settings_path.write_text("INSTALLED_APPS = [\n    'app1',\n]")
+
         mock_spec = MagicMock()
-        mock_spec.origin = "/path/to/settings.py"
+        mock_spec.origin = str(settings_path)
         mock_find_spec.return_value = mock_spec
-        
-        with patch("dj_cli_tools.management.commands.start_app.Path") as MockPath:
-            mock_path_instance = MagicMock()
-            MockPath.return_value = mock_path_instance
-            mock_path_instance.exists.return_value = True
-            
-            # Case 1: Simple list
-            mock_path_instance.read_text.return_value = "INSTALLED_APPS = [\n    'app1',\n]"
-            
-            cmd = StartAppCommand()
-            cmd.stdout = MagicMock()
-            cmd.style = MagicMock()
-            
-            cmd.add_app_to_installed_apps("new_app")
-            
-            mock_path_instance.write_text.assert_called()
-            args = mock_path_instance.write_text.call_args[0][0]
-            self.assertIn("'new_app',", args)
-            self.assertIn("'app1',", args)
+
+        cmd = StartAppCommand()
+        cmd.stdout = MagicMock()
+        cmd.style = MagicMock()
+
+        cmd.add_app_to_installed_apps("new_app")
+
+        content = settings_path.read_text()
+        self.assertIn("'new_app',", content)
+        self.assertIn("'app1',", content)
 
     @patch("dj_cli_tools.management.commands.start_app.settings")
     @patch("dj_cli_tools.management.commands.start_app.importlib.util.find_spec")
@@ -175,25 +190,24 @@ class StartAppCommandTests(TestCase):
         mock_environ_get.return_value = "myproject.settings"
         mock_get_config.return_value = "MyAppConfig"
         
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        settings_path = Path(tmp_dir.name) / "settings.py"
+        settings_path.write_text("INSTALLED_APPS = []")
+
         mock_spec = MagicMock()
-        mock_spec.origin = "/path/to/settings.py"
+        mock_spec.origin = str(settings_path)
         mock_find_spec.return_value = mock_spec
-        
-        with patch("dj_cli_tools.management.commands.start_app.Path") as MockPath:
-            mock_settings_path = MagicMock()
-            MockPath.return_value = mock_settings_path
-            mock_settings_path.exists.return_value = True
-            mock_settings_path.read_text.return_value = "INSTALLED_APPS = []"
-            
-            cmd = StartAppCommand()
-            cmd.stdout = MagicMock()
-            cmd.style = MagicMock()
-            
+
+        cmd = StartAppCommand()
+        cmd.stdout = MagicMock()
+        cmd.style = MagicMock()
+
+        # The app directory is looked up from the working directory.
+        with patch("dj_cli_tools.management.commands.start_app.Path.cwd", return_value=Path(tmp_dir.name)):
             cmd.add_app_to_installed_apps("new_app")
-            
-            mock_settings_path.write_text.assert_called()
-            args = mock_settings_path.write_text.call_args[0][0]
-            self.assertIn("'new_app.apps.MyAppConfig',", args)
+
+        self.assertIn("'new_app.apps.MyAppConfig',", settings_path.read_text())
 
     def test_get_app_config_name(self):
         cmd = StartAppCommand()
@@ -220,3 +234,1275 @@ class StartAppCommandTests(TestCase):
             mock_apps_py.exists.return_value = False
             result = cmd._get_app_config_name("new_app")
             self.assertIsNone(result)
+
+
+class StartMultipleAppsTests(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.root = Path(self.tmp_dir.name)
+        cwd = os.getcwd()
+        os.chdir(self.root)
+        self.addCleanup(os.chdir, cwd)
+
+    @patch("dj_cli_tools.management.commands.start_app.Command.add_apps_to_installed_apps")
+    def test_template_is_compiled_once_for_all_apps(self, mock_add_apps):
+        from django.template import Engine
+
+        with patch.object(Engine, "from_string", side_effect=Engine.from_string, autospec=True) as mock_compile:
+            call_command("start_app", "catalog", apps=["billing_ops"], dj_template="simple_drf",
+                         stdout=StringIO())
+
+        template_files = [
+            p for p in Path(StartAppCommand().find_directory("simple_drf")).rglob("*-tpl")]
+        self.assertEqual(mock_compile.call_count, len(template_files))
+        self.assertIn(
+            "class BillingOpsConfig(AppConfig):",
+            (self.root / "billing_ops" / "apps.py").read_text())
+        self.assertIn("name = 'catalog'", (self.root / "catalog" / "apps.py").read_text())
+        self.assertTrue((self.root / "catalog" / "migrations" / "__init__.py").exists())
+        mock_add_apps.assert_called_once_with(["catalog", "billing_ops"], None)
+
+    @patch("dj_cli_tools.management.commands.start_app.Command.add_apps_to_installed_apps")
+    def test_pagination_option_reaches_the_template(self, mock_add_apps):
+        call_command("start_app", "catalog", apps=["billing"], dj_template="simple_drf",
+                     pagination="cursor", stdout=StringIO())
+
+        pagination = (self.root / "billing" / "pagination.py").read_text()
+        self.assertIn("class DefaultCursorPagination(CursorPagination):", pagination)
+        self.assertIn("ordering = ('-created_at', '-id')", pagination)
+
+    @patch("dj_cli_tools.management.commands.start_app.Command.add_apps_to_installed_apps")
+    @patch("dj_cli_tools.management.commands.start_app.Command.add_app_to_installed_apps")
+    def test_no_pagination_file_without_pagination(self, mock_add_app, mock_add_apps):
+        call_command("start_app", "catalog", apps=["billing"], dj_template="simple_drf", stdout=StringIO())
+        call_command("start_app", "orders", dj_template="simple_drf", stdout=StringIO())
+
+        for name in ("catalog", "billing", "orders"):
+            self.assertTrue((self.root / name / "views.py").exists())
+            self.assertFalse((self.root / name / "pagination.py").exists())
+
+    @patch("dj_cli_tools.management.commands.start_app.Command.add_apps_to_installed_apps")
+    def test_async_template_ships_the_async_base_viewset(self, mock_add_apps):
+        call_command("start_app", "catalog", dj_template="simple_drf_async", stdout=StringIO())
+
+        views = (self.root / "catalog" / "views.py").read_text()
+        self.assertIn(CodeTemplates.ASYNC_VIEWSET, views)
+        self.assertFalse((self.root / "catalog" / "pagination.py").exists())
+
+    def test_existing_app_directory_creates_nothing(self):
+        (self.root / "billing").mkdir()
+        with self.assertRaises(CommandError):
+            call_command("start_app", "catalog", apps=["billing"], dj_template="simple_drf")
+        self.assertFalse((self.root / "catalog").exists())
+
+    @patch("dj_cli_tools.management.commands.start_app.Command.add_apps_to_installed_apps")
+    def test_start_app_from_registered_pack(self, mock_add_apps):
+        call_command("pack_templates", "simple_drf", output_dir=str(self.root), stdout=StringIO())
+        pack_path = self.root / "simple_drf.djpack"
+
+        with self.settings(DJ_CLI_TOOLS_TEMPLATE_PACKS={"team_drf": str(pack_path)}), \
+                patch("dj_cli_tools.management.commands.start_app.StartAppCommand.handle") as mock_super_handle:
+            call_command("start_app", "catalog", dj_template="team_drf", stdout=StringIO())
+
+        mock_super_handle.assert_not_called()
+        self.assertIn("class CatalogConfig(AppConfig):", (self.root / "catalog" / "apps.py").read_text())
+        self.assertTrue((self.root / "catalog" / "migrations" / "__init__.py").exists())
+        self.assertFalse(list((self.root / "catalog").rglob("*-tpl")))
+        mock_add_apps.assert_called_once_with(["catalog"], None)
+
+    def test_unknown_template_lists_available_ones(self):
+        with self.assertRaisesMessage(CommandError, "simple_drf"):
+            call_command("start_app", "catalog", dj_template="no_such_template")
+
+    def test_apps_conflict_with_directory(self):
+        with self.assertRaises(CommandError):
+            call_command("start_app", "catalog", str(self.root), apps=["billing"])
+
+    @patch("dj_cli_tools.management.commands.start_app.settings")
+    def test_apps_are_registered_with_one_settings_write(self, mock_settings):
+        mock_settings.configured = True
+        mock_settings.INSTALLED_APPS = ["django.contrib.admin"]
+        settings_path = self.root / "settings_under_test.py"
+        settings_path.write_text("INSTALLED_APPS = [\n    'django.contrib.admin',\n]\n")
+        for name, config in (("catalog", "CatalogConfig"), ("billing", "BillingConfig")):
+            (self.root / name).mkdir()
+            (self.root / name / "apps.py").write_text(
+                f"class {config}(AppConfig):\n    name = '{name}'\n")
+
+        cmd = StartAppCommand(stdout=StringIO())
+        cmd._project_cache = None
+        spec = MagicMock(origin=str(settings_path))
+        with patch.dict(os.environ, {"DJANGO_SETTINGS_MODULE": "settings_under_test"}), \
+                patch("dj_cli_tools.management.commands.start_app.importlib.util.find_spec",
+                      return_value=spec), \
+                patch("dj_cli_tools.utils.file_buffer.atomic_write", side_effect=atomic_write) as mock_write:
+            cmd.add_apps_to_installed_apps(["catalog", "billing", "catalog"])
+
+        settings_writes = [c for c in mock_write.call_args_list if c[0][0] == settings_path]
+        self.assertEqual(len(settings_writes), 1)
+        content = settings_path.read_text()
+        self.assertEqual(content.count("'catalog.apps.CatalogConfig',"), 1)
+        self.assertLess(
+            content.index("'catalog.apps.CatalogConfig',"),
+            content.index("'billing.apps.BillingConfig',"))
+
+    @patch("dj_cli_tools.management.commands.start_app.settings")
+    def test_split_settings_register_apps_in_the_base_module(self, mock_settings):
+        mock_settings.configured = True
+        mock_settings.INSTALLED_APPS = ["django.contrib.admin"]
+        package = self.root / "settings_package"
+        package.mkdir()
+        (package / "__init__.py").write_text("")
+        (package / "base.py").write_text("INSTALLED_APPS = [\n    'django.contrib.admin',\n]\n")
+        dev = "from .base import *  # noqa\n\nINSTALLED_APPS += ['debug_toolbar']\n"
+        (package / "dev.py").write_text(dev)
+        (self.root / "catalog").mkdir()
+        stdout = StringIO()
+
+        cmd = StartAppCommand(stdout=stdout)
+        cmd._project_cache = None
+        spec = MagicMock(origin=str(package / "dev.py"))
+        with patch.dict(os.environ, {"DJANGO_SETTINGS_MODULE": "settings_package.dev"}), \
+                patch("dj_cli_tools.management.commands.start_app.importlib.util.find_spec",
+                      return_value=spec):
+            cmd.add_apps_to_installed_apps(["catalog"])
+
+        self.assertEqual((package / "dev.py").read_text(), dev)
+        self.assertEqual((package / "base.py").read_text(),
+                         "INSTALLED_APPS = [\n    'django.contrib.admin',\n    'catalog',\n]\n")
+        self.assertIn("Added 'catalog' to INSTALLED_APPS in base.py", stdout.getvalue())
+
+
+class CreateManifestTests(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.app_path = Path(self.tmp_dir.name)
+
+        self.app_config_mock = MagicMock()
+        self.app_config_mock.path = str(self.app_path)
+        self.app_config_mock.name = "shop"
+
+    def _write_manifest(self, name, content):
+        manifest_path = self.app_path / name
+        manifest_path.write_text(content, encoding="utf-8")
+        return str(manifest_path)
+
+    @patch("dj_cli_tools.management.commands.create.apps.get_app_config")
+    def test_manifest_writes_each_file_once(self, mock_get_app_config):
+        mock_get_app_config.return_value = self.app_config_mock
+        manifest = self._write_manifest(
+            "models.toml",
+            '[apps]\nshop = ["Product", "OrderLine"]\n',
+        )
+
+        with patch.object(FileBuffer, "_atomic_write",
+                          side_effect=FileBuffer._atomic_write) as mock_atomic_write:
+            call_command("create", manifest=manifest, stdout=StringIO())
+
+        written = [call[0][0].name for call in mock_atomic_write.call_args_list]
+        self.assertEqual(sorted(written), sorted(set(written)))
+
+        models = (self.app_path / "models.py").read_text()
+        self.assertIn("class Product(models.Model):", models)
+        self.assertIn("class OrderLine(models.Model):", models)
+
+        views = (self.app_path / "views.py").read_text()
+        self.assertIn("from .models import Product, OrderLine", views)
+
+        urls = (self.app_path / "urls.py").read_text()
+        self.assertIn("router.register(r'products', ProductViewSet)", urls)
+        self.assertIn("router.register(r'order_lines', OrderLineViewSet)", urls)
+
+    @patch("dj_cli_tools.management.commands.create.apps.get_app_config")
+    def test_manifest_blocks_are_laid_out_like_single_models(self, mock_get_app_config):
+        mock_get_app_config.return_value = self.app_config_mock
+        manifest = self._write_manifest("models.toml", '[apps]\nshop = ["Product", "OrderLine"]\n')
+        call_command("create", manifest=manifest, no_cache=True, stdout=StringIO())
+        batch = {name: (self.app_path / f"{name}.py").read_text()
+                 for name in ("models", "factories", "admin", "tests")}
+        for name in batch:
+            (self.app_path / f"{name}.py").unlink()
+
+        for model_name in ("Product", "OrderLine"):
+            call_command("create", "shop", model_name, no_cache=True, stdout=StringIO())
+
+        for name, content in batch.items():
+            self.assertNotIn("\n\n\n\n", content, name)
+            self.assertEqual((self.app_path / f"{name}.py").read_text(), content, name)
+        self.assertIn("    pass\n\n\nclass OrderLine(models.Model):", batch["models"])
+
+    @patch("dj_cli_tools.management.commands.create.apps.get_app_config")
+    def test_manifest_json_models_list(self, mock_get_app_config):
+        mock_get_app_config.return_value = self.app_config_mock
+        manifest = self._write_manifest(
+            "models.json",
+            json.dumps({"models": [{"app": "shop", "model": "Product"}]}),
+        )
+
+        call_command("create", manifest=manifest, stdout=StringIO())
+
+        mock_get_app_config.assert_called_once_with("shop")
+        self.assertIn("class ProductFactory(", (self.app_path / "factories.py").read_text())
+
+    def test_manifest_apps_must_be_a_table(self):
+        manifest = self._write_manifest("models.toml", 'apps = ["shop"]\n')
+        with self.assertRaisesMessage(CommandError, "Invalid manifest apps ['shop']"):
+            call_command("create", manifest=manifest, stdout=StringIO())
+
+        manifest = self._write_manifest("models.json", json.dumps({"apps": {"shop": 1}}))
+        with self.assertRaisesMessage(CommandError, "Invalid manifest models 1 of app 'shop'"):
+            call_command("create", manifest=manifest, stdout=StringIO())
+
+    def test_manifest_conflicts_with_positional_args(self):
+        with self.assertRaises(CommandError):
+            call_command("create", "shop", "Product", manifest="models.toml")
+
+    def test_missing_model_without_manifest(self):
+        with self.assertRaises(CommandError):
+            call_command("create", "shop")
+
+    @patch("dj_cli_tools.management.commands.create.apps.get_app_config")
+    @patch("dj_cli_tools.management.commands.create.Command._register_urls")
+    def test_failed_run_writes_nothing(self, mock_register_urls, mock_get_app_config):
+        mock_get_app_config.return_value = self.app_config_mock
+        mock_register_urls.side_effect = CommandError("boom")
+
+        with self.assertRaises(CommandError):
+            call_command("create", "shop", "Product", stdout=StringIO())
+
+        self.assertEqual(list(self.app_path.iterdir()), [])
+
+    @patch("dj_cli_tools.management.commands.create.apps.get_app_config")
+    def test_existing_symbols_are_skipped(self, mock_get_app_config):
+        mock_get_app_config.return_value = self.app_config_mock
+        (self.app_path / "views.py").write_text(
+            "from .views_base import BaseProductViewSet  # not ProductViewSet\n",
+            encoding="utf-8",
+        )
+
+        call_command("create", "shop", "Product", stdout=StringIO())
+        call_command("create", "shop", "Product", stdout=StringIO())
+
+        self.assertEqual((self.app_path / "models.py").read_text().count("class Product("), 1)
+        views = (self.app_path / "views.py").read_text()
+        self.assertEqual(views.count("class ProductViewSet("), 1)
+        urls = (self.app_path / "urls.py").read_text()
+        self.assertEqual(urls.count("router.register(r'products', ProductViewSet)"), 1)
+        self.assertEqual(urls.count("import ProductViewSet"), 1)
+
+
+class CreatePaginationTests(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.app_path = Path(self.tmp_dir.name)
+
+        self.app_config_mock = MagicMock()
+        self.app_config_mock.path = str(self.app_path)
+        self.app_config_mock.name = "shop"
+        self.app_config_mock.label = "shop"
+
+    @patch("dj_cli_tools.management.commands.create.apps.get_app_config")
+    def test_cursor_pagination(self, mock_get_app_config):
+        mock_get_app_config.return_value = self.app_config_mock
+
+        call_command("create", "shop", "Product", pagination="cursor", stdout=StringIO())
+        call_command("create", "shop", "OrderLine", pagination="cursor", stdout=StringIO())
+
+        models = (self.app_path / "models.py").read_text()
+        self.assertIn("created_at = models.DateTimeField(auto_now_add=True)", models)
+        self.assertIn("ordering = ['-created_at', '-id']", models)
+        index_names = re.findall(r"models.Index\(fields=\['-created_at', '-id'\], name='(\w+)'\)", models)
+        self.assertEqual(len(set(index_names)), 2)
+        self.assertTrue(all(len(name) <= 30 for name in index_names))
+
+        pagination = (self.app_path / "pagination.py").read_text()
+        self.assertEqual(pagination.count("class DefaultCursorPagination(CursorPagination):"), 1)
+        self.assertIn("from rest_framework.pagination import CursorPagination", pagination)
+
+        views = (self.app_path / "views.py").read_text()
+        self.assertEqual(views.count("    pagination_class = DefaultCursorPagination\n"), 2)
+        self.assertIn("from .pagination import DefaultCursorPagination", views)
+        for name in ("models", "pagination", "views"):
+            ast.parse((self.app_path / f"{name}.py").read_text())
+
+
+class CreateFieldSpecTests(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.app_path = Path(self.tmp_dir.name)
+
+        self.app_config_mock = MagicMock()
+        self.app_config_mock.path = str(self.app_path)
+        self.app_config_mock.name = "shop"
+        self.app_config_mock.label = "shop"
+
+    @patch.object(CreateModelCommand, "_reload_models")
+    @patch("django.core.management.call_command")
+    @patch("dj_cli_tools.management.commands.create.apps.get_app_config")
+    def test_model_from_field_specs(self, mock_get_app_config, mock_call_command, mock_reload):
+        mock_get_app_config.return_value = self.app_config_mock
+
+        call_command(
+            "create", "shop", "Product", "name:char:120:index", "sku:char:unique",
+            "price:decimal", "created:datetime:auto", composite_indexes=["name,price"],
+            unique_together=["name,sku"], ordering_fields="price", makemigrations=True,
+            stdout=StringIO())
+
+        models = (self.app_path / "models.py").read_text()
+        ast.parse(models)
+        self.assertIn(
+            "class Product(models.Model):\n"
+            "    name = models.CharField(max_length=120, db_index=True)\n"
+            "    sku = models.CharField(max_length=255, unique=True)\n"
+            # An ordering field gets an index.
+            "    price = models.DecimalField(max_digits=10, decimal_places=2, db_index=True)\n"
+            "    created = models.DateTimeField(auto_now_add=True)\n"
+            "\n"
+            "    class Meta:\n"
+            "        indexes = [\n", models)
+        self.assertRegex(models, r"models.Index\(fields=\['name', 'price'\], name='shop_product_\w{6}_idx'\)")
+        self.assertRegex(
+            models, r"models.UniqueConstraint\(fields=\['name', 'sku'\], name='shop_product_\w{6}_uniq'\)")
+        mock_reload.assert_called_once_with(["shop"])
+        self.assertEqual(mock_call_command.call_args.args, ("makemigrations", "shop"))
+
+    @patch("dj_cli_tools.management.commands.create.apps.get_app_config")
+    def test_factories_and_query_budget_tests(self, mock_get_app_config):
+        mock_get_app_config.return_value = self.app_config_mock
+
+        call_command("create", "shop", "Category", "name:char:80:unique", stdout=StringIO())
+        call_command(
+            "create", "shop", "Product", "name", "price:decimal:8:2", "category:fk:Category",
+            "owner:fk:auth.User:null", "created:datetime:auto", stdout=StringIO())
+
+        factories = (self.app_path / "factories.py").read_text()
+        ast.parse(factories)
+        self.assertIn(
+            "    class Meta:\n"
+            "        model = Product\n"
+            "\n"
+            "    name = factory.Sequence(lambda n: f'name-{n}')\n"
+            "    price = factory.Faker('pydecimal', left_digits=6, right_digits=2, positive=True)\n"
+            "    category = factory.SubFactory('shop.factories.CategoryFactory')\n", factories)
+        self.assertNotIn("owner =", factories)
+        tests = (self.app_path / "tests.py").read_text()
+        ast.parse(tests)
+        self.assertEqual(tests.count("class QueryBudgetMixin:"), 1)
+        self.assertIn("class CategoryQueryBudgetTests(QueryBudgetMixin, TestCase):", tests)
+        self.assertIn("@override_settings(ROOT_URLCONF='shop.urls')\n"
+                      "class ProductQueryBudgetTests(QueryBudgetMixin, TestCase):", tests)
+        self.assertIn("from .serializers import CategorySerializer, ProductSerializer", tests)
+
+        call_command("create", "shop", "Tag", no_tests=True, stdout=StringIO())
+        self.assertNotIn("TagQueryBudgetTests", (self.app_path / "tests.py").read_text())
+
+    def test_generated_query_budget_tests_pass(self):
+        # A project of its own, as the generated tests need the app installed and migrated.
+        root = self.app_path
+        (root / "settings.py").write_text(
+            "SECRET_KEY = 'generated-tests'\n"
+            "USE_TZ = True\n"
+            "INSTALLED_APPS = [\n"
+            "    'django.contrib.contenttypes',\n"
+            "    'django.contrib.auth',\n"
+            "    'rest_framework',\n"
+            "    'dj_cli_tools',\n"
+            "]\n"
+            "DATABASES = {'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': 'db.sqlite3'}}\n")
+        env = {
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": "settings",
+            "PYTHONPATH": os.pathsep.join([str(root), str(Path(__file__).resolve().parents[2])]),
+            "QUERY_BUDGET_REPORT": str(root / "query_budgets.json"),
+        }
+
+        def django(*args):
+            return subprocess.run(
+                [sys.executable, "-m", "django", *args], cwd=root, env=env,
+                capture_output=True, text=True, timeout=120)
+
+        for args in [
+            ("start_app", "lib"),
+            ("create", "lib", "Genre", "name:char:50"),
+            ("create", "lib", "Book", "title:char:100", "genres:m2m:Genre"),
+            ("makemigrations", "lib"),
+            ("test", "lib"),
+        ]:
+            result = django(*args)
+            self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        self.assertIn("Ran 6 tests", result.stderr)
+        self.assertIn("queryset = Book.objects.prefetch_related('genres')",
+                      (root / "lib" / "views.py").read_text())
+        report = json.loads((root / "query_budgets.json").read_text())
+        self.assertEqual(report["lib.tests.BookQueryBudgetTests"]["list"]["queries"], 2)
+
+    @patch("dj_cli_tools.management.commands.create.apps.get_app_config")
+    def test_invalid_field_specs(self, mock_get_app_config):
+        mock_get_app_config.return_value = self.app_config_mock
+
+        with self.assertRaisesMessage(CommandError, "Invalid field spec: unknown field type 'money'"):
+            call_command("create", "shop", "Product", "price:money", stdout=StringIO())
+        with self.assertRaisesMessage(CommandError, "Cannot index 'sku' of 'Product'"):
+            call_command("create", "shop", "Product", "name", composite_indexes=["name,sku"], stdout=StringIO())
+        with self.assertRaisesMessage(CommandError, "--index takes two or more"):
+            call_command("create", "shop", "Product", "name", composite_indexes=["name"], stdout=StringIO())
+        self.assertFalse((self.app_path / "models.py").exists())
+
+
+class CreateFromDbTests(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.app_path = Path(self.tmp_dir.name)
+        self.database = self.app_path / "legacy.sqlite3"
+        with closing(sqlite3.connect(self.database)) as db:
+            db.executescript("""
+                CREATE TABLE legacy_customer (id INTEGER PRIMARY KEY, name varchar(80) NOT NULL UNIQUE);
+                CREATE TABLE legacy_order (id INTEGER PRIMARY KEY, placed date NOT NULL,
+                    customer_id integer NOT NULL REFERENCES legacy_customer (id));
+                CREATE TABLE legacy_log (message text);
+                CREATE TABLE other (id INTEGER PRIMARY KEY);
+            """)
+
+        self.app_config_mock = MagicMock()
+        self.app_config_mock.path = str(self.app_path)
+        self.app_config_mock.name = "legacy"
+        self.app_config_mock.label = "legacy"
+
+    @patch("dj_cli_tools.management.commands.create.apps.get_app_config")
+    def test_models_and_stack_from_tables(self, mock_get_app_config):
+        mock_get_app_config.return_value = self.app_config_mock
+        out = StringIO()
+
+        call_command("create", "legacy", from_db=str(self.database), tables=["legacy_*"],
+                     jobs=1, no_cache=True, stdout=out)
+
+        self.assertIn("Skipping table 'legacy_log': it has no primary key.", out.getvalue())
+        models = (self.app_path / "models.py").read_text()
+        ast.parse(models)
+        self.assertIn(
+            "class Order(models.Model):\n"
+            "    id = models.AutoField(primary_key=True)\n"
+            "    placed = models.DateField()\n"
+            "    customer = models.ForeignKey('Customer', on_delete=models.DO_NOTHING)\n"
+            "\n"
+            "    class Meta:\n"
+            "        db_table = 'legacy_order'\n", models)
+        self.assertNotIn("class Other(", models)
+        self.assertNotIn("class Log(", models)
+        self.assertIn("    customer = factory.SubFactory('legacy.factories.CustomerFactory')\n",
+                      (self.app_path / "factories.py").read_text())
+        urls = (self.app_path / "urls.py").read_text()
+        self.assertIn("router.register(r'customers', CustomerViewSet)", urls)
+        self.assertIn("router.register(r'orders', OrderViewSet)", urls)
+        self.assertIn("class OrderQueryBudgetTests", (self.app_path / "tests.py").read_text())
+
+    @patch("dj_cli_tools.utils.schema_import.PARALLEL_MIN_TABLES", 1)
+    @patch("dj_cli_tools.management.commands.create.apps.get_app_config")
+    def test_worker_pool_renders_the_same_models(self, mock_get_app_config):
+        mock_get_app_config.return_value = self.app_config_mock
+        call_command("create", "legacy", from_db=str(self.database), jobs=1, no_cache=True, stdout=StringIO())
+        serial = (self.app_path / "models.py").read_text()
+        (self.app_path / "models.py").unlink()
+
+        call_command("create", "legacy", from_db=str(self.database), jobs=2, no_cache=True,
+                     no_tests=True, stdout=StringIO())
+
+        self.assertEqual((self.app_path / "models.py").read_text(), serial)
+
+    @patch("dj_cli_tools.management.commands.create.apps.get_app_config")
+    def test_invalid_from_db(self, mock_get_app_config):
+        mock_get_app_config.return_value = self.app_config_mock
+
+        with self.assertRaisesMessage(CommandError, "and no model_name"):
+            call_command("create", "legacy", "Order", from_db=str(self.database), stdout=StringIO())
+        with self.assertRaisesMessage(CommandError, "cannot be combined with --optimize-queries"):
+            call_command("create", "legacy", from_db=str(self.database), fast_serializer=True,
+                         stdout=StringIO())
+        with self.assertRaisesMessage(CommandError, "neither a database alias nor an SQLite file"):
+            call_command("create", "legacy", from_db="missing.sqlite3", stdout=StringIO())
+        with self.assertRaisesMessage(CommandError, "No tables without a model match crm_*"):
+            call_command("create", "legacy", from_db=str(self.database), tables=["crm_*"],
+                         stdout=StringIO())
+        self.assertFalse((self.app_path / "models.py").exists())
+
+
+class UrlLayoutCommandTests(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.app_path = Path(self.tmp_dir.name)
+
+        self.app_config_mock = MagicMock()
+        self.app_config_mock.path = str(self.app_path)
+        self.app_config_mock.name = "shop"
+        self.app_config_mock.label = "shop"
+
+    @patch("dj_cli_tools.management.commands.create.apps.get_app_config")
+    def test_create_sharded_urls(self, mock_get_app_config):
+        mock_get_app_config.return_value = self.app_config_mock
+
+        call_command("create", "shop", "Order", url_layout="sharded", stdout=StringIO())
+        call_command("create", "shop", "Offer", stdout=StringIO())
+        stdout = StringIO()
+        call_command("create", "shop", "Product", stdout=stdout)
+
+        self.assertIn("Registered 'ProductViewSet' in routes/products.py for app 'shop'.", stdout.getvalue())
+        self.assertEqual((self.app_path / "urls.py").read_text(), (
+            "from django.urls import include, re_path\n"
+            "\n"
+            "from .routes import api_root_view\n"
+            "\n"
+            "urlpatterns = [\n"
+            f"    {API_ROOT_ENTRY},\n"
+            "    re_path(r'^(?=orders(?:[/.]|$))', include('shop.routes.orders')),\n"
+            "    re_path(r'^(?=offers(?:[/.]|$))', include('shop.routes.offers')),\n"
+            "    re_path(r'^(?=products(?:[/.]|$))', include('shop.routes.products')),\n"
+            "]\n"
+        ))
+        shard = (self.app_path / "routes" / "orders.py").read_text()
+        self.assertIn("from ..views import OrderViewSet\n", shard)
+        self.assertIn("router.register(r'orders', OrderViewSet)\n", shard)
+        self.assertNotIn("OfferViewSet", shard)
+        self.assertIn("def api_root_view():", (self.app_path / "routes" / "__init__.py").read_text())
+
+        with self.assertRaisesMessage(CommandError, "includes URL shards"):
+            call_command("create", "shop", "Item", url_layout="flat", stdout=StringIO())
+
+    @patch("dj_cli_tools.management.commands.reshard_urls.apps.get_app_config")
+    @patch("dj_cli_tools.management.commands.create.apps.get_app_config")
+    def test_reshard_urls(self, mock_create_app_config, mock_reshard_app_config):
+        mock_create_app_config.return_value = self.app_config_mock
+        mock_reshard_app_config.return_value = self.app_config_mock
+        call_command("create", "shop", "Order", stdout=StringIO())
+        call_command("create", "shop", "Product", stdout=StringIO())
+
+        with self.assertRaisesMessage(CommandError, "run 'manage.py reshard_urls shop' first"):
+            call_command("create", "shop", "Item", url_layout="sharded", stdout=StringIO())
+
+        stdout = StringIO()
+        call_command("reshard_urls", "shop", no_benchmark=True, stdout=stdout)
+
+        self.assertIn("Moved 2 registrations of app 'shop' to routes/{orders.py,products.py}.", stdout.getvalue())
+        urls = (self.app_path / "urls.py").read_text()
+        self.assertNotIn("router", urls)
+        # The API root of the DefaultRouter is kept, over all the shards.
+        self.assertIn(f"    {API_ROOT_ENTRY},\n", urls)
+        self.assertIn("from .routes import api_root_view\n", urls)
+        self.assertIn("re_path(r'^(?=products(?:[/.]|$))', include('shop.routes.products')),", urls)
+        self.assertIn("router.register(r'products', ProductViewSet)",
+                      (self.app_path / "routes" / "products.py").read_text())
+        self.assertFalse((self.app_path / "bench_urls.py").exists())
+
+        stdout = StringIO()
+        call_command("reshard_urls", "shop", stdout=stdout)
+        self.assertIn("nothing to reshard", stdout.getvalue())
+
+
+class AuditPerfTests(TestCase):
+    finding = Finding("warning", "unpaginated-list", "auth", "views.py", 7, "GroupViewSet",
+                      "The list endpoint returns every 'Group' row.")
+
+    @patch("dj_cli_tools.management.commands.audit_perf.audit_app")
+    def test_json_report_and_ci_gating(self, mock_audit_app):
+        mock_audit_app.return_value = [self.finding]
+        stdout, stderr = StringIO(), StringIO()
+
+        call_command("audit_perf", "auth", "admin", format="json", jobs=1, stdout=stdout, stderr=stderr)
+
+        report = json.loads(stdout.getvalue())
+        self.assertEqual(report["apps"], ["auth", "admin"])
+        self.assertEqual(report["summary"], {"info": 0, "warning": 2, "error": 0})
+        self.assertEqual(report["findings"][0], self.finding._asdict())
+        self.assertIn("Audited 2 apps", stderr.getvalue())
+
+        with self.assertRaisesMessage(CommandError, "2 findings at or above 'warning'."):
+            call_command("audit_perf", "auth", "admin", fail_on="warning", jobs=1,
+                         stdout=StringIO(), stderr=StringIO())
+        stdout = StringIO()
+        call_command("audit_perf", "auth", ignore=["unpaginated-list"], fail_on="info",
+                     stdout=stdout, stderr=StringIO())
+        self.assertEqual(stdout.getvalue(), "")
+
+    def test_unknown_app(self):
+        with self.assertRaisesMessage(CommandError, "App 'nope' does not exist."):
+            call_command("audit_perf", "nope", stdout=StringIO(), stderr=StringIO())
+
+
+class CreateAsyncTests(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.app_path = Path(self.tmp_dir.name)
+
+        self.app_config_mock = MagicMock()
+        self.app_config_mock.path = str(self.app_path)
+        self.app_config_mock.name = "shop"
+        self.app_config_mock.label = "shop"
+
+    @patch("dj_cli_tools.management.commands.create.apps.get_app_config")
+    def test_async_viewsets_and_tests(self, mock_get_app_config):
+        mock_get_app_config.return_value = self.app_config_mock
+
+        call_command("create", "shop", "Product", async_views=True, stdout=StringIO())
+        call_command("create", "shop", "Order", async_views=True, stdout=StringIO())
+
+        views = (self.app_path / "views.py").read_text()
+        ast.parse(views)
+        self.assertEqual(views.count(f"class {CodeTemplates.ASYNC_VIEWSET_NAME}("), 1)
+        self.assertIn("class ProductViewSet(AsyncModelViewSet):", views)
+        self.assertIn("class OrderViewSet(AsyncModelViewSet):", views)
+        self.assertIn("from adrf.viewsets import ViewSet as AsyncViewSet", views)
+
+        tests = (self.app_path / "tests.py").read_text()
+        ast.parse(tests)
+        self.assertIn("@override_settings(ROOT_URLCONF='shop.urls')\nclass ProductAsyncAPITests(TestCase):", tests)
+        self.assertIn("reverse('order-list')", tests)
+        self.assertIn("router.register(r'products', ProductViewSet)",
+                      (self.app_path / "urls.py").read_text())
+
+    @patch("dj_cli_tools.management.commands.create.apps.get_app_config")
+    def test_async_rejects_sync_only_options(self, mock_get_app_config):
+        mock_get_app_config.return_value = self.app_config_mock
+
+        with self.assertRaisesMessage(CommandError, "--async"):
+            call_command("create", "shop", "Product", async_views=True, pagination="cursor",
+                         stdout=StringIO())
+        self.assertFalse((self.app_path / "views.py").exists())
+
+
+class CreateCacheTests(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.app_path = Path(self.tmp_dir.name)
+
+        self.app_config_mock = MagicMock()
+        self.app_config_mock.path = str(self.app_path)
+        self.app_config_mock.name = "shop"
+        self.app_config_mock.label = "shop"
+
+    @patch("dj_cli_tools.management.commands.create.apps.get_app_config")
+    def test_cached_viewsets_signals_and_tests(self, mock_get_app_config):
+        mock_get_app_config.return_value = self.app_config_mock
+        (self.app_path / "apps.py").write_text(
+            "from django.apps import AppConfig\n\n\n"
+            "class ShopConfig(AppConfig):\n"
+            "    name = 'shop'\n")
+
+        call_command("create", "shop", "Product", "name:char", http_cache=True, cache_timeout=60,
+                     stdout=StringIO())
+        call_command("create", "shop", "Order", http_cache=True, stdout=StringIO())
+
+        for name in ("models", "caching", "views", "signals", "tests", "apps"):
+            ast.parse((self.app_path / f"{name}.py").read_text())
+        self.assertIn("    updated_at = models.DateTimeField(auto_now=True)\n",
+                      (self.app_path / "models.py").read_text())
+        caching = (self.app_path / "caching.py").read_text()
+        self.assertEqual(caching.count("class ConditionalCacheMixin:"), 1)
+        views = (self.app_path / "views.py").read_text()
+        self.assertIn(
+            "class ProductViewSet(ConditionalCacheMixin, viewsets.ModelViewSet):\n"
+            "    queryset = Product.objects.all()\n"
+            "    serializer_class = ProductSerializer\n"
+            "    cache_timeout = 60\n", views)
+        self.assertIn("    cache_timeout = 300\n", views)
+        signals = (self.app_path / "signals.py").read_text()
+        self.assertIn("@receiver([post_save, post_delete], sender=Order, "
+                      "dispatch_uid='shop.Order.responses')\n"
+                      "def invalidate_order_responses(sender, instance, **kwargs):", signals)
+        tests = (self.app_path / "tests.py").read_text()
+        self.assertIn("class ProductCacheTests(TestCase):", tests)
+        # Query budgets are measured on uncached responses.
+        self.assertIn("'django.core.cache.backends.dummy.DummyCache'},\n})\n"
+                      "class ProductQueryBudgetTests", tests)
+        apps_py = (self.app_path / "apps.py").read_text()
+        self.assertEqual(apps_py.count("from . import signals"), 1)
+        self.assertTrue(apps_py.endswith("    def ready(self):\n        from . import signals  # noqa: F401\n"))
+
+    @patch("dj_cli_tools.management.commands.create.apps.get_app_config")
+    def test_existing_ready_is_left_alone(self, mock_get_app_config):
+        mock_get_app_config.return_value = self.app_config_mock
+        apps_py = (
+            "from django.apps import AppConfig\n\n\n"
+            "class ShopConfig(AppConfig):\n"
+            "    name = 'shop'\n\n"
+            "    def ready(self):\n"
+            "        pass\n")
+        (self.app_path / "apps.py").write_text(apps_py)
+        stdout = StringIO()
+
+        call_command("create", "shop", "Product", http_cache=True, stdout=stdout)
+
+        self.assertEqual((self.app_path / "apps.py").read_text(), apps_py)
+        self.assertIn("Import 'shop.signals' in the ready()", stdout.getvalue())
+        with self.assertRaisesMessage(CommandError, "--cache"):
+            call_command("create", "shop", "Order", http_cache=True, async_views=True, stdout=StringIO())
+
+
+class CreateFilteringTests(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.app_path = Path(self.tmp_dir.name)
+
+        self.app_config_mock = MagicMock()
+        self.app_config_mock.path = str(self.app_path)
+        self.app_config_mock.name = "auth"
+        self.app_config_mock.label = "auth"
+
+    @patch("dj_cli_tools.management.commands.create.apps.get_app_config")
+    def test_new_model_declares_indexed_fields(self, mock_get_app_config):
+        mock_get_app_config.return_value = self.app_config_mock
+
+        call_command(
+            "create", "auth", "Product", filter_fields="status,category", search_fields="name",
+            ordering_fields="created_at,name", pagination="cursor", stdout=StringIO())
+
+        models = (self.app_path / "models.py").read_text()
+        for name in ("status", "category", "name"):
+            self.assertIn(f"    {name} = models.CharField(max_length=255, db_index=True)\n", models)
+        self.assertEqual(models.count("created_at = "), 1)
+        views = (self.app_path / "views.py").read_text()
+        self.assertIn(
+            "    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]\n"
+            "    filterset_fields = ['status', 'category']\n"
+            "    search_fields = ['name__startswith']\n"
+            "    ordering_fields = ['created_at', 'name']\n"
+            "    pagination_class = DefaultCursorPagination\n", views)
+        self.assertIn("from rest_framework import viewsets, filters\n", views)
+        self.assertIn("from django_filters.rest_framework import DjangoFilterBackend\n", views)
+        for name in ("models", "views"):
+            ast.parse((self.app_path / f"{name}.py").read_text())
+
+    @patch("dj_cli_tools.management.commands.create.apps.get_app_config")
+    def test_existing_model_needs_indexes(self, mock_get_app_config):
+        mock_get_app_config.return_value = self.app_config_mock
+        (self.app_path / "models.py").write_text(
+            "from django.db import models\n\n\nclass Permission(models.Model):\n    pass\n")
+
+        # codename only comes second in unique_together, name has no index.
+        with self.assertRaisesMessage(
+                CommandError, "'codename' has no index; 'name' has no index"):
+            call_command("create", "auth", "Permission", search_fields="codename,name", stdout=StringIO())
+        self.assertFalse((self.app_path / "views.py").exists())
+
+        call_command(
+            "create", "auth", "Permission", filter_fields="content_type", ordering_fields="id",
+            stdout=StringIO())
+        views = (self.app_path / "views.py").read_text()
+        self.assertIn("    filterset_fields = ['content_type']\n", views)
+        self.assertIn("    ordering_fields = ['id']\n", views)
+
+
+class CreateInstrumentationTests(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.app_path = Path(self.tmp_dir.name)
+
+        self.app_config_mock = MagicMock()
+        self.app_config_mock.path = str(self.app_path)
+        self.app_config_mock.name = "shop"
+
+    @patch("dj_cli_tools.management.commands.create.apps.get_app_config")
+    def test_timings_json_report(self, mock_get_app_config):
+        mock_get_app_config.return_value = self.app_config_mock
+        report_path = self.app_path / "timings.json"
+
+        call_command("create", "shop", "Product", timings="json", timings_output=str(report_path),
+                     no_cache=True, stdout=StringIO())
+
+        report = json.loads(report_path.read_text())
+        phases = {child["name"]: child for child in report["children"]}
+        self.assertEqual(
+            [step["name"] for step in phases["app shop"]["children"]],
+            ["model", "serializer", "viewset", "factory", "admin", "urls", "tests"])
+        self.assertEqual(phases["write"]["files"], 7)
+        self.assertEqual(
+            phases["write"]["bytes_written"],
+            sum(p.stat().st_size for p in self.app_path.glob("*.py")))
+        self.assertEqual(report["bytes_written"], phases["write"]["bytes_written"])
+
+    @patch("dj_cli_tools.management.commands.create.apps.get_app_config")
+    def test_profile_is_written(self, mock_get_app_config):
+        import pstats
+
+        mock_get_app_config.return_value = self.app_config_mock
+        profile_path = self.app_path / "out.prof"
+        stderr = StringIO()
+
+        call_command("create", "shop", "Product", profile=str(profile_path), no_cache=True,
+                     stdout=StringIO(), stderr=stderr)
+
+        self.assertIn(f"Profile written to {profile_path}", stderr.getvalue())
+        stats = pstats.Stats(str(profile_path))
+        self.assertTrue(any(func[2] == "_scaffold" for func in stats.stats))
+
+
+class OptimizeQueriesTests(TestCase):
+    VIEWS = (
+        "from rest_framework import viewsets\n"
+        "from .models import Permission\n"
+        "from .serializers import PermissionSerializer\n"
+        "\n"
+        "\n"
+        "class PermissionViewSet(viewsets.ModelViewSet):\n"
+        "    queryset = Permission.objects.all()\n"
+        "    serializer_class = PermissionSerializer\n"
+    )
+    SERIALIZERS = (
+        "from rest_framework import serializers\n"
+        "from .models import Permission\n"
+        "\n"
+        "\n"
+        "class PermissionSerializer(serializers.ModelSerializer):\n"
+        "    class Meta:\n"
+        "        model = Permission\n"
+        "        fields = '__all__'\n"
+    )
+
+    def setUp(self):
+        from django.contrib.auth.models import Permission
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.app_path = Path(self.tmp_dir.name)
+
+        self.app_config_mock = MagicMock()
+        self.app_config_mock.path = str(self.app_path)
+        self.app_config_mock.name = "auth"
+        self.app_config_mock.label = "auth"
+        self.app_config_mock.get_model.return_value = Permission
+
+    @patch("dj_cli_tools.management.commands.create.apps.get_app_config")
+    def test_create_generates_optimized_viewset_and_serializer(self, mock_get_app_config):
+        mock_get_app_config.return_value = self.app_config_mock
+
+        call_command("create", "auth", "Permission", optimize_queries=True, stdout=StringIO())
+        call_command("create", "auth", "Group", optimize_queries=True, stdout=StringIO())
+
+        views = (self.app_path / "views.py").read_text()
+        # The serializer renders content_type as its primary key, read from content_type_id.
+        self.assertIn("queryset = Permission.objects.all()\n", views)
+        self.assertIn("queryset = Group.objects.prefetch_related('permissions')\n", views)
+        serializers = (self.app_path / "serializers.py").read_text()
+        self.assertIn("fields = ['id', 'name', 'content_type', 'codename']\n", serializers)
+
+    @patch("dj_cli_tools.management.commands.create.apps.get_app_config")
+    def test_create_falls_back_for_models_that_are_not_loaded(self, mock_get_app_config):
+        self.app_config_mock.get_model.side_effect = LookupError
+        mock_get_app_config.return_value = self.app_config_mock
+        stdout = StringIO()
+
+        call_command("create", "auth", "Product", optimize_queries=True, stdout=stdout)
+
+        self.assertEqual(stdout.getvalue().count("Model 'Product' is not loaded yet"), 1)
+        self.assertIn("queryset = Product.objects.all()", (self.app_path / "views.py").read_text())
+        self.assertIn("fields = '__all__'", (self.app_path / "serializers.py").read_text())
+
+    @patch("dj_cli_tools.management.commands.create.apps.get_app_config")
+    def test_create_large_table_admin(self, mock_get_app_config):
+        mock_get_app_config.return_value = self.app_config_mock
+
+        call_command("create", "auth", "Permission", stdout=StringIO())
+        call_command("create", "auth", "Group", stdout=StringIO())
+
+        source = (self.app_path / "admin.py").read_text()
+        ast.parse(source)
+        self.assertEqual(source.count("class EstimatedCountPaginator(Paginator):"), 1)
+        self.assertIn(
+            "class PermissionAdmin(admin.ModelAdmin):\n"
+            "    list_select_related = ('content_type',)\n"
+            "    raw_id_fields = ('content_type',)\n"
+            "    show_full_result_count = False\n"
+            "    paginator = EstimatedCountPaginator\n", source)
+        self.assertIn("class GroupAdmin(admin.ModelAdmin):\n", source)
+
+    @patch("dj_cli_tools.management.commands.create.apps.get_app_config")
+    def test_create_fast_serializer(self, mock_get_app_config):
+        mock_get_app_config.return_value = self.app_config_mock
+
+        call_command("create", "auth", "Permission", fast_serializer=True, stdout=StringIO())
+        call_command("create", "auth", "Group", fast_serializer=True, stdout=StringIO())
+
+        serializers = (self.app_path / "serializers.py").read_text()
+        self.assertIn("class PermissionFastSerializer(serializers.BaseSerializer):", serializers)
+        self.assertIn("columns = ('id', 'name', 'content_type_id', 'codename')", serializers)
+        self.assertIn("# Left out of the list: permissions (ManyToManyField).", serializers)
+        views = (self.app_path / "views.py").read_text()
+        self.assertIn("return queryset.values(*PermissionFastSerializer.columns)", views)
+        self.assertIn("            return PermissionFastSerializer\n", views)
+        bench = (self.app_path / "bench_serializers.py").read_text()
+        self.assertEqual(bench.count("class SerializerBenchmarkMixin:"), 1)
+        self.assertIn("class GroupSerializerBenchmark(SerializerBenchmarkMixin, TestCase):", bench)
+        for name in ("serializers", "views", "bench_serializers"):
+            ast.parse((self.app_path / f"{name}.py").read_text())
+
+    @patch("dj_cli_tools.management.commands.create.apps.get_app_config")
+    def test_new_models_are_planned_from_their_field_specs(self, mock_get_app_config):
+        mock_get_app_config.return_value = self.app_config_mock
+        stdout = StringIO()
+
+        call_command("create", "auth", "Review", "title:char:200:index", "score:int",
+                     "product:fk:Product", "tags:m2m:Tag", fast_serializer=True,
+                     optimize_queries=True, pagination="cursor", stdout=stdout)
+
+        self.assertNotIn("is not loaded yet", stdout.getvalue())
+        serializers = (self.app_path / "serializers.py").read_text()
+        self.assertIn(
+            "columns = ('id', 'created_at', 'title', 'score', 'product_id')\n", serializers)
+        self.assertIn("# Left out of the list: tags (ManyToManyField).", serializers)
+        self.assertIn("fields = ['id', 'created_at', 'title', 'score', 'product', 'tags']\n",
+                      serializers)
+        self.assertIn("queryset = Review.objects.prefetch_related('tags')\n",
+                      (self.app_path / "views.py").read_text())
+        self.assertIn(
+            "class ReviewAdmin(admin.ModelAdmin):\n"
+            "    list_select_related = ('product',)\n"
+            "    raw_id_fields = ('product', 'tags')\n"
+            "    search_fields = ('title__startswith',)\n",
+            (self.app_path / "admin.py").read_text())
+
+    @patch("dj_cli_tools.management.commands.optimize_viewset.apps.get_app_config")
+    def test_optimize_viewset_rewrites_existing_code(self, mock_get_app_config):
+        mock_get_app_config.return_value = self.app_config_mock
+        (self.app_path / "views.py").write_text(self.VIEWS)
+        (self.app_path / "serializers.py").write_text(self.SERIALIZERS)
+
+        call_command("optimize_viewset", "auth", "Permission", include_reverse=True, stdout=StringIO())
+
+        views = (self.app_path / "views.py").read_text()
+        self.assertIn("    queryset = Permission.objects.prefetch_related('group_set', 'user_set')\n", views)
+        serializers = (self.app_path / "serializers.py").read_text()
+        self.assertIn(
+            "class PermissionSerializer(serializers.ModelSerializer):\n"
+            "    group_set = serializers.PrimaryKeyRelatedField(many=True, read_only=True)\n"
+            "    user_set = serializers.PrimaryKeyRelatedField(many=True, read_only=True)\n"
+            "\n"
+            "    class Meta:\n", serializers)
+        self.assertIn(
+            "        fields = [\n"
+            "            'id',\n"
+            "            'name',\n"
+            "            'content_type',\n"
+            "            'codename',\n"
+            "            'group_set',\n"
+            "            'user_set',\n"
+            "        ]\n", serializers)
+
+        stdout = StringIO()
+        call_command("optimize_viewset", "auth", "Permission", include_reverse=True, stdout=stdout)
+        self.assertIn("Nothing to change", stdout.getvalue())
+        self.assertEqual((self.app_path / "views.py").read_text(), views)
+
+    @patch("dj_cli_tools.management.commands.optimize_viewset.apps.get_app_config")
+    def test_optimize_viewset_joins_the_relations_the_serializer_reads(self, mock_get_app_config):
+        mock_get_app_config.return_value = self.app_config_mock
+        (self.app_path / "views.py").write_text(
+            self.VIEWS + "\n\nclass NestedPermissionViewSet(viewsets.ModelViewSet):\n"
+                         "    queryset = Permission.objects.select_related('content_type')\n"
+                         "    serializer_class = NestedPermissionSerializer\n")
+        (self.app_path / "serializers.py").write_text(
+            self.SERIALIZERS.replace("'__all__'", "['id', 'content_type']")
+            + "\n\nclass ContentTypeSerializer(serializers.ModelSerializer):\n"
+              "    class Meta:\n"
+              "        model = ContentType\n"
+              "        fields = ['app_label', 'model']\n"
+              "\n\nclass NestedPermissionSerializer(serializers.ModelSerializer):\n"
+              "    content_type = ContentTypeSerializer(read_only=True)\n"
+              "\n"
+              "    class Meta:\n"
+              "        model = Permission\n"
+              "        fields = ['id', 'content_type']\n")
+        stdout = StringIO()
+
+        call_command("optimize_viewset", "auth", "Permission", stdout=stdout)
+
+        views = (self.app_path / "views.py").read_text()
+        self.assertIn("Nothing to change", stdout.getvalue())
+        self.assertIn("    queryset = Permission.objects.all()\n", views)
+        self.assertIn("    queryset = Permission.objects.select_related('content_type')\n", views)
+
+    @patch("dj_cli_tools.management.commands.optimize_viewset.apps.get_app_config")
+    def test_optimize_viewset_keeps_filters_and_ordering(self, mock_get_app_config):
+        mock_get_app_config.return_value = self.app_config_mock
+        (self.app_path / "views.py").write_text(
+            self.VIEWS.replace(
+                "Permission.objects.all()",
+                "Permission.objects.filter(codename__startswith='view_').order_by('-id')")
+            + "\n\nclass SlicedPermissionViewSet(viewsets.ModelViewSet):\n"
+              "    queryset = Permission.objects.order_by('-id')[:10]\n"
+              "    serializer_class = PermissionSerializer\n")
+        (self.app_path / "serializers.py").write_text(self.SERIALIZERS)
+        stdout = StringIO()
+
+        call_command("optimize_viewset", "auth", "Permission", include_reverse=True, stdout=stdout)
+
+        views = (self.app_path / "views.py").read_text()
+        self.assertIn(
+            "    queryset = (\n"
+            "        Permission.objects\n"
+            "        .filter(codename__startswith='view_')\n"
+            "        .order_by('-id')\n"
+            "        .prefetch_related('group_set', 'user_set')\n"
+            "    )\n", views)
+        self.assertIn("    queryset = Permission.objects.order_by('-id')[:10]\n", views)
+        self.assertIn(
+            "Cannot add select_related/prefetch_related to the queryset of 'SlicedPermissionViewSet'",
+            stdout.getvalue())
+
+    @patch("dj_cli_tools.management.commands.optimize_viewset.apps.get_app_config")
+    def test_optimize_viewset_unknown_model(self, mock_get_app_config):
+        self.app_config_mock.get_model.side_effect = LookupError
+        mock_get_app_config.return_value = self.app_config_mock
+
+        with self.assertRaisesMessage(CommandError, "Model 'Missing' does not exist"):
+            call_command("optimize_viewset", "auth", "Missing")
+
+
+class SeedCommandTests(TestCase):
+    def setUp(self):
+        import types
+
+        import factory
+        from django.contrib.auth.models import Group, Permission
+
+        class GroupFactory(factory.django.DjangoModelFactory):
+            class Meta:
+                model = Group
+
+            name = factory.Sequence(lambda n: f"group-{n}")
+
+        class ContentTypeFactory(factory.django.DjangoModelFactory):
+            class Meta:
+                model = "contenttypes.ContentType"
+
+            app_label = "seed"
+            model = factory.Sequence(lambda n: f"model{n}")
+
+        class PermissionFactory(factory.django.DjangoModelFactory):
+            class Meta:
+                model = Permission
+
+            name = factory.Sequence(lambda n: f"permission-{n}")
+            codename = factory.Sequence(lambda n: f"seed_{n}")
+            content_type = factory.SubFactory(ContentTypeFactory)
+
+        module = types.ModuleType("django.contrib.auth.factories")
+        module.GroupFactory = GroupFactory
+        module.PermissionFactory = PermissionFactory
+        patcher = patch.dict(sys.modules, {"django.contrib.auth.factories": module})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.Group, self.Permission = Group, Permission
+
+    def test_seed_in_chunks_with_m2m(self):
+        from django.contrib.contenttypes.models import ContentType
+
+        content_types = ContentType.objects.count()
+        permissions = self.Permission.objects.count()
+        call_command("seed", "auth", "Permission", count=25, batch_size=10, stdout=StringIO())
+        # SubFactory objects are replaced by existing content types.
+        self.assertEqual(self.Permission.objects.count(), permissions + 25)
+        self.assertEqual(ContentType.objects.count(), content_types)
+
+        stdout = StringIO()
+        # The count and the permission pool, then per chunk of 2 rows a
+        # savepoint, the group insert, the through-table insert and the release.
+        with self.assertNumQueries(2 + 4 * 4):
+            call_command("seed", "auth", "Group", count=7, batch_size=2, m2m=3, stdout=stdout)
+        self.assertRegex(stdout.getvalue(), r"Seeded 7 'auth.Group' rows in .*rows/s, 1 worker\)")
+        self.assertEqual(self.Group.objects.filter(name__startswith="group-").count(), 7)
+        self.assertEqual(self.Group.permissions.through.objects.count(), 21)
+
+        # Sequences continue after the existing rows instead of colliding.
+        call_command("seed", "auth", "Group", count=3, stdout=StringIO())
+        self.assertTrue(self.Group.objects.filter(name="group-9").exists())
+
+    def test_seed_errors(self):
+        with self.assertRaisesMessage(CommandError, "Factory 'django.contrib.auth.factories.UserFactory' not found"):
+            call_command("seed", "auth", "User", count=1)
+        with self.assertRaisesMessage(CommandError, "cannot share an in-memory SQLite database"):
+            call_command("seed", "auth", "Group", count=10, workers=2)
+        with self.assertRaisesMessage(CommandError, "--count must be at least 1."):
+            call_command("seed", "auth", "Group", count=0)
+
+
+class FastCliTests(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.root = Path(self.tmp_dir.name)
+        (self.root / "manage.py").write_text("")
+        (self.root / "shop").mkdir()
+        (self.root / "shop" / "__init__.py").write_text("")
+
+    @patch("django.setup")
+    def test_create_without_django_setup(self, mock_setup):
+        stdout = StringIO()
+        cwd = os.getcwd()
+        os.chdir(self.root)
+        self.addCleanup(os.chdir, cwd)
+        self.addCleanup(sys.path.remove, str(self.root.resolve()))
+
+        with patch.dict(os.environ, {"DJANGO_SETTINGS_MODULE": ""}), patch("sys.stdout", stdout):
+            self.assertEqual(cli.main(["create", "shop", "Product"]), 0)
+
+        mock_setup.assert_not_called()
+        self.assertIn("class Product(models.Model):", (self.root / "shop" / "models.py").read_text())
+        self.assertIn("Registered 'ProductViewSet' in urls.py", stdout.getvalue())
+
+    @patch.object(cli.FastCreate, "_setup_django")
+    def test_existing_models_are_generated_like_manage_py_create(self, mock_setup):
+        from dj_cli_tools.utils.project import AppLocation
+
+        cwd = os.getcwd()
+        os.chdir(self.root)
+        self.addCleanup(os.chdir, cwd)
+        self.addCleanup(sys.path.remove, str(self.root.resolve()))
+        # The auth label makes the loaded Permission model stand in for the class.
+        models = "from django.db import models\n\n\nclass Permission(models.Model):\n    pass\n"
+        (self.root / "shop" / "models.py").write_text(models)
+        managed = self.root / "managed"
+        managed.mkdir()
+        (managed / "models.py").write_text(models)
+        app_config_mock = MagicMock(path=str(managed), label="auth")
+        app_config_mock.name = "shop"
+
+        with patch.dict(os.environ, {"DJANGO_SETTINGS_MODULE": ""}), patch("sys.stdout", StringIO()), \
+                patch.object(cli.ProjectContext, "resolve_app",
+                             return_value=AppLocation("shop", self.root / "shop", "auth")):
+            self.assertEqual(cli.main(["create", "shop", "Permission", "--no-cache"]), 0)
+        mock_setup.assert_called_once_with()
+        with patch("dj_cli_tools.management.commands.create.apps.get_app_config",
+                   return_value=app_config_mock):
+            call_command("create", "shop", "Permission", stdout=StringIO())
+
+        serializers = (self.root / "shop" / "serializers.py").read_text()
+        self.assertIn("        fields = ['id', 'name', 'content_type', 'codename']\n", serializers)
+        for name in ("serializers", "views", "admin"):
+            self.assertEqual((self.root / "shop" / f"{name}.py").read_text(),
+                             (managed / f"{name}.py").read_text())
+
+        mock_setup.reset_mock()
+        with patch.dict(os.environ, {"DJANGO_SETTINGS_MODULE": ""}), patch("sys.stdout", StringIO()), \
+                patch.object(cli.ProjectContext, "resolve_app",
+                             return_value=AppLocation("shop", self.root / "shop", "auth")):
+            self.assertEqual(cli.main(["create", "shop", "Product", "name", "--no-cache"]), 0)
+        mock_setup.assert_not_called()
+
+    @patch("django.setup")
+    def test_unchanged_files_are_answered_from_the_project_cache(self, mock_setup):
+        cwd = os.getcwd()
+        os.chdir(self.root)
+        self.addCleanup(os.chdir, cwd)
+        self.addCleanup(sys.path.remove, str(self.root.resolve()))
+
+        with patch.dict(os.environ, {"DJANGO_SETTINGS_MODULE": ""}), patch("sys.stdout", StringIO()):
+            cli.main(["create", "shop", "Product"])
+            # The files written by the first run are parsed once more...
+            cli.main(["create", "shop", "Product"])
+            # ...after which nothing is read or parsed.
+            with patch("dj_cli_tools.utils.file_handling_mixin.ModuleIndex.from_source") as mock_parse, \
+                    patch("dj_cli_tools.utils.file_buffer.FileBuffer._load") as mock_load:
+                self.assertEqual(cli.main(["create", "shop", "Product"]), 0)
+
+        mock_parse.assert_not_called()
+        mock_load.assert_not_called()
+        self.assertTrue((self.root / ".dj_cli_tools" / "index").exists())
+
+
+class CliToolsServerTests(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.root = Path(self.tmp_dir.name)
+        self.app_path = self.root / "shop"
+        self.app_path.mkdir()
+
+        self.app_config_mock = MagicMock()
+        self.app_config_mock.path = str(self.app_path)
+        self.app_config_mock.name = "shop"
+        self.app_config_mock.label = "shop"
+
+        command = ServerCommand(stdout=StringIO())
+        command.project_cache = ProjectCache.for_project(self.root)
+        command.file_locks = FileLocks()
+        self.socket = self.root / "server.sock"
+        self.server = GeneratorServer(self.socket, command.run_request)
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    @patch("dj_cli_tools.management.commands.create.apps.get_app_config")
+    def test_concurrent_creates_in_one_app(self, mock_get_app_config):
+        mock_get_app_config.return_value = self.app_config_mock
+        names = [f"Item{i}" for i in range(6)]
+        responses = {}
+
+        def create(name):
+            responses[name] = send_request(
+                self.socket, {"command": "create", "args": ["shop", name]})
+
+        threads = [threading.Thread(target=create, args=(name,)) for name in names]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for name in names:
+            self.assertEqual(responses[name]["returncode"], 0, responses[name]["stderr"])
+            self.assertIn(f"Model '{name}' created in app 'shop'.", responses[name]["stdout"])
+        models = (self.app_path / "models.py").read_text()
+        ast.parse(models)
+        self.assertEqual(sorted(re.findall(r"^class (\w+)\(", models, re.M)), names)
+
+    @patch("dj_cli_tools.management.commands.create.apps.get_app_config")
+    def test_client_prints_the_output_and_exits_with_the_status(self, mock_get_app_config):
+        mock_get_app_config.return_value = self.app_config_mock
+        stdout, stderr = StringIO(), StringIO()
+
+        with patch.dict(os.environ, {"DJ_CLI_TOOLS_SOCKET": str(self.socket)}), \
+                patch("sys.stdout", stdout), patch("sys.stderr", stderr):
+            self.assertEqual(client.main(["create", "shop", "Product"]), 0)
+            self.assertEqual(client.main(["create", "shop", "Product", "--pagination", "bogus"]), 1)
+
+        self.assertIn("Model 'Product' created in app 'shop'.", stdout.getvalue())
+        self.assertIn("CommandError: Error: argument --pagination", stderr.getvalue())
+
+    @patch("dj_cli_tools.management.commands.create.apps.get_app_config")
+    def test_from_db_runs_in_the_client_directory_and_releases_the_app(self, mock_get_app_config):
+        mock_get_app_config.return_value = self.app_config_mock
+        with closing(sqlite3.connect(self.root / "legacy.sqlite3")) as db:
+            db.execute("CREATE TABLE shop_customer (id INTEGER PRIMARY KEY, name varchar(80) NOT NULL)")
+        responses = []
+
+        def create(*args):
+            responses.append(send_request(
+                self.socket, {"command": "create", "args": ["shop", *args], "cwd": str(self.root)}))
+
+        # Run in threads: a lock taken twice by one request hangs it.
+        for args in (["--from-db", "legacy.sqlite3", "--no-cache"], ["Product"]):
+            thread = threading.Thread(target=create, args=args, daemon=True)
+            thread.start()
+            thread.join(timeout=30)
+            self.assertFalse(thread.is_alive(), f"create {' '.join(args)} hangs")
+
+        for response in responses:
+            self.assertEqual(response["returncode"], 0, response["stderr"])
+        models = (self.app_path / "models.py").read_text()
+        self.assertIn("class Customer(models.Model):", models)
+        self.assertIn("class Product(models.Model):", models)
+
+    def test_requests_for_other_commands_are_refused(self):
+        response = send_request(self.socket, {"command": "migrate", "args": []})
+
+        self.assertEqual(response["returncode"], 2)
+        self.assertIn("create or start_app", response["stderr"])
@@ -0,0 +1,1107 @@
+import ast
+import importlib.util
+import os
+import sqlite3
+import sys
+import tempfile
+from contextlib import closing
+from pathlib import Path
+from unittest.mock import patch
+
+from django.contrib.auth.models import Group
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from dj_cli_tools.utils import file_buffer, project, project_cache, timings
+from dj_cli_tools.utils.admin_plan import admin_options_code, plan_admin
+from dj_cli_tools.utils.case_utils import CaseUtils
+from dj_cli_tools.utils.code_templates import CodeTemplates
+from dj_cli_tools.utils.fast_serializer import fast_columns, fast_serializer_code
+from dj_cli_tools.utils.field_specs import (
+    factory_declaration,
+    factory_post_generation,
+    field_code,
+    parse_field_spec,
+)
+from dj_cli_tools.utils.file_buffer import FileBuffer
+from dj_cli_tools.utils.filtering import FilterSpec, indexed_field_names, unindexed_fields
+from dj_cli_tools.utils.perf_audit import audit_app
+from dj_cli_tools.utils.project_cache import ProjectCache
+from dj_cli_tools.utils.schema_import import (
+    _read_sqlite_table,
+    _read_table,
+    model_names,
+    read_tables,
+    render_table,
+    select_tables,
+)
+from dj_cli_tools.utils.server import socket_path
+from dj_cli_tools.utils.settings_editor import SettingsEditor
+from dj_cli_tools.utils.query_plan import (
+    QueryPlan,
+    plan_queries,
+    queryset_chain,
+    queryset_code,
+    traversed_lookups,
+)
+from dj_cli_tools.utils.symbol_index import (
+    ModuleIndex,
+    SourceEditor,
+    class_attributes,
+    merge_imports,
+    root_name,
+)
+from dj_cli_tools.utils.template_packs import TemplatePack, TemplateRegistry, build_pack
+from dj_cli_tools.utils.url_layout import API_ROOT_ENTRY, Route, add_routes, reshard, shard_include, shard_module
+
+
+class FileBufferTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.root = Path(self.tmp_dir.name)
+
+    def test_edits_stay_in_memory_until_commit(self):
+        path = self.root / "models.py"
+        path.write_text("from django.db import models\n", encoding="utf-8")
+
+        buffer = FileBuffer()
+        buffer.write(path, buffer.read(path) + "\nclass A(models.Model):\n    pass\n")
+
+        self.assertEqual(path.read_text(), "from django.db import models\n")
+        self.assertEqual(buffer.commit(), [path])
+        self.assertIn("class A(models.Model):", path.read_text())
+
+    def test_unchanged_files_are_not_rewritten(self):
+        path = self.root / "admin.py"
+        path.write_text("from django.contrib import admin\n", encoding="utf-8")
+
+        buffer = FileBuffer()
+        buffer.write(path, buffer.read(path))
+
+        with patch("dj_cli_tools.utils.file_buffer.os.replace") as mock_replace:
+            self.assertEqual(buffer.commit(), [])
+        mock_replace.assert_not_called()
+
+    def test_reading_missing_file_does_not_create_it(self):
+        path = self.root / "factories.py"
+
+        buffer = FileBuffer()
+        self.assertEqual(buffer.read(path), "")
+        self.assertFalse(buffer.exists(path))
+        buffer.commit()
+
+        self.assertFalse(path.exists())
+
+    def test_failed_commit_leaves_original_and_no_temp_files(self):
+        path = self.root / "views.py"
+        path.write_text("original\n", encoding="utf-8")
+
+        buffer = FileBuffer()
+        buffer.write(path, "changed\n")
+        with patch("dj_cli_tools.utils.file_buffer.os.replace", side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                buffer.commit()
+
+        self.assertEqual(path.read_text(), "original\n")
+        self.assertEqual([p.name for p in self.root.iterdir()], ["views.py"])
+
+    def test_discard_drops_pending_edits(self):
+        path = self.root / "urls.py"
+
+        buffer = FileBuffer()
+        buffer.write(path, "urlpatterns = []\n")
+        self.assertTrue(buffer.exists(path))
+        buffer.discard()
+
+        self.assertEqual(buffer.commit(), [])
+        self.assertFalse(path.exists())
+
+    def test_stale_paths_lists_files_changed_on_disk_since_read(self):
+        changed, kept = self.root / "models.py", self.root / "views.py"
+        changed.write_text("original\n", encoding="utf-8")
+        kept.write_text("original\n", encoding="utf-8")
+
+        buffer = FileBuffer()
+        buffer.write(changed, buffer.read(changed) + "edit\n")
+        buffer.write(kept, buffer.read(kept) + "edit\n")
+        changed.write_text("rewritten by someone else\n", encoding="utf-8")
+
+        self.assertEqual(buffer.stale_paths(), [changed])
+
+
+class ModuleIndexTests(SimpleTestCase):
+    URLS = (
+        "from django.urls import include, path\n"
+        "from rest_framework.routers import DefaultRouter\n"
+        "from .views import BigProductViewSet  # ProductViewSet is next\n"
+        "\n"
+        "router = DefaultRouter()\n"
+        "router.register(r'big_products', BigProductViewSet)\n"
+        "\n"
+        "urlpatterns = [\n"
+        "    path('', include(router.urls)),\n"
+        "]\n"
+    )
+
+    def test_indexes_symbols_without_substring_matches(self):
+        index = ModuleIndex.from_source(self.URLS)
+
+        self.assertEqual(index.routers, {"router": 5})
+        self.assertEqual(index.registered_viewsets, {"BigProductViewSet"})
+        self.assertEqual(index.registered_prefixes, {"big_products"})
+        self.assertNotIn("ProductViewSet", index.bound_names)
+        self.assertEqual(index.import_end, 3)
+        self.assertEqual(index.assignments["urlpatterns"], 8)
+
+    def test_indexes_classes_and_admin_registrations(self):
+        index = ModuleIndex.from_source(
+            "from django.contrib import admin\n"
+            "from .models import A, B, C\n"
+            "\n"
+            "@admin.register(A, B)\n"
+            "class AAdmin(admin.ModelAdmin):\n"
+            "    pass\n"
+            "\n"
+            "admin.site.register(C)\n"
+            "\n"
+            "def action(modeladmin, request, queryset):\n"
+            "    pass\n"
+        )
+
+        self.assertEqual(set(index.classes), {"AAdmin"})
+        self.assertEqual(index.functions, {"action": 10})
+        self.assertEqual(index.admin_registered, {"A", "B", "C"})
+        self.assertEqual(ModuleIndex.from_dict(index.to_dict()).functions, index.functions)
+
+    def test_merge_imports_extends_existing_statement(self):
+        index = ModuleIndex.from_source(self.URLS)
+        editor = SourceEditor(self.URLS)
+        merge_imports(editor, index, "from .views import ProductViewSet\nimport factory")
+        content = editor.apply()
+
+        self.assertIn("from .views import BigProductViewSet, ProductViewSet  # ProductViewSet is next\n"
+                      "import factory\n", content)
+        self.assertEqual(content.count("from .views import"), 1)
+
+    def test_merge_imports_keeps_comments_of_wrapped_statements(self):
+        source = (
+            "from .models import (\n"
+            "    Alpha,\n"
+            "    Beta  # comment\n"
+            ")\n"
+            "from .views import AlphaViewSet  # noqa: F401\n"
+        )
+        index = ModuleIndex.from_source(source)
+        editor = SourceEditor(source)
+        merge_imports(editor, index, "from .models import Item\nfrom .views import ItemViewSet")
+
+        self.assertEqual(
+            editor.apply(),
+            "from .models import (\n"
+            "    Alpha,\n"
+            "    Beta,  # comment\n"
+            "    Item,\n"
+            ")\n"
+            "from .views import AlphaViewSet, ItemViewSet  # noqa: F401\n",
+        )
+
+    def test_merge_imports_wraps_long_statements(self):
+        source = "from .models import " + ", ".join(f"Model{i}" for i in range(10)) + "\n"
+        index = ModuleIndex.from_source(source)
+        editor = SourceEditor(source)
+        merge_imports(editor, index, "from .models import Model10\nfrom .models import Model3")
+
+        self.assertEqual(
+            editor.apply(),
+            "from .models import (\n"
+            + "".join(f"    Model{i},\n" for i in range(11))
+            + ")\n",
+        )
+
+
+class ProjectDiscoveryTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.root = Path(self.tmp_dir.name)
+        (self.root / "manage.py").write_text(
+            'os.environ.setdefault("DJANGO_SETTINGS_MODULE", "proj.settings")\n')
+        (self.root / "proj").mkdir()
+        (self.root / "proj" / "__init__.py").write_text("")
+        (self.root / "proj" / "settings.py").write_text(
+            "INSTALLED_APPS = [\n"
+            "    'django.contrib.admin',\n"
+            "    'apps.shop.apps.ShopConfig',\n"
+            "]\n"
+            "INSTALLED_APPS += ['billing']\n"
+        )
+        for package in ("apps", "apps/shop", "billing"):
+            (self.root / package).mkdir()
+            (self.root / package / "__init__.py").write_text("")
+        (self.root / "apps" / "shop" / "apps.py").write_text(
+            "class ShopConfig(AppConfig):\n    name = 'apps.shop'\n    label = 'store'\n")
+
+        sys.path.insert(0, str(self.root))
+        self.addCleanup(sys.path.remove, str(self.root))
+
+    def test_settings_and_installed_apps(self):
+        with patch.dict(os.environ, clear=True):
+            self.assertEqual(project.get_settings_module(self.root), "proj.settings")
+        self.assertEqual(
+            project.read_installed_apps(self.root / "proj" / "settings.py"),
+            ["django.contrib.admin", "apps.shop.apps.ShopConfig", "billing"],
+        )
+
+    def test_resolve_app_by_label(self):
+        installed_apps = project.read_installed_apps(self.root / "proj" / "settings.py")
+
+        shop = project.resolve_app("store", self.root, installed_apps)
+        self.assertEqual((shop.name, shop.label), ("apps.shop", "store"))
+        self.assertEqual(Path(shop.path), self.root / "apps" / "shop")
+
+        billing = project.resolve_app("billing", self.root, installed_apps)
+        self.assertEqual(Path(billing.path), self.root / "billing")
+
+        self.assertIsNone(project.resolve_app("missing", self.root, installed_apps))
+
+
+class ProjectCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.root = Path(self.tmp_dir.name)
+
+    def test_entries_are_invalidated_when_the_source_changes(self):
+        settings_path = self.root / "settings.py"
+        settings_path.write_text("INSTALLED_APPS = []\n")
+
+        cache = ProjectCache.for_project(self.root)
+        cache.set("installed_apps", "settings", ["shop"], source=settings_path)
+        cache.save()
+
+        self.assertTrue((self.root / ".dj_cli_tools" / "index").exists())
+        self.assertEqual((self.root / ".dj_cli_tools" / ".gitignore").read_text(), "*\n")
+        reloaded = ProjectCache.for_project(self.root)
+        self.assertEqual(reloaded.get("installed_apps", "settings", source=settings_path), ["shop"])
+
+        settings_path.write_text("INSTALLED_APPS = ['shop', 'billing']\n")
+        self.assertIsNone(reloaded.get("installed_apps", "settings", source=settings_path))
+
+    def test_module_index_round_trip(self):
+        path = self.root / "urls.py"
+        path.write_text(ModuleIndexTests.URLS)
+        index = ModuleIndex.from_source(ModuleIndexTests.URLS)
+
+        cache = ProjectCache.for_project(self.root)
+        cache.set_module_index(path, index, project_cache.file_signature(path))
+        cache.save()
+
+        cached = ProjectCache.for_project(self.root).module_index(path)
+        self.assertEqual(cached.to_dict(), index.to_dict())
+        self.assertEqual(cached.registered_viewsets, {"BigProductViewSet"})
+        self.assertEqual(cached.from_imports[".views"][0].lineno, 3)
+
+    def test_unreadable_cache_is_ignored(self):
+        (self.root / ".dj_cli_tools").mkdir()
+        (self.root / ".dj_cli_tools" / "index").write_text("{not json")
+
+        cache = ProjectCache.for_project(self.root)
+        self.assertIsNone(cache.get("settings", "proj.settings"))
+        self.assertIsNone(ProjectCache.for_project(None))
+
+
+class TemplatePackTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.root = Path(self.tmp_dir.name)
+        self.template_dir = self.root / "service"
+        (self.template_dir / "migrations").mkdir(parents=True)
+        (self.template_dir / "__pycache__").mkdir()
+        (self.template_dir / "models.py-tpl").write_text("# {{ app_name }}\n")
+        (self.template_dir / "views.py").write_text("# {{ camel_case_app_name }}\n")
+        (self.template_dir / "migrations" / "__init__.py-tpl").write_text("")
+        (self.template_dir / "__pycache__" / "models.cpython-311.pyc").write_bytes(b"\0")
+
+    def test_pack_round_trip(self):
+        pack_path = build_pack(self.template_dir)
+
+        self.assertEqual(pack_path, self.root / "service.djpack")
+        with TemplatePack(pack_path) as pack:
+            self.assertEqual(pack.name, "service")
+            self.assertEqual(pack.directories, ["migrations"])
+            contents = {entry.path: data for entry, data in pack.read_all()}
+        # Plain modules are stored as templates; caches are left out.
+        self.assertEqual(contents, {
+            "migrations/__init__.py-tpl": b"",
+            "models.py-tpl": b"# {{ app_name }}\n",
+            "views.py-tpl": b"# {{ camel_case_app_name }}\n",
+        })
+
+    def test_packing_is_reproducible(self):
+        first = build_pack(self.template_dir, self.root / "a.djpack").read_bytes()
+        os.utime(self.template_dir / "models.py-tpl", (0, 0))
+        second = build_pack(self.template_dir, self.root / "b.djpack").read_bytes()
+        self.assertEqual(first, second)
+
+    def test_registry_prefers_setting_over_builtin(self):
+        (self.root / "simple_drf").mkdir()
+        pack_path = build_pack(self.template_dir, self.root / "custom.djpack")
+        registry = TemplateRegistry(builtin_dir=self.root)
+
+        self.assertEqual(registry.find("service"), str(self.template_dir))
+        with override_settings(DJ_CLI_TOOLS_TEMPLATE_PACKS={"simple_drf": str(pack_path)}):
+            self.assertEqual(registry.find("simple_drf"), str(pack_path))
+        self.assertEqual(registry.find("simple_drf"), str(self.root / "simple_drf"))
+        self.assertIsNone(registry.find("missing"))
+
+    def test_registry_prefers_built_pack_over_its_tree(self):
+        build_pack(self.template_dir)
+        registry = TemplateRegistry(builtin_dir=self.root)
+        self.assertEqual(registry.find("service"), str(self.root / "service.djpack"))
+        self.assertEqual(registry.template_directories(), [str(self.template_dir)])
+
+    def test_registry_prefers_the_tree_once_edited_after_the_pack(self):
+        pack_path = build_pack(self.template_dir)
+        registry = TemplateRegistry(builtin_dir=self.root)
+        built = pack_path.stat().st_mtime
+
+        os.utime(self.template_dir / "migrations" / "__init__.py-tpl", (built + 10, built + 10))
+        self.assertEqual(registry.find("service"), str(self.template_dir))
+
+        build_pack(self.template_dir)
+        os.utime(pack_path, (built + 20, built + 20))
+        self.assertEqual(registry.find("service"), str(pack_path))
+        # A new file changes the mtime of its directory.
+        os.utime(self.template_dir, (built + 30, built + 30))
+        self.assertEqual(registry.find("service"), str(self.template_dir))
+
+
+class TimingsTests(SimpleTestCase):
+    def test_hooks_report_into_the_active_recorder(self):
+        recorder = timings.Timings()
+        token = timings.activate(recorder)
+        try:
+            with timings.phase("app shop"):
+                with timings.phase("model"):
+                    timings.record_read("models.py", 10)
+                timings.record_write("models.py", 30)
+                timings.record_write("admin.py", 5)
+        finally:
+            timings.deactivate(token)
+        recorder.finish()
+
+        report = recorder.to_dict()
+        app = report["children"][0]
+        self.assertEqual((app["name"], app["bytes_read"], app["bytes_written"], app["files"]),
+                         ("app shop", 10, 35, 2))
+        self.assertEqual(app["children"][0]["name"], "model")
+        self.assertGreaterEqual(report["seconds"], app["seconds"])
+        self.assertIn("    model", recorder.format_text())
+
+    def test_hooks_are_no_ops_without_a_recorder(self):
+        self.assertIsNone(timings.active())
+        with timings.phase("custom step") as current:
+            timings.record_read("models.py", 10)
+        self.assertIsNone(current)
+
+
+class CaseUtilsTests(SimpleTestCase):
+    def setUp(self):
+        CaseUtils.cache_clear()
+
+    def test_conversions(self):
+        self.assertEqual(CaseUtils.to_pascal_case("order_line"), "OrderLine")
+        self.assertEqual(CaseUtils.to_snake_case("HTTPRequest"), "http_request")
+        self.assertEqual(CaseUtils.to_camel_case("order-line 2"), "orderLine2")
+        self.assertEqual(CaseUtils.to_sentence_case(""), "")
+
+    def test_convert_many_splits_each_name_once(self):
+        with patch.object(CaseUtils, "_WORD_RE", wraps=CaseUtils._WORD_RE) as word_re:
+            result = CaseUtils.convert_many(["order_line", "OrderLine"], ["pascal", "kebab", "constant"])
+        self.assertEqual(result, {
+            "order_line": {"pascal": "OrderLine", "kebab": "order-line", "constant": "ORDER_LINE"},
+            "OrderLine": {"pascal": "OrderLine", "kebab": "order-line", "constant": "ORDER_LINE"},
+        })
+        self.assertEqual(word_re.findall.call_count, 2)
+
+    def test_separated_tokens_without_ascii_words_are_kept(self):
+        self.assertEqual(CaseUtils.to_pascal_case("order é"), "OrderÉ")
+        self.assertEqual(CaseUtils.to_snake_case("order_é"), "order_é")
+        self.assertEqual(CaseUtils.to_pascal_case("é"), "É")
+
+    def test_convert_many_rejects_unknown_styles(self):
+        with self.assertRaisesMessage(ValueError, "Unknown case style(s): shouting"):
+            CaseUtils.convert_many(["order_line"], ["snake", "shouting"])
+
+
+class QueryPlanTests(SimpleTestCase):
+    def test_forward_relations_only_by_default(self):
+        from django.contrib.auth.models import Permission, User
+
+        # Rendered as primary keys, which are read from content_type_id.
+        plan = plan_queries(Permission)
+        self.assertEqual((plan.select_related, plan.prefetch_related), ([], []))
+        self.assertEqual(plan_queries(User).prefetch_related, ["groups", "user_permissions"])
+        plan = plan_queries(Permission, traversed={"content_type"})
+        self.assertEqual((plan.select_related, plan.prefetch_related), (["content_type"], []))
+        self.assertEqual(queryset_code("Permission", plan),
+                         "Permission.objects.select_related('content_type')")
+
+    def test_queryset_chain_keeps_the_calls_that_select_rows(self):
+        def chain(code):
+            return queryset_chain(ast.parse(code, mode="eval").body)
+
+        plan = QueryPlan(["author"], ["genres"], [], [])
+        self.assertEqual(
+            queryset_code("Book", plan._replace(prefetch_related=[]), chain=chain(
+                "Book.published.filter(year=2020).select_related('publisher').all()")),
+            "Book.published.filter(year=2020).select_related('author')")
+        self.assertEqual(
+            queryset_code("Book", plan, 0, chain(
+                "Book.objects.prefetch_related(Prefetch('genres', to_attr='all_genres'))")),
+            "(\n"
+            "    Book.objects\n"
+            "    .prefetch_related(Prefetch('genres', to_attr='all_genres'))\n"
+            "    .select_related('author')\n"
+            "    .prefetch_related('genres')\n"
+            ")")
+        self.assertEqual(
+            queryset_code("Book", plan._replace(select_related=[]), 0,
+                          chain("Book.objects.prefetch_related(Prefetch('genres'))")),
+            "Book.objects.prefetch_related(Prefetch('genres'))")
+        self.assertEqual(queryset_code("Book", None, chain=chain("Book.objects")), "Book.objects.all()")
+        self.assertIsNone(chain("Book.objects.all()[:10]"))
+        self.assertIsNone(chain("Book.objects.values('id')"))
+        self.assertIsNone(chain("Book.objects.select_related()"))
+
+    def test_traversed_lookups(self):
+        from django.contrib.auth.models import Permission, User
+
+        classes = class_attributes(
+            "class ContentTypeSerializer(serializers.ModelSerializer):\n"
+            "    class Meta:\n"
+            "        model = ContentType\n"
+            "        fields = '__all__'\n"
+            "\n"
+            "class PermissionSerializer(serializers.ModelSerializer):\n"
+            "    content_type = serializers.PrimaryKeyRelatedField(read_only=True)\n"
+            "    class Meta:\n"
+            "        model = Permission\n"
+            "        fields = '__all__'\n"
+            "\n"
+            "class UserSerializer(serializers.ModelSerializer):\n"
+            "    groups = serializers.StringRelatedField(many=True)\n"
+            "    app = serializers.CharField(source='user_permissions.content_type.app_label')\n"
+            "    class Meta:\n"
+            "        model = User\n"
+            "        fields = ['id', 'groups', 'app']\n"
+            "\n"
+            "class NestedPermissionSerializer(serializers.ModelSerializer):\n"
+            "    content_type = ContentTypeSerializer()\n"
+            "    group_set = serializers.PrimaryKeyRelatedField(many=True, read_only=True)\n"
+            "    class Meta:\n"
+            "        model = Permission\n"
+            "        fields = ['id', 'content_type', 'group_set']\n"
+            "\n"
+            "class DeepPermissionSerializer(serializers.ModelSerializer):\n"
+            "    class Meta:\n"
+            "        model = Permission\n"
+            "        exclude = ['name']\n"
+            "        depth = 1\n")
+
+        self.assertEqual(traversed_lookups(classes, "PermissionSerializer", Permission), set())
+        self.assertEqual(traversed_lookups(classes, "UserSerializer", User),
+                         {"groups", "user_permissions", "user_permissions__content_type"})
+        self.assertEqual(traversed_lookups(classes, "NestedPermissionSerializer", Permission),
+                         {"content_type", "group_set"})
+        self.assertEqual(traversed_lookups(classes, "DeepPermissionSerializer", Permission),
+                         {"content_type"})
+
+    def test_reverse_relations(self):
+        from django.contrib.auth.models import Permission
+
+        plan = plan_queries(Permission, include_reverse=True)
+        self.assertEqual(plan.prefetch_related, ["group_set", "user_set"])
+        self.assertEqual(plan.reverse_relations, [("group_set", True), ("user_set", True)])
+        self.assertEqual(plan.fields[-2:], ["group_set", "user_set"])
+
+    def test_class_attributes(self):
+        classes = class_attributes(
+            "class BookSerializer(Base):\n"
+            "    class Meta:\n"
+            "        model = Book\n"
+            "        fields = '__all__'\n"
+            "\n"
+            "class BookViewSet(Base):\n"
+            "    queryset = Book.objects.filter(\n"
+            "        active=True).all()\n"
+        )
+
+        self.assertEqual(set(classes), {"BookSerializer", "BookSerializer.Meta", "BookViewSet"})
+        queryset = classes["BookViewSet"]["queryset"]
+        self.assertEqual((queryset.lineno, queryset.end_lineno, queryset.col_offset), (7, 8, 4))
+        self.assertEqual(root_name(queryset.node.value), "Book")
+        self.assertEqual(root_name(classes["BookSerializer.Meta"]["model"].node.value), "Book")
+
+
+class FastSerializerTests(SimpleTestCase):
+    def test_generated_serializer_matches_the_model_serializer(self):
+        import datetime
+
+        from django.contrib.admin.models import LogEntry
+        from rest_framework import serializers
+
+        columns, left_out = fast_columns(LogEntry)
+        self.assertEqual(
+            [column.column for column in columns],
+            ["id", "action_time", "user_id", "content_type_id", "object_repr", "action_flag"])
+        self.assertEqual(left_out, ["object_id (TextField)", "change_message (TextField)"])
+
+        namespace = {"serializers": serializers}
+        exec(fast_serializer_code("LogEntryFastSerializer", "LogEntry", columns, left_out), namespace)
+        row = {"id": 1, "action_time": datetime.datetime(2024, 5, 1, 12, tzinfo=datetime.timezone.utc),
+               "user_id": 2, "content_type_id": None, "object_repr": "x", "action_flag": 1}
+        entry = LogEntry(**row)
+
+        class LogEntrySerializer(serializers.ModelSerializer):
+            class Meta:
+                model = LogEntry
+                fields = "__all__"
+
+        fast = namespace["LogEntryFastSerializer"](row).data
+        full = LogEntrySerializer(entry).data
+        self.assertEqual(
+            list(fast), ["id", "action_time", "user", "content_type", "object_repr", "action_flag"])
+        self.assertEqual(fast, {key: full[key] for key in fast})
+
+    def test_unloaded_model_keeps_the_cursor_field(self):
+        columns, _ = fast_columns(None, cursor_field="created_at")
+        self.assertEqual([column.key for column in columns], ["id", "created_at"])
+
+
+class AdminPlanTests(TestCase):
+    def test_relations_and_indexed_search_fields(self):
+        from django.contrib import admin
+        from django.contrib.admin.models import LogEntry
+        from django.contrib.auth.models import User
+
+        plan = plan_admin(LogEntry, admin.site)
+        self.assertEqual(plan.list_select_related, ["user", "content_type"])
+        # The user admin has search_fields, content types are not registered.
+        self.assertEqual(plan.autocomplete_fields, ["user"])
+        self.assertEqual(plan.raw_id_fields, ["content_type"])
+        self.assertEqual(plan.search_fields, [])
+
+        plan = plan_admin(User)
+        self.assertEqual(plan.raw_id_fields, ["groups", "user_permissions"])
+        self.assertEqual(plan.search_fields, ["username__startswith"])
+        self.assertEqual(
+            admin_options_code(plan),
+            "    raw_id_fields = ('groups', 'user_permissions')\n"
+            "    search_fields = ('username__startswith',)\n")
+
+    def test_paginator_falls_back_to_the_exact_count(self):
+        from django.contrib.auth.models import Permission
+
+        namespace = {}
+        exec(CodeTemplates.ADMIN_PAGINATOR_IMPORTS, namespace)
+        exec(CodeTemplates.ADMIN_PAGINATOR.format(paginator_name="Estimated"), namespace)
+        paginator_class = namespace["Estimated"]
+        queryset = Permission.objects.order_by("pk")
+
+        self.assertEqual(paginator_class(queryset, 10).count, Permission.objects.count())
+        with patch.object(paginator_class, "_estimated_count", return_value=250000):
+            self.assertEqual(paginator_class(queryset, 10).count, 250000)
+
+
+class ConditionalCacheMixinTests(TestCase):
+    """The generated caching.py, run against auth.Group with the default
+    local-memory cache."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        from rest_framework import serializers, viewsets
+        from rest_framework.test import APIRequestFactory
+
+        namespace = {}
+        exec(CodeTemplates.CACHE_IMPORTS + "\n" + CodeTemplates.CACHE_MIXIN, namespace)
+        self.invalidate = namespace["invalidate_cached_responses"]
+
+        class GroupSerializer(serializers.ModelSerializer):
+            class Meta:
+                model = Group
+                fields = ["id", "name"]
+
+        class GroupViewSet(namespace["ConditionalCacheMixin"], viewsets.ModelViewSet):
+            queryset = Group.objects.all()
+            serializer_class = GroupSerializer
+            authentication_classes = []
+            permission_classes = []
+
+        self.detail = GroupViewSet.as_view({"get": "retrieve"})
+        self.list = GroupViewSet.as_view({"get": "list"})
+        self.factory = APIRequestFactory()
+        self.group = Group.objects.create(name="staff")
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_detail_revalidates_without_queries(self):
+        response = self.detail(self.factory.get("/"), pk=str(self.group.pk))
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.detail(self.factory.get("/", HTTP_IF_NONE_MATCH=etag), pk=f"0{self.group.pk}")
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(self.detail(self.factory.get("/"), pk=str(self.group.pk)).data,
+                             {"id": self.group.pk, "name": "staff"})
+
+        self.invalidate(Group, self.group.pk)
+        response = self.detail(self.factory.get("/", HTTP_IF_NONE_MATCH=etag), pk=str(self.group.pk))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(self.detail(self.factory.get("/"), pk="nope").status_code, 404)
+
+    def test_list_is_cached_per_url_until_invalidated(self):
+        first = self.list(self.factory.get("/groups/"))
+        with self.assertNumQueries(0):
+            self.assertEqual(self.list(self.factory.get("/groups/")).data, first.data)
+        self.assertNotEqual(self.list(self.factory.get("/groups/?page=2"))["ETag"], first["ETag"])
+
+        Group.objects.create(name="ops")
+        self.invalidate(Group, self.group.pk)
+        self.assertEqual(len(self.list(self.factory.get("/groups/")).data), 2)
+
+
+class FilteringTests(SimpleTestCase):
+    def test_indexed_fields(self):
+        from django.contrib.auth.models import Permission, User
+
+        self.assertEqual(indexed_field_names(Permission), {"id", "content_type"})
+        self.assertEqual(indexed_field_names(User), {"id", "username"})
+        spec = FilterSpec(["is_staff"], ["username", "id"], ["missing"])
+        self.assertEqual(unindexed_fields(User, spec), [
+            "'is_staff' has no index",
+            "'id' is not a text column and cannot be searched",
+            "'missing' is not a column of 'User'",
+        ])
+
+
+class FieldSpecTests(SimpleTestCase):
+    def test_field_code(self):
+        cases = {
+            "name": "name = models.CharField(max_length=255)",
+            "name:char:120:index": "name = models.CharField(max_length=120, db_index=True)",
+            "sku:char:unique": "sku = models.CharField(max_length=255, unique=True)",
+            "price:decimal:12": "price = models.DecimalField(max_digits=12, decimal_places=2)",
+            "created:datetime:auto": "created = models.DateTimeField(auto_now_add=True)",
+            "active:boolean": "active = models.BooleanField(default=False)",
+            "owner:fk:auth.User": "owner = models.ForeignKey('auth.User', on_delete=models.CASCADE)",
+            "tags:m2m:Tag:blank": "tags = models.ManyToManyField('Tag', blank=True)",
+        }
+        for spec, code in cases.items():
+            with self.subTest(spec):
+                self.assertEqual(field_code(parse_field_spec(spec), indent=0), code + "\n")
+        self.assertTrue(parse_field_spec("owner:fk:User").indexed)
+        self.assertFalse(parse_field_spec("owner:fk:User").with_index().index)
+
+    def test_factory_declaration(self):
+        cases = {
+            "name": "factory.Sequence(lambda n: f'name-{n}')",
+            "sku:char:8:unique": "factory.Sequence(str)",
+            "email:email": "factory.Sequence(lambda n: f'email{n}@example.com')",
+            "stock:posint": "factory.Sequence(int)",
+            "price:decimal:8:2": "factory.Faker('pydecimal', left_digits=6, right_digits=2, positive=True)",
+            "category:fk:Category": "factory.SubFactory('shop.factories.CategoryFactory')",
+            # Left to the database, or to the model field's default.
+            "note:text:blank": "",
+            "parent:fk:Category:null": "",
+            "created:datetime:auto": "",
+            "active:bool": "",
+            "tags:m2m:Tag": "",
+        }
+        for spec, declaration in cases.items():
+            with self.subTest(spec):
+                self.assertEqual(factory_declaration(
+                    parse_field_spec(spec), "shop.factories.CategoryFactory")[0], declaration)
+        self.assertEqual(factory_declaration(parse_field_spec("owner:fk:auth.User")), ("", ""))
+        self.assertEqual(factory_declaration(parse_field_spec("published:datetime")),
+                         ("factory.LazyFunction(timezone.now)", "from django.utils import timezone"))
+
+    def test_factory_post_generation(self):
+        self.assertEqual(
+            factory_post_generation(parse_field_spec("tags:m2m:Tag"), "TagFactory"),
+            "    @factory.post_generation\n"
+            "    def tags(self, create, extracted, **kwargs):\n"
+            "        if not create:\n"
+            "            return\n"
+            "        self.tags.set([TagFactory()] if extracted is None else extracted)\n")
+        self.assertEqual(factory_post_generation(parse_field_spec("tags:m2m:Tag"), ""), "")
+        self.assertEqual(factory_post_generation(parse_field_spec("tags:m2m:Tag:blank"), "TagFactory"), "")
+        self.assertEqual(factory_post_generation(parse_field_spec("tag:fk:Tag"), "TagFactory"), "")
+
+    def test_invalid_specs(self):
+        for spec, message in [
+            ("id:int", "invalid field name"),
+            ("name:varchar", "unknown field type 'varchar'"),
+            ("name:char:indexed", "unknown modifier 'indexed'"),
+            ("owner:fk", "needs a target model"),
+            ("name:char:auto", "only apply to dates and times"),
+            ("tags:m2m:Tag:index", "many-to-many fields have no column"),
+        ]:
+            with self.subTest(spec), self.assertRaisesMessage(ValueError, message):
+                parse_field_spec(spec)
+
+
+class ServerSocketTests(SimpleTestCase):
+    def test_socket_lives_in_the_project(self):
+        self.assertEqual(socket_path("/src/proj"), Path("/src/proj/.dj_cli_tools/server.sock"))
+
+    def test_long_project_paths_fall_back_to_the_temp_dir(self):
+        root = "/src/" + "nested/" * 20 + "proj"
+
+        path = socket_path(root)
+
+        self.assertEqual(path.parent, Path(tempfile.gettempdir()))
+        self.assertLess(len(os.fsencode(path)), 100)
+        self.assertEqual(path, socket_path(root))
+
+
+class SettingsEditorTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.root = Path(self.tmp_dir.name)
+        self.settings_path = self.root / "settings.py"
+
+    def add_apps(self, source, apps=("shop", "billing.apps.BillingConfig")):
+        self.settings_path.write_text(source, encoding="utf-8")
+        editor = SettingsEditor(self.settings_path)
+        editor.add_to_list("INSTALLED_APPS", list(apps))
+        editor.apply()
+        return self.settings_path.read_text(encoding="utf-8")
+
+    def test_entries_follow_the_layout_of_the_list(self):
+        self.assertEqual(
+            self.add_apps("INSTALLED_APPS = [\n    'admin',\n    'auth'  # last\n]\n"),
+            "INSTALLED_APPS = [\n    'admin',\n    'auth',  # last\n"
+            "    'shop',\n    'billing.apps.BillingConfig',\n]\n")
+        self.assertEqual(self.add_apps('INSTALLED_APPS = ["admin"]\n', ["shop"]),
+                         'INSTALLED_APPS = ["admin", "shop"]\n')
+        self.assertEqual(self.add_apps("INSTALLED_APPS = ()\n", ["shop"]),
+                         "INSTALLED_APPS = (\n    'shop',\n)\n")
+        self.assertEqual(
+            self.add_apps("INSTALLED_APPS = [\n    'admin',\n    'auth',]\n"),
+            "INSTALLED_APPS = [\n    'admin',\n    'auth',\n"
+            "    'shop',\n    'billing.apps.BillingConfig',]\n")
+
+    def test_present_entries_are_skipped_and_files_left_alone(self):
+        source = "INSTALLED_APPS = [\n    'shop',\n]\n"
+        self.settings_path.write_text(source)
+
+        editor = SettingsEditor(self.settings_path)
+        editor.add_to_list("INSTALLED_APPS", ["shop"])
+        with patch("dj_cli_tools.utils.file_buffer.os.replace") as mock_replace:
+            self.assertEqual(editor.apply(), [])
+
+        mock_replace.assert_not_called()
+
+    def test_concatenated_lists_grow_the_last_one(self):
+        content = self.add_apps(
+            "DJANGO_APPS = ['admin']\nLOCAL_APPS = [\n    'core',\n]\n"
+            "INSTALLED_APPS = DJANGO_APPS + LOCAL_APPS\n", ["shop"])
+
+        self.assertIn("LOCAL_APPS = [\n    'core',\n    'shop',\n]\n", content)
+
+    def test_edits_are_applied_in_one_write(self):
+        self.settings_path.write_text("DEBUG = True\nINSTALLED_APPS = ['admin']\n")
+
+        editor = SettingsEditor(self.settings_path)
+        editor.add_to_list("INSTALLED_APPS", ["shop"])
+        editor.add_to_list("MIDDLEWARE", ["shop.middleware.Timing"])
+        editor.set("DEBUG", "False")
+        with patch("dj_cli_tools.utils.file_buffer.atomic_write",
+                   side_effect=file_buffer.atomic_write) as mock_write:
+            edits = editor.apply()
+
+        mock_write.assert_called_once()
+        self.assertEqual(
+            self.settings_path.read_text(),
+            "DEBUG = False\nINSTALLED_APPS = ['admin', 'shop']\n\n"
+            "MIDDLEWARE += ['shop.middleware.Timing']\n")
+        self.assertEqual([(edit.name, edit.appended) for edit in edits],
+                         [("INSTALLED_APPS", False), ("MIDDLEWARE", True), ("DEBUG", False)])
+        with self.assertRaises(ValueError):
+            editor.set("DEBUG", "False)")
+
+
+class UrlLayoutTests(SimpleTestCase):
+    def test_shard_modules_and_includes(self):
+        self.assertEqual(shard_module("orders"), "orders")
+        self.assertEqual(shard_module("1"), "x1")
+        self.assertEqual(shard_module("class"), "xclass")
+        self.assertEqual(shard_module("line-items"), "line_2d_items")
+        self.assertEqual(shard_module("line_items"), "line_5f_items")
+        self.assertEqual(
+            shard_include("apps.shop", "orders"),
+            "re_path(r'^(?=orders(?:[/.]|$))', "
+            "include('apps.shop.routes.orders'))")
+
+    def test_reshard_moves_registrations_and_keeps_other_patterns(self):
+        source = (
+            "from django.urls import include, path\n"
+            "from rest_framework.routers import DefaultRouter\n"
+            "from .views import OrderViewSet, PaymentViewSet, health\n"
+            "\n"
+            "router = DefaultRouter()\n"
+            "router.register(r'orders', OrderViewSet)\n"
+            "router.register(r'payments', PaymentViewSet, basename='pay')\n"
+            "\n"
+            "urlpatterns = [\n"
+            "    path('health/', health),\n"
+            "    path('', include(router.urls)),\n"
+            "]\n"
+        )
+        new_source, routes = reshard(source, "shop")
+
+        self.assertEqual(new_source, (
+            "from django.urls import include, path, re_path\n"
+            "from .views import health\n"
+            "from .routes import api_root_view\n"
+            "\n"
+            "urlpatterns = [\n"
+            "    path('health/', health),\n"
+            f"    {API_ROOT_ENTRY},\n"
+            "    re_path(r'^(?=orders(?:[/.]|$))', include('shop.routes.orders')),\n"
+            "    re_path(r'^(?=payments(?:[/.]|$))', include('shop.routes.payments')),\n"
+            "]\n"
+        ))
+        self.assertEqual(routes, [
+            Route("orders", "OrderViewSet", "r'orders', OrderViewSet", "..views"),
+            Route("payments", "PaymentViewSet", "r'payments', PaymentViewSet, basename='pay'", "..views"),
+        ])
+
+    def test_reshard_shards_by_resource(self):
+        source = (
+            "from django.urls import include, path\n"
+            "from rest_framework.routers import SimpleRouter\n"
+            "from .views import OptionViewSet, OrderViewSet, OwnerViewSet\n"
+            "router = SimpleRouter()\n"
+            "router.register(r'orders', OrderViewSet)\n"
+            "router.register(r'orders/archived', OrderViewSet, basename='old')\n"
+            "router.register(r'options', OptionViewSet)\n"
+            "router.register(r'owners', OwnerViewSet)\n"
+            "urlpatterns = [path('', include(router.urls))]\n"
+        )
+        new_source, routes = reshard(source, "shop")
+
+        self.assertEqual([route.shard for route in routes],
+                         ["orders", "orders", "options", "owners"])
+        # A SimpleRouter has no API root to keep.
+        self.assertNotIn("api_root_view", new_source)
+        self.assertIn(
+            "urlpatterns = [\n"
+            "    re_path(r'^(?=options(?:[/.]|$))', include('shop.routes.options')),\n"
+            "    re_path(r'^(?=orders(?:[/.]|$))', include('shop.routes.orders')),\n"
+            "    re_path(r'^(?=owners(?:[/.]|$))', include('shop.routes.owners')),\n"
+            "]\n", new_source)
+        with self.assertRaisesMessage(ValueError, "'(?P<kind>\\w+)' does not start"):
+            reshard(source.replace("r'owners'", "r'(?P<kind>\\w+)'"), "shop")
+
+    def test_reshard_refuses_routers_used_elsewhere(self):
+        source = (
+            "from rest_framework.routers import DefaultRouter\n"
+            "from .views import OrderViewSet\n"
+            "router = DefaultRouter()\n"
+            "router.register(r'orders', OrderViewSet)\n"
+            "urlpatterns = router.urls\n"
+        )
+        with self.assertRaisesMessage(ValueError, "urlpatterns is not a list"):
+            reshard(source, "shop")
+        with self.assertRaisesMessage(ValueError, "'router' is used on line 6"):
+            reshard(source.replace("router.urls", "[]") + "api = router.urls\n", "shop")
+
+    def test_add_routes_skips_registered_ones(self):
+        source = CodeTemplates.URLS_SHARD
+        source, added = add_routes(source, ModuleIndex.from_source(source), [
+            Route.for_viewset("orders", "OrderViewSet"), Route.for_viewset("offers", "OfferViewSet")])
+        source, added_again = add_routes(source, ModuleIndex.from_source(source), [
+            Route.for_viewset("orders", "OrderViewSet")])
+
+        self.assertEqual(len(added), 2)
+        self.assertEqual(added_again, [])
+        self.assertIn("from ..views import OrderViewSet, OfferViewSet\n", source)
+        self.assertIn(
+            "router = SimpleRouter()\n"
+            "router.register(r'orders', OrderViewSet)\n"
+            "router.register(r'offers', OfferViewSet)\n\n", source)
+
+
+AUDITED_VIEWS = """
+from django.contrib.auth.models import Group, Permission, User
+from rest_framework import filters, serializers, viewsets
+
+
+class PermissionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Permission
+        fields = ['id', 'name', 'content_type']
+
+
+class GroupSerializer(serializers.ModelSerializer):
+    permissions = PermissionSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Group
+        fields = ['id', 'name', 'permissions']
+
+
+class GroupViewSet(viewsets.ModelViewSet):
+    queryset = Group.objects.all()
+    serializer_class = GroupSerializer
+    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    search_fields = ['name', '^name']
+    ordering_fields = '__all__'
+
+
+class PrefetchedGroupViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = Group.objects.all()
+    serializer_class = GroupSerializer
+
+    def get_queryset(self):
+        return super().get_queryset().prefetch_related('permissions')
+
+
+class UserSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = '__all__'
+"""
+
+
+class PerfAuditTests(SimpleTestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        path = Path(tmp_dir.name) / "audit_views.py"
+        path.write_text(AUDITED_VIEWS)
+        # A module of the auth app, as the audit finds the classes of an app.
+        name = "django.contrib.auth.audit_views"
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        self.addCleanup(sys.modules.pop, name)
+        spec.loader.exec_module(module)
+        self.root = tmp_dir.name
+
+    @patch("dj_cli_tools.utils.perf_audit.WIDE_TABLE_COLUMNS", 5)
+    def test_findings(self):
+        findings = audit_app("auth", self.root)
+
+        self.assertEqual(
+            sorted((f.severity, f.check, f.object, f.line) for f in findings),
+            [
+                ("error", "n-plus-one", "GroupViewSet", 20),
+                ("error", "unindexed-filter", "GroupViewSet", 20),
+                ("warning", "all-fields-wide-table", "UserSerializer", 36),
+                ("warning", "unindexed-filter", "GroupViewSet", 20),
+                ("warning", "unpaginated-list", "GroupViewSet", 20),
+                ("warning", "unpaginated-list", "PrefetchedGroupViewSet", 28),
+            ])
+        messages = {f.message for f in findings}
+        self.assertIn(
+            "GroupSerializer.permissions reads 'permissions' for every row of the list; "
+            "add .prefetch_related('permissions') to the queryset.", messages)
+        self.assertIn(
+            "search_fields 'name' matches with icontains, which no index serves; "
+            "search by prefix with '^name'.", messages)
+        self.assertEqual({f.path for f in findings}, {"audit_views.py"})
+
+
+LEGACY_SCHEMA = """
+CREATE TABLE legacy_customer (id INTEGER PRIMARY KEY, "FullName" varchar(120) NOT NULL,
+    email varchar(254) NOT NULL UNIQUE, credit decimal(8, 2) NOT NULL, notes text NULL);
+CREATE INDEX legacy_customer_name ON legacy_customer ("FullName");
+CREATE TABLE legacy_order (order_no INTEGER PRIMARY KEY,
+    customer_id integer NOT NULL REFERENCES legacy_customer (id),
+    billing integer NULL REFERENCES legacy_customer (id),
+    owner_id integer NOT NULL REFERENCES auth_user (id),
+    placed date NOT NULL, class varchar(10) NOT NULL);
+CREATE INDEX legacy_order_placed ON legacy_order (customer_id, placed DESC);
+CREATE TABLE legacy_log (message text);
+CREATE TABLE legacy_pair (a integer, b integer, PRIMARY KEY (a, b));
+CREATE VIEW legacy_names AS SELECT "FullName" FROM legacy_customer;
+"""
+
+
+class SchemaImportTests(TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        path = Path(tmp_dir.name) / "legacy.sqlite3"
+        with closing(sqlite3.connect(path)) as db:
+            db.executescript(LEGACY_SCHEMA)
+        self.connection = ConnectionHandler({
+            "default": {"ENGINE": "django.db.backends.sqlite3", "NAME": str(path)}})["default"]
+        self.addCleanup(self.connection.close)
+        self.modeled = {"auth_user": ("auth.User", "id")}
+
+    def schemas(self):
+        tables, skipped = select_tables(self.connection, ["legacy_*"], self.modeled)
+        names = model_names(list(tables), "legacy")
+        return list(read_tables(self.connection, tables, names, "legacy", self.modeled)), skipped
+
+    def test_select_tables(self):
+        tables, skipped = select_tables(self.connection, ["legacy_*"], self.modeled)
+        self.assertEqual(tables, {"legacy_customer": "id", "legacy_order": "order_no"})
+        self.assertEqual(skipped, [
+            ("legacy_log", "it has no primary key"),
+            ("legacy_names", "it is a view"),
+            ("legacy_pair", "its primary key spans several columns"),
+        ])
+        self.assertEqual(model_names(["legacy_order", "order", "2nd"], "legacy"),
+                         {"legacy_order": "Order", "order": "Order2", "2nd": "Table2Nd"})
+
+    def test_render_table(self):
+        (customer, order), _ = self.schemas()
+        self.assertEqual(render_table(customer).code, CodeTemplates.MODEL_FIELDS.format(
+            model_name="Customer",
+            fields=(
+                "    id = models.AutoField(primary_key=True)\n"
+                "    full_name = models.CharField(\n"
+                "        max_length=120,\n"
+                "        db_column='FullName',\n"
+                "        db_index=True,\n"
+                "    )\n"
+                "    email = models.CharField(max_length=254, unique=True)\n"
+                "    credit = models.DecimalField(max_digits=8, decimal_places=2)\n"
+                "    notes = models.TextField(null=True, blank=True)\n"),
+            meta="\n    class Meta:\n        db_table = 'legacy_customer'\n"))
+
+        code = render_table(order).code
+        ast.parse(code)
+        self.assertIn("    order_no = models.AutoField(primary_key=True)\n", code)
+        # Two relations to one model need their own reverse accessors.
+        self.assertIn("related_name='customer_orders'", code)
+        self.assertIn("        db_column='billing',\n        related_name='billing_orders',\n", code)
+        self.assertIn("    owner = models.ForeignKey('auth.User', on_delete=models.DO_NOTHING)\n", code)
+        self.assertIn("    class_field = models.CharField(max_length=10, db_column='class')\n", code)
+        self.assertRegex(code, r"models.Index\(fields=\['customer', '-placed'\], name='legacy_order_\w{6}_idx'\)")
+
+    def test_sqlite_pragmas_match_django_introspection(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = 'table'")
+            statements = dict(cursor.fetchall())
+            for table, primary_key in [("legacy_customer", "id"), ("legacy_order", "order_no")]:
+                with self.subTest(table):
+                    columns, foreign_keys, constraints = _read_sqlite_table(
+                        self.connection, cursor, table, primary_key, statements)
+                    expected = _read_table(self.connection, cursor, table, primary_key)
+                    # Django's SQLite introspection has no decimal sizes or index orders.
+                    self.assertEqual([column[:5] for column in columns],
+                                     [column[:5] for column in expected[0]])
+                    self.assertEqual(foreign_keys, expected[1])
+                    self.assertEqual({constraint[:2] for constraint in constraints},
+                                     {constraint[:2] for constraint in expected[2]})
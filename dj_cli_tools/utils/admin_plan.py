@@ -0,0 +1,118 @@
+"""Admin options that keep the changelist usable on large tables.
+
+A bare ``ModelAdmin`` counts the whole table twice per changelist page,
+renders every row of a related table into each ForeignKey dropdown and
+searches with ``icontains``, which no B-tree index can serve.
+:func:`plan_admin` reads the model's ``_meta`` and returns the options that
+avoid each of those: ``list_select_related`` for the forward relations,
+autocomplete or raw-id widgets instead of dropdowns and ``search_fields``
+on indexed text columns only. The generated admin also turns off the full
+result count and pages through an estimated-count paginator.
+
+Only model classes are passed in, so importing this module does not import
+Django.
+"""
+from __future__ import annotations
+
+from typing import Collection, List, NamedTuple
+
+from .field_specs import FieldSpec
+from .filtering import TEXT_TYPES, indexed_field_names
+from .symbol_index import MAX_LINE_LENGTH
+
+
+class AdminPlan(NamedTuple):
+    """Relation widgets and search fields of one model's admin."""
+
+    list_select_related: List[str]
+    autocomplete_fields: List[str]
+    raw_id_fields: List[str]
+    search_fields: List[str]
+
+
+def plan_admin(model, admin_site=None) -> AdminPlan:
+    """Plan the admin options of ``model``.
+
+    Relations to models registered on ``admin_site`` with ``search_fields``
+    get autocomplete widgets, the others raw-id inputs. Text columns that
+    lead an index (see :func:`~dj_cli_tools.utils.filtering.indexed_field_names`)
+    are searched with ``startswith``, which that index can serve.
+    """
+    opts = model._meta.concrete_model._meta
+    list_select_related: List[str] = []
+    autocomplete_fields: List[str] = []
+    raw_id_fields: List[str] = []
+    search_fields: List[str] = []
+    indexed = indexed_field_names(model)
+
+    for field in opts.get_fields():
+        if field.auto_created and not field.concrete:
+            continue
+        if field.is_relation:
+            if field.related_model is None or not field.editable:
+                continue
+            if field.many_to_one or field.one_to_one:
+                list_select_related.append(field.name)
+            if _has_search(admin_site, field.related_model):
+                autocomplete_fields.append(field.name)
+            else:
+                raw_id_fields.append(field.name)
+        elif field.get_internal_type() in TEXT_TYPES and field.name in indexed:
+            search_fields.append(f"{field.name}__startswith")
+    return AdminPlan(list_select_related, autocomplete_fields, raw_id_fields, search_fields)
+
+
+def plan_admin_specs(specs: List[FieldSpec], leading: Collection[str] = ()) -> AdminPlan:
+    """Plan the admin options of a model that is not loaded yet, from its
+    field specs. Relations get raw-id inputs; indexed text fields and those
+    in ``leading``, which lead a composite index, are searched."""
+    list_select_related: List[str] = []
+    raw_id_fields: List[str] = []
+    search_fields: List[str] = []
+    for spec in specs:
+        if spec.type in ("fk", "o2o"):
+            list_select_related.append(spec.name)
+        if spec.target:
+            raw_id_fields.append(spec.name)
+        elif spec.field_class in TEXT_TYPES and (spec.indexed or spec.name in leading):
+            search_fields.append(f"{spec.name}__startswith")
+    return AdminPlan(list_select_related, [], raw_id_fields, search_fields)
+
+
+def _has_search(admin_site, model) -> bool:
+    if admin_site is None:
+        return False
+    try:
+        model_admin = admin_site.get_model_admin(model)
+    except Exception:
+        # django.contrib.admin.exceptions.NotRegistered
+        return False
+    return bool(model_admin.search_fields)
+
+
+def admin_options_code(plan: AdminPlan, indent: int = 4) -> str:
+    """Class body lines for the non-empty options of ``plan``."""
+    prefix = " " * indent
+    lines = []
+    for name, values in plan._asdict().items():
+        if values:
+            lines.append(f"{prefix}{name} = {_tuple(values, prefix, name)}")
+    return "\n".join(lines) + ("\n" if lines else "")
+
+
+def _tuple(names: List[str], prefix: str, name: str) -> str:
+    quoted = [f"'{value}'" for value in names]
+    if len(quoted) == 1:
+        return f"({quoted[0]},)"
+    code = f"({', '.join(quoted)})"
+    if len(prefix) + len(f"{name} = ") + len(code) <= MAX_LINE_LENGTH:
+        return code
+    return "(\n" + "".join(f"{prefix}    {value},\n" for value in quoted) + f"{prefix})"
+
+
+__all__ = [
+    "AdminPlan",
+    "admin_options_code",
+    "plan_admin",
+    "plan_admin_specs",
+]
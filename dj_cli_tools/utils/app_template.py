@@ -0,0 +1,231 @@
+"""App templates compiled once and rendered for many apps.
+
+Django's ``TemplateCommand`` walks the template directory and compiles and
+renders every file for a single app per call. :class:`AppTemplate` walks
+the directory -- or reads a template pack -- and compiles each renderable
+file once; the files of any number of apps are then rendered and written on
+a thread pool.
+"""
+from __future__ import annotations
+
+import os
+import posixpath
+import shutil
+import stat
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from . import timings
+
+IGNORED_SUFFIXES = (".pyo", ".pyc", ".py.class")
+
+
+class TemplateFile(NamedTuple):
+    """One file of the template tree; ``template`` is None for verbatim copies.
+
+    Files read from a pack carry their bytes and mode; files of a template
+    directory are copied from, and take their mode from, ``source``.
+    """
+
+    source: str
+    relative_dir: str
+    filename: str
+    template: Any
+    content: Optional[bytes] = None
+    mode: Optional[int] = None
+
+
+def _target_name(filename: str, rewrite_template_suffixes) -> str:
+    for old_suffix, new_suffix in rewrite_template_suffixes:
+        if filename.endswith(old_suffix):
+            return filename.removesuffix(old_suffix) + new_suffix
+    return filename
+
+
+def current_umask() -> int:
+    # os.umask() can only be read by setting it; do that once, on the main
+    # thread, rather than from the writer threads.
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+class AppTemplate:
+    """A template directory walked and compiled once, rendered per app."""
+
+    def __init__(
+        self,
+        files: Sequence[TemplateFile],
+        directories: Sequence[str] = (),
+        base_name: str = "app_name",
+    ):
+        self.files = list(files)
+        self.directories = list(directories)
+        self.base_name = base_name
+
+    @classmethod
+    def compile(
+        cls,
+        template_dir: str,
+        extensions: Iterable[str],
+        extra_files: Iterable[str] = (),
+        excluded_directories: Optional[Iterable[str]] = None,
+        rewrite_template_suffixes: Sequence[Tuple[str, str]] = ((".py-tpl", ".py"),),
+        base_name: str = "app_name",
+    ) -> "AppTemplate":
+        """Walk ``template_dir`` like ``TemplateCommand`` and compile its files.
+
+        ``excluded_directories`` of None skips hidden directories and
+        ``__pycache__``, the default of ``startapp`` without ``--exclude``.
+        """
+        from django.template import Engine
+
+        engine = Engine()
+        extensions = tuple(extensions)
+        extra_files = set(extra_files)
+        excluded = set(excluded_directories) if excluded_directories is not None else None
+        prefix_length = len(template_dir) + 1
+
+        files: List[TemplateFile] = []
+        directories: List[str] = []
+        for root, dirs, filenames in os.walk(template_dir):
+            if root[prefix_length:]:
+                directories.append(root[prefix_length:])
+            dirs[:] = sorted(
+                d for d in dirs
+                if not (
+                    (excluded is None and (d.startswith(".") or d == "__pycache__"))
+                    or (excluded is not None and d in excluded)
+                )
+            )
+            for filename in sorted(filenames):
+                if filename.endswith(IGNORED_SUFFIXES):
+                    continue
+                source = os.path.join(root, filename)
+                target_name = _target_name(filename, rewrite_template_suffixes)
+
+                template = None
+                if target_name.endswith(extensions) or filename in extra_files:
+                    with open(source, encoding="utf-8") as template_file:
+                        content = template_file.read()
+                    timings.record_read(source, len(content.encode("utf-8")))
+                    template = engine.from_string(content)
+                files.append(TemplateFile(source, root[prefix_length:], target_name, template))
+        return cls(files, directories, base_name)
+
+    @classmethod
+    def from_pack(
+        cls,
+        pack,
+        extensions: Iterable[str],
+        extra_files: Iterable[str] = (),
+        excluded_directories: Optional[Iterable[str]] = None,
+        rewrite_template_suffixes: Sequence[Tuple[str, str]] = ((".py-tpl", ".py"),),
+        base_name: str = "app_name",
+    ) -> "AppTemplate":
+        """Compile the files of a :class:`~.template_packs.TemplatePack`."""
+        from django.template import Engine
+
+        engine = Engine()
+        extensions = tuple(extensions)
+        extra_files = set(extra_files)
+        excluded = set(excluded_directories) if excluded_directories is not None else None
+
+        def skipped(relative_dir: str) -> bool:
+            parts = relative_dir.split("/") if relative_dir else []
+            if excluded is None:
+                return any(p.startswith(".") or p == "__pycache__" for p in parts)
+            return any(p in excluded for p in parts)
+
+        files: List[TemplateFile] = []
+        for entry, data in pack.read_all():
+            timings.record_read(pack.path, len(data))
+            relative_dir, filename = posixpath.split(entry.path)
+            if skipped(relative_dir) or filename.endswith(IGNORED_SUFFIXES):
+                continue
+            target_name = _target_name(filename, rewrite_template_suffixes)
+            template = None
+            if target_name.endswith(extensions) or filename in extra_files:
+                template = engine.from_string(data.decode("utf-8"))
+            files.append(TemplateFile(
+                f"{pack.path}:{entry.path}", relative_dir.replace("/", os.sep), target_name,
+                template, None if template is not None else data, entry.mode))
+        directories = [
+            d.replace("/", os.sep) for d in pack.directories if not skipped(d)]
+        return cls(files, directories, base_name)
+
+    def target_path(self, file: TemplateFile, name: str, top_dir: str) -> str:
+        return os.path.join(
+            top_dir,
+            file.relative_dir.replace(self.base_name, name),
+            file.filename.replace(self.base_name, name),
+        )
+
+    def render(
+        self,
+        apps: Dict[str, Tuple[str, Dict[str, Any]]],
+        max_workers: Optional[int] = None,
+    ) -> List[str]:
+        """Write the files of every ``name -> (top_dir, context)`` in ``apps``.
+
+        The top directories must exist; sub-directories are created here
+        before any file is written. Nothing is written if a target file
+        already exists. Returns the written paths in template order, app by
+        app.
+        """
+        from django.template import Context
+
+        jobs = []
+        for name, (top_dir, context) in apps.items():
+            jobs.extend(
+                (file, self.target_path(file, name, top_dir), context)
+                for file in self.files)
+        existing = [target for _, target, _ in jobs if os.path.exists(target)]
+        if existing:
+            raise FileExistsError(
+                f"{', '.join(existing)} already exist{'s' if len(existing) == 1 else ''}.")
+
+        for name, (top_dir, _) in apps.items():
+            for directory in self.directories:
+                os.makedirs(
+                    os.path.join(top_dir, directory.replace(self.base_name, name)),
+                    exist_ok=True)
+
+        umask = current_umask()
+        # Worker threads do not see the caller's context; report through
+        # the recorder directly.
+        recorder = timings.active()
+
+        def write(job):
+            file, target, context = job
+            if file.content is not None:
+                with open(target, "wb") as new_file:
+                    size = new_file.write(file.content)
+            elif file.template is None:
+                shutil.copyfile(file.source, target)
+                size = os.path.getsize(target)
+            else:
+                # A Context is mutated while rendering, so each file gets its own.
+                content = file.template.render(Context(context, autoescape=False))
+                with open(target, "w", encoding="utf-8") as new_file:
+                    new_file.write(content)
+                size = len(content.encode("utf-8"))
+            if recorder is not None:
+                recorder.record_write(target, size)
+            try:
+                mode = file.mode if file.mode is not None else stat.S_IMODE(os.stat(file.source).st_mode)
+                mode &= ~umask
+                os.chmod(target, mode | stat.S_IWUSR)
+            except OSError:
+                # Permission bits are best effort, as in TemplateCommand.
+                pass
+            return target
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return list(pool.map(write, jobs))
+
+
+__all__ = [
+    "AppTemplate",
+    "TemplateFile",
+]
@@ -6,7 +6,8 @@ backwards compatibility.
 from __future__ import annotations
 
 import re
-from typing import List
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Tuple
 
 
 class CaseUtils:
@@ -25,58 +26,130 @@ class CaseUtils:
         [A-Z]+                  # remaining ALLCAPS words
     """, re.VERBOSE)
 
+    # Bounded so long batch runs over many identifiers cannot grow it forever.
+    CACHE_SIZE = 4096
+
+    STYLES = ("pascal", "camel", "snake", "kebab", "title", "constant", "sentence")
+
     @staticmethod
     def _split_into_words(s: str) -> List[str]:
-        if not s:
-            return []
-        s = re.sub(r"[_\-\s]+", " ", s).strip()
-        if " " in s:
-            tokens: List[str] = []
-            for token in s.split():
-                tokens.extend(CaseUtils._WORD_RE.findall(token) or [token])
-            return tokens
-        found = CaseUtils._WORD_RE.findall(s)
-        return found or re.findall(r"\w+", s)
+        return list(_split(s))
 
     @staticmethod
     def to_pascal_case(s: str) -> str:
-        parts = CaseUtils._split_into_words(s)
-        return "".join(p.capitalize() for p in parts)
+        return _convert(s, "pascal")
 
     @staticmethod
     def to_camel_case(s: str) -> str:
-        pascal = CaseUtils.to_pascal_case(s)
-        if not pascal:
-            return pascal
-        return pascal[0].lower() + pascal[1:]
+        return _convert(s, "camel")
 
     @staticmethod
     def to_snake_case(s: str) -> str:
-        parts = CaseUtils._split_into_words(s)
-        return "_".join(p.lower() for p in parts)
+        return _convert(s, "snake")
 
     @staticmethod
     def to_kebab_case(s: str) -> str:
-        parts = CaseUtils._split_into_words(s)
-        return "-".join(p.lower() for p in parts)
+        return _convert(s, "kebab")
 
     @staticmethod
     def to_title_case(s: str) -> str:
-        parts = CaseUtils._split_into_words(s)
-        return " ".join(p.capitalize() for p in parts)
+        return _convert(s, "title")
 
     @staticmethod
     def to_constant_case(s: str) -> str:
-        parts = CaseUtils._split_into_words(s)
-        return "_".join(p.upper() for p in parts)
+        return _convert(s, "constant")
 
     @staticmethod
     def to_sentence_case(s: str) -> str:
-        parts = CaseUtils._split_into_words(s)
-        if not parts:
-            return s
-        sentence = " ".join(p.lower() for p in parts)
-        return sentence[0].upper() + sentence[1:]
+        return _convert(s, "sentence")
+
+    @staticmethod
+    def convert_many(
+        names: Iterable[str], styles: Iterable[str] = STYLES
+    ) -> Dict[str, Dict[str, str]]:
+        """Return ``{name: {style: converted}}`` for every name and style.
+
+        Each name is split once, however many styles are requested::
+
+            >>> CaseUtils.convert_many(["order_line"], ["pascal", "kebab"])
+            {'order_line': {'pascal': 'OrderLine', 'kebab': 'order-line'}}
+        """
+        styles = tuple(styles)
+        unknown = [style for style in styles if style not in _JOINERS]
+        if unknown:
+            raise ValueError(
+                f"Unknown case style(s): {', '.join(unknown)}. "
+                f"Expected any of: {', '.join(CaseUtils.STYLES)}.")
+        result: Dict[str, Dict[str, str]] = {}
+        for name in names:
+            if name in result:
+                continue
+            words = _split(name)
+            result[name] = {style: _join(name, words, style) for style in styles}
+        return result
+
+    @staticmethod
+    def cache_clear() -> None:
+        _split.cache_clear()
+
+
+def _pascal(words: Tuple[str, ...]) -> str:
+    return "".join(map(str.capitalize, words))
+
+
+def _camel(words: Tuple[str, ...]) -> str:
+    pascal = _pascal(words)
+    return pascal[:1].lower() + pascal[1:]
+
+
+def _sentence(words: Tuple[str, ...]) -> str:
+    sentence = " ".join(words).lower()
+    return sentence[:1].upper() + sentence[1:]
+
+
+_JOINERS: Dict[str, Callable[[Tuple[str, ...]], str]] = {
+    "pascal": _pascal,
+    "camel": _camel,
+    "snake": lambda words: "_".join(words).lower(),
+    "kebab": lambda words: "-".join(words).lower(),
+    "title": lambda words: " ".join(map(str.capitalize, words)),
+    "constant": lambda words: "_".join(words).upper(),
+    "sentence": _sentence,
+}
+
+_SEPARATORS_RE = re.compile(r"[_\-\s]+")
+# A separated token without any ASCII letter or digit, e.g. "é".
+_BARE_TOKEN_RE = re.compile(r"(?:^| )[^A-Za-z0-9 ]+(?= |$)")
+# Runs of word characters, for a name without any ASCII word.
+_FALLBACK_RE = re.compile(r"\w+")
+
+
+@lru_cache(maxsize=CaseUtils.CACHE_SIZE)
+def _split(s: str) -> Tuple[str, ...]:
+    if not s:
+        return ()
+    s = _SEPARATORS_RE.sub(" ", s).strip()
+    if " " not in s:
+        return tuple(CaseUtils._WORD_RE.findall(s) or _FALLBACK_RE.findall(s))
+    if _BARE_TOKEN_RE.search(s):
+        # Tokens _WORD_RE finds nothing in are words as they are.
+        words: List[str] = []
+        for token in s.split():
+            words.extend(CaseUtils._WORD_RE.findall(token) or [token])
+        return tuple(words)
+    # Spaces never match _WORD_RE and its lookahead only looks at letters,
+    # so one scan of the whole string finds the words of every token.
+    return tuple(CaseUtils._WORD_RE.findall(s))
+
+
+def _join(s: str, words: Tuple[str, ...], style: str) -> str:
+    if not words and style == "sentence":
+        return s
+    return _JOINERS[style](words)
+
+
+def _convert(s: str, style: str) -> str:
+    return _join(s, _split(s), style)
 
 
 __all__ = [
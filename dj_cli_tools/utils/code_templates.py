@@ -5,6 +5,309 @@ class {model_name}(models.Model):
     pass
 """
 
+    MODEL_FIELDS = """
+class {model_name}(models.Model):
+{fields}{meta}"""
+
+    # Cursor pagination orders by the creation time, with the primary key
+    # breaking ties, and the model gets an index matching that ordering.
+    CURSOR_FIELD = "created_at"
+    CURSOR_FIELD_SPEC = "created_at:datetime:auto"
+    CURSOR_ORDERING_FIELDS = ("-created_at", "-id")
+    CURSOR_ORDERING = repr(CURSOR_ORDERING_FIELDS)
+    CURSOR_PAGINATION_NAME = "DefaultCursorPagination"
+
+    CURSOR_PAGINATION = """
+class {pagination_name}(CursorPagination):
+    # Pages are read with an indexed range scan on the ordering instead of
+    # COUNT(*) and OFFSET, so deep pages cost the same as the first one.
+    ordering = {ordering}
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+"""
+
+    PAGINATION_IMPORT = "from rest_framework.pagination import CursorPagination"
+
+    # Cached responses are invalidated through post_save and post_delete
+    # handlers, and detail responses carry the row's modification time.
+    CACHE_FIELD = "updated_at"
+    CACHE_FIELD_SPEC = "updated_at:datetime:auto_now"
+    CACHE_TIMEOUT = 300
+    CACHE_MIXIN_NAME = "ConditionalCacheMixin"
+
+    CACHE_MIXIN = """
+def cache_key(model, *parts):
+    return ':'.join(['responses', model._meta.label_lower, *map(str, parts)])
+
+
+def cache_version(model, *parts):
+    \"\"\"The current version token of a cached response, made on first use.\"\"\"
+    return cache.get_or_set(cache_key(model, 'version', *parts), uuid4().hex, None)
+
+
+def invalidate_cached_responses(model, pk):
+    \"\"\"Retire the cached detail response of row ``pk`` and every cached
+    list response of ``model``, with their ETags.\"\"\"
+    token = uuid4().hex
+    cache.set_many({
+        cache_key(model, 'version', 'list'): token,
+        cache_key(model, 'version', 'detail', pk): token,
+    }, None)
+
+
+class ConditionalCacheMixin:
+    \"\"\"Conditional GET and response caching for a ModelViewSet.
+
+    List and detail responses carry an ETag made of a version token that
+    :func:`invalidate_cached_responses` replaces whenever a row is saved
+    or deleted, and detail responses a Last-Modified from
+    ``last_modified_field``. Requests whose ``If-None-Match`` or
+    ``If-Modified-Since`` still match get a 304; ``If-None-Match`` is
+    answered without querying the database.
+
+    With ``cache_timeout`` set, serialized responses are kept in Django's
+    cache under their version token, so repeated reads skip the queries and
+    the serializer. Cached responses are shared by every user: don't use
+    this where results depend on ``request.user`` or on object permissions.
+    Detail routes must look rows up by primary key.
+    \"\"\"
+
+    cache_timeout = 300
+    last_modified_field = 'updated_at'
+
+    def list(self, request, *args, **kwargs):
+        model = self.get_queryset().model
+        version = cache_version(model, 'list')
+        url = request.build_absolute_uri().encode()
+        etag = f'W/"{version}-{hashlib.md5(url, usedforsecurity=False).hexdigest()}"'
+        not_modified = self.not_modified(request, etag)
+        if not_modified is not None:
+            return not_modified
+        key = cache_key(model, 'list', etag)
+        data = cache.get(key) if self.cache_timeout else None
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            if self.cache_timeout:
+                cache.set(key, data, self.cache_timeout)
+        return Response(data, headers={'ETag': etag})
+
+    def retrieve(self, request, *args, **kwargs):
+        if self.lookup_field != 'pk':
+            return super().retrieve(request, *args, **kwargs)
+        model = self.get_queryset().model
+        try:
+            # '05' and '5' are the same row, and its signal handler's key.
+            pk = model._meta.pk.to_python(self.kwargs[self.lookup_url_kwarg or 'pk'])
+        except ValidationError:
+            return super().retrieve(request, *args, **kwargs)
+        version = cache_version(model, 'detail', pk)
+        etag = f'W/"{version}"'
+        not_modified = self.not_modified(request, etag)
+        if not_modified is not None:
+            return not_modified
+        key = cache_key(model, 'detail', etag)
+        entry = cache.get(key) if self.cache_timeout else None
+        if entry is None:
+            instance = self.get_object()
+            modified = getattr(instance, self.last_modified_field, None)
+            entry = (
+                self.get_serializer(instance).data,
+                int(modified.timestamp()) if modified else None,
+            )
+            if self.cache_timeout:
+                cache.set(key, entry, self.cache_timeout)
+        data, last_modified = entry
+        not_modified = self.not_modified(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        headers = {'ETag': etag}
+        if last_modified is not None:
+            headers['Last-Modified'] = http_date(last_modified)
+        return Response(data, headers=headers)
+
+    def not_modified(self, request, etag, last_modified=None):
+        \"\"\"A 304 response if the request's validators still match, else None.\"\"\"
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            response['ETag'] = etag
+        return response
+"""
+
+    CACHE_IMPORTS = """import hashlib
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response"""
+
+    CACHE_SIGNALS = """
+@receiver([post_save, post_delete], sender={model_name}, dispatch_uid='{label}.{model_name}.responses')
+def invalidate_{snake_name}_responses(sender, instance, **kwargs):
+    invalidate_cached_responses(sender, instance.pk)
+    # Again once the transaction commits, in case a concurrent request
+    # cached the old row in between.
+    transaction.on_commit(partial(invalidate_cached_responses, sender, instance.pk))
+"""
+
+    CACHE_SIGNALS_IMPORTS = """from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .caching import invalidate_cached_responses"""
+
+    APP_READY_SIGNALS = """
+    def ready(self):
+        from . import signals  # noqa: F401"""
+
+    CACHE_API_TESTS = """
+@override_settings(ROOT_URLCONF='{urlconf}', CACHES={{'default': {{
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': '{test_name}',
+}}}})
+class {test_name}(TestCase):
+    \"\"\"Conditional GETs and cached responses of {viewset_name}.\"\"\"
+
+    def test_detail_is_not_modified_until_saved(self):
+        instance = {model_name}Factory.create()
+        url = reverse('{basename}-detail', args=[instance.pk])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, headers={{'If-None-Match': etag}})
+        self.assertEqual(response.status_code, 304)
+
+        instance.save()
+        response = self.client.get(url, headers={{'If-None-Match': etag}})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_list_is_cached_until_a_row_is_deleted(self):
+        instance = {model_name}Factory.create()
+        url = reverse('{basename}-list')
+        response = self.client.get(url)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).content, response.content)
+
+        instance.delete()
+        deleted = self.client.get(url)
+        self.assertNotEqual(deleted.headers['ETag'], response.headers['ETag'])
+"""
+
+    # Each endpoint is requested with one row seeded and again with `rows`
+    # rows; the second request gets the query count of the first as its
+    # budget, so a relation that is neither joined nor prefetched fails.
+    QUERY_BUDGET_MIXIN_NAME = "QueryBudgetMixin"
+    QUERY_BUDGET_MIXIN = """
+class QueryBudgetMixin:
+    \"\"\"Query budgets and response times of a viewset's list, detail and
+    create endpoints.
+
+    The response times of the requests made with `rows` rows are merged
+    into the JSON file named by the QUERY_BUDGET_REPORT environment
+    variable (default query_budgets.json), for CI to keep as an artifact.
+    \"\"\"
+
+    factory = None
+    serializer_class = None
+    basename = ''
+    rows = 25
+    # A smoke test for endpoints gone pathologically slow, not a benchmark.
+    max_response_ms = 1000
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.timings = {}
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        if not cls.timings:
+            return
+        path = Path(os.environ.get('QUERY_BUDGET_REPORT', 'query_budgets.json'))
+        try:
+            report = json.loads(path.read_text())
+        except (OSError, ValueError):
+            report = {}
+        report[f'{cls.__module__}.{cls.__qualname__}'] = cls.timings
+        path.write_text(json.dumps(report, indent=2, sort_keys=True) + '\\n')
+
+    def test_list_query_budget(self):
+        self.factory.create()
+        url = reverse(f'{self.basename}-list')
+        self.assertQueryBudget('list', lambda: self.client.get(url))
+
+    def test_detail_query_budget(self):
+        instance = self.factory.create()
+        url = reverse(f'{self.basename}-detail', args=[instance.pk])
+        self.assertQueryBudget('detail', lambda: self.client.get(url))
+
+    def test_create_query_budget(self):
+        self.factory.create()
+        url = reverse(f'{self.basename}-list')
+        payloads = [self.payload(), self.payload()]
+        self.assertQueryBudget('create', lambda: self.client.post(
+            url, payloads.pop(), content_type='application/json'))
+
+    def payload(self):
+        \"\"\"Request data for a new row: a seeded row, serialized and deleted
+        again so that its unique values are free.\"\"\"
+        instance = self.factory.create()
+        data = self.serializer_class(instance).data
+        instance.delete()
+        return data
+
+    def assertQueryBudget(self, endpoint, request):
+        budget, _ = self.measure(request)
+        self.factory.create_batch(self.rows - 1)
+        with self.assertNumQueries(budget):
+            _, elapsed_ms = self.measure(request)
+        self.timings[endpoint] = {
+            'rows': self.rows, 'queries': budget, 'ms': round(elapsed_ms, 3)}
+        self.assertLess(elapsed_ms, self.max_response_ms,
+                        f'{endpoint} took {elapsed_ms:.0f} ms with {self.rows} rows')
+
+    def measure(self, request):
+        \"\"\"The number of queries ``request()`` makes and its time in ms.\"\"\"
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = request()
+            elapsed_ms = (time.perf_counter() - started) * 1000
+        self.assertLess(response.status_code, 300, response.content)
+        return len(queries), elapsed_ms
+"""
+
+    QUERY_BUDGET_MIXIN_IMPORTS = """import json
+import os
+import time
+from pathlib import Path
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse"""
+
+    # Budgets are for the queries of uncached responses; CACHE_API_TESTS
+    # covers the cached ones.
+    QUERY_BUDGET_CACHE_SETTINGS = """, CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}"""
+
+    QUERY_BUDGET_TESTS = """
+@override_settings(ROOT_URLCONF='{urlconf}'{cache_settings})
+class {test_name}(QueryBudgetMixin, TestCase):
+    \"\"\"Query budgets of {viewset_name}.\"\"\"
+
+    factory = {model_name}Factory
+    serializer_class = {model_name}Serializer
+    basename = '{basename}'
+"""
+
     SERIALIZER = """
 class {serializer_name}(serializers.ModelSerializer):
     class Meta:
@@ -12,24 +315,287 @@ class {serializer_name}(serializers.ModelSerializer):
         fields = '__all__'
 """
 
+    SERIALIZER_FIELDS = """
+class {serializer_name}(serializers.ModelSerializer):
+{declarations}    class Meta:
+        model = {model_name}
+        fields = {fields}
+"""
+
     VIEWSET = """
-class {viewset_name}(viewsets.ModelViewSet):
+class {viewset_name}({bases}):
     queryset = {model_name}.objects.all()
     serializer_class = {serializer_name}
 """
 
+    VIEWSET_QUERYSET = """
+class {viewset_name}({bases}):
+    queryset = {queryset}
+    serializer_class = {serializer_name}
+"""
+
+    VIEWSET_ASYNC = """
+class {viewset_name}(AsyncModelViewSet):
+    queryset = {queryset}
+    serializer_class = {serializer_name}
+"""
+
+    ASYNC_VIEWSET_NAME = "AsyncModelViewSet"
+
+    # Also the body of dj_templates/simple_drf_async/views.py-tpl.
+    ASYNC_VIEWSET = """
+class AsyncModelViewSet(AsyncViewSet):
+    \"\"\"Model CRUD actions on Django's async ORM, for ASGI deployments.
+
+    Reads use ``aget``, ``acount`` and async iteration, so a request waiting
+    on the database does not hold a worker thread. Validators and
+    ``serializer.save()`` query the database synchronously and run through
+    ``sync_to_async``. Many-to-many fields are prefetched, so serializing
+    the results does not query the database from the event loop.
+    \"\"\"
+
+    queryset = None
+    serializer_class = None
+    page_size = 50
+    max_page_size = 500
+
+    def get_queryset(self):
+        queryset = self.queryset.all()
+        many_to_many = [field.name for field in queryset.model._meta.many_to_many]
+        return queryset.prefetch_related(*many_to_many) if many_to_many else queryset
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('context', {'request': self.request, 'view': self})
+        return self.serializer_class(*args, **kwargs)
+
+    async def get_object(self, pk):
+        try:
+            return await self.get_queryset().aget(pk=pk)
+        except (ObjectDoesNotExist, ValueError, ValidationError):
+            raise NotFound()
+
+    def page_bounds(self, request):
+        try:
+            limit = int(request.query_params.get('limit', self.page_size))
+            offset = int(request.query_params.get('offset', 0))
+        except ValueError:
+            raise ParseError('limit and offset must be integers.')
+        return max(offset, 0), min(max(limit, 1), self.max_page_size)
+
+    async def list(self, request):
+        queryset = self.get_queryset()
+        if not queryset.ordered:
+            queryset = queryset.order_by('pk')
+        offset, limit = self.page_bounds(request)
+        results = [instance async for instance in queryset[offset:offset + limit]]
+        return Response({
+            'count': await queryset.acount(),
+            'results': self.get_serializer(results, many=True).data,
+        })
+
+    async def retrieve(self, request, pk=None):
+        instance = await self.get_object(pk)
+        return Response(self.get_serializer(instance).data)
+
+    async def create(self, request):
+        serializer = self.get_serializer(data=request.data)
+        data = await sync_to_async(self.save)(serializer)
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    async def update(self, request, pk=None, partial=False):
+        instance = await self.get_object(pk)
+        serializer = self.get_serializer(instance, data=request.data, partial=partial)
+        return Response(await sync_to_async(self.save)(serializer))
+
+    async def partial_update(self, request, pk=None):
+        return await self.update(request, pk, partial=True)
+
+    async def destroy(self, request, pk=None):
+        instance = await self.get_object(pk)
+        await instance.adelete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def save(self, serializer):
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return serializer.data
+"""
+
+    ASYNC_VIEWSET_IMPORTS = """from adrf.viewsets import ViewSet as AsyncViewSet
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from rest_framework import status
+from rest_framework.exceptions import NotFound, ParseError
+from rest_framework.response import Response"""
+
+    ASYNC_API_TESTS = """
+@override_settings(ROOT_URLCONF='{urlconf}')
+class {test_name}(TestCase):
+    \"\"\"Drives {viewset_name} through Django's ASGI request handler.\"\"\"
+
+    async def test_list_retrieve_destroy(self):
+        instance = await sync_to_async({model_name}Factory.create)()
+        response = await self.async_client.get(reverse('{basename}-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 1)
+
+        detail_url = reverse('{basename}-detail', args=[instance.pk])
+        response = await self.async_client.get(detail_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['id'], instance.pk)
+
+        response = await self.async_client.delete(detail_url)
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(await {model_name}.objects.filter(pk=instance.pk).aexists())
+
+    async def test_concurrent_requests(self):
+        await sync_to_async({model_name}Factory.create_batch)(3)
+        responses = await asyncio.gather(
+            *(self.async_client.get(reverse('{basename}-list')) for _ in range(10)))
+        self.assertEqual({{response.status_code for response in responses}}, {{200}})
+"""
+
+    VIEWSET_FAST_LIST = """
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            # Plain rows for the fast serializer, without model instances.
+            return queryset.values(*{fast_serializer_name}.columns)
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return {fast_serializer_name}
+        return super().get_serializer_class()
+"""
+
+    SERIALIZER_BENCHMARK_MIXIN_NAME = "SerializerBenchmarkMixin"
+
+    SERIALIZER_BENCHMARK_MIXIN = """
+class SerializerBenchmarkMixin:
+    \"\"\"Times the ModelSerializer of a model against its fast list serializer
+    on factory-built rows. Not collected by the default test discovery; run
+    it with ``python manage.py test <app>.bench_serializers``.
+    \"\"\"
+
+    factory = None
+    serializer_class = None
+    fast_serializer_class = None
+    rows = 1000
+    repeat = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.factory.create_batch(cls.rows)
+
+    def best_of(self, serialize):
+        timings = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            serialize()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    def test_fast_serializer(self):
+        model = self.factory._meta.model
+        queryset = model.objects.order_by('pk')
+        columns = self.fast_serializer_class.columns
+        full = self.serializer_class(queryset, many=True).data
+        fast = self.fast_serializer_class(queryset.values(*columns), many=True).data
+        for full_row, fast_row in zip(full, fast):
+            self.assertEqual({key: full_row[key] for key in fast_row}, dict(fast_row))
+
+        model_time = self.best_of(lambda: self.serializer_class(queryset, many=True).data)
+        fast_time = self.best_of(
+            lambda: self.fast_serializer_class(queryset.values(*columns), many=True).data)
+        print(f"\\n{model.__name__} x {self.rows}: "
+              f"{self.serializer_class.__name__} {model_time * 1000:.1f} ms, "
+              f"{self.fast_serializer_class.__name__} {fast_time * 1000:.1f} ms "
+              f"({model_time / fast_time:.1f}x)")
+"""
+
+    SERIALIZER_BENCHMARK = """
+class {benchmark_name}(SerializerBenchmarkMixin, TestCase):
+    factory = {model_name}Factory
+    serializer_class = {model_name}Serializer
+    fast_serializer_class = {model_name}FastSerializer
+"""
+
     FACTORY = """
 class {factory_name}(factory.django.DjangoModelFactory):
     class Meta:
         model = {model_name}
 """
 
+    FACTORY_FIELDS = """
+class {factory_name}(factory.django.DjangoModelFactory):
+    class Meta:
+        model = {model_name}
+{meta_options}
+{declarations}"""
+
+    # The post_generation hooks of many-to-many fields only call set().
+    FACTORY_SKIP_SAVE = "        skip_postgeneration_save = True\n"
+
     ADMIN = """
 @admin.register({model_name})
 class {model_name}Admin(admin.ModelAdmin):
-    pass
+{options}    show_full_result_count = False
+    paginator = {paginator_name}
 """
 
+    ADMIN_PAGINATOR_NAME = "EstimatedCountPaginator"
+
+    ADMIN_PAGINATOR = """
+class {paginator_name}(Paginator):
+    \"\"\"Takes the changelist count of large tables from the planner
+    statistics instead of running COUNT(*) over the whole table.
+
+    PostgreSQL estimates any queryset with EXPLAIN, MySQL only unfiltered
+    ones from information_schema. Other databases, and estimates below
+    ``exact_count_below``, fall back to the exact count.
+    \"\"\"
+
+    exact_count_below = 100000
+
+    @cached_property
+    def count(self):
+        estimate = self._estimated_count()
+        if estimate is None or estimate < self.exact_count_below:
+            return super().count
+        return estimate
+
+    def _estimated_count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is None:
+            return None
+        connection = connections[self.object_list.db]
+        if connection.vendor == 'postgresql':
+            sql, params = query.get_compiler(connection=connection).as_sql()
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+                plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]['Plan']['Plan Rows'])
+        if connection.vendor == 'mysql' and not query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT table_rows FROM information_schema.tables '
+                    'WHERE table_schema = DATABASE() AND table_name = %s',
+                    [query.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            return None if row is None or row[0] is None else int(row[0])
+        return None
+"""
+
+    ADMIN_PAGINATOR_IMPORTS = """import json
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property"""
+
     URLS_INITIAL = """from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
@@ -43,3 +609,92 @@ urlpatterns = [
     URLS_ROUTER_DEF = "\nrouter = DefaultRouter()\n"
     
     URLS_ROUTER_IMPORT = "from rest_framework.routers import DefaultRouter\n"
+
+    URLS_SHARDED_INITIAL = """from django.urls import include, re_path
+
+from .routes import api_root_view
+
+urlpatterns = [
+    re_path(r'^(?:\\.(?P<format>[a-z0-9]+)/?)?$', api_root_view(), name='api-root'),
+]
+"""
+
+    URLS_SHARDS_PACKAGE = """\"\"\"URL shards of the app, one module per first path segment of the route prefixes.\"\"\"
+from importlib import import_module
+from pkgutil import iter_modules
+
+from rest_framework.routers import DefaultRouter
+
+
+def api_root_view():
+    \"\"\"The API root view of DefaultRouter, listing the routes of every shard.\"\"\"
+    router = DefaultRouter()
+    for shard in iter_modules(__path__):
+        router.registry.extend(import_module(f'{__name__}.{shard.name}').router.registry)
+    return router.get_api_root_view()
+"""
+
+    URLS_SHARD = """from rest_framework.routers import SimpleRouter
+from rest_framework.urlpatterns import format_suffix_patterns
+
+router = SimpleRouter()
+
+urlpatterns = format_suffix_patterns(router.urls)
+"""
+
+    URL_BENCHMARK = """\"\"\"Time URL resolution over every route of {urlconf}.
+
+Not collected by the default test discovery; run it with
+``python manage.py test {app_name}.bench_urls``.
+\"\"\"
+import time
+
+from django.test import SimpleTestCase
+from django.urls import NoReverseMatch, URLPattern, URLResolver, get_resolver, reverse
+
+URLCONF = '{urlconf}'
+REPEAT = 5
+
+
+def route_paths(urlconf=URLCONF):
+    \"\"\"A path for every named route of ``urlconf``.\"\"\"
+    paths = []
+
+    def walk(patterns, namespace):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                walk(pattern.url_patterns, namespace + [pattern.namespace] if pattern.namespace else namespace)
+            elif isinstance(pattern, URLPattern) and pattern.name:
+                name = ':'.join(namespace + [pattern.name])
+                groups = pattern.pattern.regex.groupindex
+                kwargs = {{group: 'json' if group == 'format' else '1' for group in groups}}
+                try:
+                    paths.append(reverse(name, urlconf=urlconf, kwargs=kwargs))
+                except NoReverseMatch:
+                    # Groups that only match particular values.
+                    pass
+
+    walk(get_resolver(urlconf).url_patterns, [])
+    return paths
+
+
+def time_resolution(paths, urlconf=URLCONF, repeat=REPEAT):
+    \"\"\"Best seconds per resolve of ``paths``, over ``repeat`` rounds.\"\"\"
+    resolver = get_resolver(urlconf)
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for path in paths:
+            resolver.resolve(path)
+        elapsed = (time.perf_counter() - start) / len(paths)
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+class UrlResolutionBenchmark(SimpleTestCase):
+    def test_resolution(self):
+        paths = route_paths()
+        self.assertTrue(paths)
+        seconds = time_resolution(paths)
+        print(f"\\n{{len(paths)}} routes of {{URLCONF}}: {{seconds * 1e6:.1f}} us per resolve")
+"""
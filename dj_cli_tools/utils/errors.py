@@ -0,0 +1,19 @@
+"""Errors raised by the generators.
+
+The generators run both inside management commands and from the ``dj-cli``
+entry point, which does not import Django unless a step needs it. Building
+the CommandError lazily keeps Django off the import path of the happy path
+while callers still catch the usual ``CommandError``.
+"""
+
+
+def command_error(message: str) -> Exception:
+    """Return a ``django.core.management.base.CommandError`` for ``message``."""
+    from django.core.management.base import CommandError
+
+    return CommandError(message)
+
+
+__all__ = [
+    "command_error",
+]
@@ -0,0 +1,158 @@
+"""Read-only list serializers that build their output by hand.
+
+A ``ModelSerializer`` runs a bound Field object per column and row, which
+dominates the time of large list responses. The serializer generated here
+reads the rows of ``Model.objects.values(*columns)`` and builds each dict
+directly. Values JSON cannot hold as they are (dates, decimals, UUIDs) go
+through the matching DRF field's ``to_representation``, created once per
+class, so the output matches the ModelSerializer's.
+
+Large columns (text, JSON, binary and file fields) and many-to-many fields
+are left out of the list payload; the ModelSerializer still serves them on
+the detail endpoints.
+"""
+from __future__ import annotations
+
+from typing import List, NamedTuple, Optional, Tuple
+
+from .field_specs import FieldSpec
+from .symbol_index import MAX_LINE_LENGTH
+
+# Internal type -> DRF field converting the value for JSON.
+_CONVERTERS = {
+    "DateTimeField": "serializers.DateTimeField()",
+    "DateField": "serializers.DateField()",
+    "TimeField": "serializers.TimeField()",
+    "DurationField": "serializers.DurationField()",
+    "UUIDField": "serializers.UUIDField()",
+}
+_LEFT_OUT = ("TextField", "JSONField", "BinaryField", "FileField", "ImageField", "FilePathField")
+
+
+class FastColumn(NamedTuple):
+    """A key of the output, the ``.values()`` column it is read from and
+    the DRF field converting it (None when the value is used as is)."""
+
+    key: str
+    column: str
+    converter: Optional[str] = None
+    null: bool = False
+
+
+def fast_columns(model, cursor_field: Optional[str] = None) -> Tuple[List[FastColumn], List[str]]:
+    """The columns of ``model`` for a fast serializer, and the fields left out.
+
+    Without a loaded ``model`` only the primary key is known, plus
+    ``cursor_field`` when the list is cursor paginated, since the paginator
+    reads the ordering from every row.
+    """
+    if model is None:
+        columns = [FastColumn("id", "id")]
+        if cursor_field:
+            columns.append(FastColumn(cursor_field, cursor_field, _CONVERTERS["DateTimeField"]))
+        return columns, []
+
+    columns: List[FastColumn] = []
+    left_out: List[str] = []
+    for field in model._meta.concrete_model._meta.get_fields():
+        if field.auto_created and not field.concrete:
+            continue
+        if field.many_to_many:
+            left_out.append(f"{field.name} ({field.get_internal_type()})")
+            continue
+        if not field.concrete:
+            continue
+        internal_type = field.get_internal_type()
+        if internal_type in _LEFT_OUT:
+            left_out.append(f"{field.name} ({internal_type})")
+            continue
+        if internal_type == "DecimalField":
+            converter = (f"serializers.DecimalField(max_digits={field.max_digits}, "
+                         f"decimal_places={field.decimal_places})")
+        elif field.is_relation:
+            # ForeignKey/OneToOneField: the primary key, as PrimaryKeyRelatedField gives it.
+            converter = _CONVERTERS.get(field.target_field.get_internal_type())
+        else:
+            converter = _CONVERTERS.get(internal_type)
+        columns.append(FastColumn(field.name, field.attname, converter, field.null))
+    return columns, left_out
+
+
+def fast_spec_columns(specs: List[FieldSpec]) -> Tuple[List[FastColumn], List[str]]:
+    """The columns of a model that is not loaded yet, from its field specs,
+    and the fields left out, as :func:`fast_columns` gives them."""
+    columns: List[FastColumn] = []
+    left_out: List[str] = []
+    if not any(spec.primary_key for spec in specs):
+        columns.append(FastColumn("id", "id"))
+    for spec in specs:
+        arguments = dict(spec.arguments)
+        if spec.type == "m2m" or spec.field_class in _LEFT_OUT:
+            left_out.append(f"{spec.name} ({spec.field_class})")
+            continue
+        if spec.field_class == "DecimalField":
+            converter = (f"serializers.DecimalField(max_digits={arguments['max_digits']}, "
+                         f"decimal_places={arguments['decimal_places']})")
+        else:
+            converter = _CONVERTERS.get(spec.field_class)
+        # ForeignKey/OneToOneField: the primary key from <fk>_id, whatever its type.
+        column = f"{spec.name}_id" if spec.type in ("fk", "o2o") else spec.name
+        columns.append(FastColumn(spec.name, column, converter, arguments.get("null") == "True"))
+    return columns, left_out
+
+
+def fast_serializer_code(
+    serializer_name: str, model_name: str, columns: List[FastColumn], left_out: List[str]
+) -> str:
+    """Source of a ``BaseSerializer`` subclass for ``columns``."""
+    lines = [
+        "",
+        f"class {serializer_name}(serializers.BaseSerializer):",
+        f'    """Read-only list serializer for {model_name} rows from',
+        f"    ``{model_name}.objects.values(*{serializer_name}.columns)``.",
+        '    """',
+        "",
+    ]
+    if left_out:
+        lines.append(f"    # Left out of the list: {', '.join(left_out)}.")
+    lines.append(f"    columns = {_tuple([c.column for c in columns])}")
+    for column in columns:
+        if column.converter:
+            lines.append(f"    _{column.key} = {column.converter}.to_representation")
+    lines += [
+        "",
+        "    def to_representation(self, instance):",
+        "        # Rows from .values(*columns), or instances loaded with .only(*columns).",
+        "        row = getattr(instance, '__dict__', instance)",
+    ]
+    lines.append("        return {")
+    for column in columns:
+        value = f"row[{_quote(column.column)}]"
+        if column.converter and column.null:
+            value = f"None if {value} is None else self._{column.key}({value})"
+        elif column.converter:
+            value = f"self._{column.key}({value})"
+        lines.append(f"            {_quote(column.key)}: {value},")
+    lines.append("        }")
+    return "\n".join(lines) + "\n"
+
+
+def _quote(name: str) -> str:
+    return f"'{name}'"
+
+
+def _tuple(names: List[str]) -> str:
+    if len(names) == 1:
+        return f"({_quote(names[0])},)"
+    code = f"({', '.join(map(_quote, names))})"
+    if len(code) <= MAX_LINE_LENGTH - len("    columns = "):
+        return code
+    return "(\n" + "".join(f"        {_quote(name)},\n" for name in names) + "    )"
+
+
+__all__ = [
+    "FastColumn",
+    "fast_columns",
+    "fast_serializer_code",
+    "fast_spec_columns",
+]
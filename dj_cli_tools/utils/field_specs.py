@@ -0,0 +1,286 @@
+"""Field specs for the models ``create`` generates.
+
+A spec is ``name[:type][:argument...][:modifier...]``, for example
+``name:char:120:index``, ``sku:char:unique``, ``price:decimal:12:2``,
+``created:datetime:auto`` or ``category:fk:Category:null``. Numeric
+arguments are the type's sizes (``max_length``, or ``max_digits`` and
+``decimal_places``); relations take the target model. The modifiers are:
+
+``index``     ``db_index=True``
+``unique``    ``unique=True``
+``null``      ``null=True, blank=True`` (and ``on_delete=SET_NULL`` on relations)
+``blank``     ``blank=True``
+``auto``      ``auto_now_add=True`` on dates and times
+``auto_now``  ``auto_now=True`` on dates and times
+
+:func:`parse_field_spec` raises ValueError on specs it cannot render.
+"""
+from __future__ import annotations
+
+import hashlib
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+from .case_utils import CaseUtils
+from .symbol_index import MAX_LINE_LENGTH
+
+# Spec type -> (model field class, size arguments with their defaults).
+FIELD_TYPES: Dict[str, Tuple[str, Tuple[Tuple[str, str], ...]]] = {
+    "char": ("CharField", (("max_length", "255"),)),
+    "slug": ("SlugField", (("max_length", "50"),)),
+    "email": ("EmailField", (("max_length", "254"),)),
+    "url": ("URLField", (("max_length", "200"),)),
+    "text": ("TextField", ()),
+    "int": ("IntegerField", ()),
+    "bigint": ("BigIntegerField", ()),
+    "smallint": ("SmallIntegerField", ()),
+    "posint": ("PositiveIntegerField", ()),
+    "bool": ("BooleanField", ()),
+    "float": ("FloatField", ()),
+    "decimal": ("DecimalField", (("max_digits", "10"), ("decimal_places", "2"))),
+    "date": ("DateField", ()),
+    "datetime": ("DateTimeField", ()),
+    "time": ("TimeField", ()),
+    "duration": ("DurationField", ()),
+    "uuid": ("UUIDField", ()),
+    "json": ("JSONField", ()),
+    "file": ("FileField", ()),
+    "image": ("ImageField", ()),
+    "fk": ("ForeignKey", ()),
+    "o2o": ("OneToOneField", ()),
+    "m2m": ("ManyToManyField", ()),
+}
+_ALIASES = {"integer": "int", "boolean": "bool", "foreignkey": "fk", "onetoone": "o2o"}
+_RELATIONS = ("fk", "o2o", "m2m")
+_DATES = ("date", "datetime", "time")
+MODIFIERS = ("index", "unique", "null", "blank", "auto", "auto_now")
+
+
+class FieldSpec(NamedTuple):
+    """A parsed field spec."""
+
+    name: str
+    type: str
+    field_class: str
+    # Keyword arguments other than db_index, rendered in order.
+    arguments: List[Tuple[str, str]]
+    index: bool = False
+    unique: bool = False
+    # Relation target, as written in the spec.
+    target: str = ""
+
+    @property
+    def indexed(self) -> bool:
+        """Whether the column gets an index of its own."""
+        return self.index or self.unique or self.type in ("fk", "o2o")
+
+    @property
+    def primary_key(self) -> bool:
+        """Whether the spec replaces the implicit ``id`` primary key."""
+        return ("primary_key", "True") in self.arguments
+
+    @property
+    def is_text(self) -> bool:
+        return self.type in ("char", "slug", "email", "url")
+
+    def with_index(self) -> "FieldSpec":
+        return self if self.indexed or self.type == "m2m" else self._replace(index=True)
+
+
+def parse_field_spec(spec: str) -> FieldSpec:
+    """Parse one ``name[:type][:argument...][:modifier...]`` spec."""
+    name, *parts = spec.split(":")
+    if not name.isidentifier() or name in ("id", "pk"):
+        raise ValueError(f"invalid field name {name!r} in {spec!r}")
+    field_type = _ALIASES.get(parts[0].lower(), parts[0].lower()) if parts else "char"
+    if field_type not in FIELD_TYPES:
+        raise ValueError(f"unknown field type {field_type!r} in {spec!r}, "
+                         f"expected one of {', '.join(FIELD_TYPES)}")
+    field_class, sizes = FIELD_TYPES[field_type]
+
+    numbers: List[str] = []
+    modifiers: List[str] = []
+    target = ""
+    for part in parts[1:]:
+        if part.isdigit():
+            numbers.append(part)
+        elif part in MODIFIERS:
+            modifiers.append(part)
+        elif field_type in _RELATIONS and not target and all(
+                piece.isidentifier() for piece in part.split(".")):
+            target = part
+        else:
+            raise ValueError(f"unknown modifier {part!r} in {spec!r}, "
+                             f"expected one of {', '.join(MODIFIERS)}")
+    if len(numbers) > len(sizes):
+        raise ValueError(f"too many sizes in {spec!r}")
+    if field_type in _RELATIONS and not target:
+        raise ValueError(f"{spec!r} needs a target model, e.g. {name}:{field_type}:Category")
+    if field_type not in _DATES and ({"auto", "auto_now"} & set(modifiers)):
+        raise ValueError(f"'auto' and 'auto_now' only apply to dates and times in {spec!r}")
+    if field_type == "m2m" and ({"index", "unique", "null"} & set(modifiers)):
+        raise ValueError(f"many-to-many fields have no column to index or null in {spec!r}")
+
+    arguments: List[Tuple[str, str]] = []
+    if field_type in _RELATIONS:
+        arguments.append(("to", repr(target)))
+        if field_type != "m2m":
+            on_delete = "SET_NULL" if "null" in modifiers else "CASCADE"
+            arguments.append(("on_delete", f"models.{on_delete}"))
+    for (keyword, default), value in zip(sizes, numbers + [None] * len(sizes)):
+        arguments.append((keyword, value or default))
+    if field_type == "bool":
+        arguments.append(("default", "False"))
+    if "auto" in modifiers:
+        arguments.append(("auto_now_add", "True"))
+    if "auto_now" in modifiers:
+        arguments.append(("auto_now", "True"))
+    if "unique" in modifiers and field_type != "o2o":
+        arguments.append(("unique", "True"))
+    if "null" in modifiers:
+        arguments.append(("null", "True"))
+    if "null" in modifiers or "blank" in modifiers:
+        arguments.append(("blank", "True"))
+    return FieldSpec(
+        name, field_type, field_class, arguments,
+        index="index" in modifiers and field_type not in ("fk", "o2o"),
+        unique="unique" in modifiers or field_type == "o2o",
+        target=target,
+    )
+
+
+def field_code(spec: FieldSpec, indent: int = 4) -> str:
+    """The ``name = models.X(...)`` line of ``spec``, wrapped when too long."""
+    arguments = [f"{value}" if keyword == "to" else f"{keyword}={value}"
+                 for keyword, value in spec.arguments]
+    if spec.index and not spec.unique:
+        arguments.append("db_index=True")
+    prefix = " " * indent
+    code = f"{prefix}{spec.name} = models.{spec.field_class}({', '.join(arguments)})"
+    if len(code) <= MAX_LINE_LENGTH:
+        return code + "\n"
+    return (f"{prefix}{spec.name} = models.{spec.field_class}(\n"
+            + "".join(f"{prefix}    {argument},\n" for argument in arguments) + f"{prefix})\n")
+
+
+def factory_declaration(spec: FieldSpec, target_factory: str = "") -> Tuple[str, str]:
+    """The factory_boy declaration of ``spec`` and the import it needs.
+
+    Fields the database fills in or leaves empty (nullable, blank, ``auto``
+    dates, booleans with their default, many-to-many) get no declaration
+    and ("", "") is returned. Foreign keys and one-to-ones get a
+    ``SubFactory`` of ``target_factory``, the dotted path of the target's
+    factory, and nothing when it is not given.
+    """
+    keywords = dict(spec.arguments)
+    if ("null" in keywords or "blank" in keywords or "auto_now_add" in keywords
+            or "auto_now" in keywords or "default" in keywords or spec.type == "m2m"
+            or spec.field_class.endswith("AutoField")):
+        return "", ""
+    if spec.type in ("fk", "o2o"):
+        return (f"factory.SubFactory({target_factory!r})", "") if target_factory else ("", "")
+    if spec.type == "email":
+        return f"factory.Sequence(lambda n: f'{spec.name}{{n}}@example.com')", ""
+    if spec.type == "url":
+        return f"factory.Sequence(lambda n: f'https://example.com/{spec.name}/{{n}}')", ""
+    if spec.type in ("char", "slug", "text"):
+        # Room for the name and a sequence number in short columns.
+        if int(keywords.get("max_length", "255")) < len(spec.name) + 8:
+            return "factory.Sequence(str)", ""
+        return f"factory.Sequence(lambda n: f'{spec.name}-{{n}}')", ""
+    if spec.type in ("int", "bigint", "smallint", "posint"):
+        return "factory.Sequence(int)", ""
+    if spec.type == "decimal":
+        digits, places = int(keywords["max_digits"]), int(keywords["decimal_places"])
+        return (f"factory.Faker('pydecimal', left_digits={digits - places}, "
+                f"right_digits={places}, positive=True)"), ""
+    if spec.type == "datetime":
+        # Aware or naive, whatever USE_TZ asks for.
+        return "factory.LazyFunction(timezone.now)", "from django.utils import timezone"
+    return _FACTORY_VALUES.get(spec.type, ""), ""
+
+
+def factory_post_generation(spec: FieldSpec, target_factory: str = "") -> str:
+    """A ``post_generation`` hook giving the many-to-many ``spec`` a row.
+
+    The serializer of a model requires its many-to-many fields that are
+    not ``blank``, so a factory built row needs one related row to be
+    posted back. ``target_factory`` is the name of the target's factory in
+    the same module; without it, and for other fields, "" is returned.
+    """
+    if spec.type != "m2m" or "blank" in dict(spec.arguments) or not target_factory:
+        return ""
+    return (
+        "    @factory.post_generation\n"
+        f"    def {spec.name}(self, create, extracted, **kwargs):\n"
+        "        if not create:\n"
+        "            return\n"
+        f"        self.{spec.name}.set([{target_factory}()] if extracted is None else extracted)\n"
+    )
+
+
+# Declarations that need nothing from the spec.
+_FACTORY_VALUES = {
+    "float": "factory.Sequence(float)",
+    "bool": "factory.Faker('pybool')",
+    "date": "factory.Faker('date_object')",
+    "time": "factory.Faker('time_object')",
+    "duration": "factory.Faker('time_delta')",
+    "uuid": "factory.Faker('uuid4')",
+    "json": "factory.LazyFunction(dict)",
+    "file": "factory.django.FileField()",
+    "image": "factory.django.ImageField()",
+    # Column types of existing databases that field specs do not offer.
+    "binary": "factory.LazyFunction(bytes)",
+    "ip": "factory.Faker('ipv4')",
+}
+
+
+def meta_code(ordering: List[str], indexes: List[Tuple[List[str], str]],
+              constraints: List[Tuple[List[str], str]], db_table: str = "") -> str:
+    """A ``class Meta`` block, or "" when there is nothing to put in it.
+
+    ``indexes`` and ``constraints`` hold (fields, name) pairs; constraints
+    are unique constraints.
+    """
+    lines = []
+    if db_table:
+        lines.append(f"        db_table = {db_table!r}\n")
+    if ordering:
+        lines.append(f"        ordering = {_names(ordering)}\n")
+    if indexes:
+        lines.append("        indexes = [\n" + "".join(
+            f"            models.Index(fields={_names(fields)}, name='{name}'),\n"
+            for fields, name in indexes) + "        ]\n")
+    if constraints:
+        lines.append("        constraints = [\n" + "".join(
+            f"            models.UniqueConstraint(fields={_names(fields)}, name='{name}'),\n"
+            for fields, name in constraints) + "        ]\n")
+    if not lines:
+        return ""
+    return "\n    class Meta:\n" + "".join(lines)
+
+
+def index_name(app_label: str, model_name: str, suffix: str, fields: Sequence[str] = ()) -> str:
+    """A name for an index or constraint, unique per model and fields
+    and within the 30 characters Django allows."""
+    base = f"{app_label}_{CaseUtils.to_snake_case(model_name)}"
+    key = base + "".join(f"_{name}" for name in fields)
+    digest = hashlib.md5(key.encode(), usedforsecurity=False).hexdigest()[:6]
+    return f"{base[:14].rstrip('_')}_{digest}_{suffix}"
+
+
+def _names(names: List[str]) -> str:
+    return f"[{', '.join(repr(name) for name in names)}]"
+
+
+__all__ = [
+    "FIELD_TYPES",
+    "FieldSpec",
+    "MODIFIERS",
+    "factory_declaration",
+    "factory_post_generation",
+    "field_code",
+    "index_name",
+    "meta_code",
+    "parse_field_spec",
+]
@@ -0,0 +1,152 @@
+"""Write-back buffer for the source files a command edits.
+
+Files are read once, edited in memory for the life of a command and
+committed together at the end. Every changed file is written to a temporary
+sibling and moved into place with ``os.replace`` so an interrupted run never
+leaves a half-written module behind; files whose bytes did not change are
+not touched at all, which keeps file watchers from reloading for nothing.
+"""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from . import timings
+
+
+class FileBuffer:
+    """In-memory view of a set of text files with an atomic commit."""
+
+    def __init__(self, encoding: str = "utf-8"):
+        self.encoding = encoding
+        # Bytes on disk when the file was first read, None if it did not exist.
+        self._original: Dict[Path, Optional[bytes]] = {}
+        self._contents: Dict[Path, str] = {}
+        # Insertion-ordered set of the paths written through the buffer.
+        self._written: Dict[Path, None] = {}
+        # (st_mtime_ns, st_size) of each file when it was read.
+        self._stats: Dict[Path, Tuple[int, int]] = {}
+
+    def _load(self, path: Path) -> None:
+        if path in self._original:
+            return
+        try:
+            with path.open("rb") as f:
+                stat = os.fstat(f.fileno())
+                data = f.read()
+        except FileNotFoundError:
+            self._original[path] = None
+            self._contents[path] = ""
+            return
+        timings.record_read(path, len(data))
+        self._original[path] = data
+        self._contents[path] = data.decode(self.encoding)
+        self._stats[path] = (stat.st_mtime_ns, stat.st_size)
+
+    def is_loaded(self, path: Path) -> bool:
+        return Path(path) in self._original
+
+    def is_written(self, path: Path) -> bool:
+        return Path(path) in self._written
+
+    def disk_stat(self, path: Path) -> Optional[Tuple[int, int]]:
+        """(st_mtime_ns, st_size) of ``path`` when it was read, if it existed."""
+        return self._stats.get(Path(path))
+
+    def exists(self, path: Path) -> bool:
+        """Whether ``path`` exists on disk or has been written in the buffer."""
+        path = Path(path)
+        if path in self._original:
+            return self._original[path] is not None or path in self._written
+        return path.exists()
+
+    def read(self, path: Path) -> str:
+        path = Path(path)
+        self._load(path)
+        return self._contents[path]
+
+    def write(self, path: Path, content: str) -> None:
+        path = Path(path)
+        self._load(path)
+        self._contents[path] = content
+        self._written[path] = None
+
+    def dirty_paths(self) -> List[Path]:
+        """Paths whose buffered bytes differ from what is on disk."""
+        return [
+            path for path in self._written
+            if self._contents[path].encode(self.encoding) != self._original[path]
+        ]
+
+    def stale_paths(self) -> List[Path]:
+        """Dirty paths another writer changed on disk since they were read."""
+        stale = []
+        for path in self.dirty_paths():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                if self._original[path] is not None:
+                    stale.append(path)
+                continue
+            if self._original[path] is None or (stat.st_mtime_ns, stat.st_size) != self._stats.get(path):
+                stale.append(path)
+        return stale
+
+    def commit(self) -> List[Path]:
+        """Atomically write every changed file and return the written paths."""
+        written = []
+        for path in self.dirty_paths():
+            data = self._contents[path].encode(self.encoding)
+            self._atomic_write(path, data)
+            timings.record_write(path, len(data))
+            self._original[path] = data
+            self._stats.pop(path, None)
+            written.append(path)
+        self._written.clear()
+        return written
+
+    def discard(self) -> None:
+        """Forget every pending edit without touching the disk."""
+        self._original.clear()
+        self._contents.clear()
+        self._written.clear()
+        self._stats.clear()
+
+    @staticmethod
+    def _atomic_write(path: Path, data: bytes) -> None:
+        atomic_write(path, data)
+
+
+def atomic_write(path: Path, data: bytes) -> None:
+    """Replace ``path`` with ``data`` through a temporary sibling file."""
+    import tempfile
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        mode = path.stat().st_mode & 0o7777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as tmp_file:
+            tmp_file.write(data)
+            tmp_file.flush()
+            os.fsync(tmp_file.fileno())
+        os.chmod(tmp_name, mode)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+__all__ = [
+    "FileBuffer",
+    "atomic_write",
+]
@@ -1,31 +1,94 @@
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Sequence
 
-from django.core.management.base import CommandError
+from . import timings
+from .errors import command_error
+from .file_buffer import FileBuffer
+from .symbol_index import ModuleIndex, SourceEditor, merge_imports
 
 
 class FileHandlingMixin:
     """
     Mixin for Django management commands to handle file operations.
     Expected to be mixed in with BaseCommand.
+
+    Reads and writes go through a FileBuffer that lives as long as the
+    command: edits are applied in memory and only reach the disk when
+    ``_commit_files`` is called, once per changed file.
+
+    Set ``_project_cache`` to a ProjectCache to reuse the symbol indexes of
+    unchanged files across runs.
     """
 
+    _project_cache = None
+
+    @property
+    def _file_buffer(self) -> FileBuffer:
+        if getattr(self, "_buffer", None) is None:
+            self._buffer = FileBuffer()
+        return self._buffer
+
     def _get_file_path(self, app_config, filename: str) -> Path:
         return Path(app_config.path) / f"{filename}.py"
 
+    def _file_exists(self, file_path: Path) -> bool:
+        return self._file_buffer.exists(file_path)
+
     def _read_file(self, file_path: Path) -> str:
-        if not file_path.exists():
-            return ""
         try:
-            return file_path.read_text(encoding="utf-8")
-        except IOError as e:
-            raise CommandError(f"Error reading file {file_path}: {e}")
+            return self._file_buffer.read(file_path)
+        except (IOError, UnicodeDecodeError) as e:
+            raise command_error(f"Error reading file {file_path}: {e}")
 
     def _write_file(self, file_path: Path, content: str) -> None:
+        self._file_buffer.write(file_path, content)
+
+    def _get_index(self, file_path: Path) -> ModuleIndex:
+        """Symbol index of the buffered contents, re-parsed only after edits.
+
+        With a ``_project_cache``, files that have not been read yet are
+        answered from the cache as long as they are unchanged on disk.
+        """
+        cache = self._project_cache
+        buffer = self._file_buffer
+        if cache is not None and not buffer.is_loaded(file_path):
+            index = cache.module_index(file_path)
+            if index is not None:
+                return index
+
+        content = self._read_file(file_path)
+        if getattr(self, "_indexes", None) is None:
+            self._indexes = {}
+        cached = self._indexes.get(file_path)
+        if cached is not None and cached[0] == content:
+            return cached[1]
+
+        signature = None if buffer.is_written(file_path) else buffer.disk_stat(file_path)
+        index = None
+        if cache is not None and signature is not None:
+            index = cache.module_index(file_path, signature)
+        if index is None:
+            try:
+                with timings.phase(f"parse {file_path.name}"):
+                    index = ModuleIndex.from_source(content, str(file_path))
+            except SyntaxError as e:
+                raise command_error(f"Error parsing file {file_path}: {e}")
+            if cache is not None and signature is not None:
+                cache.set_module_index(file_path, index, signature)
+        self._indexes[file_path] = (content, index)
+        return index
+
+    def _commit_files(self) -> None:
         try:
-            file_path.write_text(content, encoding="utf-8")
+            with timings.phase("write"):
+                self._file_buffer.commit()
         except IOError as e:
-            raise CommandError(f"Error writing to file {file_path}: {e}")
+            raise command_error(f"Error writing to file: {e}")
+
+    @staticmethod
+    def _join_blocks(blocks: Sequence[str]) -> str:
+        """Top-level code blocks, two blank lines apart as PEP 8 wants them."""
+        return "\n\n\n".join(block.strip() for block in blocks if block.strip())
 
     def _append_to_file(
         self,
@@ -36,26 +99,16 @@ class FileHandlingMixin:
         import_statements: Optional[str] = None
     ) -> None:
         file_path = self._get_file_path(app_config, filename)
-        
-        if not file_path.exists():
-            file_path.touch()
-
         current_content = self._read_file(file_path)
-        
-        new_content_parts = []
-        
-        # Prepend imports if they don't exist
-        if import_statements and import_statements.strip() not in current_content:
-            new_content_parts.append(import_statements)
-
-        if current_content:
-            new_content_parts.append(current_content)
-            
-        new_content_parts.append(template_code)
-        
-        # Join with double newlines for separation, ensure final newline
-        final_content = "\n\n".join(part.strip() for part in new_content_parts if part.strip()) + "\n"
-        
+
+        # Merge the missing imports into the existing import block
+        if import_statements:
+            editor = SourceEditor(current_content)
+            merge_imports(editor, self._get_index(file_path), import_statements)
+            current_content = editor.apply()
+
+        final_content = self._join_blocks([current_content, template_code]) + "\n"
+
         self._write_file(file_path, final_content)
 
         if hasattr(self, 'stdout') and hasattr(self, 'style'):
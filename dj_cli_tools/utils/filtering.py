@@ -0,0 +1,144 @@
+"""Filtering, search and ordering options backed by indexes.
+
+``?search=`` with ``icontains`` and filters or orderings on unindexed
+columns scan the whole table on every request. :class:`FilterSpec` holds
+the fields ``create`` exposes through ``filterset_fields``, ``search_fields``
+and ``ordering_fields``. New models declare those fields with
+``db_index=True``; for existing models :func:`unindexed_fields` lists the
+ones no index serves, so ``create`` can refuse them.
+
+Search uses ``startswith`` lookups, which a B-tree index can serve; on
+PostgreSQL through the ``varchar_pattern_ops`` index Django adds for
+``db_index`` text columns.
+
+Only model classes are passed in, so importing this module does not import
+Django.
+"""
+from __future__ import annotations
+
+from typing import List, NamedTuple, Set
+
+from .symbol_index import MAX_LINE_LENGTH
+
+TEXT_TYPES = ("CharField", "SlugField", "EmailField", "URLField")
+
+
+class FilterSpec(NamedTuple):
+    """The fields a viewset filters, searches and orders by."""
+
+    filter_fields: List[str]
+    search_fields: List[str]
+    ordering_fields: List[str]
+
+    @property
+    def names(self) -> List[str]:
+        """Every field of the spec once, in option order."""
+        return list(dict.fromkeys(self.filter_fields + self.search_fields + self.ordering_fields))
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.names
+
+
+def field_list(value: str) -> List[str]:
+    """argparse type for comma-separated field names."""
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    for name in names:
+        if not name.isidentifier():
+            raise ValueError(f"invalid field name {name!r}")
+    return names
+
+
+def indexed_field_names(model) -> Set[str]:
+    """Names of the fields of ``model`` that lead a usable index.
+
+    The primary key, unique fields, ``db_index`` fields (ForeignKeys have it
+    by default) and the first field of every index, unique constraint and
+    ``unique_together`` entry. Partial indexes only serve the rows their
+    condition matches and are left out.
+    """
+    opts = model._meta.concrete_model._meta
+    indexed = {
+        field.name for field in opts.concrete_fields
+        if field.primary_key or field.unique or field.db_index
+    }
+    for index in opts.indexes:
+        if index.fields and index.condition is None:
+            indexed.add(index.fields[0].lstrip("-"))
+    for constraint in opts.constraints:
+        fields = getattr(constraint, "fields", None)
+        if fields and getattr(constraint, "condition", None) is None:
+            indexed.add(fields[0])
+    for fields in opts.unique_together:
+        if fields:
+            indexed.add(fields[0])
+    return indexed
+
+
+def unindexed_fields(model, spec: FilterSpec) -> List[str]:
+    """Problems with exposing ``spec`` on ``model``, one per field.
+
+    Unknown fields, fields no index serves and search fields that are not
+    text columns are reported; an empty list means the spec is safe.
+    """
+    opts = model._meta.concrete_model._meta
+    concrete = {field.name: field for field in opts.concrete_fields}
+    indexed = indexed_field_names(model)
+    problems = []
+    for name in spec.names:
+        field = concrete.get(name)
+        if field is None:
+            problems.append(f"'{name}' is not a column of '{opts.object_name}'")
+        elif name not in indexed:
+            problems.append(f"'{name}' has no index")
+        elif name in spec.search_fields and field.get_internal_type() not in TEXT_TYPES:
+            problems.append(f"'{name}' is not a text column and cannot be searched")
+    return problems
+
+
+def viewset_filter_code(spec: FilterSpec, indent: int = 4) -> str:
+    """Class body lines setting up the filter backends of ``spec``."""
+    backends, lines = [], []
+    if spec.filter_fields:
+        backends.append("DjangoFilterBackend")
+        lines.append(_list_code("filterset_fields", spec.filter_fields, indent))
+    if spec.search_fields:
+        backends.append("filters.SearchFilter")
+        lines.append(_list_code(
+            "search_fields", [f"{name}__startswith" for name in spec.search_fields], indent))
+    if spec.ordering_fields:
+        backends.append("filters.OrderingFilter")
+        lines.append(_list_code("ordering_fields", spec.ordering_fields, indent))
+    if not backends:
+        return ""
+    prefix = " " * indent
+    return f"{prefix}filter_backends = [{', '.join(backends)}]\n" + "".join(lines)
+
+
+def viewset_filter_imports(spec: FilterSpec) -> str:
+    imports = []
+    if spec.filter_fields:
+        imports.append("from django_filters.rest_framework import DjangoFilterBackend")
+    if spec.search_fields or spec.ordering_fields:
+        imports.append("from rest_framework import filters")
+    return "\n".join(imports)
+
+
+def _list_code(name: str, values: List[str], indent: int) -> str:
+    prefix = " " * indent
+    code = f"[{', '.join(repr(value) for value in values)}]"
+    if len(prefix) + len(f"{name} = ") + len(code) <= MAX_LINE_LENGTH:
+        return f"{prefix}{name} = {code}\n"
+    return (f"{prefix}{name} = [\n"
+            + "".join(f"{prefix}    {value!r},\n" for value in values) + f"{prefix}]\n")
+
+
+__all__ = [
+    "FilterSpec",
+    "TEXT_TYPES",
+    "field_list",
+    "indexed_field_names",
+    "unindexed_fields",
+    "viewset_filter_code",
+    "viewset_filter_imports",
+]
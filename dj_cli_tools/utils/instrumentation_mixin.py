@@ -0,0 +1,82 @@
+import json
+from typing import Callable
+
+from . import timings
+from .errors import command_error
+
+
+class InstrumentationMixin:
+    """
+    Adds ``--timings`` and ``--profile`` to a command.
+    Expects a ``stderr`` attribute like BaseCommand's.
+
+    ``--timings`` prints the phase tree recorded through
+    :mod:`dj_cli_tools.utils.timings` to stderr (or ``--timings-output``) as
+    text or JSON; ``--profile`` runs the command under cProfile and dumps
+    the stats for ``python -m pstats`` or snakeviz.
+    """
+
+    def _add_instrumentation_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--timings", nargs="?", const="text", choices=["text", "json"],
+            help="Report the time, bytes and files of every phase (default format: text).",
+        )
+        parser.add_argument(
+            "--timings-output", metavar="PATH",
+            help="Write the --timings report to PATH instead of stderr.",
+        )
+        parser.add_argument(
+            "--profile", metavar="PATH",
+            help="Run under cProfile and write the stats to PATH.",
+        )
+
+    def _run_instrumented(self, options, run: Callable[[], None]) -> None:
+        recorder = None
+        if options.get("timings") or options.get("timings_output"):
+            recorder = timings.Timings()
+            startup = timings.process_uptime()
+            if startup is not None:
+                # Interpreter start up to the command, including django.setup()
+                # when run through manage.py.
+                recorder.add("startup", startup)
+        token = timings.activate(recorder)
+
+        profiler = None
+        if options.get("profile"):
+            import cProfile
+
+            profiler = cProfile.Profile()
+        try:
+            if profiler is not None:
+                profiler.runcall(run)
+            else:
+                run()
+        finally:
+            timings.deactivate(token)
+            if profiler is not None:
+                self._write_profile(profiler, options["profile"])
+            if recorder is not None:
+                recorder.finish()
+                self._write_timings(recorder, options)
+
+    def _write_profile(self, profiler, path: str) -> None:
+        try:
+            profiler.dump_stats(path)
+        except OSError as e:
+            raise command_error(f"Error writing profile {path}: {e}")
+        self.stderr.write(f"Profile written to {path}")
+
+    def _write_timings(self, recorder: timings.Timings, options) -> None:
+        if options.get("timings") == "json":
+            report = json.dumps(recorder.to_dict(), indent=2)
+        else:
+            report = recorder.format_text()
+        path = options.get("timings_output")
+        if path:
+            try:
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(report + "\n")
+            except OSError as e:
+                raise command_error(f"Error writing timings {path}: {e}")
+        else:
+            self.stderr.write(report)
\ No newline at end of file
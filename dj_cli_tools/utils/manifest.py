@@ -0,0 +1,75 @@
+"""Loading of batch manifests for the ``create`` command.
+
+A manifest lists the (app, model) pairs to scaffold in a single run. Both
+TOML and JSON are accepted and may use either of two shapes::
+
+    [[models]]
+    app = "core_api"
+    model = "Product"
+
+    [apps]
+    core_api = ["Order", "Invoice"]
+
+The equivalent JSON documents use the same keys.
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import List, Tuple
+
+from .errors import command_error
+
+
+def load_manifest(path) -> List[Tuple[str, str]]:
+    """Return the ordered, de-duplicated (app, model) pairs in ``path``."""
+    manifest_path = Path(path)
+    try:
+        raw = manifest_path.read_bytes()
+    except OSError as e:
+        raise command_error(f"Error reading manifest {manifest_path}: {e}")
+
+    try:
+        if manifest_path.suffix == ".json":
+            data = json.loads(raw)
+        else:
+            import tomllib
+
+            data = tomllib.loads(raw.decode("utf-8"))
+    except ValueError as e:
+        raise command_error(f"Invalid manifest {manifest_path}: {e}")
+
+    if isinstance(data, list):
+        data = {"models": data}
+    if not isinstance(data, dict):
+        raise command_error(f"Invalid manifest {manifest_path}: expected a table or object.")
+
+    pairs: List[Tuple[str, str]] = []
+    for entry in data.get("models", []):
+        if not isinstance(entry, dict) or "app" not in entry or "model" not in entry:
+            raise command_error(
+                f"Invalid manifest entry {entry!r}: expected 'app' and 'model' keys.")
+        pairs.append((str(entry["app"]), str(entry["model"])))
+
+    apps = data.get("apps", {})
+    if not isinstance(apps, dict):
+        raise command_error(
+            f"Invalid manifest apps {apps!r}: expected a table of app names to models.")
+    for app_name, model_names in apps.items():
+        if isinstance(model_names, str):
+            model_names = [model_names]
+        if not isinstance(model_names, list):
+            raise command_error(
+                f"Invalid manifest models {model_names!r} of app '{app_name}': "
+                "expected a model name or a list of them.")
+        pairs.extend((app_name, str(model_name)) for model_name in model_names)
+
+    if not pairs:
+        raise command_error(f"Manifest {manifest_path} does not list any models.")
+
+    return list(dict.fromkeys(pairs))
+
+
+__all__ = [
+    "load_manifest",
+]
@@ -0,0 +1,372 @@
+"""Hot-path checks for the viewsets, serializers and admins of existing apps.
+
+Apps scaffolded long ago and edited by hand drift away from what
+``create`` generates. :func:`audit_app` imports an app's ``urls``,
+``views``, ``serializers`` and ``admin`` modules, inspects the classes they
+define and returns a :class:`Finding` per problem:
+
+``n-plus-one`` (error)
+    A list endpoint serialises a relation that its queryset neither joins
+    nor prefetches, so every row costs another query. ForeignKeys rendered
+    as primary keys or hyperlinks read the ``<fk>_id`` column and are free.
+``unindexed-filter`` (error, or warning for ``icontains`` search)
+    ``filterset_fields``, ``ordering_fields`` or ``search_fields`` on
+    columns no index leads, which scan the table on every request.
+``unpaginated-list`` (warning)
+    A list endpoint without a pagination class returns the whole table.
+``all-fields-wide-table`` (warning)
+    ``fields = '__all__'`` on a model with more than
+    :data:`WIDE_TABLE_COLUMNS` columns.
+``admin-list-select-related`` (warning)
+    A ModelAdmin whose changelist shows computed columns of a model with
+    ForeignKeys, without ``list_select_related``: the changelist only joins
+    relations that ``list_display`` names directly.
+``audit-failed`` (error for modules that do not import, info otherwise)
+    A module or class the checks could not inspect.
+
+Overridden ``get_queryset`` methods are read statically: the
+``select_related``/``prefetch_related`` calls in their source count as
+loaded, and a queryset of ``.values()`` rows is not judged. Nested
+serializers are checked one level deep.
+
+Only labels go in and :class:`Finding` tuples come out, so apps can be
+audited in worker processes; importing this module does not import Django.
+"""
+from __future__ import annotations
+
+import ast
+import inspect
+import sys
+import textwrap
+from importlib import import_module
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple, Union
+
+from .filtering import TEXT_TYPES, indexed_field_names
+from .symbol_index import ModuleIndex
+
+SEVERITIES = ("info", "warning", "error")
+CHECKS = (
+    "n-plus-one",
+    "unindexed-filter",
+    "unpaginated-list",
+    "all-fields-wide-table",
+    "admin-list-select-related",
+    "audit-failed",
+)
+# Columns above which ``fields = '__all__'`` is reported.
+WIDE_TABLE_COLUMNS = 20
+# Modules of an app imported to find its classes; urls pulls in the views it routes.
+AUDITED_MODULES = ("urls", "views", "serializers", "admin")
+# search_fields prefixes and lookups a B-tree index can serve.
+INDEXED_SEARCH_PREFIXES = ("^", "=")
+INDEXED_SEARCH_LOOKUPS = ("exact", "iexact", "startswith", "istartswith")
+
+# select_related() with no arguments joins every non-null ForeignKey.
+Loaded = Tuple[Union[bool, Set[str]], Set[str]]
+
+
+class Finding(NamedTuple):
+    """A problem found in an app, located at the class that causes it."""
+
+    severity: str
+    check: str
+    app: str
+    path: str
+    line: int
+    # The class the finding is about, e.g. ``OrderViewSet``.
+    object: str
+    message: str
+
+
+def audit_app(label: str, root: Optional[str] = None) -> List[Finding]:
+    """Audit the app with ``label``; paths are reported relative to ``root``."""
+    return _Auditor(label, root).run()
+
+
+def severity_rank(severity: str) -> int:
+    return SEVERITIES.index(severity)
+
+
+class _Auditor:
+    def __init__(self, label: str, root: Optional[str]):
+        from django.apps import apps
+
+        self.app_config = apps.get_app_config(label)
+        self.label = label
+        self.root = Path(root) if root else None
+        self.findings: List[Finding] = []
+        self._indexes: Dict[str, Optional[ModuleIndex]] = {}
+
+    def run(self) -> List[Finding]:
+        from django.contrib.admin.sites import site
+        from rest_framework import serializers
+        from rest_framework.generics import GenericAPIView
+
+        for name in AUDITED_MODULES:
+            module_name = f"{self.app_config.name}.{name}"
+            try:
+                if find_spec(module_name) is not None:
+                    import_module(module_name)
+            except Exception as e:
+                self._add("error", "audit-failed", module_name, Path(self.app_config.path),
+                          f"Importing {module_name} failed: {e}")
+        prefix = f"{self.app_config.name}."
+        classes = [
+            obj for module_name, module in list(sys.modules.items())
+            if module is not None and (module_name == self.app_config.name or module_name.startswith(prefix))
+            for obj in vars(module).values()
+            if inspect.isclass(obj) and obj.__module__ == module_name
+        ]
+
+        serializer_classes = []
+        for cls in classes:
+            if issubclass(cls, GenericAPIView):
+                self._guarded(cls, self._check_view, cls)
+                serializer_classes.append(getattr(cls, "serializer_class", None))
+            elif issubclass(cls, serializers.ModelSerializer):
+                serializer_classes.append(cls)
+        for cls in dict.fromkeys(serializer_classes):
+            if cls is not None:
+                self._guarded(cls, self._check_serializer, cls)
+        for model, model_admin in list(site._registry.items()):
+            if model._meta.app_label == self.label:
+                self._guarded(type(model_admin), self._check_admin, model, model_admin)
+        return sorted(self.findings, key=lambda f: (f.path, f.line, f.check, f.message))
+
+    # Checks
+
+    def _check_view(self, view) -> None:
+        queryset = getattr(view, "queryset", None)
+        model = getattr(queryset, "model", None)
+        if model is None:
+            return
+        lists = hasattr(view, "list")
+        if lists and getattr(view, "pagination_class", None) is None:
+            self._add("warning", "unpaginated-list", view.__name__, view,
+                      f"The list endpoint returns every '{model.__name__}' row: "
+                      f"no pagination_class and no DEFAULT_PAGINATION_CLASS.")
+        self._check_filters(view, model)
+
+        serializer_class = getattr(view, "serializer_class", None)
+        if not lists or serializer_class is None:
+            return
+        loaded = _loaded_relations(view, queryset)
+        if loaded is None:
+            return
+        select, prefetch = loaded
+        for field_name, relation, forward in _serialized_relations(serializer_class, model):
+            if relation in prefetch or (forward and (select is True or relation in select)):
+                continue
+            call = "select_related" if forward else "prefetch_related"
+            self._add("error", "n-plus-one", view.__name__, view,
+                      f"{serializer_class.__name__}.{field_name} reads '{relation}' for every row "
+                      f"of the list; add .{call}('{relation}') to the queryset.")
+
+    def _check_filters(self, view, model) -> None:
+        backends = {base.__name__ for backend in getattr(view, "filter_backends", ())
+                    for base in inspect.getmro(backend)}
+        indexed = indexed_field_names(model)
+        columns = {field.name: field for field in model._meta.concrete_model._meta.concrete_fields}
+
+        def unindexed(option: str, names) -> None:
+            for name in names:
+                if name in columns and name not in indexed:
+                    self._add("error", "unindexed-filter", view.__name__, view,
+                              f"{option} '{name}' has no index, so requests using it scan "
+                              f"the '{model._meta.db_table}' table.")
+
+        if "DjangoFilterBackend" in backends:
+            unindexed("filterset_fields", getattr(view, "filterset_fields", None) or ())
+        if "OrderingFilter" in backends:
+            ordering_fields = getattr(view, "ordering_fields", None)
+            if ordering_fields == "__all__":
+                self._add("error", "unindexed-filter", view.__name__, view,
+                          "ordering_fields = '__all__' lets clients order by any column, "
+                          "indexed or not.")
+            else:
+                unindexed("ordering_fields", ordering_fields or ())
+        if "SearchFilter" in backends:
+            for term in getattr(view, "search_fields", None) or ():
+                name, _, lookup = term.lstrip("^=@$").partition("__")
+                if term[:1] in INDEXED_SEARCH_PREFIXES or lookup in INDEXED_SEARCH_LOOKUPS:
+                    unindexed("search_fields", [name])
+                elif name in columns and columns[name].get_internal_type() in TEXT_TYPES:
+                    self._add("warning", "unindexed-filter", view.__name__, view,
+                              f"search_fields '{term}' matches with icontains, which no index "
+                              f"serves; search by prefix with '^{name}'.")
+
+    def _check_serializer(self, serializer_class) -> None:
+        meta = getattr(serializer_class, "Meta", None)
+        model = getattr(meta, "model", None)
+        if model is None or getattr(meta, "fields", None) != "__all__":
+            return
+        columns = len(model._meta.concrete_fields)
+        if columns > WIDE_TABLE_COLUMNS:
+            self._add("warning", "all-fields-wide-table", serializer_class.__name__, serializer_class,
+                      f"fields = '__all__' serialises all {columns} columns of '{model.__name__}'; "
+                      f"list the fields clients need.")
+
+    def _check_admin(self, model, model_admin) -> None:
+        if model_admin.list_select_related:
+            return
+        opts = model._meta
+        relations = {field.name for field in opts.concrete_fields
+                     if field.many_to_one or field.one_to_one}
+        if not relations:
+            return
+        columns = {field.name for field in opts.concrete_fields} | {field.attname for field in opts.concrete_fields}
+        list_display = [entry for entry in model_admin.list_display]
+        if any(entry in relations for entry in list_display):
+            # The changelist then calls select_related() itself.
+            return
+        computed = [entry if isinstance(entry, str) else getattr(entry, "__name__", repr(entry))
+                    for entry in list_display if entry not in columns]
+        if computed:
+            admin_class = type(model_admin)
+            if admin_class.__module__.startswith("django."):
+                # admin.site.register(Model) with the default ModelAdmin.
+                name, admin_class = f"ModelAdmin({model.__name__})", Path(self.app_config.path) / "admin.py"
+            else:
+                name = admin_class.__name__
+            self._add("warning", "admin-list-select-related", name, admin_class,
+                      f"list_display shows {', '.join(repr(entry) for entry in computed)} without "
+                      f"list_select_related; relations of '{model.__name__}' "
+                      f"({', '.join(sorted(relations))}) read there cost a query per row.")
+
+    # Reporting
+
+    def _guarded(self, cls, check, *args) -> None:
+        try:
+            check(*args)
+        except Exception as e:
+            self._add("info", "audit-failed", cls.__name__, cls, f"Could not be audited: {e}")
+
+    def _add(self, severity: str, check: str, name: str, where, message: str) -> None:
+        """Record a finding about ``name``, located at the class or path ``where``."""
+        path, line = self._location(where)
+        self.findings.append(Finding(severity, check, self.label, path, line, name, message))
+
+    def _location(self, cls) -> Tuple[str, int]:
+        if isinstance(cls, Path):
+            return self._relative(cls), 0
+        try:
+            file_name = inspect.getsourcefile(cls)
+        except TypeError:
+            file_name = None
+        if file_name is None:
+            return self._relative(Path(self.app_config.path)), 0
+        if file_name not in self._indexes:
+            # One parse per module for the line numbers of all its classes.
+            try:
+                self._indexes[file_name] = ModuleIndex.from_source(
+                    Path(file_name).read_text(encoding="utf-8"), file_name)
+            except (OSError, SyntaxError, UnicodeDecodeError):
+                self._indexes[file_name] = None
+        index = self._indexes[file_name]
+        line = index.classes.get(cls.__name__, 0) if index is not None else 0
+        return self._relative(Path(file_name)), line
+
+    def _relative(self, path: Path) -> str:
+        if self.root is not None:
+            try:
+                return str(path.resolve().relative_to(self.root.resolve()))
+            except ValueError:
+                pass
+        return str(path)
+
+
+def _serialized_relations(serializer_class, model) -> List[Tuple[str, str, bool]]:
+    """(serializer field, relation, forward) for the fields that read a relation per row."""
+    from rest_framework import serializers
+
+    relations = {}
+    for field in model._meta.get_fields():
+        if not field.is_relation or field.related_model is None:
+            continue
+        if field.auto_created and not field.concrete:
+            accessor = field.get_accessor_name()
+            if accessor:
+                relations[accessor] = False
+        else:
+            relations[field.name] = (field.many_to_one or field.one_to_one) and field.concrete
+
+    found = []
+    for name, field in serializer_class().fields.items():
+        if field.write_only or field.source == "*":
+            continue
+        attrs = field.source.split(".")
+        forward = relations.get(attrs[0])
+        if forward is None:
+            continue
+        if (forward and len(attrs) == 1 and isinstance(field, serializers.RelatedField)
+                and field.use_pk_only_optimization()):
+            # Reads the <fk>_id column of the row.
+            continue
+        found.append((name, attrs[0], forward))
+    return found
+
+
+def _loaded_relations(view, queryset) -> Optional[Loaded]:
+    """Relations the list queryset of ``view`` joins and prefetches, or None when unknown."""
+    select = queryset.query.select_related
+    select = select if select is True else set(select or ())
+    prefetch = {getattr(lookup, "prefetch_to", lookup).split("__")[0]
+                for lookup in queryset._prefetch_related_lookups}
+    method = _overridden(view, "get_queryset")
+    if method is None:
+        return select, prefetch
+    try:
+        tree = ast.parse(textwrap.dedent(inspect.getsource(method)))
+    except (OSError, TypeError, SyntaxError):
+        return None
+
+    calls = [node for node in ast.walk(tree)
+             if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)]
+    names = {call.func.attr for call in calls}
+    if names & {"values", "values_list", "raw"}:
+        # Rows that are not model instances.
+        return None
+    uses_class_queryset = "get_queryset" in names or any(
+        isinstance(node, ast.Attribute) and node.attr == "queryset" for node in ast.walk(tree))
+    if not uses_class_queryset:
+        select, prefetch = set(), set()
+    for call in calls:
+        lookups = [_string(argument) for argument in call.args]
+        lookups = [lookup.split("__")[0] for lookup in lookups if lookup]
+        if call.func.attr == "select_related":
+            select = True if not call.args or select is True else select | set(lookups)
+        elif call.func.attr == "prefetch_related":
+            prefetch |= set(lookups)
+    return select, prefetch
+
+
+def _overridden(view, name: str):
+    """``view.<name>`` when a class outside DRF defines it."""
+    for cls in inspect.getmro(view):
+        if name in vars(cls):
+            if cls.__module__.split(".")[0] in ("rest_framework", "adrf"):
+                return None
+            return vars(cls)[name]
+    return None
+
+
+def _string(node: ast.expr) -> Optional[str]:
+    """A string argument, or the lookup of a ``Prefetch('lookup', ...)``."""
+    if isinstance(node, ast.Call) and node.args:
+        node = node.args[0]
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    return None
+
+
+__all__ = [
+    "AUDITED_MODULES",
+    "CHECKS",
+    "Finding",
+    "SEVERITIES",
+    "WIDE_TABLE_COLUMNS",
+    "audit_app",
+    "severity_rank",
+]
@@ -0,0 +1,168 @@
+"""Lightweight discovery of a Django project without ``django.setup()``.
+
+Locates the project root, the settings module and file, and app directories
+with filesystem checks, ``ast`` and ``importlib.util.find_spec`` only, so the
+``dj-cli`` entry point can run the generators without importing the settings
+or any installed app.
+"""
+from __future__ import annotations
+
+import ast
+import importlib.util
+import os
+import re
+from pathlib import Path
+from typing import List, Optional
+
+_SETTINGS_ENV_RE = re.compile(
+    r"""DJANGO_SETTINGS_MODULE['"]\s*,\s*['"]([\w.]+)['"]""")
+
+
+class AppLocation:
+    """The parts of an AppConfig the generators use: ``name``, ``label``, ``path``."""
+
+    def __init__(self, name: str, path, label: Optional[str] = None):
+        self.name = name
+        self.label = label or name.rsplit(".", 1)[-1]
+        self.path = str(path)
+
+    def __repr__(self):
+        return f"<AppLocation: {self.label} ({self.path})>"
+
+
+def find_project_root(start=None) -> Optional[Path]:
+    """Return the closest directory at or above ``start`` holding manage.py."""
+    current = Path(start or os.getcwd()).resolve()
+    for directory in (current, *current.parents):
+        if (directory / "manage.py").is_file():
+            return directory
+    return None
+
+
+def get_settings_module(project_root: Optional[Path]) -> Optional[str]:
+    """DJANGO_SETTINGS_MODULE from the environment, else from manage.py."""
+    settings_module = os.environ.get("DJANGO_SETTINGS_MODULE")
+    if settings_module or project_root is None:
+        return settings_module
+    try:
+        manage_py = (project_root / "manage.py").read_text(encoding="utf-8")
+    except OSError:
+        return None
+    match = _SETTINGS_ENV_RE.search(manage_py)
+    return match.group(1) if match else None
+
+
+def find_module_path(module_name: str) -> Optional[Path]:
+    """Source file of ``module_name`` (``__init__.py`` for packages), if any."""
+    try:
+        spec = importlib.util.find_spec(module_name)
+    except (ImportError, ValueError):
+        return None
+    if spec is None or spec.origin in (None, "namespace"):
+        return None
+    return Path(spec.origin)
+
+
+def read_installed_apps(settings_path: Path) -> Optional[List[str]]:
+    """Literal INSTALLED_APPS entries assigned or added in ``settings_path``.
+
+    Returns None when the file cannot be parsed or does not define the
+    setting with literals, e.g. in split settings that import it.
+    """
+    try:
+        tree = ast.parse(settings_path.read_text(encoding="utf-8"))
+    except (OSError, SyntaxError, UnicodeDecodeError):
+        return None
+
+    installed_apps: Optional[List[str]] = None
+    for node in tree.body:
+        if isinstance(node, ast.Assign):
+            targets = node.targets
+        elif isinstance(node, ast.AugAssign):
+            targets = [node.target]
+        else:
+            continue
+        if not any(isinstance(t, ast.Name) and t.id == "INSTALLED_APPS" for t in targets):
+            continue
+        try:
+            value = ast.literal_eval(node.value)
+        except ValueError:
+            continue
+        if not isinstance(value, (list, tuple)):
+            continue
+        if isinstance(node, ast.Assign) or installed_apps is None:
+            installed_apps = []
+        installed_apps.extend(str(entry) for entry in value)
+    return installed_apps
+
+
+def app_module_name(entry: str) -> str:
+    """Module of an INSTALLED_APPS entry, which may be an AppConfig path."""
+    module, _, last = entry.rpartition(".")
+    if module and last[:1].isupper():
+        # "shop.apps.ShopConfig" -> "shop"
+        return module[:-len(".apps")] if module.endswith(".apps") else module
+    return entry
+
+
+def read_app_label(app_path: Path) -> Optional[str]:
+    """Explicit ``label`` declared on the AppConfig in ``app_path/apps.py``."""
+    try:
+        tree = ast.parse((app_path / "apps.py").read_text(encoding="utf-8"))
+    except (OSError, SyntaxError, UnicodeDecodeError):
+        return None
+    for node in ast.walk(tree):
+        if (
+            isinstance(node, ast.Assign)
+            and any(isinstance(t, ast.Name) and t.id == "label" for t in node.targets)
+            and isinstance(node.value, ast.Constant)
+            and isinstance(node.value.value, str)
+        ):
+            return node.value.value
+    return None
+
+
+def resolve_app(
+    app_label: str,
+    project_root: Optional[Path] = None,
+    installed_apps: Optional[List[str]] = None,
+) -> Optional[AppLocation]:
+    """Locate an app by label or dotted name without importing it."""
+    candidates = [app_module_name(entry) for entry in installed_apps or []]
+    matches = [
+        module for module in candidates
+        if module == app_label or module.rsplit(".", 1)[-1] == app_label
+    ]
+    # Apps with a custom label can only be found by reading their apps.py;
+    # restrict that to apps inside the project so third-party packages such
+    # as django.contrib are never imported by the lookup.
+    if project_root is not None:
+        matches += [
+            module for module in candidates
+            if module not in matches and (project_root / module.split(".")[0]).is_dir()
+        ]
+
+    for module in matches:
+        init_py = find_module_path(module)
+        if init_py is None or init_py.name != "__init__.py":
+            continue
+        app_path = init_py.parent
+        label = read_app_label(app_path) or module.rsplit(".", 1)[-1]
+        if label == app_label or module == app_label:
+            return AppLocation(module, app_path, label)
+
+    if project_root is not None and (project_root / app_label / "__init__.py").is_file():
+        return AppLocation(app_label, project_root / app_label)
+    return None
+
+
+__all__ = [
+    "AppLocation",
+    "app_module_name",
+    "find_module_path",
+    "find_project_root",
+    "get_settings_module",
+    "read_app_label",
+    "read_installed_apps",
+    "resolve_app",
+]
@@ -0,0 +1,114 @@
+"""Persistent project index cache in ``<project>/.dj_cli_tools/index``.
+
+Stores what the generators otherwise recompute on every run -- the settings
+path, INSTALLED_APPS, app label to path, AppConfig class names and the
+symbol index of every generated module. Each entry records the
+``(st_mtime_ns, st_size)`` of the file it was derived from and is only used
+while that file is unchanged, so a repeated run does a ``stat`` per file
+instead of reading and parsing it.
+"""
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from .file_buffer import atomic_write
+from .symbol_index import ModuleIndex
+
+CACHE_DIR = ".dj_cli_tools"
+CACHE_FILE = "index"
+VERSION = 3
+
+
+def file_signature(path) -> Optional[list]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+class ProjectCache:
+    """Sections of cached values, each valid while a source file is unchanged."""
+
+    def __init__(self, path: Path, data: Optional[Dict[str, Any]] = None):
+        self.path = path
+        self._data: Dict[str, Dict[str, Any]] = data or {}
+        self._dirty = False
+        # Indexes already rebuilt from their cached form, for long-lived processes.
+        self._indexes: Dict[str, Tuple[list, ModuleIndex]] = {}
+
+    @classmethod
+    def for_project(cls, root) -> Optional["ProjectCache"]:
+        """Load the cache of the project at ``root``; None without a root."""
+        if root is None:
+            return None
+        path = Path(root) / CACHE_DIR / CACHE_FILE
+        try:
+            data = json.loads(path.read_bytes())
+        except (OSError, ValueError):
+            data = None
+        if not isinstance(data, dict) or data.get("version") != VERSION:
+            return cls(path)
+        return cls(path, data.get("sections"))
+
+    def get(self, section: str, key: str, source=None) -> Any:
+        """Cached value, or None if missing or ``source`` changed since."""
+        entry = self._data.get(section, {}).get(key)
+        if entry is None:
+            return None
+        signature, value = entry
+        if source is not None and signature != file_signature(source):
+            return None
+        return value
+
+    def set(self, section: str, key: str, value: Any, source=None, signature=None) -> None:
+        """Cache ``value``, tied to the current (or given) signature of ``source``."""
+        if source is not None and signature is None:
+            signature = file_signature(source)
+            if signature is None:
+                return
+        self._data.setdefault(section, {})[key] = [
+            list(signature) if signature is not None else None, value]
+        self._dirty = True
+
+    def module_index(self, path, signature=None) -> Optional[ModuleIndex]:
+        """Cached index of ``path`` if it still matches ``signature`` (or the disk)."""
+        entry = self._data.get("modules", {}).get(str(path))
+        if entry is None:
+            return None
+        expected = list(signature) if signature is not None else file_signature(path)
+        if entry[0] != expected:
+            return None
+        memo = self._indexes.get(str(path))
+        if memo is None or memo[0] != expected:
+            memo = self._indexes[str(path)] = (expected, ModuleIndex.from_dict(entry[1]))
+        return memo[1]
+
+    def set_module_index(self, path, index: ModuleIndex, signature) -> None:
+        self.set("modules", str(path), index.to_dict(), source=path, signature=signature)
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        cache_dir = self.path.parent
+        data = {"version": VERSION, "sections": self._data}
+        try:
+            if not cache_dir.exists():
+                cache_dir.mkdir(parents=True)
+                # Keep the cache out of version control, like .pytest_cache does.
+                (cache_dir / ".gitignore").write_text("*\n", encoding="utf-8")
+            atomic_write(self.path, json.dumps(data, separators=(",", ":")).encode("utf-8"))
+        except OSError:
+            # The cache is an optimisation; never fail a command over it.
+            return
+        self._dirty = False
+
+
+__all__ = [
+    "CACHE_DIR",
+    "ProjectCache",
+    "file_signature",
+]
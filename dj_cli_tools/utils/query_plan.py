@@ -0,0 +1,358 @@
+"""Relation-aware querysets and serializer fields for generated code.
+
+A generated ``Model.objects.all()`` queryset serialised through
+``fields = '__all__'`` costs one extra query per row and relation as soon as
+the model has a ManyToManyField, or the serializer nests a related model. :func:`plan_queries` walks a
+model's relation graph through ``_meta`` and returns the ``select_related``
+and ``prefetch_related`` lookups that load the relations the serializer
+reads in a fixed number of queries, together with the serializer fields
+that expose those relations.
+
+:func:`traversed_lookups` reads which relations an existing serializer
+reads from its source. Only model classes and parsed source are passed in,
+so importing this module does not import Django.
+"""
+from __future__ import annotations
+
+import ast
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from .field_specs import FieldSpec
+from .symbol_index import MAX_LINE_LENGTH, root_name
+
+DEFAULT_DEPTH = 1
+# Related fields rendering the primary key, which DRF reads from <fk>_id.
+_PK_FIELDS = ("PrimaryKeyRelatedField", "HyperlinkedRelatedField")
+# QuerySet methods the loading calls of a plan can follow without changing
+# which rows are returned or in what order.
+_CHAINABLE = (
+    "alias", "all", "annotate", "distinct", "exclude", "filter", "order_by",
+    "prefetch_related", "reverse", "select_related", "using",
+)
+
+
+class QueryPlan(NamedTuple):
+    """Lookups and serializer fields for the list endpoint of one model."""
+
+    select_related: List[str]
+    prefetch_related: List[str]
+    # Meta.fields of the serializer, in model order.
+    fields: List[str]
+    # Reverse relations, declared read-only on the serializer: (accessor, many).
+    reverse_relations: List[Tuple[str, bool]]
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.select_related or self.prefetch_related)
+
+
+def plan_queries(
+    model, depth: int = DEFAULT_DEPTH, include_reverse: bool = False,
+    traversed: Optional[Set[str]] = None,
+) -> QueryPlan:
+    """Plan the queryset and serializer fields of ``model``.
+
+    ``traversed`` holds the lookups the serializer reads past the columns
+    of the row: nested serializers, dotted ``source`` paths and related
+    fields that render more than the primary key. A ForeignKey rendered as
+    a primary key reads ``<fk>_id`` and is not joined. Forward ForeignKey
+    and OneToOneField relations in ``traversed`` are joined with
+    ``select_related``, ``depth`` levels deep at most, and ManyToManyFields
+    in it are loaded with ``prefetch_related``. Without ``traversed`` the
+    plan is for the serializer generated with it, which renders every
+    relation as primary keys: only the ManyToManyFields are loaded.
+
+    Reverse relations are not serialised by ``fields = '__all__'`` and can
+    be unbounded, so they are only added with ``include_reverse``: reverse
+    OneToOneFields are joined, reverse ForeignKeys and ManyToManyFields are
+    prefetched and all of them are declared read-only on the serializer.
+    Hidden reverse relations (``related_name='+'``) and generic relations
+    are always left out.
+    """
+    opts = model._meta.concrete_model._meta
+    if traversed is None:
+        traversed = {field.name for field in opts.get_fields()
+                     if field.many_to_many and field.concrete and _is_followed(field)}
+
+    prefetch_related: List[str] = []
+    fields: List[str] = [opts.pk.name]
+    reverse_relations: List[Tuple[str, bool]] = []
+    for field in opts.get_fields():
+        if field.auto_created and not field.concrete:
+            if include_reverse and _is_followed(field):
+                reverse_relations.append((field.get_accessor_name(), not field.one_to_one))
+        elif field is opts.pk or not getattr(field, "serialize", False):
+            continue
+        elif field.many_to_many and _is_followed(field):
+            if field.name in traversed:
+                prefetch_related.append(field.name)
+            fields.append(field.name)
+        elif field.concrete:
+            fields.append(field.name)
+    prefetch_related.extend(accessor for accessor, many in reverse_relations if many)
+    fields.extend(accessor for accessor, _ in reverse_relations)
+
+    # The declared reverse OneToOneFields read the related row themselves.
+    joined = traversed | {accessor for accessor, many in reverse_relations if not many}
+    select_related: List[str] = []
+    _collect_select_related(opts, "", depth, include_reverse, {opts.label}, select_related)
+    select_related = [lookup for lookup in select_related if lookup in joined]
+    return QueryPlan(select_related, prefetch_related, fields, reverse_relations)
+
+
+def plan_spec_queries(specs: List[FieldSpec]) -> QueryPlan:
+    """The plan of a model that is not loaded yet, from its field specs.
+
+    Like the plan of the loaded model for the generated serializer, it
+    prefetches the ManyToManyFields and joins nothing.
+    """
+    fields = [spec.name for spec in specs]
+    if not any(spec.primary_key for spec in specs):
+        fields.insert(0, "id")
+    return QueryPlan([], [spec.name for spec in specs if spec.type == "m2m"], fields, [])
+
+
+def _collect_select_related(
+    opts, prefix: str, depth: int, include_reverse: bool, seen: Set[str], lookups: List[str]
+) -> None:
+    if depth <= 0:
+        return
+    for field in opts.get_fields():
+        if not (field.many_to_one or field.one_to_one) or not _is_followed(field):
+            continue
+        if field.auto_created and not field.concrete:
+            if not include_reverse:
+                continue
+            name = field.get_accessor_name()
+        else:
+            name = field.name
+        related_opts = field.related_model._meta
+        lookup = prefix + name
+        lookups.append(lookup)
+        if related_opts.label not in seen:
+            _collect_select_related(
+                related_opts, lookup + "__", depth - 1, include_reverse,
+                seen | {related_opts.label}, lookups)
+
+
+def _is_followed(field) -> bool:
+    if not field.is_relation or field.related_model is None:
+        # Generic foreign keys have no related model to join or prefetch.
+        return False
+    if field.auto_created and not field.concrete:
+        # Reverse relations: skip hidden ones and the links of multi-table
+        # inheritance, which every child model adds to its parent.
+        return not (field.hidden or field.parent_link)
+    return not getattr(field.remote_field, "parent_link", False)
+
+
+def traversed_lookups(classes, serializer_name: str, model, prefix: str = "") -> Set[str]:
+    """Lookups the serializer ``serializer_name`` of ``model`` reads past the
+    columns of each row, read from the ``class_attributes`` of serializers.py.
+
+    Nested serializers, dotted ``source`` paths, related fields other than
+    primary keys and hyperlinks (``StringRelatedField``, ``SlugRelatedField``),
+    many-to-many and reverse relations and ``Meta.depth`` traverse their
+    relation. Nested serializers defined in serializers.py are followed.
+    """
+    attributes = classes.get(serializer_name, {})
+    meta = classes.get(f"{serializer_name}.Meta", {})
+    relations = _relations(model)
+    lookups: Set[str] = set()
+    declared = set()
+    for name, attribute in attributes.items():
+        value = getattr(attribute.node, "value", None)
+        if not isinstance(value, ast.Call):
+            continue
+        declared.add(name)
+        keywords = {keyword.arg: keyword.value for keyword in value.keywords}
+        source = _string(keywords.get("source")) or name
+        path, current = [], model
+        for attr in source.split("."):
+            field = _relations(current).get(attr)
+            if field is None:
+                break
+            path.append(attr)
+            current = field.related_model
+        if not path:
+            continue
+        callee = value.func.attr if isinstance(value.func, ast.Attribute) else root_name(value.func)
+        field = relations[path[0]]
+        if (len(source.split(".")) == 1 and callee in _PK_FIELDS and _is_forward(field)
+                and _string(keywords.get("lookup_field")) in ("", "pk")):
+            # Reads the <fk>_id column of the row.
+            continue
+        lookups.update(prefix + "__".join(path[:end]) for end in range(1, len(path) + 1))
+        if callee in classes and len(path) == len(source.split(".")):
+            lookups |= traversed_lookups(classes, callee, current, prefix + "__".join(path) + "__")
+
+    depth = meta["depth"].node.value if "depth" in meta else None
+    depth = depth.value if isinstance(depth, ast.Constant) and isinstance(depth.value, int) else 0
+    for name in _model_fields(meta, relations):
+        field = relations.get(name)
+        if name in declared or field is None:
+            continue
+        if not _is_forward(field):
+            # Many-to-many and reverse relations query their manager per row.
+            lookups.add(prefix + name)
+        elif depth:
+            lookups |= _nested_lookups(field, prefix + name, depth)
+    return lookups
+
+
+def _relations(model) -> Dict[str, object]:
+    """The relations of ``model`` by field name or reverse accessor."""
+    relations = {}
+    for field in model._meta.get_fields():
+        if not field.is_relation or field.related_model is None:
+            continue
+        name = field.get_accessor_name() if field.auto_created and not field.concrete else field.name
+        if name:
+            relations[name] = field
+    return relations
+
+
+def _is_forward(field) -> bool:
+    return field.concrete and (field.many_to_one or field.one_to_one)
+
+
+def _model_fields(meta, relations) -> List[str]:
+    """The names ``Meta.fields`` or ``Meta.exclude`` serialise."""
+    if "fields" not in meta and "exclude" not in meta:
+        # A plain Serializer: only its declared fields.
+        return []
+    fields = meta["fields"].node.value if "fields" in meta else None
+    if isinstance(fields, (ast.List, ast.Tuple)):
+        return [name for name in map(_string, fields.elts) if name]
+    exclude = meta["exclude"].node.value if "exclude" in meta else None
+    excluded = ({_string(e) for e in exclude.elts} if isinstance(exclude, (ast.List, ast.Tuple))
+                else set())
+    # '__all__' serialises the forward relations only.
+    return [name for name, field in relations.items()
+            if field.concrete and name not in excluded]
+
+
+def _nested_lookups(field, lookup: str, depth: int) -> Set[str]:
+    """``Meta.depth`` nesting: every forward relation, ``depth`` levels deep."""
+    lookups = {lookup}
+    if depth > 1:
+        for name, related in _relations(field.related_model).items():
+            if related.concrete:
+                lookups |= _nested_lookups(related, f"{lookup}__{name}", depth - 1)
+    return lookups
+
+
+def _string(node) -> str:
+    return node.value if isinstance(node, ast.Constant) and isinstance(node.value, str) else ""
+
+
+class QuerysetChain(NamedTuple):
+    """An existing ``queryset`` expression, without its loading calls."""
+
+    manager: str
+    # The calls to keep, in order, e.g. ".filter(published=True)".
+    calls: List[str]
+    # Lookups loaded by the kept ``prefetch_related(Prefetch(...))`` calls.
+    prefetched: Set[str]
+
+
+def queryset_chain(node: ast.expr) -> Optional[QuerysetChain]:
+    """Split ``Book.objects.filter(...).order_by(...)`` into its manager and
+    the calls a plan's loading calls can be appended to.
+
+    ``all()`` and ``select_related``/``prefetch_related`` calls that only
+    name lookups are left out, the plan replaces them. ``None`` is returned
+    for anything else than a chain of :data:`_CHAINABLE` calls on a
+    manager, such as a slice or a ``values()`` call.
+    """
+    calls: List[str] = []
+    prefetched: Set[str] = set()
+    while isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+        method, arguments = node.func.attr, node.args
+        if method not in _CHAINABLE or (method == "select_related" and not arguments):
+            return None
+        only_lookups = all(_string(argument) for argument in arguments) and not node.keywords
+        if method == "all" or (method.endswith("_related") and only_lookups):
+            node = node.func.value
+            continue
+        if method == "prefetch_related":
+            prefetched.update(
+                _string(argument.args[0]) for argument in arguments
+                if isinstance(argument, ast.Call) and argument.args
+                and not any(keyword.arg == "to_attr" for keyword in argument.keywords))
+        call = ast.Call(func=ast.Name(id=method), args=arguments, keywords=node.keywords)
+        calls.insert(0, f".{ast.unparse(call)}")
+        node = node.func.value
+    if not (isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name)):
+        return None
+    return QuerysetChain(node.attr, calls, prefetched)
+
+
+def queryset_code(
+    model_name: str, plan: Optional[QueryPlan], indent: int = 4,
+    chain: Optional[QuerysetChain] = None,
+) -> str:
+    """The ``queryset`` expression for ``plan``, assigned at ``indent``.
+
+    With ``chain`` the loading calls of the plan are appended to its
+    calls, on its manager; lookups it prefetches itself are not repeated.
+    Chains that do not fit on the ``queryset = ...`` line are wrapped in
+    parentheses, one call per line.
+    """
+    manager, calls = (chain.manager, list(chain.calls)) if chain else ("objects", [])
+    select_related = plan.select_related if plan else []
+    prefetch_related = [lookup for lookup in (plan.prefetch_related if plan else [])
+                        if not chain or lookup not in chain.prefetched]
+    if not (calls or select_related or prefetch_related):
+        return f"{model_name}.{manager}.all()"
+    if select_related:
+        calls.append(f".select_related({_arguments(select_related)})")
+    if prefetch_related:
+        calls.append(f".prefetch_related({_arguments(prefetch_related)})")
+    code = f"{model_name}.{manager}" + "".join(calls)
+    if indent + len("queryset = ") + len(code) <= MAX_LINE_LENGTH:
+        return code
+    inner = " " * (indent + 4)
+    lines = [f"{model_name}.{manager}", *calls]
+    return "(\n" + "".join(f"{inner}{line}\n" for line in lines) + " " * indent + ")"
+
+
+def fields_code(fields: List[str], indent: int = 8) -> str:
+    """A ``Meta.fields`` list, one name per line when it is too long."""
+    code = f"[{_arguments(fields)}]"
+    if indent + len("fields = ") + len(code) <= MAX_LINE_LENGTH:
+        return code
+    inner = " " * (indent + 4)
+    return "[\n" + "".join(f"{inner}'{name}',\n" for name in fields) + " " * indent + "]"
+
+
+def serializer_declarations(reverse_relations: List[Tuple[str, bool]], indent: int = 4) -> str:
+    """Read-only serializer fields for ``reverse_relations``.
+
+    Each declaration ends with a newline and a non-empty result with a
+    blank line, ready to go in front of the serializer's ``class Meta``.
+    """
+    declarations = "".join(
+        f"{' ' * indent}{accessor} = serializers.PrimaryKeyRelatedField("
+        f"{'many=True, ' if many else ''}read_only=True)\n"
+        for accessor, many in reverse_relations
+    )
+    return declarations + "\n" if declarations else ""
+
+
+def _arguments(lookups: List[str]) -> str:
+    return ", ".join(f"'{lookup}'" for lookup in lookups)
+
+
+__all__ = [
+    "DEFAULT_DEPTH",
+    "QueryPlan",
+    "QuerysetChain",
+    "fields_code",
+    "plan_queries",
+    "plan_spec_queries",
+    "queryset_chain",
+    "queryset_code",
+    "serializer_declarations",
+    "traversed_lookups",
+]
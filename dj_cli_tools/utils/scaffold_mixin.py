@@ -0,0 +1,1243 @@
+"""Resource scaffolding shared by ``create`` and the ``dj-cli`` entry point.
+
+Nothing in here imports Django at module level, so the generators can run
+without ``django.setup()`` when the caller can locate the apps on its own.
+"""
+import ast
+import importlib.util
+import os
+import re
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from . import timings
+from .admin_plan import AdminPlan, admin_options_code, plan_admin, plan_admin_specs
+from .case_utils import CaseUtils
+from .code_templates import CodeTemplates
+from .errors import command_error
+from .fast_serializer import fast_columns, fast_serializer_code, fast_spec_columns
+from .file_handling_mixin import FileHandlingMixin
+from .field_specs import (
+    FieldSpec,
+    factory_declaration,
+    factory_post_generation,
+    field_code,
+    index_name,
+    meta_code,
+    parse_field_spec,
+)
+from .filtering import (
+    FilterSpec,
+    field_list,
+    unindexed_fields,
+    viewset_filter_code,
+    viewset_filter_imports,
+)
+from .manifest import load_manifest
+from .project import find_project_root
+from .project_cache import ProjectCache
+from .query_plan import (
+    QueryPlan,
+    fields_code,
+    plan_queries,
+    plan_spec_queries,
+    queryset_code,
+    serializer_declarations,
+)
+from .schema_import import DEFAULT_DATABASE, SchemaImportMixin
+from .symbol_index import SourceEditor, merge_imports
+from .url_layout import LAYOUTS, Route, ShardedUrlsMixin, included_shards
+
+
+class ScaffoldMixin(SchemaImportMixin, ShardedUrlsMixin, FileHandlingMixin):
+    """
+    Generates models, serializers, viewsets, factories, admin and URL
+    registrations for (app, model) pairs. Expects ``stdout`` and ``style``
+    attributes like BaseCommand's and an implementation of
+    ``_get_app_config``.
+
+    New models are rendered from field specs, ``--index`` and ``--unique``,
+    see :mod:`dj_cli_tools.utils.field_specs`, and ``--makemigrations``
+    writes their migrations in the same run. ``--from-db`` renders one per
+    table of an existing database instead, see
+    :mod:`dj_cli_tools.utils.schema_import`.
+
+    Serializers of models that are already loaded list their fields
+    explicitly. With ``--optimize-queries`` the viewset queryset is built
+    from the model's relations, see :mod:`dj_cli_tools.utils.query_plan`.
+    With ``--fast-serializer`` list actions go through a hand-rolled
+    read-only serializer over ``.values()`` rows, see
+    :mod:`dj_cli_tools.utils.fast_serializer`. With ``--pagination cursor``
+    the viewsets page through a keyset ``CursorPagination`` in the app's
+    ``pagination.py`` and new models get the matching ordering index.
+    With ``--cache`` the viewsets answer conditional GETs and cache their
+    responses through the ``ConditionalCacheMixin`` of the app's
+    ``caching.py``; ``signals.py`` invalidates them when rows change, and
+    new models get an ``updated_at`` field.
+    ``--filter-fields``, ``--search-fields`` and ``--ordering-fields``
+    set up the viewset's filter backends on indexed columns only: new
+    models declare those fields with ``db_index=True`` and existing ones
+    are refused unless every field has an index, see
+    :mod:`dj_cli_tools.utils.filtering`.
+    With ``--async`` the viewsets extend an ``AsyncModelViewSet`` on the
+    async ORM, and ``tests.py`` gets tests driving them through the ASGI
+    test client.
+    ``tests.py`` gets a ``QueryBudgetMixin`` test per viewset that seeds
+    rows through the factory and asserts that the list, detail and create
+    endpoints make as many queries with many rows as with one; factories
+    of new models declare values for the required fields of their specs.
+    Admin classes skip the full result count and page with an
+    estimated-count paginator; for loaded models they also get the
+    relation and search options of :mod:`dj_cli_tools.utils.admin_plan`.
+    """
+
+    _optimize_queries = False
+    _filters = FilterSpec([], [], [])
+    _async_views = False
+    _http_cache = False
+    _cache_timeout = CodeTemplates.CACHE_TIMEOUT
+    _field_specs = []
+    _composite_indexes = []
+    _unique_together = []
+    _fast_serializer = False
+    _pagination = "none"
+    _table_models = {}
+    _created_models = set()
+
+    def _add_scaffold_arguments(self, parser) -> None:
+        parser.add_argument(
+            "app_name", nargs="?", help="Name of the Django app to create the model in."
+        )
+        parser.add_argument(
+            "model_name", nargs="?", help="Name of the model to create."
+        )
+        parser.add_argument(
+            "fields", nargs="*", metavar="FIELD",
+            help="Field specs of a new model, name[:type][:argument...][:modifier...], e.g. "
+                 "name:char:120:index sku:char:unique price:decimal created:datetime:auto.",
+        )
+        parser.add_argument(
+            "--index",
+            dest="composite_indexes",
+            action="append",
+            type=field_list,
+            default=[],
+            metavar="FIELD,...",
+            help="Add a Meta.indexes entry on these fields of a new model; repeatable.",
+        )
+        parser.add_argument(
+            "--unique",
+            dest="unique_together",
+            action="append",
+            type=field_list,
+            default=[],
+            metavar="FIELD,...",
+            help="Add a UniqueConstraint on these fields of a new model; repeatable.",
+        )
+        parser.add_argument(
+            "--makemigrations",
+            action="store_true",
+            help="Run makemigrations for the apps that got new models.",
+        )
+        parser.add_argument(
+            "--manifest",
+            help="TOML or JSON file listing many (app, model) pairs to create in one pass.",
+        )
+        parser.add_argument(
+            "--from-db",
+            nargs="?",
+            const=DEFAULT_DATABASE,
+            metavar="DATABASE",
+            help="Create a model, with the rest of the stack, for every table of this database "
+                 "alias or SQLite file (default: 'default') that has no model yet.",
+        )
+        parser.add_argument(
+            "--tables",
+            action="append",
+            default=[],
+            metavar="PATTERN",
+            help="With --from-db, only the tables matching this glob pattern; repeatable.",
+        )
+        parser.add_argument(
+            "--jobs",
+            type=int,
+            default=None,
+            help="Worker processes rendering the models of --from-db (default: one per CPU).",
+        )
+        parser.add_argument(
+            "--no-cache",
+            action="store_true",
+            help="Do not read or update the project index cache in .dj_cli_tools/.",
+        )
+        parser.add_argument(
+            "--optimize-queries",
+            action="store_true",
+            help="Generate select_related/prefetch_related querysets and explicit serializer "
+                 "fields from the relations of models that already exist, and warn about "
+                 "models that are not loaded yet. Many-to-many fields are prefetched without it.",
+        )
+        parser.add_argument(
+            "--fast-serializer",
+            action="store_true",
+            help="Serve list actions through a read-only serializer with a hand-rolled "
+                 "to_representation over .values() rows, with a micro-benchmark in "
+                 "bench_serializers.py.",
+        )
+        parser.add_argument(
+            "--filter-fields",
+            type=field_list,
+            default=[],
+            metavar="FIELD,...",
+            help="Fields the viewset filters by exactly, through django-filter.",
+        )
+        parser.add_argument(
+            "--search-fields",
+            type=field_list,
+            default=[],
+            metavar="FIELD,...",
+            help="Text fields ?search= matches by prefix.",
+        )
+        parser.add_argument(
+            "--ordering-fields",
+            type=field_list,
+            default=[],
+            metavar="FIELD,...",
+            help="Fields ?ordering= accepts. Existing models must have an index on every "
+                 "filter, search and ordering field; new models get one.",
+        )
+        parser.add_argument(
+            "--async",
+            dest="async_views",
+            action="store_true",
+            help="Generate async viewsets on Django's async ORM (needs adrf) and ASGI "
+                 "client tests for them.",
+        )
+        parser.add_argument(
+            "--cache",
+            dest="http_cache",
+            action="store_true",
+            help="Answer conditional GETs with ETag/Last-Modified, cache list and detail "
+                 "responses in Django's cache and invalidate them from post_save/post_delete "
+                 "signal handlers.",
+        )
+        parser.add_argument(
+            "--cache-timeout",
+            type=int,
+            default=CodeTemplates.CACHE_TIMEOUT,
+            metavar="SECONDS",
+            help=f"How long --cache keeps responses (default: {CodeTemplates.CACHE_TIMEOUT}); "
+                 f"0 only answers conditional GETs.",
+        )
+        parser.add_argument(
+            "--url-layout",
+            choices=LAYOUTS,
+            help="How urls.py registers the viewsets: 'flat' on one router, or 'sharded' in "
+                 "routes/<letter>.py modules included by prefix (default: the app's current "
+                 "layout, flat for a new urls.py).",
+        )
+        parser.add_argument(
+            "--no-tests",
+            action="store_true",
+            help="Do not append query budget tests for the viewsets to tests.py.",
+        )
+        parser.add_argument(
+            "--pagination",
+            choices=["none", "cursor"],
+            default="none",
+            help="Pagination of the generated list endpoints. 'cursor' pages by keyset on an "
+                 "indexed ordering instead of COUNT(*) and OFFSET.",
+        )
+
+    def _get_app_config(self, app_name: str):
+        """Return an object with ``name`` and ``path`` for ``app_name``.
+
+        Raises LookupError if the app cannot be found.
+        """
+        raise NotImplementedError
+
+    def _get_model(self, app_config, model_name: str):
+        """Return the loaded model class for ``model_name``, or None."""
+        from django.apps import apps
+
+        # The registry itself, so nothing is imported for models that are not.
+        return apps.all_models.get(self._app_label(app_config), {}).get(model_name.lower())
+
+    def _get_project_root(self):
+        return find_project_root()
+
+    def _scaffold(self, options) -> None:
+        if options.get("no_cache"):
+            self._project_cache = None
+        elif self._project_cache is None:
+            with timings.phase("cache load"):
+                self._project_cache = ProjectCache.for_project(self._get_project_root())
+
+        app_name = options["app_name"]
+        model_name = options["model_name"]
+        manifest = options.get("manifest")
+        self._optimize_queries = bool(options.get("optimize_queries"))
+        self._fast_serializer = bool(options.get("fast_serializer"))
+        self._pagination = options.get("pagination") or "none"
+        self._url_layout = options.get("url_layout")
+        self._models: Dict[tuple, object] = {}
+        self._new_model_apps = []
+        try:
+            self._field_specs = [parse_field_spec(spec) for spec in options.get("fields") or []]
+        except ValueError as e:
+            raise command_error(f"Invalid field spec: {e}.")
+        names = [spec.name for spec in self._field_specs]
+        if len(set(names)) != len(names):
+            raise command_error("Each field can only be given one spec.")
+        self._composite_indexes = self._field_groups(options, "composite_indexes", "--index")
+        self._unique_together = self._field_groups(options, "unique_together", "--unique")
+        self._filters = FilterSpec(*(
+            self._field_names(options, option)
+            for option in ("filter_fields", "search_fields", "ordering_fields")))
+        self._http_cache = bool(options.get("http_cache"))
+        self._cache_timeout = int(options.get("cache_timeout", CodeTemplates.CACHE_TIMEOUT))
+        if self._cache_timeout < 0:
+            raise command_error("--cache-timeout cannot be negative.")
+        self._async_views = bool(options.get("async_views"))
+        if self._async_views:
+            if self._fast_serializer or self._pagination != "none" or not self._filters.is_empty:
+                raise command_error(
+                    "--async viewsets page with limit/offset themselves and cannot be combined "
+                    "with --fast-serializer, --pagination or the filter options.")
+            if self._http_cache:
+                raise command_error("--cache works on sync viewsets and cannot be combined with --async.")
+            if importlib.util.find_spec("adrf") is None:
+                self.stdout.write(self.style.WARNING(
+                    "--async generates adrf viewsets: install adrf (pip install adrf)."))
+        if self._filters.filter_fields and importlib.util.find_spec("django_filters") is None:
+            self.stdout.write(self.style.WARNING(
+                "--filter-fields generates a DjangoFilterBackend: install django-filter "
+                "and add 'django_filters' to INSTALLED_APPS."))
+
+        from_db = options.get("from_db")
+        self._table_models = {}
+        self._app_configs = {}
+        self._created_models: Set[tuple] = set()
+        if manifest and from_db:
+            raise command_error("Cannot use --manifest with --from-db.")
+        if manifest:
+            if app_name or model_name:
+                raise command_error("Cannot use app_name/model_name with --manifest.")
+            if self._field_specs or self._composite_indexes or self._unique_together:
+                raise command_error("Field specs, --index and --unique need a single model, not --manifest.")
+            with timings.phase("manifest"):
+                pairs = load_manifest(manifest)
+        elif from_db:
+            pairs = self._table_pairs(app_name, options)
+        elif app_name and model_name:
+            pairs = [(app_name, model_name)]
+        else:
+            raise command_error("Provide app_name and model_name, or --manifest.")
+
+        # Group the models by app so every target file is rendered and written
+        # once per run, whatever the number of models.
+        grouped: Dict[str, List[str]] = {}
+        for app_name, model_name in pairs:
+            grouped.setdefault(app_name, []).append(model_name)
+
+        with timings.phase("app lookup"):
+            app_configs = [self._lookup_app(app_name) for app_name in grouped]
+
+        steps = [
+            ("model", self._create_model),
+            ("serializer", self._create_serializer),
+            ("viewset", self._create_viewset),
+            ("factory", self._create_factory),
+            ("admin", self._register_admin),
+            ("urls", self._register_urls),
+        ]
+        if not options.get("no_tests"):
+            steps.append(("tests", self._create_query_budget_tests))
+        if self._pagination == "cursor":
+            steps.insert(2, ("pagination", self._create_pagination))
+        if self._http_cache:
+            steps.insert(steps.index(("viewset", self._create_viewset)),
+                         ("caching", self._create_caching))
+            steps.append(("signals", self._create_cache_signals))
+            steps.append(("tests", self._create_cache_tests))
+        if self._fast_serializer:
+            steps.append(("benchmark", self._create_serializer_benchmark))
+        if self._async_views:
+            steps.append(("tests", self._create_async_tests))
+        for app_config, model_names in zip(app_configs, grouped.values()):
+            with timings.phase(f"app {app_config.name}"):
+                for name, step in steps:
+                    with timings.phase(name):
+                        step(app_config, model_names)
+
+        self._commit_files()
+        if self._project_cache is not None:
+            with timings.phase("cache save"):
+                self._project_cache.save()
+        if options.get("makemigrations") and self._new_model_apps:
+            with timings.phase("makemigrations"):
+                self._make_migrations(self._new_model_apps)
+
+    def _table_pairs(self, app_name: Optional[str], options) -> List[tuple]:
+        """The (app, model) pairs of ``--from-db``, with the models rendered
+        from the tables of the database."""
+        if not app_name or options["model_name"]:
+            raise command_error("--from-db takes the app_name to create the models in, and no model_name.")
+        if self._field_specs or self._composite_indexes or self._unique_together:
+            raise command_error("--from-db reads the fields and indexes from the database: "
+                                "field specs, --index and --unique do not apply.")
+        if (self._optimize_queries or self._fast_serializer or self._http_cache
+                or self._pagination != "none" or not self._filters.is_empty):
+            raise command_error(
+                "--from-db cannot be combined with --optimize-queries, --fast-serializer, --cache, "
+                "--pagination or the filter options; use them on single models once migrated.")
+        jobs = options["jobs"] if options.get("jobs") is not None else os.cpu_count() or 1
+        if jobs < 1:
+            raise command_error("--jobs must be at least 1.")
+        app_config = self._lookup_app(app_name)
+        with timings.phase("schema"):
+            rendered = self._import_schema(app_config, options["from_db"], options.get("tables") or [], jobs)
+        self._table_models = {model.model_name: model for model in rendered}
+        return [(app_name, model.model_name) for model in rendered]
+
+    def _lookup_app(self, app_name: str):
+        """``_get_app_config`` once per app and run; the server holds the
+        app's lock from the first lookup on."""
+        if app_name not in self._app_configs:
+            try:
+                self._app_configs[app_name] = self._get_app_config(app_name)
+            except LookupError:
+                raise command_error(f"App '{app_name}' does not exist.")
+        return self._app_configs[app_name]
+
+    def _setup_django(self) -> None:
+        import django
+        from django.apps import apps
+
+        if not apps.ready:
+            with timings.phase("django.setup"):
+                django.setup()
+
+    def _make_migrations(self, app_configs) -> None:
+        """Run ``makemigrations`` in this process for the apps in ``app_configs``.
+
+        Models modules imported before the new classes were written are
+        reloaded so the autodetector sees them.
+        """
+        from django.apps import apps
+        from django.core.management import call_command
+
+        labels = [self._app_label(app_config) for app_config in app_configs]
+        if apps.ready:
+            self._reload_models(labels)
+        else:
+            self._setup_django()
+        call_command("makemigrations", *labels, stdout=self.stdout)
+
+    @staticmethod
+    def _reload_models(labels: Sequence[str]) -> None:
+        import importlib
+        import warnings
+
+        from django.apps import apps
+
+        for label in labels:
+            app_config = apps.get_app_config(label)
+            with warnings.catch_warnings():
+                # "Model ... was already registered" for the models that were there.
+                warnings.simplefilter("ignore", RuntimeWarning)
+                if app_config.models_module is None:
+                    app_config.models_module = importlib.import_module(f"{app_config.name}.models")
+                else:
+                    importlib.reload(app_config.models_module)
+        apps.clear_cache()
+
+    def _model(self, app_config, model_name: str):
+        """The loaded model class of ``model_name``, looked up once per run."""
+        key = (app_config.name, model_name)
+        if key not in self._models:
+            model = self._get_model(app_config, model_name)
+            # The field specs of models created in this run stand in for them.
+            if (model is None and (self._optimize_queries or self._fast_serializer)
+                    and self._new_model_specs(app_config, model_name) is None):
+                hint = (f" Run 'optimize_viewset {app_config.name} {model_name}' once it has relations."
+                        if self._optimize_queries else "")
+                self.stdout.write(self.style.WARNING(
+                    f"Model '{model_name}' is not loaded yet, generating code without its fields.{hint}"))
+            self._models[key] = model
+        return self._models[key]
+
+    def _query_plan(self, app_config, model_name: str) -> Optional[QueryPlan]:
+        """The relation plan of ``model_name``, if it is loaded or created in this run."""
+        model = self._model(app_config, model_name)
+        if model is None:
+            specs = self._new_model_specs(app_config, model_name)
+            return None if specs is None else plan_spec_queries(specs)
+        return plan_queries(model)
+
+    def _admin_plan(self, app_config, model_name: str) -> Optional[AdminPlan]:
+        """The admin options of ``model_name``, if it is loaded or created in this run."""
+        model = self._model(app_config, model_name)
+        if model is None:
+            specs = self._new_model_specs(app_config, model_name)
+            return None if specs is None else plan_admin_specs(specs, self._leading_fields())
+        admin_site = None
+        if model._meta.apps.is_installed("django.contrib.admin"):
+            from django.contrib import admin
+            admin_site = admin.site
+        return plan_admin(model, admin_site)
+
+    def _warn_exists(self, what: str, app_config) -> None:
+        self.stdout.write(self.style.WARNING(
+            f"{what} already exists in app '{app_config.name}', skipping."))
+
+    @staticmethod
+    def _combine_imports(*import_blocks: str) -> str:
+        """Merge import blocks, joining ``from x import ...`` lines per module."""
+        from_imports: Dict[str, List[str]] = {}
+        lines: List[str] = []
+        for block in import_blocks:
+            for line in block.splitlines():
+                line = line.strip()
+                match = re.match(r"from\s+(\S+)\s+import\s+(.+)$", line)
+                if not match:
+                    if line and line not in lines:
+                        lines.append(line)
+                    continue
+                module, names = match.groups()
+                if module not in from_imports:
+                    from_imports[module] = []
+                    lines.append(module)
+                for name in names.split(","):
+                    name = name.strip()
+                    if name and name not in from_imports[module]:
+                        from_imports[module].append(name)
+        return "\n".join(
+            f"from {line} import {', '.join(from_imports[line])}" if line in from_imports else line
+            for line in lines
+        )
+
+    def _create_model(self, app_config, model_names: Sequence[str]) -> None:
+        index = self._get_index(self._get_file_path(app_config, 'models'))
+        blocks, messages = [], []
+        for model_name in model_names:
+            model_name_pascal = CaseUtils.to_pascal_case(model_name)
+            if model_name_pascal in index.classes:
+                self._warn_exists(f"Model '{model_name_pascal}'", app_config)
+                if self._pagination == "cursor":
+                    self.stdout.write(self.style.WARNING(
+                        f"Cursor pagination orders '{model_name_pascal}' by "
+                        f"{CodeTemplates.CURSOR_ORDERING}: make sure it has a "
+                        f"'{CodeTemplates.CURSOR_FIELD}' field and an index on that ordering."))
+                if self._http_cache:
+                    self.stdout.write(self.style.WARNING(
+                        f"Cached detail responses of '{model_name_pascal}' get their Last-Modified "
+                        f"from a '{CodeTemplates.CACHE_FIELD}' field: add one, or set "
+                        f"last_modified_field on the viewset."))
+                if self._field_specs or self._composite_indexes or self._unique_together:
+                    self.stdout.write(self.style.WARNING(
+                        f"Field specs, --index and --unique only apply to new models, "
+                        f"'{model_name_pascal}' is left as it is."))
+                self._check_filter_indexes(app_config, model_name_pascal)
+                continue
+            table_model = self._table_models.get(model_name_pascal)
+            self._created_models.add((app_config.name, model_name_pascal))
+            blocks.append(table_model.code if table_model else self._model_code(app_config, model_name_pascal))
+            messages.append(f"Model '{model_name_pascal}' created in app '{app_config.name}'.")
+        if not blocks:
+            return
+        self._append_to_file(
+            app_config,
+            'models', 
+            self._join_blocks(blocks),
+            success_message="\n".join(messages)
+        )
+        self._new_model_apps.append(app_config)
+
+    @classmethod
+    def _field_groups(cls, options, option: str, flag: str) -> List[List[str]]:
+        """The field lists of a repeatable option, at least two fields each."""
+        value = options.get(option) or []
+        groups = [cls._field_names({option: group}, option) for group in
+                  ([value] if isinstance(value, str) else value)]
+        for fields in groups:
+            if len(fields) < 2:
+                raise command_error(f"{flag} takes two or more comma-separated fields, got {fields}.")
+        return groups
+
+    @staticmethod
+    def _field_names(options, option: str) -> List[str]:
+        # call_command() passes option values through without the argparse type.
+        value = options.get(option) or []
+        if isinstance(value, str):
+            try:
+                value = field_list(value)
+            except ValueError as e:
+                raise command_error(f"--{option.replace('_', '-')}: {e}.")
+        return list(value)
+
+    def _option_specs(self, model_name: str) -> Tuple[List[FieldSpec], List[FieldSpec]]:
+        """The field specs of a new model from the options, and placeholder
+        specs for the filter, search and ordering fields without one."""
+        cursor = self._pagination == "cursor"
+        specs = list(self._field_specs)
+        declared = {spec.name for spec in specs}
+        if cursor and CodeTemplates.CURSOR_FIELD not in declared:
+            specs.insert(0, parse_field_spec(CodeTemplates.CURSOR_FIELD_SPEC))
+            declared.add(CodeTemplates.CURSOR_FIELD)
+        if self._http_cache and CodeTemplates.CACHE_FIELD not in declared:
+            specs.append(parse_field_spec(CodeTemplates.CACHE_FIELD_SPEC))
+            declared.add(CodeTemplates.CACHE_FIELD)
+        # Filter fields without a spec have no type yet.
+        placeholders = [parse_field_spec(name) for name in self._filters.names
+                        if name not in declared and name not in ("id", "pk")]
+
+        leading = self._leading_fields()
+        for position, spec in enumerate(specs):
+            if spec.name in self._filters.names and spec.name not in leading:
+                specs[position] = spec.with_index()
+
+        # Several relations to one model need distinct reverse accessors.
+        targets = [spec.target for spec in specs if spec.target]
+        for position, spec in enumerate(specs):
+            if spec.target and targets.count(spec.target) > 1:
+                related_name = f"{spec.name}_{CaseUtils.to_snake_case(model_name)}s"
+                specs[position] = spec._replace(
+                    arguments=spec.arguments + [("related_name", repr(related_name))])
+        return specs, placeholders
+
+    def _leading_fields(self) -> Set[str]:
+        """Fields leading the composite indexes of a new model."""
+        leading = {fields[0] for fields in self._composite_indexes}
+        if self._pagination == "cursor":
+            leading.add(CodeTemplates.CURSOR_FIELD)
+        return leading
+
+    def _new_model_specs(self, app_config, model_name: str) -> Optional[List[FieldSpec]]:
+        """The field specs of a model this run creates from field specs or a
+        table, or None for the others, whose fields are not known."""
+        if (app_config.name, model_name) not in self._created_models:
+            return None
+        if model_name in self._table_models:
+            return self._table_models[model_name].specs
+        if not self._field_specs and self._filters.is_empty:
+            return None
+        specs, placeholders = self._option_specs(model_name)
+        return specs + [spec.with_index() for spec in placeholders]
+
+    def _model_code(self, app_config, model_name: str) -> str:
+        """The class of a new model: its field specs, the cursor field and
+        the filter, search and ordering fields, with their indexes."""
+        cursor = self._pagination == "cursor"
+        specs, placeholders = self._option_specs(model_name)
+        for spec in specs:
+            if spec.name in self._filters.search_fields and not spec.is_text:
+                raise command_error(f"Search field '{spec.name}' is not a text field.")
+
+        declared = {spec.name for spec in specs}
+        known = declared | {spec.name for spec in placeholders} | {"id"}
+        many_to_many = {spec.name for spec in specs if spec.type == "m2m"}
+        for fields in self._composite_indexes + self._unique_together:
+            for name in fields:
+                if name not in known or name in many_to_many:
+                    raise command_error(
+                        f"Cannot index '{name}' of '{model_name}': declare it as a field spec first.")
+
+        fields = "".join(field_code(spec) for spec in specs)
+        if placeholders:
+            fields += ("    # Indexed for filtering, search and ordering; adjust the types.\n"
+                       + "".join(field_code(spec.with_index()) for spec in placeholders))
+        indexes = [(list(names), self._index_name(app_config, model_name, "idx", names))
+                   for names in self._composite_indexes]
+        if cursor:
+            indexes.insert(0, (list(CodeTemplates.CURSOR_ORDERING_FIELDS),
+                               self._index_name(app_config, model_name, "cursor")))
+        meta = meta_code(
+            list(CodeTemplates.CURSOR_ORDERING_FIELDS) if cursor else [],
+            indexes,
+            [(list(names), self._index_name(app_config, model_name, "uniq", names))
+             for names in self._unique_together],
+        )
+        if not fields and not meta:
+            return CodeTemplates.MODEL.format(model_name=model_name)
+        return CodeTemplates.MODEL_FIELDS.format(model_name=model_name, fields=fields, meta=meta)
+
+    def _check_filter_indexes(self, app_config, model_name: str) -> None:
+        """Refuse to filter, search or order an existing model by unindexed fields."""
+        if self._filters.is_empty:
+            return
+        model = self._model(app_config, model_name)
+        if model is None:
+            raise command_error(
+                f"Cannot check the indexes of '{model_name}' in app '{app_config.name}': "
+                f"the model is not loaded.")
+        problems = unindexed_fields(model, self._filters)
+        if problems:
+            raise command_error(
+                f"Refusing to filter, search or order '{model_name}' by unindexed fields: "
+                f"{'; '.join(problems)}. Add db_index=True or a Meta.indexes entry "
+                f"and migrate first.")
+
+    def _create_serializer(self, app_config, model_names: Sequence[str]) -> None:
+        index = self._get_index(self._get_file_path(app_config, 'serializers'))
+        blocks, imports, messages = [], [], []
+        for model_name in model_names:
+            model_name_pascal = CaseUtils.to_pascal_case(model_name)
+            serializer_name = f"{model_name_pascal}Serializer"
+            if serializer_name in index.classes:
+                self._warn_exists(f"Serializer '{serializer_name}'", app_config)
+                continue
+
+            plan = self._query_plan(app_config, model_name_pascal)
+            if plan is None:
+                blocks.append(CodeTemplates.SERIALIZER.format(
+                    serializer_name=serializer_name,
+                    model_name=model_name_pascal
+                ))
+            else:
+                blocks.append(CodeTemplates.SERIALIZER_FIELDS.format(
+                    serializer_name=serializer_name,
+                    model_name=model_name_pascal,
+                    declarations=serializer_declarations(plan.reverse_relations),
+                    fields=fields_code(plan.fields),
+                ))
+            imports.append(f"from rest_framework import serializers\nfrom .models import {model_name_pascal}")
+            messages.append(f"Serializer '{serializer_name}' created in app '{app_config.name}'.")
+
+        for model_name in model_names if self._fast_serializer else ():
+            model_name_pascal = CaseUtils.to_pascal_case(model_name)
+            fast_serializer_name = f"{model_name_pascal}FastSerializer"
+            if fast_serializer_name in index.classes:
+                self._warn_exists(f"Serializer '{fast_serializer_name}'", app_config)
+                continue
+            cursor_field = CodeTemplates.CURSOR_FIELD if self._pagination == "cursor" else None
+            model = self._model(app_config, model_name_pascal)
+            specs = None if model else self._new_model_specs(app_config, model_name_pascal)
+            if specs is None:
+                columns, left_out = fast_columns(model, cursor_field)
+            else:
+                columns, left_out = fast_spec_columns(specs)
+            blocks.append(fast_serializer_code(fast_serializer_name, model_name_pascal, columns, left_out))
+            imports.append("from rest_framework import serializers")
+            messages.append(f"Serializer '{fast_serializer_name}' created in app '{app_config.name}'.")
+
+        if not blocks:
+            return
+        self._append_to_file(
+            app_config,
+            'serializers', 
+            self._join_blocks(blocks),
+            success_message="\n".join(messages),
+            import_statements=self._combine_imports(*imports)
+        )
+
+    @staticmethod
+    def _app_label(app_config) -> str:
+        label = getattr(app_config, "label", None)
+        if not isinstance(label, str) or not label:
+            label = app_config.name.rsplit(".", 1)[-1]
+        return label
+
+    @classmethod
+    def _index_name(cls, app_config, model_name: str, suffix: str, fields: Sequence[str] = ()) -> str:
+        """A name for an index or constraint, unique per model and fields
+        and within the 30 characters Django allows."""
+        return index_name(cls._app_label(app_config), model_name, suffix, fields)
+
+    def _create_pagination(self, app_config, model_names: Sequence[str]) -> None:
+        name = CodeTemplates.CURSOR_PAGINATION_NAME
+        if name in self._get_index(self._get_file_path(app_config, 'pagination')).classes:
+            return
+        self._append_to_file(
+            app_config,
+            'pagination',
+            CodeTemplates.CURSOR_PAGINATION.format(
+                pagination_name=name, ordering=CodeTemplates.CURSOR_ORDERING),
+            success_message=f"Pagination '{name}' created in app '{app_config.name}'.",
+            import_statements=CodeTemplates.PAGINATION_IMPORT,
+        )
+
+    def _create_caching(self, app_config, model_names: Sequence[str]) -> None:
+        name = CodeTemplates.CACHE_MIXIN_NAME
+        if name in self._get_index(self._get_file_path(app_config, 'caching')).classes:
+            return
+        self._append_to_file(
+            app_config,
+            'caching',
+            CodeTemplates.CACHE_MIXIN,
+            success_message=f"Cache mixin '{name}' created in app '{app_config.name}'.",
+            import_statements=CodeTemplates.CACHE_IMPORTS,
+        )
+
+    def _create_viewset(self, app_config, model_names: Sequence[str]) -> None:
+        index = self._get_index(self._get_file_path(app_config, 'views'))
+        blocks, imports, messages = [], [], []
+        for model_name in model_names:
+            model_name_pascal = CaseUtils.to_pascal_case(model_name)
+            viewset_name = f"{model_name_pascal}ViewSet"
+            serializer_name = f"{model_name_pascal}Serializer"
+            if viewset_name in index.classes:
+                self._warn_exists(f"ViewSet '{viewset_name}'", app_config)
+                continue
+
+            # Like the serializer, the plan prefetches the many-to-many fields it lists.
+            plan = self._query_plan(app_config, model_name_pascal)
+            if self._async_views:
+                blocks.append(CodeTemplates.VIEWSET_ASYNC.format(
+                    viewset_name=viewset_name,
+                    queryset=queryset_code(model_name_pascal, plan),
+                    serializer_name=serializer_name
+                ))
+                imports.append(
+                    f"from .models import {model_name_pascal}\n"
+                    f"from .serializers import {serializer_name}"
+                )
+                messages.append(f"Async ViewSet '{viewset_name}' created in app '{app_config.name}'.")
+                continue
+            bases = "viewsets.ModelViewSet"
+            if self._http_cache:
+                bases = f"{CodeTemplates.CACHE_MIXIN_NAME}, {bases}"
+            if plan is None:
+                blocks.append(CodeTemplates.VIEWSET.format(
+                    viewset_name=viewset_name,
+                    bases=bases,
+                    model_name=model_name_pascal,
+                    serializer_name=serializer_name
+                ))
+            else:
+                blocks.append(CodeTemplates.VIEWSET_QUERYSET.format(
+                    viewset_name=viewset_name,
+                    bases=bases,
+                    queryset=queryset_code(model_name_pascal, plan),
+                    serializer_name=serializer_name
+                ))
+            imports.append(
+                f"from rest_framework import viewsets\n"
+                f"from .models import {model_name_pascal}\n"
+                f"from .serializers import {serializer_name}"
+            )
+            if not self._filters.is_empty:
+                blocks[-1] = blocks[-1].rstrip("\n") + "\n" + viewset_filter_code(self._filters)
+                imports.append(viewset_filter_imports(self._filters))
+            if self._pagination == "cursor":
+                pagination_name = CodeTemplates.CURSOR_PAGINATION_NAME
+                blocks[-1] = blocks[-1].rstrip("\n") + f"\n    pagination_class = {pagination_name}\n"
+                imports.append(f"from .pagination import {pagination_name}")
+            if self._http_cache:
+                blocks[-1] = blocks[-1].rstrip("\n") + f"\n    cache_timeout = {self._cache_timeout}\n"
+                imports.append(f"from .caching import {CodeTemplates.CACHE_MIXIN_NAME}")
+            if self._fast_serializer:
+                fast_serializer_name = f"{model_name_pascal}FastSerializer"
+                blocks[-1] += CodeTemplates.VIEWSET_FAST_LIST.format(
+                    fast_serializer_name=fast_serializer_name)
+                imports.append(f"from .serializers import {fast_serializer_name}")
+            messages.append(f"ViewSet '{viewset_name}' created in app '{app_config.name}'.")
+
+        if not blocks:
+            return
+        if self._async_views and CodeTemplates.ASYNC_VIEWSET_NAME not in index.classes:
+            blocks.insert(0, CodeTemplates.ASYNC_VIEWSET)
+            imports.insert(0, CodeTemplates.ASYNC_VIEWSET_IMPORTS)
+        self._append_to_file(
+            app_config,
+            'views',
+            self._join_blocks(blocks),
+            success_message="\n".join(messages),
+            import_statements=self._combine_imports(*imports)
+        )
+
+    def _create_serializer_benchmark(self, app_config, model_names: Sequence[str]) -> None:
+        index = self._get_index(self._get_file_path(app_config, 'bench_serializers'))
+        blocks, imports, messages = [], [], []
+        if CodeTemplates.SERIALIZER_BENCHMARK_MIXIN_NAME not in index.classes:
+            blocks.append(CodeTemplates.SERIALIZER_BENCHMARK_MIXIN)
+            imports.append("import time")
+        for model_name in model_names:
+            model_name_pascal = CaseUtils.to_pascal_case(model_name)
+            benchmark_name = f"{model_name_pascal}SerializerBenchmark"
+            if benchmark_name in index.classes:
+                self._warn_exists(f"Benchmark '{benchmark_name}'", app_config)
+                continue
+            blocks.append(CodeTemplates.SERIALIZER_BENCHMARK.format(
+                benchmark_name=benchmark_name,
+                model_name=model_name_pascal,
+                app_name=app_config.name,
+            ))
+            imports.append(
+                f"from django.test import TestCase\n"
+                f"from .factories import {model_name_pascal}Factory\n"
+                f"from .serializers import {model_name_pascal}FastSerializer, {model_name_pascal}Serializer"
+            )
+            messages.append(f"Benchmark '{benchmark_name}' created in app '{app_config.name}'.")
+
+        if not messages:
+            return
+        self._append_to_file(
+            app_config,
+            'bench_serializers',
+            self._join_blocks(blocks),
+            success_message="\n".join(messages),
+            import_statements=self._combine_imports(*imports)
+        )
+
+    def _create_async_tests(self, app_config, model_names: Sequence[str]) -> None:
+        index = self._get_index(self._get_file_path(app_config, 'tests'))
+        blocks, imports, messages = [], [], []
+        for model_name in model_names:
+            model_name_pascal = CaseUtils.to_pascal_case(model_name)
+            test_name = f"{model_name_pascal}AsyncAPITests"
+            if test_name in index.classes:
+                self._warn_exists(f"Tests '{test_name}'", app_config)
+                continue
+            blocks.append(CodeTemplates.ASYNC_API_TESTS.format(
+                test_name=test_name,
+                viewset_name=f"{model_name_pascal}ViewSet",
+                model_name=model_name_pascal,
+                basename=model_name_pascal.lower(),
+                urlconf=f"{app_config.name}.urls",
+            ))
+            imports.append(
+                f"import asyncio\n"
+                f"from asgiref.sync import sync_to_async\n"
+                f"from django.test import TestCase, override_settings\n"
+                f"from django.urls import reverse\n"
+                f"from .factories import {model_name_pascal}Factory\n"
+                f"from .models import {model_name_pascal}"
+            )
+            messages.append(f"Tests '{test_name}' created in app '{app_config.name}'.")
+
+        if not blocks:
+            return
+        self._append_to_file(
+            app_config,
+            'tests',
+            self._join_blocks(blocks),
+            success_message="\n".join(messages),
+            import_statements=self._combine_imports(*imports)
+        )
+
+    def _create_cache_signals(self, app_config, model_names: Sequence[str]) -> None:
+        index = self._get_index(self._get_file_path(app_config, 'signals'))
+        blocks, imports, messages = [], [], []
+        for model_name in model_names:
+            model_name_pascal = CaseUtils.to_pascal_case(model_name)
+            snake_name = CaseUtils.to_snake_case(model_name_pascal)
+            handler_name = f"invalidate_{snake_name}_responses"
+            if handler_name in index.functions:
+                self._warn_exists(f"Signal handler '{handler_name}'", app_config)
+                continue
+            blocks.append(CodeTemplates.CACHE_SIGNALS.format(
+                model_name=model_name_pascal,
+                snake_name=snake_name,
+                label=self._app_label(app_config),
+            ))
+            imports.append(f"{CodeTemplates.CACHE_SIGNALS_IMPORTS}\nfrom .models import {model_name_pascal}")
+            messages.append(f"Signal handler '{handler_name}' created in app '{app_config.name}'.")
+
+        if not blocks:
+            return
+        self._append_to_file(
+            app_config,
+            'signals',
+            self._join_blocks(blocks),
+            success_message="\n".join(messages),
+            import_statements=self._combine_imports(*imports)
+        )
+        self._connect_signals(app_config)
+
+    def _connect_signals(self, app_config) -> None:
+        """Import ``signals.py`` from the ``ready()`` of the app's config."""
+        file_path = self._get_file_path(app_config, 'apps')
+        hint = (f"Import '{app_config.name}.signals' in the ready() of the app config "
+                f"of '{app_config.name}' to connect the cache signal handlers.")
+        if not self._file_exists(file_path):
+            self.stdout.write(self.style.WARNING(hint))
+            return
+        source = self._read_file(file_path)
+        try:
+            tree = ast.parse(source, filename=str(file_path))
+        except SyntaxError as e:
+            raise command_error(f"Error parsing file {file_path}: {e}")
+        for node in ast.walk(tree):
+            if isinstance(node, ast.ImportFrom) and (
+                    (node.module or "").endswith("signals")
+                    or any(alias.name == "signals" for alias in node.names)):
+                return
+            if isinstance(node, ast.Import) and any(
+                    alias.name.endswith(".signals") for alias in node.names):
+                return
+        configs = [
+            node for node in tree.body if isinstance(node, ast.ClassDef)
+            and any(ast.unparse(base).rsplit(".", 1)[-1] == "AppConfig" for base in node.bases)]
+        if len(configs) != 1 or any(
+                isinstance(node, ast.FunctionDef) and node.name == "ready" for node in configs[0].body):
+            self.stdout.write(self.style.WARNING(hint))
+            return
+        editor = SourceEditor(source)
+        editor.insert_after(configs[0].end_lineno, CodeTemplates.APP_READY_SIGNALS)
+        self._write_file(file_path, editor.apply())
+        self.stdout.write(self.style.SUCCESS(
+            f"Connected the signal handlers in the app config of '{app_config.name}'."))
+
+    def _create_cache_tests(self, app_config, model_names: Sequence[str]) -> None:
+        index = self._get_index(self._get_file_path(app_config, 'tests'))
+        blocks, imports, messages = [], [], []
+        for model_name in model_names:
+            model_name_pascal = CaseUtils.to_pascal_case(model_name)
+            test_name = f"{model_name_pascal}CacheTests"
+            if test_name in index.classes:
+                self._warn_exists(f"Tests '{test_name}'", app_config)
+                continue
+            blocks.append(CodeTemplates.CACHE_API_TESTS.format(
+                test_name=test_name,
+                viewset_name=f"{model_name_pascal}ViewSet",
+                model_name=model_name_pascal,
+                basename=model_name_pascal.lower(),
+                urlconf=f"{app_config.name}.urls",
+            ))
+            imports.append(
+                f"from django.test import TestCase, override_settings\n"
+                f"from django.urls import reverse\n"
+                f"from .factories import {model_name_pascal}Factory"
+            )
+            messages.append(f"Tests '{test_name}' created in app '{app_config.name}'.")
+
+        if not blocks:
+            return
+        self._append_to_file(
+            app_config,
+            'tests',
+            self._join_blocks(blocks),
+            success_message="\n".join(messages),
+            import_statements=self._combine_imports(*imports)
+        )
+
+    def _create_factory(self, app_config, model_names: Sequence[str]) -> None:
+        index = self._get_index(self._get_file_path(app_config, 'factories'))
+        blocks, imports, messages = [], [], []
+        created = {CaseUtils.to_pascal_case(name) for name in model_names}
+        for model_name in model_names:
+            model_name_pascal = CaseUtils.to_pascal_case(model_name)
+            factory_name = f"{model_name_pascal}Factory"
+            if factory_name in index.classes:
+                self._warn_exists(f"Factory '{factory_name}'", app_config)
+                continue
+
+            declarations, hooks, declaration_imports = self._factory_declarations(
+                app_config, model_name_pascal, index.classes, created)
+            if declarations or hooks:
+                blocks.append(CodeTemplates.FACTORY_FIELDS.format(
+                    factory_name=factory_name,
+                    model_name=model_name_pascal,
+                    meta_options=CodeTemplates.FACTORY_SKIP_SAVE if hooks else "",
+                    declarations="\n".join(part for part in (declarations, hooks) if part),
+                ))
+            else:
+                blocks.append(CodeTemplates.FACTORY.format(
+                    factory_name=factory_name,
+                    model_name=model_name_pascal
+                ))
+            imports.append(
+                f"import factory\n"
+                f"from .models import {model_name_pascal}"
+            )
+            imports.extend(declaration_imports)
+            messages.append(f"Factory '{factory_name}' created in app '{app_config.name}'.")
+
+        if not blocks:
+            return
+        self._append_to_file(
+            app_config,
+            'factories',
+            self._join_blocks(blocks),
+            success_message="\n".join(messages),
+            import_statements=self._combine_imports(*imports)
+        )
+
+    def _factory_declarations(self, app_config, model_name: str, factories, created):
+        """Declarations giving the required fields of a new model values,
+        from its field specs or its table, and the ``post_generation`` hooks
+        of its required many-to-many fields; relations get a row of the
+        target's factory when it has one in the same app."""
+        if model_name in self._table_models:
+            specs = self._table_models[model_name].specs
+        elif not self._field_specs and not self._filters.names:
+            return "", "", []
+        else:
+            declared = {spec.name for spec in self._field_specs}
+            specs = self._field_specs + [
+                parse_field_spec(name) for name in self._filters.names
+                if name not in declared and name not in ("id", "pk")]
+        lines, hooks, imports = [], [], []
+        for spec in specs:
+            target_factory = ""
+            app, _, target = spec.target.rpartition(".")
+            if (spec.target and app in ("", self._app_label(app_config)) and target != model_name
+                    and (f"{target}Factory" in factories or target in created)):
+                target_factory = f"{target}Factory"
+            declaration, import_statement = factory_declaration(
+                spec, target_factory and f"{app_config.name}.factories.{target_factory}")
+            if declaration:
+                lines.append(f"    {spec.name} = {declaration}\n")
+            if import_statement:
+                imports.append(import_statement)
+            hook = factory_post_generation(spec, target_factory)
+            if hook:
+                hooks.append(hook)
+        return "".join(lines), "\n".join(hooks), imports
+
+    def _create_query_budget_tests(self, app_config, model_names: Sequence[str]) -> None:
+        index = self._get_index(self._get_file_path(app_config, 'tests'))
+        blocks, imports, messages = [], [], []
+        for model_name in model_names:
+            model_name_pascal = CaseUtils.to_pascal_case(model_name)
+            test_name = f"{model_name_pascal}QueryBudgetTests"
+            if test_name in index.classes:
+                self._warn_exists(f"Tests '{test_name}'", app_config)
+                continue
+            blocks.append(CodeTemplates.QUERY_BUDGET_TESTS.format(
+                test_name=test_name,
+                viewset_name=f"{model_name_pascal}ViewSet",
+                model_name=model_name_pascal,
+                basename=model_name_pascal.lower(),
+                urlconf=f"{app_config.name}.urls",
+                cache_settings=CodeTemplates.QUERY_BUDGET_CACHE_SETTINGS if self._http_cache else "",
+            ))
+            imports.append(
+                f"from django.test import TestCase, override_settings\n"
+                f"from .factories import {model_name_pascal}Factory\n"
+                f"from .serializers import {model_name_pascal}Serializer"
+            )
+            messages.append(f"Tests '{test_name}' created in app '{app_config.name}'.")
+
+        if not blocks:
+            return
+        if CodeTemplates.QUERY_BUDGET_MIXIN_NAME not in index.classes:
+            blocks.insert(0, CodeTemplates.QUERY_BUDGET_MIXIN)
+            imports.insert(0, CodeTemplates.QUERY_BUDGET_MIXIN_IMPORTS)
+        self._append_to_file(
+            app_config,
+            'tests',
+            self._join_blocks(blocks),
+            success_message="\n".join(messages),
+            import_statements=self._combine_imports(*imports)
+        )
+
+    def _register_admin(self, app_config, model_names: Sequence[str]) -> None:
+        index = self._get_index(self._get_file_path(app_config, 'admin'))
+        blocks, imports, messages = [], [], []
+        for model_name in model_names:
+            model_name_pascal = CaseUtils.to_pascal_case(model_name)
+            if model_name_pascal in index.admin_registered:
+                self._warn_exists(f"Admin for '{model_name_pascal}'", app_config)
+                continue
+
+            plan = self._admin_plan(app_config, model_name_pascal)
+            blocks.append(CodeTemplates.ADMIN.format(
+                model_name=model_name_pascal,
+                options=admin_options_code(plan) if plan else "",
+                paginator_name=CodeTemplates.ADMIN_PAGINATOR_NAME,
+            ))
+            imports.append(
+                f"from django.contrib import admin\n"
+                f"from .models import {model_name_pascal}"
+            )
+            messages.append(f"Registered '{model_name_pascal}' in admin for app '{app_config.name}'.")
+
+        if not blocks:
+            return
+        if CodeTemplates.ADMIN_PAGINATOR_NAME not in index.classes:
+            blocks.insert(0, CodeTemplates.ADMIN_PAGINATOR.format(
+                paginator_name=CodeTemplates.ADMIN_PAGINATOR_NAME))
+            imports.insert(0, CodeTemplates.ADMIN_PAGINATOR_IMPORTS)
+        self._append_to_file(
+            app_config,
+            'admin',
+            self._join_blocks(blocks),
+            success_message="\n".join(messages),
+            import_statements=self._combine_imports(*imports)
+        )
+
+    def _register_urls(self, app_config, model_names: Sequence[str]) -> None:
+        registrations = []
+        for model_name in model_names:
+            model_name_pascal = CaseUtils.to_pascal_case(model_name)
+            viewset_name = f"{model_name_pascal}ViewSet"
+            url_prefix = CaseUtils.to_snake_case(model_name_pascal) + 's'
+            registrations.append((viewset_name, url_prefix))
+
+        file_path = self._get_file_path(app_config, 'urls')
+        if self._sharded_urls(app_config, file_path):
+            self._register_shard_urls(app_config, file_path, registrations)
+            return
+        if not self._file_exists(file_path):
+            # Initialize urls.py structure for a new file
+            self._write_file(file_path, CodeTemplates.URLS_INITIAL)
+        index = self._get_index(file_path)
+
+        # Check if router is defined
+        if not index.routers:
+            # Inject router definition, placed before urlpatterns if possible
+            editor = SourceEditor(self._read_file(file_path))
+            merge_imports(editor, index, CodeTemplates.URLS_ROUTER_IMPORT)
+            if "urlpatterns" in index.assignments:
+                editor.insert_after(index.assignments["urlpatterns"] - 1, CodeTemplates.URLS_ROUTER_DEF + "\n")
+            else:
+                editor.append(CodeTemplates.URLS_ROUTER_DEF)
+            self._write_file(file_path, editor.apply())
+            index = self._get_index(file_path)
+
+        router_name = "router" if "router" in index.routers else next(iter(index.routers))
+        router_registrations = [r for r in index.registrations if r.router == router_name]
+        # Insert new registrations after the last existing one, or after the router
+        insertion_line = (
+            router_registrations[-1].end_lineno if router_registrations else index.routers[router_name]
+        )
+
+        viewset_imports, register_lines, registered = [], [], []
+        for viewset_name, url_prefix in registrations:
+            if viewset_name in index.registered_viewsets or url_prefix in index.registered_prefixes:
+                self.stdout.write(self.style.WARNING(
+                    f"'{viewset_name}' is already registered in urls.py for app '{app_config.name}', skipping."))
+                continue
+            if viewset_name not in index.bound_names:
+                viewset_imports.append(f"from .views import {viewset_name}")
+            register_lines.append(f"{router_name}.register(r'{url_prefix}', {viewset_name})")
+            registered.append(viewset_name)
+
+        if not register_lines:
+            return
+        editor = SourceEditor(self._read_file(file_path))
+        editor.insert_after(insertion_line, "\n".join(register_lines))
+        if viewset_imports:
+            merge_imports(editor, index, self._combine_imports(*viewset_imports))
+        self._write_file(file_path, editor.apply())
+        for viewset_name in registered:
+            self.stdout.write(self.style.SUCCESS(f"Registered '{viewset_name}' in urls.py for app '{app_config.name}'."))
+
+    def _sharded_urls(self, app_config, file_path) -> bool:
+        """Whether the app uses the sharded URL layout, as given or as urls.py includes it."""
+        sharded = self._file_exists(file_path) and bool(
+            included_shards(self._get_index(file_path).includes, app_config.name))
+        layout = getattr(self, "_url_layout", None)
+        if layout == "flat" and sharded:
+            raise command_error(
+                f"urls.py of app '{app_config.name}' includes URL shards; "
+                f"register its viewsets with --url-layout sharded.")
+        return layout == "sharded" if layout else sharded
+
+    def _register_shard_urls(self, app_config, file_path, registrations) -> None:
+        if self._file_exists(file_path) and self._get_index(file_path).registrations:
+            raise command_error(
+                f"urls.py of app '{app_config.name}' registers viewsets on a router; "
+                f"run 'manage.py reshard_urls {self._app_label(app_config)}' first.")
+        routes = [Route.for_viewset(url_prefix, viewset_name) for viewset_name, url_prefix in registrations]
+        registered = self._register_sharded_routes(app_config, routes)
+        added = {route.viewset for route, _ in registered}
+        for route in routes:
+            if route.viewset not in added:
+                self.stdout.write(self.style.WARNING(
+                    f"'{route.viewset}' is already registered in the URL shards of app "
+                    f"'{app_config.name}', skipping."))
+        for route, shard_path in registered:
+            self.stdout.write(self.style.SUCCESS(
+                f"Registered '{route.viewset}' in {shard_path.parent.name}/{shard_path.name} "
+                f"for app '{app_config.name}'."))
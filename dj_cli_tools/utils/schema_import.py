@@ -0,0 +1,415 @@
+"""Models for the tables of an existing database, for ``create --from-db``.
+
+:func:`select_tables` picks the tables matching ``--tables`` that can
+become models, and :func:`read_tables` streams one :class:`TableSchema`
+per table from Django's database introspection: the columns with the
+field class the backend maps them to, foreign keys resolved to model
+references, and indexes and unique constraints. A TableSchema is plain
+data, so :func:`render_table` can turn it into field specs and a model
+class in a worker process, without Django or a database connection.
+
+Models keep their table through ``Meta.db_table`` and are managed, so
+``makemigrations`` writes an initial migration that ``migrate
+--fake-initial`` records without touching the tables.
+"""
+from __future__ import annotations
+
+import keyword
+import re
+from fnmatch import fnmatchcase
+from functools import partial
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from . import timings
+from .case_utils import CaseUtils
+from .code_templates import CodeTemplates
+from .errors import command_error
+from .field_specs import FIELD_TYPES, FieldSpec, field_code, index_name, meta_code
+
+# django.db.DEFAULT_DB_ALIAS, without importing Django.
+DEFAULT_DATABASE = "default"
+# Django's own bookkeeping table, which no app models.
+MIGRATIONS_TABLE = "django_migrations"
+# Below this many tables, starting worker processes costs more than it saves.
+PARALLEL_MIN_TABLES = 200
+
+# Model field class -> spec type, for the classes introspection returns.
+SPEC_TYPES: Dict[str, str] = {
+    **{field_class: spec_type for spec_type, (field_class, _) in FIELD_TYPES.items()},
+    "AutoField": "int",
+    "BigAutoField": "bigint",
+    "SmallAutoField": "smallint",
+    "PositiveBigIntegerField": "posint",
+    "PositiveSmallIntegerField": "posint",
+    "BinaryField": "binary",
+    "GenericIPAddressField": "ip",
+}
+_SIZES = re.compile(r"\(\s*(\d+)\s*(?:,\s*(\d+)\s*)?\)")
+
+
+class Column(NamedTuple):
+    name: str
+    # The model field class introspection maps the column type to.
+    field_class: str
+    null: bool
+    primary_key: bool = False
+    max_length: Optional[int] = None
+    max_digits: Optional[int] = None
+    decimal_places: Optional[int] = None
+
+
+class Reference(NamedTuple):
+    """The model a foreign key column points to."""
+
+    # "Model" in the same app, "app_label.Model" or "self".
+    model: str
+    # The referenced column when it is not the target's primary key.
+    to_field: str = ""
+
+
+class Constraint(NamedTuple):
+    """An index or a unique constraint, other than the primary key's."""
+
+    columns: Tuple[str, ...]
+    unique: bool
+    # "ASC"/"DESC" per column, when the backend reports them.
+    orders: Tuple[str, ...] = ()
+
+
+class TableSchema(NamedTuple):
+    table: str
+    model_name: str
+    app_label: str
+    columns: List[Column]
+    relations: Dict[str, Reference]
+    constraints: List[Constraint]
+
+
+class RenderedModel(NamedTuple):
+    model_name: str
+    table: str
+    code: str
+    specs: List[FieldSpec]
+
+
+def select_tables(connection, patterns: Sequence[str], modeled: Dict[str, Tuple[str, str]]):
+    """The tables to import, the primary key column of each, and the
+    tables matching ``patterns`` that are left out, with the reason.
+
+    ``modeled`` maps the tables of installed models to their label and
+    primary key column; those tables are left out silently.
+    """
+    introspection = connection.introspection
+    tables: Dict[str, str] = {}
+    skipped: List[Tuple[str, str]] = []
+    with connection.cursor() as cursor:
+        for info in introspection.get_table_list(cursor):
+            name = info.name
+            if (patterns and not any(fnmatchcase(name, pattern) for pattern in patterns)
+                    or name in modeled or name == MIGRATIONS_TABLE):
+                continue
+            if info.type != "t":
+                skipped.append((name, "it is a view"))
+                continue
+            primary_key = introspection.get_primary_key_columns(cursor, name) or []
+            if len(primary_key) != 1:
+                skipped.append((name, "it has no primary key" if not primary_key
+                                else "its primary key spans several columns"))
+                continue
+            tables[name] = primary_key[0]
+    return tables, skipped
+
+
+def model_names(tables: Sequence[str], app_label: str) -> Dict[str, str]:
+    """A distinct model name per table, without the ``<app_label>_`` prefix
+    Django puts on the tables of its own models."""
+    names: Dict[str, str] = {}
+    taken = set()
+    for table in tables:
+        stem = table[len(app_label) + 1:] if table.startswith(f"{app_label}_") else table
+        name = CaseUtils.to_pascal_case(stem) or "Table"
+        if name[0].isdigit():
+            name = f"Table{name}"
+        candidate, number = name, 2
+        while candidate.lower() in taken:
+            candidate, number = f"{name}{number}", number + 1
+        taken.add(candidate.lower())
+        names[table] = candidate
+    return names
+
+
+def read_tables(connection, tables: Dict[str, str], names: Dict[str, str], app_label: str,
+                modeled: Dict[str, Tuple[str, str]]) -> Iterator[TableSchema]:
+    """Introspect ``tables`` (table -> primary key column) one at a time."""
+    read_table = _read_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            # sqlite_master has no index on the name: one scan for all tables.
+            cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = 'table'")
+            read_table = partial(_read_sqlite_table, statements=dict(cursor.fetchall()))
+        for table, primary_key in tables.items():
+            columns, foreign_keys, constraints = read_table(connection, cursor, table, primary_key)
+            relations = {}
+            for column, (target_column, target_table) in foreign_keys.items():
+                if target_table == table:
+                    target, target_key = "self", primary_key
+                elif target_table in tables:
+                    target, target_key = names[target_table], tables[target_table]
+                elif target_table in modeled:
+                    target, target_key = modeled[target_table]
+                else:
+                    # Not imported and not modeled: the column stays a plain value.
+                    continue
+                relations[column] = Reference(
+                    target, "" if target_column in (None, target_key) else target_column)
+            yield TableSchema(table, names[table], app_label, columns, relations, constraints)
+
+
+def _read_table(connection, cursor, table: str, primary_key: str):
+    """Columns, foreign keys (column -> (target column, target table)) and
+    constraints of ``table``, through Django's introspection."""
+    introspection = connection.introspection
+    columns = []
+    for row in introspection.get_table_description(cursor, table):
+        try:
+            field_class = introspection.get_field_type(row.type_code, row)
+        except KeyError:
+            field_class = "TextField"
+        columns.append(Column(
+            row.name, field_class, bool(row.null_ok), row.name == primary_key,
+            int(row.display_size) if row.display_size else None, row.precision, row.scale))
+    constraints = [
+        Constraint(tuple(constraint["columns"]), bool(constraint["unique"]),
+                   tuple(constraint.get("orders") or ()))
+        for constraint in introspection.get_constraints(cursor, table).values()
+        if constraint["columns"] and not constraint["primary_key"] and not constraint["check"]
+        and (constraint["index"] or constraint["unique"]) and not constraint["foreign_key"]]
+    return columns, introspection.get_relations(cursor, table), constraints
+
+
+def _read_sqlite_table(connection, cursor, table: str, primary_key: str, statements: Dict[str, str]):
+    """What :func:`_read_table` reads, from SQLite's pragmas and the
+    CREATE statements in ``statements``.
+
+    Django's SQLite introspection parses the CREATE statement of the table
+    with sqlparse, several times over, and scans sqlite_master once per
+    column; the pragmas answer the same questions in a few milliseconds
+    per hundred tables.
+    """
+    introspection = connection.introspection
+    quote = connection.ops.quote_name
+    sql = statements.get(table) or ""
+
+    columns = []
+    cursor.execute(f"PRAGMA table_info({quote(table)})")
+    for _, name, declared, not_null, _, _ in cursor.fetchall():
+        try:
+            field_class = introspection.data_types_reverse[declared]
+        except KeyError:
+            field_class = "TextField"
+        # As DatabaseIntrospection.get_field_type() maps them.
+        if name == primary_key and field_class in ("BigIntegerField", "IntegerField", "SmallIntegerField"):
+            field_class = "AutoField"
+        elif f'json_valid("{name}")' in sql:
+            field_class = "JSONField"
+        sizes = _SIZES.search(declared)
+        max_length = max_digits = decimal_places = None
+        if sizes and sizes.group(2):
+            max_digits, decimal_places = int(sizes.group(1)), int(sizes.group(2))
+        elif sizes:
+            max_length = int(sizes.group(1))
+        columns.append(Column(name, field_class, not not_null, name == primary_key,
+                              max_length, max_digits, decimal_places))
+
+    foreign_keys = {}
+    cursor.execute(f"PRAGMA foreign_key_list({quote(table)})")
+    rows = cursor.fetchall()
+    for key_id, _, target_table, column, target_column, *_ in rows:
+        # Composite foreign keys have no model field.
+        if sum(row[0] == key_id for row in rows) == 1:
+            foreign_keys[column] = (target_column, target_table)
+
+    constraints = []
+    cursor.execute(f"PRAGMA index_list({quote(table)})")
+    for _, index, unique, origin, partial in cursor.fetchall():
+        if origin == "pk" or partial:
+            continue
+        cursor.execute(f"PRAGMA index_xinfo({quote(index)})")
+        # Key columns only; a None name is an expression.
+        keys = [(name, descending) for _, _, name, descending, _, key in cursor.fetchall() if key]
+        if keys and all(name is not None for name, _ in keys):
+            constraints.append(Constraint(
+                tuple(name for name, _ in keys), bool(unique),
+                tuple("DESC" if descending else "ASC" for _, descending in keys)))
+    return columns, foreign_keys, constraints
+
+
+def render_table(schema: TableSchema) -> RenderedModel:
+    """The field specs and model class of one table."""
+    single = {constraint.columns[0]: constraint for constraint in schema.constraints
+              if len(constraint.columns) == 1}
+    used = set()
+    field_names: Dict[str, str] = {}
+    specs = []
+    for column in schema.columns:
+        reference = schema.relations.get(column.name)
+        name = _field_name(column, reference is not None, used)
+        field_names[column.name] = name
+        constraint = single.get(column.name)
+        unique = bool(constraint and constraint.unique) and not column.primary_key
+        specs.append(_column_spec(column, name, reference, unique,
+                                  index=bool(constraint) and not unique and reference is None))
+
+    # Several relations to one model need distinct reverse accessors.
+    targets = [spec.target for spec in specs if spec.target]
+    for position, spec in enumerate(specs):
+        if spec.target and targets.count(spec.target) > 1:
+            related_name = f"{spec.name}_{CaseUtils.to_snake_case(schema.model_name)}s"
+            specs[position] = spec._replace(arguments=spec.arguments + [("related_name", repr(related_name))])
+
+    indexes, unique_constraints = [], []
+    for constraint in schema.constraints:
+        if len(constraint.columns) < 2 or not all(column in field_names for column in constraint.columns):
+            continue
+        fields = [("-" if order == "DESC" else "") + field_names[column]
+                  for column, order in zip(constraint.columns, constraint.orders or ("",) * len(constraint.columns))]
+        names = [field_names[column] for column in constraint.columns]
+        if constraint.unique:
+            unique_constraints.append((names, index_name(schema.app_label, schema.model_name, "uniq", names)))
+        else:
+            indexes.append((fields, index_name(schema.app_label, schema.model_name, "idx", fields)))
+    meta = meta_code([], indexes, unique_constraints, db_table=schema.table)
+    code = CodeTemplates.MODEL_FIELDS.format(
+        model_name=schema.model_name, fields="".join(field_code(spec) for spec in specs), meta=meta)
+    return RenderedModel(schema.model_name, schema.table, code, specs)
+
+
+def _column_spec(column: Column, name: str, reference: Optional[Reference], unique: bool,
+                 index: bool) -> FieldSpec:
+    arguments: List[Tuple[str, str]] = []
+    target = ""
+    if reference is not None:
+        spec_type = "o2o" if unique or column.primary_key else "fk"
+        field_class = FIELD_TYPES[spec_type][0]
+        target = reference.model
+        # The database owns the referential actions of a legacy schema.
+        arguments += [("to", repr(target)), ("on_delete", "models.DO_NOTHING")]
+        if reference.to_field:
+            arguments.append(("to_field", repr(reference.to_field)))
+        db_column = f"{name}_id"
+    else:
+        field_class = column.field_class
+        if field_class == "CharField" and not column.max_length:
+            field_class = "TextField"
+        spec_type = SPEC_TYPES.get(field_class, "text")
+        if spec_type == "text" and field_class not in SPEC_TYPES:
+            field_class = "TextField"
+        if field_class == "CharField":
+            arguments.append(("max_length", str(column.max_length)))
+        elif field_class == "DecimalField":
+            sizes = dict(FIELD_TYPES["decimal"][1])
+            arguments += [("max_digits", str(column.max_digits or sizes["max_digits"])),
+                          ("decimal_places", str(column.decimal_places if column.decimal_places is not None
+                                                 else sizes["decimal_places"]))]
+        db_column = name
+    if column.primary_key:
+        arguments.append(("primary_key", "True"))
+    if unique and spec_type != "o2o":
+        arguments.append(("unique", "True"))
+    if column.null and not column.primary_key:
+        arguments += [("null", "True"), ("blank", "True")]
+    if column.name != db_column:
+        arguments.append(("db_column", repr(column.name)))
+    return FieldSpec(name, spec_type, field_class, arguments, index=index,
+                     unique=unique or spec_type == "o2o", target=target)
+
+
+def _field_name(column: Column, is_relation: bool, used: set) -> str:
+    """A field name for ``column`` that Django accepts and ``used`` does not hold."""
+    name = CaseUtils.to_snake_case(column.name) or "field"
+    if is_relation and name.endswith("_id") and len(name) > 3:
+        name = name[:-3]
+    if name[0].isdigit():
+        name = f"field_{name}"
+    if keyword.iskeyword(name) or name == "pk" or (name == "id" and not column.primary_key):
+        name = f"{name}_field"
+    candidate, number = name, 2
+    while candidate in used:
+        candidate, number = f"{name}_{number}", number + 1
+    used.add(candidate)
+    return candidate
+
+
+class SchemaImportMixin:
+    """Reads the models of ``create --from-db`` from a database.
+
+    Expects the ScaffoldMixin attributes and ``_setup_django``.
+    """
+
+    def _import_schema(self, app_config, source: str, patterns: Sequence[str], jobs: int) -> List[RenderedModel]:
+        """Introspect the tables of ``source``, a database alias or an
+        SQLite file, and render their models, ``jobs`` processes at a time."""
+        self._setup_django()
+        from django.apps import apps
+
+        connection, ad_hoc = self._schema_connection(source)
+        app_label = self._app_label(app_config)
+        modeled = {model._meta.db_table: (model._meta.label, model._meta.pk.column)
+                   for model in apps.get_models(include_auto_created=True)}
+        try:
+            with timings.phase("introspection"):
+                tables, skipped = select_tables(connection, patterns, modeled)
+            for table, reason in skipped:
+                self.stdout.write(self.style.WARNING(f"Skipping table '{table}': {reason}."))
+            if not tables:
+                raise command_error(
+                    f"No tables without a model{' match ' + ', '.join(patterns) if patterns else ''} "
+                    f"in {source}.")
+            names = model_names(list(tables), app_label)
+            schemas = read_tables(connection, tables, names, app_label, modeled)
+            with timings.phase("render"):
+                if jobs == 1 or len(tables) < PARALLEL_MIN_TABLES:
+                    return [render_table(schema) for schema in schemas]
+                # Imported here: multiprocessing would slow down every CLI start.
+                from concurrent.futures import ProcessPoolExecutor
+
+                chunksize = max(1, len(tables) // (jobs * 4))
+                # Introspection goes on in this process while workers render
+                # the chunks submitted so far.
+                with ProcessPoolExecutor(max_workers=jobs) as pool:
+                    return list(pool.map(render_table, schemas, chunksize=chunksize))
+        finally:
+            if ad_hoc:
+                connection.close()
+
+    @staticmethod
+    def _schema_connection(source: str):
+        """The connection of a database alias, or a new one to an SQLite file."""
+        from django.conf import settings
+        from django.db import connections
+        from django.db.utils import ConnectionHandler
+
+        if source in settings.DATABASES:
+            return connections[source], False
+        if Path(source).is_file():
+            # A handler of its own, which insists on a "default" alias.
+            handler = ConnectionHandler({DEFAULT_DATABASE: {"ENGINE": "django.db.backends.sqlite3", "NAME": source}})
+            return handler[DEFAULT_DATABASE], True
+        raise command_error(f"--from-db: '{source}' is neither a database alias nor an SQLite file.")
+
+
+__all__ = [
+    "Column",
+    "Constraint",
+    "DEFAULT_DATABASE",
+    "PARALLEL_MIN_TABLES",
+    "Reference",
+    "RenderedModel",
+    "SchemaImportMixin",
+    "TableSchema",
+    "model_names",
+    "read_tables",
+    "render_table",
+    "select_tables",
+]
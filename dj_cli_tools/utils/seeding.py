@@ -0,0 +1,180 @@
+"""Bulk inserts of factory-built rows for the ``seed`` command.
+
+``Factory.create_batch`` saves one row, and one query per related object,
+at a time. :func:`seed_rows` builds unsaved instances with ``build_batch``
+instead, one chunk of ``batch_size`` rows at a time so memory stays flat,
+and inserts each chunk with a single ``bulk_create`` plus one
+``executemany`` per many-to-many through table.
+
+Related objects a factory builds (``SubFactory``) are unsaved and
+``bulk_create`` cannot save them, so ForeignKeys point at rows that already
+exist instead, picked at random from the first ``RELATED_POOL_SIZE`` rows
+of the related table. :func:`split_jobs` cuts a run into
+:class:`SeedJob` ranges that worker processes run independently, each on
+its own database connection.
+"""
+from __future__ import annotations
+
+import random
+from typing import Dict, List, NamedTuple, Tuple
+
+DEFAULT_BATCH_SIZE = 1000
+# Existing rows loaded per related table to pick ForeignKey and M2M targets from.
+RELATED_POOL_SIZE = 10000
+
+
+class SeedJob(NamedTuple):
+    """A range of rows one worker builds and inserts."""
+
+    # Dotted path of the factory class, importable in a fresh process.
+    factory: str
+    database: str
+    start: int
+    count: int
+    batch_size: int = DEFAULT_BATCH_SIZE
+    # Related rows linked to every new row, per ManyToManyField.
+    m2m: int = 0
+    # Factory sequence number of row 0, so unique values stay unique across jobs.
+    sequence_offset: int = 0
+
+
+def split_jobs(count: int, workers: int, **job_options) -> List[SeedJob]:
+    """Cut ``count`` rows into at most ``workers`` jobs of near-equal size."""
+    workers = max(1, min(workers, count))
+    size, extra = divmod(count, workers)
+    jobs, start = [], 0
+    for worker in range(workers):
+        rows = size + (worker < extra)
+        jobs.append(SeedJob(start=start, count=rows, **job_options))
+        start += rows
+    return jobs
+
+
+def init_worker() -> None:
+    """Process pool initializer: set Django up in spawned workers."""
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def seed_rows(job: SeedJob) -> int:
+    """Build and insert the rows of ``job``; returns how many were inserted.
+
+    Raises ValueError when a required ForeignKey points at an empty table.
+    """
+    from django.db import transaction
+    from django.utils.module_loading import import_string
+
+    factory_class = import_string(job.factory)
+    model = factory_class._meta.model
+    manager = model._default_manager.db_manager(job.database)
+    factory_class.reset_sequence(job.sequence_offset + job.start, force=True)
+    pools = _RelatedPools(job.database, random.Random(job.start))
+    foreign_keys = [field for field in model._meta.concrete_fields if field.many_to_one]
+    m2m_fields = m2m_through_fields(model) if job.m2m else []
+
+    inserted = 0
+    while inserted < job.count:
+        objs = factory_class.build_batch(min(job.batch_size, job.count - inserted))
+        for field in foreign_keys:
+            _resolve_foreign_key(field, objs, pools)
+        with transaction.atomic(using=job.database):
+            manager.bulk_create(objs, batch_size=job.batch_size)
+            for field in m2m_fields:
+                _link_m2m(field, objs, job, pools)
+        inserted += len(objs)
+    return inserted
+
+
+def m2m_through_fields(model) -> list:
+    """The ManyToManyFields of ``model`` with auto-created through tables.
+
+    Explicit through models carry their own columns and are seeded with
+    their own factory instead.
+    """
+    return [field for field in model._meta.many_to_many
+            if field.remote_field.through._meta.auto_created]
+
+
+class _RelatedPools:
+    """Existing values of the column a relation points at, per table."""
+
+    def __init__(self, database: str, rng: random.Random):
+        self.database = database
+        self.rng = rng
+        self._pools: Dict[Tuple[str, str], list] = {}
+
+    def values(self, target_field) -> list:
+        model = target_field.model
+        key = (model._meta.label, target_field.attname)
+        if key not in self._pools:
+            self._pools[key] = list(
+                model._default_manager.db_manager(self.database)
+                .order_by().values_list(target_field.attname, flat=True)[:RELATED_POOL_SIZE])
+        return self._pools[key]
+
+    def choice(self, target_field):
+        return self.rng.choice(self.values(target_field))
+
+    def sample(self, target_field, k: int) -> list:
+        values = self.values(target_field)
+        return self.rng.sample(values, min(k, len(values)))
+
+
+def _resolve_foreign_key(field, objs, pools: _RelatedPools) -> None:
+    """Point ``field`` of every object at an existing row where needed.
+
+    Unsaved related objects built by a ``SubFactory`` are replaced, and so
+    are empty required ForeignKeys; values the factory set are kept.
+    """
+    for obj in objs:
+        if field.is_cached(obj):
+            related = field.get_cached_value(obj)
+            if related is not None and related._state.adding:
+                field.delete_cached_value(obj)
+                obj.__dict__[field.attname] = None
+        if getattr(obj, field.attname) is None and not field.null:
+            if not pools.values(field.target_field):
+                raise ValueError(
+                    f"'{field.model._meta.label}.{field.name}' needs existing "
+                    f"'{field.related_model._meta.label}' rows, seed that model first.")
+            setattr(obj, field.attname, pools.choice(field.target_field))
+
+
+def _link_m2m(field, objs, job: SeedJob, pools: _RelatedPools) -> None:
+    """Insert the through rows of ``field`` for ``objs`` in one ``executemany``.
+
+    Through rows have no defaults or signals, so the ORM's per-value
+    preparation in ``bulk_create`` would only add cost.
+    """
+    from django.db import connections
+
+    through = field.remote_field.through
+    source = through._meta.get_field(field.m2m_field_name())
+    target = through._meta.get_field(field.m2m_reverse_field_name())
+    rows = [
+        (getattr(obj, source.target_field.attname), value)
+        for obj in objs
+        for value in pools.sample(target.target_field, job.m2m)
+    ]
+    if not rows:
+        return
+    connection = connections[job.database]
+    quote = connection.ops.quote_name
+    sql = (f"INSERT INTO {quote(through._meta.db_table)} "
+           f"({quote(source.column)}, {quote(target.column)}) VALUES (%s, %s)")
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+__all__ = [
+    "DEFAULT_BATCH_SIZE",
+    "RELATED_POOL_SIZE",
+    "SeedJob",
+    "init_worker",
+    "m2m_through_fields",
+    "seed_rows",
+    "split_jobs",
+]
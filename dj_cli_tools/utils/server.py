@@ -0,0 +1,294 @@
+"""A warm generator process answering requests over a Unix socket.
+
+``manage.py create`` pays for the interpreter, the settings import and
+``django.setup()`` on every call. The ``cli_tools_server`` command pays for
+them once and serves :class:`GeneratorServer` on a Unix socket, with the
+app registry loaded and the symbol indexes of the target files kept in one
+:class:`~dj_cli_tools.utils.project_cache.ProjectCache`. A request is one
+line of JSON and so is its response::
+
+    {"command": "create", "args": ["shop", "Product", "--cache"], "cwd": "/src/proj"}
+    {"returncode": 0, "stdout": "...", "stderr": "", "seconds": 0.004}
+
+Plain ``create`` requests run concurrently, each editing its own
+FileBuffer, and take turns per app through :class:`FileLocks`. A request
+whose files changed on disk after it read them, e.g. through an editor,
+raises :class:`FileConflict` and runs again on the new contents.
+``start_app`` and requests with :data:`EXCLUSIVE_OPTIONS` change the
+settings, reload models or use paths relative to the client, so they run
+alone, in the client's directory.
+
+:func:`send_request` is the client side and needs nothing but the
+standard library, so ``dj-cli-client`` starts in milliseconds.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+COMMANDS = ("create", "start_app")
+# Options that read or write paths relative to the client's directory, or
+# reload the models of the app registry.
+EXCLUSIVE_OPTIONS = ("--manifest", "--from-db", "--makemigrations", "--timings-output", "--profile")
+# Seconds a client keeps retrying a socket nobody listens on, which is what a
+# restarting server looks like.
+RESTART_TIMEOUT = 10.0
+# Times a create request runs again after its files changed under it.
+CONFLICT_RETRIES = 3
+
+# (command, args, color) -> (returncode, stdout, stderr)
+Runner = Callable[[str, List[str], bool], Tuple[int, str, str]]
+
+
+class FileConflict(Exception):
+    """Files a request read were changed on disk before it committed."""
+
+    def __init__(self, paths: Iterable[Path]):
+        self.paths = [str(path) for path in paths]
+        super().__init__(f"{', '.join(self.paths)} changed while the request ran")
+
+
+def socket_path(project_root) -> Path:
+    """Default socket of the server of the project at ``project_root``."""
+    path = Path(project_root) / ".dj_cli_tools" / "server.sock"
+    # AF_UNIX paths are limited to about 100 bytes.
+    if len(os.fsencode(path)) < 100:
+        return path
+    digest = hashlib.md5(os.fsencode(project_root), usedforsecurity=False).hexdigest()[:12]
+    return Path(tempfile.gettempdir()) / f"dj_cli_tools-{digest}.sock"
+
+
+def send_request(path, payload: dict, restart_timeout: float = RESTART_TIMEOUT) -> dict:
+    """Send one request to the server listening on ``path`` and return its response.
+
+    Raises OSError when no server listens on ``path``.
+    """
+    deadline = time.monotonic() + restart_timeout
+    while True:
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            client.connect(str(path))
+            break
+        except ConnectionRefusedError:
+            client.close()
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.05)
+        except OSError:
+            client.close()
+            raise
+    with client:
+        client.sendall(json.dumps(payload).encode("utf-8") + b"\n")
+        client.shutdown(socket.SHUT_WR)
+        data = b"".join(iter(lambda: client.recv(65536), b""))
+    return json.loads(data)
+
+
+class FileLocks:
+    """A lock per path, held by a request while it edits the files below it."""
+
+    def __init__(self):
+        self._locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    @contextmanager
+    def hold(self, paths: Iterable[Path]) -> Iterator[None]:
+        # Taken in sorted order, so two commits never wait on each other.
+        with self._guard:
+            locks = [self._locks.setdefault(path, threading.Lock())
+                     for path in sorted({str(path) for path in paths})]
+        for lock in locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+
+class _RequestLock:
+    """Shared by concurrent requests, exclusive for the ones that run alone."""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._shared = 0
+        self._exclusive = False
+
+    @contextmanager
+    def shared(self) -> Iterator[None]:
+        with self._condition:
+            self._condition.wait_for(lambda: not self._exclusive)
+            self._shared += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._shared -= 1
+                self._condition.notify_all()
+
+    @contextmanager
+    def exclusive(self) -> Iterator[None]:
+        with self._condition:
+            self._condition.wait_for(lambda: not self._exclusive and not self._shared)
+            self._exclusive = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._exclusive = False
+                self._condition.notify_all()
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        try:
+            payload = json.loads(self.rfile.readline())
+        except ValueError:
+            payload = None
+        if isinstance(payload, dict):
+            response = self.server.respond(payload)
+        else:
+            response = {"returncode": 2, "stdout": "", "stderr": "Malformed request.\n"}
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+class GeneratorServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Runs the requests sent to ``path`` through ``runner``, one thread each."""
+
+    def __init__(self, path, runner: Runner, log: Optional[Callable[[str], None]] = None):
+        self.path = Path(path)
+        self.runner = runner
+        self.log = log
+        self.restarting = False
+        self._lock = _RequestLock()
+        super().__init__(str(self.path), _RequestHandler)
+
+    def server_bind(self) -> None:
+        if self.path.exists():
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(str(self.path))
+            except OSError:
+                # Left behind by a server that stopped or restarted.
+                self.path.unlink()
+            else:
+                raise OSError(f"A server is already listening on {self.path}")
+            finally:
+                probe.close()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        super().server_bind()
+        # Only the owner may have code generated in the project.
+        os.chmod(self.path, 0o600)
+
+    def server_close(self) -> None:
+        super().server_close()
+        if not self.restarting:
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def restart(self) -> None:
+        """Stop serving once the running requests are answered; the caller
+        then starts a fresh process on the same socket."""
+        self.restarting = True
+        threading.Thread(target=self.shutdown, daemon=True).start()
+
+    def respond(self, payload: dict) -> dict:
+        command = payload.get("command")
+        args = payload.get("args", [])
+        if command not in COMMANDS or not isinstance(args, list) or \
+                not all(isinstance(arg, str) for arg in args):
+            return {"returncode": 2, "stdout": "",
+                    "stderr": f"Expected a {' or '.join(COMMANDS)} request with a list of arguments.\n"}
+        exclusive = command != "create" or any(
+            arg.split("=", 1)[0] in EXCLUSIVE_OPTIONS for arg in args)
+        started = time.perf_counter()
+        with (self._lock.exclusive() if exclusive else self._lock.shared()):
+            with _working_directory(payload.get("cwd") if exclusive else None):
+                returncode, stdout, stderr = self._run(command, args, bool(payload.get("color")))
+        seconds = time.perf_counter() - started
+        if self.log is not None:
+            self.log(f"{command} {' '.join(args)} -> {returncode} in {seconds * 1000:.1f} ms")
+        return {"returncode": returncode, "stdout": stdout, "stderr": stderr,
+                "seconds": round(seconds, 6)}
+
+    def _run(self, command: str, args: List[str], color: bool) -> Tuple[int, str, str]:
+        for attempt in range(CONFLICT_RETRIES + 1):
+            try:
+                return self.runner(command, args, color)
+            except FileConflict as e:
+                if attempt == CONFLICT_RETRIES:
+                    return 1, "", f"CommandError: {e}.\n"
+            except SystemExit as e:
+                # argparse exits on --help and on usage errors.
+                return e.code if isinstance(e.code, int) else 1, "", ""
+            except Exception:
+                return 1, "", traceback.format_exc()
+
+
+@contextmanager
+def _working_directory(path: Optional[str]) -> Iterator[None]:
+    if not path:
+        yield
+        return
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+class FileWatcher(threading.Thread):
+    """Calls ``on_change`` once when any of ``paths`` changes."""
+
+    def __init__(self, paths: Iterable[Path], on_change: Callable[[], None], interval: float = 1.0):
+        super().__init__(daemon=True)
+        self.paths = list(paths)
+        self.on_change = on_change
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._mtimes = self._snapshot()
+
+    def _snapshot(self) -> Dict[Path, Optional[int]]:
+        mtimes = {}
+        for path in self.paths:
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                mtimes[path] = None
+        return mtimes
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            if self._snapshot() != self._mtimes:
+                self.on_change()
+                return
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+
+__all__ = [
+    "COMMANDS",
+    "CONFLICT_RETRIES",
+    "EXCLUSIVE_OPTIONS",
+    "FileConflict",
+    "FileLocks",
+    "FileWatcher",
+    "GeneratorServer",
+    "RESTART_TIMEOUT",
+    "send_request",
+    "socket_path",
+]
@@ -0,0 +1,399 @@
+"""Symbol index of a generated module, built from a single ``ast`` pass.
+
+The index answers the questions the generators keep asking about a target
+file -- is this class already defined, is this name imported, is this
+viewset registered on the router, is this model registered in the admin --
+with set and dict lookups instead of substring scans, and knows where the
+import block ends so new imports are merged into it instead of being
+prepended to the file.
+"""
+from __future__ import annotations
+
+import ast
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+MAX_LINE_LENGTH = 79
+
+
+class ImportFrom(NamedTuple):
+    """A top-level ``from module import ...`` statement."""
+
+    module: str
+    names: List[Tuple[str, Optional[str]]]
+    lineno: int
+    end_lineno: int
+
+
+class Registration(NamedTuple):
+    """A top-level ``<router>.register(prefix, viewset)`` call."""
+
+    router: str
+    prefix: Optional[str]
+    viewset: Optional[str]
+    end_lineno: int
+
+
+class ModuleIndex:
+    """Classes, functions, imports, router and admin registrations of one module."""
+
+    def __init__(self):
+        self.classes: Dict[str, int] = {}
+        self.functions: Dict[str, int] = {}
+        self.bound_names: Set[str] = set()
+        self.imports: Set[str] = set()
+        self.from_imports: Dict[str, List[ImportFrom]] = {}
+        self.assignments: Dict[str, int] = {}
+        self.routers: Dict[str, int] = {}
+        self.registrations: List[Registration] = []
+        self.registered_viewsets: Set[str] = set()
+        self.registered_prefixes: Set[str] = set()
+        self.admin_registered: Set[str] = set()
+        # Modules named by include() calls in assignments, e.g. urlpatterns.
+        self.includes: Set[str] = set()
+        # Last line of the docstring / ``__future__`` header and of the import block.
+        self.header_end = 0
+        self.import_end = 0
+
+    @classmethod
+    def from_source(cls, source: str, filename: str = "<unknown>") -> "ModuleIndex":
+        """Index ``source``; raises SyntaxError if it cannot be parsed."""
+        index = cls()
+        tree = ast.parse(source, filename=filename)
+        for position, node in enumerate(tree.body):
+            if (
+                position == 0
+                and isinstance(node, ast.Expr)
+                and isinstance(node.value, ast.Constant)
+                and isinstance(node.value.value, str)
+            ):
+                index.header_end = node.end_lineno
+            elif isinstance(node, ast.ImportFrom):
+                index._add_import_from(node)
+            elif isinstance(node, ast.Import):
+                for alias in node.names:
+                    index.imports.add(alias.name)
+                    index.bound_names.add(alias.asname or alias.name.split(".")[0])
+                index.import_end = node.end_lineno
+            elif isinstance(node, ast.ClassDef):
+                index.classes[node.name] = node.lineno
+                index._add_admin_decorators(node)
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                index.functions[node.name] = node.lineno
+            elif isinstance(node, ast.Assign):
+                index._add_assignment(node)
+            elif isinstance(node, ast.Expr) and isinstance(node.value, ast.Call):
+                index._add_call(node)
+        return index
+
+    def to_dict(self) -> dict:
+        """JSON-serialisable form, the inverse of ``from_dict``."""
+        return {
+            "classes": self.classes,
+            "functions": self.functions,
+            "bound_names": sorted(self.bound_names),
+            "imports": sorted(self.imports),
+            "from_imports": {
+                module: [[s.names, s.lineno, s.end_lineno] for s in statements]
+                for module, statements in self.from_imports.items()
+            },
+            "assignments": self.assignments,
+            "routers": self.routers,
+            "registrations": [list(r) for r in self.registrations],
+            "admin_registered": sorted(self.admin_registered),
+            "includes": sorted(self.includes),
+            "header_end": self.header_end,
+            "import_end": self.import_end,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ModuleIndex":
+        index = cls()
+        index.classes = dict(data["classes"])
+        index.functions = dict(data["functions"])
+        index.bound_names = set(data["bound_names"])
+        index.imports = set(data["imports"])
+        index.from_imports = {
+            module: [
+                ImportFrom(module, [tuple(name) for name in names], lineno, end_lineno)
+                for names, lineno, end_lineno in statements
+            ]
+            for module, statements in data["from_imports"].items()
+        }
+        index.assignments = dict(data["assignments"])
+        index.routers = dict(data["routers"])
+        index.registrations = [Registration(*r) for r in data["registrations"]]
+        index.registered_prefixes = {r.prefix for r in index.registrations if r.prefix is not None}
+        index.registered_viewsets = {r.viewset for r in index.registrations if r.viewset is not None}
+        index.admin_registered = set(data["admin_registered"])
+        index.includes = set(data["includes"])
+        index.header_end = data["header_end"]
+        index.import_end = data["import_end"]
+        return index
+
+    def _add_import_from(self, node: ast.ImportFrom) -> None:
+        module = "." * node.level + (node.module or "")
+        names = [(alias.name, alias.asname) for alias in node.names]
+        self.from_imports.setdefault(module, []).append(
+            ImportFrom(module, names, node.lineno, node.end_lineno))
+        for name, asname in names:
+            self.bound_names.add(asname or name)
+        if module == "__future__":
+            self.header_end = node.end_lineno
+        self.import_end = node.end_lineno
+
+    def _add_assignment(self, node: ast.Assign) -> None:
+        for target in node.targets:
+            if not isinstance(target, ast.Name):
+                continue
+            self.assignments[target.id] = node.lineno
+            value = node.value
+            if isinstance(value, ast.Call) and _dotted_name(value.func).endswith("Router"):
+                self.routers[target.id] = node.end_lineno
+        for call in ast.walk(node.value):
+            if isinstance(call, ast.Call) and _dotted_name(call.func) == "include":
+                module = _string_argument(call, 0, "arg")
+                if module is not None:
+                    self.includes.add(module)
+
+    def _add_call(self, node: ast.Expr) -> None:
+        call = node.value
+        func = call.func
+        if not isinstance(func, ast.Attribute):
+            return
+        if func.attr == "register" and isinstance(func.value, ast.Name) and func.value.id in self.routers:
+            prefix = _string_argument(call, 0, "prefix")
+            viewset = _name_argument(call, 1, "viewset")
+            self.registrations.append(Registration(func.value.id, prefix, viewset, node.end_lineno))
+            if prefix is not None:
+                self.registered_prefixes.add(prefix)
+            if viewset is not None:
+                self.registered_viewsets.add(viewset)
+        elif func.attr == "register" and _dotted_name(func.value) in ("admin.site", "site"):
+            if call.args:
+                self._add_admin_models(call.args[0])
+
+    def _add_admin_decorators(self, node: ast.ClassDef) -> None:
+        for decorator in node.decorator_list:
+            if isinstance(decorator, ast.Call) and _dotted_name(decorator.func) in ("admin.register", "register"):
+                for arg in decorator.args:
+                    self._add_admin_models(arg)
+
+    def _add_admin_models(self, node: ast.expr) -> None:
+        elements = node.elts if isinstance(node, (ast.List, ast.Tuple)) else [node]
+        for element in elements:
+            name = _dotted_name(element)
+            if name:
+                self.admin_registered.add(name.rsplit(".", 1)[-1])
+
+
+class SourceEditor:
+    """Line based edits against the source an index was built from.
+
+    Edits are recorded against the original line numbers and applied bottom
+    up, so the positions from a single ModuleIndex stay valid for all of them.
+    """
+
+    def __init__(self, source: str):
+        self._lines = source.splitlines()
+        self._edits: List[Tuple[int, int, int, List[str]]] = []
+
+    def insert_after(self, lineno: int, text: str) -> None:
+        """Insert ``text`` after line ``lineno`` (0 inserts at the top)."""
+        self._edits.append((lineno, lineno, len(self._edits), text.splitlines()))
+
+    def replace(self, lineno: int, end_lineno: int, text: str) -> None:
+        """Replace lines ``lineno`` to ``end_lineno`` inclusive with ``text``."""
+        self._edits.append((end_lineno, lineno - 1, len(self._edits), text.splitlines()))
+
+    def lines(self, lineno: int, end_lineno: int) -> List[str]:
+        """Lines ``lineno`` to ``end_lineno`` inclusive of the original source."""
+        return self._lines[lineno - 1:end_lineno]
+
+    def append(self, text: str) -> None:
+        self.insert_after(len(self._lines), text)
+
+    def apply(self) -> str:
+        lines = list(self._lines)
+        for end, start, _, new_lines in sorted(self._edits, key=lambda e: (e[0], e[1], e[2]), reverse=True):
+            lines[start:end] = new_lines
+        return "\n".join(lines) + ("\n" if lines else "")
+
+
+def merge_imports(editor: SourceEditor, index: ModuleIndex, import_statements: str) -> None:
+    """Record the edits that make every import in ``import_statements`` present.
+
+    Names already bound in the module are skipped, names from a module that is
+    already imported from are added to that statement, and anything else is
+    inserted after the existing import block.
+    """
+    new_statements: List[str] = []
+    extended: Dict[int, Tuple[ImportFrom, List[Tuple[str, Optional[str]]]]] = {}
+
+    for node in ast.parse(import_statements).body:
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.name not in index.imports:
+                    new_statements.append(f"import {_format_alias(alias.name, alias.asname)}")
+            continue
+        if not isinstance(node, ast.ImportFrom):
+            continue
+
+        module = "." * node.level + (node.module or "")
+        missing = [
+            (alias.name, alias.asname) for alias in node.names
+            if (alias.asname or alias.name) not in index.bound_names
+        ]
+        if not missing:
+            continue
+        existing = index.from_imports.get(module)
+        if existing:
+            statement = existing[-1]
+            _, names = extended.setdefault(statement.lineno, (statement, []))
+            names.extend(name for name in missing if name not in names)
+        else:
+            new_statements.append(format_import_from(module, missing))
+
+    for statement, names in extended.values():
+        lines = editor.lines(statement.lineno, statement.end_lineno)
+        if len(lines) == 1 and "#" not in lines[0]:
+            code = format_import_from(statement.module, statement.names + names)
+        else:
+            # Wrapped or commented by hand: only add the names.
+            code = _extend_import_from(lines, names)
+        editor.replace(statement.lineno, statement.end_lineno, code)
+    if new_statements:
+        editor.insert_after(index.import_end or index.header_end, "\n".join(new_statements))
+
+
+def _extend_import_from(lines: List[str], names: List[Tuple[str, Optional[str]]]) -> str:
+    """The ``from ... import`` statement on ``lines`` with ``names`` added,
+    keeping its layout and comments."""
+    # Imported here: tokenize slows down every CLI start and few statements need it.
+    import io
+    import tokenize
+
+    aliases = [_format_alias(name, asname) for name, asname in names]
+    lines = list(lines)
+    tokens = [
+        token for token in tokenize.generate_tokens(io.StringIO("\n".join(lines) + "\n").readline)
+        if token.type not in (tokenize.COMMENT, tokenize.NL, tokenize.NEWLINE, tokenize.ENDMARKER)
+    ]
+    close = tokens.pop() if tokens[-1].string == ")" else None
+    last = tokens[-1]
+    row, col = last.end
+    if close is not None and close.start[0] > row and not lines[close.start[0] - 1][:close.start[1]].strip():
+        # One name per line: a line of its own for each, before the ")".
+        name_line = lines[row - 1]
+        indent = name_line[:len(name_line) - len(name_line.lstrip())] if row > 1 else "    "
+        if last.string != ",":
+            lines[row - 1] = name_line[:col] + "," + name_line[col:]
+        lines[close.start[0] - 1:close.start[0] - 1] = [f"{indent}{alias}," for alias in aliases]
+    else:
+        separator = " " if last.string == "," else ", "
+        lines[row - 1] = lines[row - 1][:col] + separator + ", ".join(aliases) + lines[row - 1][col:]
+    return "\n".join(lines)
+
+
+class ClassAttribute(NamedTuple):
+    """A name assigned, or a class defined, in the body of a class."""
+
+    node: ast.stmt
+    lineno: int
+    end_lineno: int
+    col_offset: int
+
+
+def class_attributes(source: str, filename: str = "<unknown>") -> Dict[str, Dict[str, ClassAttribute]]:
+    """Attributes of every top-level class and of the classes nested in them.
+
+    Nested classes are keyed ``Outer.Inner``, so the ``Meta`` options of a
+    serializer are ``class_attributes(source)["BookSerializer.Meta"]``.
+    Raises SyntaxError if ``source`` cannot be parsed.
+    """
+    classes: Dict[str, Dict[str, ClassAttribute]] = {}
+
+    def visit(node: ast.ClassDef, name: str) -> None:
+        attributes = classes.setdefault(name, {})
+        for statement in node.body:
+            targets: List[str] = []
+            if isinstance(statement, ast.Assign):
+                targets = [t.id for t in statement.targets if isinstance(t, ast.Name)]
+            elif isinstance(statement, ast.AnnAssign) and isinstance(statement.target, ast.Name):
+                targets = [statement.target.id]
+            elif isinstance(statement, ast.ClassDef):
+                targets = [statement.name]
+                visit(statement, f"{name}.{statement.name}")
+            for target in targets:
+                attributes[target] = ClassAttribute(
+                    statement, statement.lineno, statement.end_lineno, statement.col_offset)
+
+    for node in ast.parse(source, filename=filename).body:
+        if isinstance(node, ast.ClassDef):
+            visit(node, node.name)
+    return classes
+
+
+def root_name(node: ast.expr) -> str:
+    """The name an attribute and call chain starts from: ``Book`` for
+    ``Book.objects.filter(...).all()``, or ``""``."""
+    while isinstance(node, (ast.Attribute, ast.Call, ast.Subscript)):
+        node = node.func if isinstance(node, ast.Call) else node.value
+    return node.id if isinstance(node, ast.Name) else ""
+
+
+def _format_alias(name: str, asname: Optional[str]) -> str:
+    return f"{name} as {asname}" if asname else name
+
+
+def format_import_from(module: str, names: List[Tuple[str, Optional[str]]]) -> str:
+    """A ``from module import ...`` statement, wrapped when too long."""
+    aliases = [_format_alias(name, asname) for name, asname in names]
+    line = f"from {module} import {', '.join(aliases)}"
+    if len(line) <= MAX_LINE_LENGTH:
+        return line
+    body = "".join(f"    {alias},\n" for alias in aliases)
+    return f"from {module} import (\n{body})"
+
+
+def _dotted_name(node: ast.expr) -> str:
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        parent = _dotted_name(node.value)
+        return f"{parent}.{node.attr}" if parent else ""
+    return ""
+
+
+def _string_argument(call: ast.Call, position: int, keyword: str) -> Optional[str]:
+    node = _argument(call, position, keyword)
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    return None
+
+
+def _name_argument(call: ast.Call, position: int, keyword: str) -> Optional[str]:
+    node = _argument(call, position, keyword)
+    name = _dotted_name(node) if node is not None else ""
+    return name.rsplit(".", 1)[-1] or None
+
+
+def _argument(call: ast.Call, position: int, keyword: str) -> Optional[ast.expr]:
+    if len(call.args) > position:
+        return call.args[position]
+    for kw in call.keywords:
+        if kw.arg == keyword:
+            return kw.value
+    return None
+
+
+__all__ = [
+    "ClassAttribute",
+    "ImportFrom",
+    "ModuleIndex",
+    "Registration",
+    "SourceEditor",
+    "class_attributes",
+    "format_import_from",
+    "merge_imports",
+    "root_name",
+]
@@ -0,0 +1,260 @@
+"""Packed app templates and the registry that finds them.
+
+A template pack is one uncompressed zip archive (``<name>.djpack``) holding a
+``manifest.json`` -- the pack name and an index of every file with its size,
+mode and CRC -- followed by the files under ``files/`` in manifest order.
+Opening a pack reads the zip directory once; the files are then read
+sequentially, so looking up and unpacking a template costs a single open
+however many files it has.
+
+Packs are located through :class:`TemplateRegistry`, in order of precedence:
+
+1. the ``DJ_CLI_TOOLS_TEMPLATE_PACKS`` setting, a mapping of name to path;
+2. the ``dj_cli_tools.template_packs`` entry point group, whose objects are a
+   path or a callable returning one;
+3. the packs and loose template directories shipped in ``dj_templates``; a
+   pack is only used while no file of the directory it was built from is
+   newer than it.
+"""
+from __future__ import annotations
+
+import io
+import json
+import os
+import stat
+import zipfile
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from .errors import command_error
+from .file_buffer import atomic_write
+
+PACK_SUFFIX = ".djpack"
+MANIFEST = "manifest.json"
+FILES_DIR = "files/"
+FORMAT = 1
+SETTING = "DJ_CLI_TOOLS_TEMPLATE_PACKS"
+ENTRY_POINT_GROUP = "dj_cli_tools.template_packs"
+BUILTIN_DIR = Path(__file__).resolve().parents[2] / "dj_templates"
+
+# Members get a fixed timestamp so packing the same tree twice gives the
+# same bytes.
+_ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+_SKIPPED_DIRS = ("__pycache__",)
+_SKIPPED_SUFFIXES = (".pyo", ".pyc", ".py.class")
+
+
+class PackEntry(NamedTuple):
+    """A file in the pack index; ``path`` is relative and uses ``/``."""
+
+    path: str
+    size: int
+    mode: int
+    crc: int
+
+
+def is_template_pack(path) -> bool:
+    return str(path).endswith(PACK_SUFFIX) and os.path.isfile(path)
+
+
+class TemplatePack:
+    """Read access to a ``.djpack`` archive through its manifest."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        try:
+            self._zip = zipfile.ZipFile(self.path)
+            manifest = json.loads(self._zip.read(MANIFEST))
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile) as e:
+            raise command_error(f"Invalid template pack {self.path}: {e}")
+        if not isinstance(manifest, dict) or manifest.get("format") != FORMAT:
+            self._zip.close()
+            raise command_error(
+                f"Invalid template pack {self.path}: unsupported format "
+                f"{manifest.get('format') if isinstance(manifest, dict) else manifest!r}.")
+        self.name: str = manifest["name"]
+        self.directories: List[str] = manifest.get("directories", [])
+        self.entries: List[PackEntry] = [
+            PackEntry(f["path"], f["size"], f["mode"], f["crc"]) for f in manifest["files"]]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self) -> None:
+        self._zip.close()
+
+    def read(self, entry: PackEntry) -> bytes:
+        return self._zip.read(FILES_DIR + entry.path)
+
+    def read_all(self) -> Iterator[Tuple[PackEntry, bytes]]:
+        """Every file with its content, in archive order."""
+        for entry in self.entries:
+            yield entry, self.read(entry)
+
+    def extract(self, destination) -> None:
+        """Unpack the template tree into ``destination``."""
+        destination = Path(destination)
+        for directory in self.directories:
+            (destination / directory).mkdir(parents=True, exist_ok=True)
+        for entry, data in self.read_all():
+            target = destination / entry.path
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(data)
+            os.chmod(target, entry.mode)
+
+
+def _pack_name(relative_path: str) -> str:
+    # Packs always hold ``.py-tpl`` files, whether the tree is kept as
+    # templates or as plain modules for editing.
+    return relative_path + "-tpl" if relative_path.endswith(".py") else relative_path
+
+
+def build_pack(source_dir, destination=None, name: Optional[str] = None) -> Path:
+    """Pack the template tree at ``source_dir``; returns the pack path.
+
+    ``destination`` defaults to ``<source_dir>.djpack``. Hidden entries,
+    ``__pycache__`` and compiled files are left out.
+    """
+    source_dir = Path(source_dir)
+    if not source_dir.is_dir():
+        raise command_error(f"Template directory {source_dir} does not exist.")
+    name = name or source_dir.name
+    destination = Path(destination) if destination else source_dir.with_name(name + PACK_SUFFIX)
+
+    directories: List[str] = []
+    files: List[Tuple[str, Path]] = []
+    for root, dirs, filenames in os.walk(source_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith(".") and d not in _SKIPPED_DIRS)
+        relative_root = Path(root).relative_to(source_dir).as_posix()
+        if relative_root != ".":
+            directories.append(relative_root)
+        for filename in sorted(filenames):
+            if filename.startswith(".") or filename.endswith(_SKIPPED_SUFFIXES):
+                continue
+            relative = filename if relative_root == "." else f"{relative_root}/{filename}"
+            files.append((_pack_name(relative), Path(root) / filename))
+
+    packed = [path for path, _ in files]
+    duplicates = sorted({path for path in packed if packed.count(path) > 1})
+    if duplicates:
+        raise command_error(
+            f"Both a .py and a .py-tpl file would be packed as {', '.join(duplicates)}.")
+
+    buffer = io.BytesIO()
+    index = []
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+        contents = []
+        for path, source in files:
+            data = source.read_bytes()
+            mode = stat.S_IMODE(source.stat().st_mode)
+            contents.append((path, data, mode))
+            index.append({"path": path, "size": len(data), "mode": mode,
+                          "crc": zipfile.crc32(data)})
+        manifest = {"format": FORMAT, "name": name, "directories": directories, "files": index}
+        archive.writestr(_member(MANIFEST, 0o644), json.dumps(manifest, indent=1))
+        for path, data, mode in contents:
+            archive.writestr(_member(FILES_DIR + path, mode), data)
+
+    atomic_write(destination, buffer.getvalue())
+    return destination
+
+
+def _newest_mtime(template_dir: str) -> float:
+    """The last time a file of ``template_dir`` was changed, added or removed.
+
+    Only the inode data is read, not the files.
+    """
+    newest = 0.0
+    for root, dirs, files in os.walk(template_dir):
+        dirs[:] = [name for name in dirs if name not in _SKIPPED_DIRS]
+        newest = max(newest, os.stat(root).st_mtime)
+        for name in files:
+            if not name.endswith(_SKIPPED_SUFFIXES):
+                newest = max(newest, os.stat(os.path.join(root, name)).st_mtime)
+    return newest
+
+
+def _member(name: str, mode: int) -> zipfile.ZipInfo:
+    info = zipfile.ZipInfo(name, date_time=_ZIP_EPOCH)
+    info.external_attr = (stat.S_IFREG | mode) << 16
+    return info
+
+
+class TemplateRegistry:
+    """Maps template names to a pack file or a loose template directory."""
+
+    def __init__(self, builtin_dir: Optional[Path] = BUILTIN_DIR):
+        self.builtin_dir = builtin_dir
+
+    def _from_settings(self) -> Dict[str, str]:
+        from django.conf import settings
+
+        if not settings.configured:
+            return {}
+        return dict(getattr(settings, SETTING, {}))
+
+    def _from_entry_points(self, name: Optional[str] = None) -> Dict[str, str]:
+        from importlib.metadata import entry_points
+
+        selected = entry_points(group=ENTRY_POINT_GROUP)
+        if name is not None:
+            selected = selected.select(name=name)
+        found = {}
+        for entry_point in selected:
+            value = entry_point.load()
+            found[entry_point.name] = os.fspath(value() if callable(value) else value)
+        return found
+
+    def _builtin(self) -> Dict[str, str]:
+        found: Dict[str, str] = {}
+        try:
+            children = sorted(os.scandir(self.builtin_dir), key=lambda e: e.name)
+        except (OSError, TypeError):
+            return found
+        packs: Dict[str, os.DirEntry] = {}
+        for child in children:
+            if child.name.startswith("."):
+                continue
+            if child.name.endswith(PACK_SUFFIX) and child.is_file():
+                packs[child.name[:-len(PACK_SUFFIX)]] = child
+            elif child.is_dir():
+                found[child.name] = child.path
+        for name, pack in packs.items():
+            # A built pack wins over the tree it was built from, until the
+            # tree is edited after the pack was built.
+            if name not in found or _newest_mtime(found[name]) <= pack.stat().st_mtime:
+                found[name] = pack.path
+        return found
+
+    def template_directories(self) -> List[str]:
+        """The loose template directories shipped in ``dj_templates``."""
+        try:
+            children = sorted(os.scandir(self.builtin_dir), key=lambda e: e.name)
+        except (OSError, TypeError):
+            return []
+        return [child.path for child in children
+                if child.is_dir() and not child.name.startswith(".")]
+
+    def find(self, name: str) -> Optional[str]:
+        """Path of the pack or template directory registered as ``name``."""
+        for source in (self._from_settings, lambda: self._from_entry_points(name), self._builtin):
+            location = source().get(name)
+            if location:
+                return location
+        return None
+
+    def names(self) -> List[str]:
+        return sorted({**self._builtin(), **self._from_entry_points(), **self._from_settings()})
+
+
+__all__ = [
+    "PACK_SUFFIX",
+    "PackEntry",
+    "TemplatePack",
+    "TemplateRegistry",
+    "build_pack",
+    "is_template_pack",
+]
@@ -0,0 +1,196 @@
+"""Per-phase timings of a command run.
+
+A :class:`Timings` recorder holds a tree of phases with their wall time, the
+bytes read and written and the files touched in each. Commands activate one
+for ``--timings``; the code they run reports into whichever recorder is
+active through the module-level hooks, which do nothing when none is::
+
+    from dj_cli_tools.utils import timings
+
+    with timings.phase("openapi schema"):
+        timings.record_read(path, len(data))
+        ...
+
+Custom steps added to a command report into the same tree this way.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+
+class Phase:
+    """A named span of a run; counters exclude those of ``children``."""
+
+    __slots__ = ("name", "seconds", "bytes_read", "bytes_written", "files", "children")
+
+    def __init__(self, name: str, seconds: float = 0.0):
+        self.name = name
+        self.seconds = seconds
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.files: Set[str] = set()
+        self.children: List["Phase"] = []
+
+    def totals(self):
+        """(bytes read, bytes written, files touched) including the children."""
+        bytes_read, bytes_written, files = self.bytes_read, self.bytes_written, set(self.files)
+        for child in self.children:
+            child_read, child_written, child_files = child.totals()
+            bytes_read += child_read
+            bytes_written += child_written
+            files |= child_files
+        return bytes_read, bytes_written, files
+
+    def to_dict(self) -> Dict[str, Any]:
+        bytes_read, bytes_written, files = self.totals()
+        data: Dict[str, Any] = {
+            "name": self.name,
+            "seconds": round(self.seconds, 6),
+            "bytes_read": bytes_read,
+            "bytes_written": bytes_written,
+            "files": len(files),
+        }
+        if self.children:
+            data["children"] = [child.to_dict() for child in self.children]
+        return data
+
+
+class Timings:
+    """Records a tree of phases below a root phase spanning the command."""
+
+    def __init__(self, name: str = "total"):
+        self.root = Phase(name)
+        self._stack = [self.root]
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._offset = 0.0
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[Phase]:
+        current = Phase(name)
+        self._stack[-1].children.append(current)
+        self._stack.append(current)
+        start = time.perf_counter()
+        try:
+            yield current
+        finally:
+            current.seconds += time.perf_counter() - start
+            self._stack.pop()
+
+    def add(self, name: str, seconds: float) -> Phase:
+        """Add a phase timed elsewhere, such as the interpreter startup."""
+        current = Phase(name, seconds)
+        self._stack[-1].children.append(current)
+        if self._stack[-1] is self.root:
+            self._offset += seconds
+        return current
+
+    def record_read(self, path, nbytes: int) -> None:
+        with self._lock:
+            current = self._stack[-1]
+            current.bytes_read += nbytes
+            current.files.add(str(path))
+
+    def record_write(self, path, nbytes: int) -> None:
+        with self._lock:
+            current = self._stack[-1]
+            current.bytes_written += nbytes
+            current.files.add(str(path))
+
+    def finish(self) -> Phase:
+        self.root.seconds = self._offset + time.perf_counter() - self._started
+        return self.root
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self.root.to_dict()
+
+    def format_text(self) -> str:
+        lines = [f"{'phase':<36} {'time':>10} {'read':>10} {'written':>10} {'files':>6}"]
+
+        def visit(current: Phase, depth: int) -> None:
+            bytes_read, bytes_written, files = current.totals()
+            label = ("  " * depth + current.name)[:36]
+            lines.append(
+                f"{label:<36} {current.seconds * 1000:>7.1f} ms {_size(bytes_read):>10} "
+                f"{_size(bytes_written):>10} {len(files):>6}")
+            for child in current.children:
+                visit(child, depth + 1)
+
+        visit(self.root, 0)
+        return "\n".join(lines)
+
+
+def _size(nbytes: int) -> str:
+    if nbytes < 1024:
+        return f"{nbytes} B"
+    return f"{nbytes / 1024:.1f} kB"
+
+
+def process_uptime() -> Optional[float]:
+    """Seconds since this process started, where the OS exposes it (Linux)."""
+    try:
+        with open("/proc/self/stat", "rb") as f:
+            fields = f.read().rsplit(b")", 1)[1].split()
+        with open("/proc/uptime", "rb") as f:
+            uptime = float(f.read().split()[0])
+        # Field 22 of stat, the start time in clock ticks after boot.
+        return max(0.0, uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+_active: ContextVar[Optional[Timings]] = ContextVar("dj_cli_tools_timings", default=None)
+
+
+def active() -> Optional[Timings]:
+    return _active.get()
+
+
+def activate(recorder: Optional[Timings]):
+    """Make ``recorder`` the target of the hooks; returns a reset token."""
+    return _active.set(recorder)
+
+
+def deactivate(token) -> None:
+    _active.reset(token)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[Optional[Phase]]:
+    """Time the block as ``name`` under the current phase, if recording."""
+    recorder = _active.get()
+    if recorder is None:
+        yield None
+        return
+    with recorder.phase(name) as current:
+        yield current
+
+
+def record_read(path, nbytes: int) -> None:
+    recorder = _active.get()
+    if recorder is not None:
+        recorder.record_read(path, nbytes)
+
+
+def record_write(path, nbytes: int) -> None:
+    recorder = _active.get()
+    if recorder is not None:
+        recorder.record_write(path, nbytes)
+
+
+__all__ = [
+    "Phase",
+    "Timings",
+    "activate",
+    "active",
+    "deactivate",
+    "phase",
+    "process_uptime",
+    "record_read",
+    "record_write",
+]
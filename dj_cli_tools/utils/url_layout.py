@@ -0,0 +1,399 @@
+"""Sharded URL layouts for apps with many viewsets.
+
+``create`` registers every viewset of an app on one ``DefaultRouter``
+included at the root of its urls.py. Django resolves a path by trying the
+patterns of a list in order, and the router adds four per viewset (list and
+detail, each with a format suffix). A request for the viewset registered
+last therefore tries all of them, and every ``create`` run rewrites the
+whole urls.py.
+
+The sharded layout moves the registrations into the modules of the app's
+``routes`` package, one per resource: the first path segment of the
+prefix, each with its own router. urls.py includes them behind a
+lookahead::
+
+    urlpatterns = [
+        re_path(r'^(?:\.(?P<format>[a-z0-9]+)/?)?$', api_root_view(), name='api-root'),
+        re_path(r'^(?=orders(?:[/.]|$))', include('shop.routes.orders')),
+        re_path(r'^(?=products(?:[/.]|$))', include('shop.routes.products')),
+    ]
+
+The lookahead consumes nothing, so paths and route names do not change, and
+a request only tries the patterns of its own shard. The shards keep the
+format suffixes; ``api_root_view()`` of the routes package serves the API
+root of ``DefaultRouter`` over the routes of every shard.
+
+:func:`reshard` converts a flat urls.py.
+"""
+from __future__ import annotations
+
+import ast
+import re
+import string
+from keyword import iskeyword
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from .code_templates import CodeTemplates
+from .errors import command_error
+from .symbol_index import ModuleIndex, SourceEditor, format_import_from, merge_imports
+
+LAYOUTS = ("flat", "sharded")
+SHARD_PACKAGE = "routes"
+URLS_IMPORTS = "from django.urls import include, re_path"
+# The root view DefaultRouter adds, with its format suffix, served for all
+# shards by the routes package.
+API_ROOT_ENTRY = r"re_path(r'^(?:\.(?P<format>[a-z0-9]+)/?)?$', api_root_view(), name='api-root')"
+API_ROOT_IMPORT = f"from .{SHARD_PACKAGE} import api_root_view"
+
+_MODULE_CHARACTERS = frozenset(string.ascii_lowercase + string.digits)
+# Prefix segments matched literally, as routers build their patterns.
+_LITERAL_SEGMENT = re.compile(r"[\w\-.~]+")
+
+# Stands in for the lines of a removed statement until blank lines are tidied.
+_REMOVED = "\0"
+_REMOVED_BLOCK = re.compile(r"^(?:[ \t]*\n)*(?:\0\n(?:[ \t]*\n)*)+", re.MULTILINE)
+
+
+class Route(NamedTuple):
+    """A viewset registration in a shard module."""
+
+    prefix: str
+    viewset: str
+    # Arguments of the register() call, as source.
+    arguments: str
+    # Module the viewset is imported from, relative to the shard module.
+    module: str
+
+    @classmethod
+    def for_viewset(cls, prefix: str, viewset: str) -> "Route":
+        return cls(prefix, viewset, f"r'{prefix}', {viewset}", "..views")
+
+    @property
+    def shard(self) -> str:
+        """Key of the shard the route goes to: the first path segment of its prefix."""
+        return self.prefix.split("/", 1)[0]
+
+
+def shard_module(key: str) -> str:
+    """Name of the module of shard ``key`` in the routes package.
+
+    Characters other than lowercase letters and digits, ``_`` included, are
+    written as ``_<code point>_``, so different keys never share a module.
+    """
+    name = "".join(c if c in _MODULE_CHARACTERS else f"_{ord(c):x}_" for c in key)
+    return name if name[:1].isalpha() and not iskeyword(name) else f"x{name}"
+
+
+def shard_include(app_name: str, key: str) -> str:
+    """The urlpatterns entry including shard ``key`` of ``app_name``.
+
+    The segment has to end at a ``/``, the ``.`` of a format suffix or the
+    end of the path, so that ``orders`` does not take ``orders-archive/``.
+    """
+    return (f"re_path(r'^(?={re.escape(key)}(?:[/.]|$))', "
+            f"include('{app_name}.{SHARD_PACKAGE}.{shard_module(key)}'))")
+
+
+def included_shards(includes: Iterable[str], app_name: str) -> Set[str]:
+    """Modules of the routes package of ``app_name`` among the ``includes`` of a urls.py."""
+    package = f"{app_name}.{SHARD_PACKAGE}."
+    return {module[len(package):] for module in includes if module.startswith(package)}
+
+
+def add_routes(source: str, index: ModuleIndex, routes: Sequence[Route]) -> Tuple[str, List[Route]]:
+    """Register ``routes`` on the router of the shard module ``source``.
+
+    Returns the new source and the routes added; prefixes and viewsets that
+    are already registered are left out.
+    """
+    if not index.routers:
+        raise ValueError("it defines no router")
+    router = "router" if "router" in index.routers else next(iter(index.routers))
+    registrations = [r for r in index.registrations if r.router == router]
+    insertion = registrations[-1].end_lineno if registrations else index.routers[router]
+
+    added: List[Route] = []
+    prefixes, viewsets = set(index.registered_prefixes), set(index.registered_viewsets)
+    for route in routes:
+        if route.prefix in prefixes or route.viewset in viewsets:
+            continue
+        prefixes.add(route.prefix)
+        viewsets.add(route.viewset)
+        added.append(route)
+    if not added:
+        return source, []
+
+    editor = SourceEditor(source)
+    editor.insert_after(insertion, "\n".join(f"{router}.register({route.arguments})" for route in added))
+    imports: Dict[str, List[str]] = {}
+    for route in added:
+        imports.setdefault(route.module, []).append(route.viewset)
+    merge_imports(editor, index, "\n".join(
+        f"from {module} import {', '.join(names)}" for module, names in imports.items()))
+    return editor.apply(), added
+
+
+def add_includes(editor: SourceEditor, source: str, entries: Sequence[str]) -> None:
+    """Record the edits adding ``entries``, as source, to the urlpatterns of ``source``.
+
+    Entries go on lines of their own above the closing bracket; a list
+    written in another layout is rewritten one entry per line.
+    """
+    if not entries:
+        return
+    tree = ast.parse(source)
+    node = _urlpatterns(tree)
+    if node is None:
+        editor.append("\nurlpatterns = [\n" + "".join(f"    {entry},\n" for entry in entries) + "]")
+        return
+    if not isinstance(node.value, ast.List):
+        editor.append("\nurlpatterns += [\n" + "".join(f"    {entry},\n" for entry in entries) + "]")
+        return
+
+    lines = source.splitlines()
+    value = node.value
+    closing = lines[value.end_lineno - 1]
+    before_bracket = closing.encode("utf-8")[:value.end_col_offset - 1].decode("utf-8")
+    if value.end_lineno > value.lineno and not before_bracket.strip() and (
+            not value.elts or _has_trailing_comma(lines, value)):
+        indent = before_bracket + "    "
+        editor.insert_after(value.end_lineno - 1, "\n".join(f"{indent}{entry}," for entry in entries))
+        return
+    elements = [ast.get_source_segment(source, element) for element in value.elts]
+    editor.replace(node.lineno, node.end_lineno, "urlpatterns = [\n" + "".join(
+        f"    {element},\n" for element in elements + list(entries)) + "]")
+
+
+def reshard(source: str, app_name: str) -> Tuple[str, List[Route]]:
+    """Move the router registrations of the flat urls.py ``source`` to shards.
+
+    Returns the new urls.py and the routes to register in the shard
+    modules. Raises ValueError for a layout it cannot rewrite safely: a
+    router used other than in ``register()`` calls and a urlpatterns
+    entry, a prefix that is not a string, a viewset that is not imported.
+    """
+    tree = ast.parse(source)
+    routers: Dict[str, ast.Assign] = {}
+    for node in tree.body:
+        if (
+            isinstance(node, ast.Assign)
+            and len(node.targets) == 1
+            and isinstance(node.targets[0], ast.Name)
+            and isinstance(node.value, ast.Call)
+            and _call_name(node.value).endswith("Router")
+        ):
+            routers[node.targets[0].id] = node
+    if not routers:
+        raise ValueError("urls.py defines no router")
+
+    imported: Dict[str, Tuple[str, Optional[str]]] = {}
+    for node in tree.body:
+        if isinstance(node, ast.ImportFrom):
+            for alias in node.names:
+                module = "." * node.level + (node.module or "")
+                imported[alias.asname or alias.name] = (module, alias.asname)
+
+    removed: List[ast.stmt] = list(routers.values())
+    routes: List[Route] = []
+    for node in tree.body:
+        call = node.value if isinstance(node, ast.Expr) else None
+        if not (
+            isinstance(call, ast.Call)
+            and isinstance(call.func, ast.Attribute)
+            and call.func.attr == "register"
+            and isinstance(call.func.value, ast.Name)
+            and call.func.value.id in routers
+        ):
+            continue
+        prefix = call.args[0] if call.args else None
+        viewset = call.args[1] if len(call.args) > 1 else None
+        if not (isinstance(prefix, ast.Constant) and isinstance(prefix.value, str)):
+            raise ValueError(f"the prefix registered on line {node.lineno} is not a string")
+        if not isinstance(viewset, ast.Name) or viewset.id not in imported:
+            raise ValueError(f"the viewset registered on line {node.lineno} is not imported by name")
+        module, asname = imported[viewset.id]
+        if asname:
+            raise ValueError(f"'{viewset.id}' is imported under an alias")
+        arguments = ", ".join(
+            ast.get_source_segment(source, argument) for argument in call.args)
+        if call.keywords:
+            arguments += ", " + ", ".join(
+                ast.get_source_segment(source, keyword) for keyword in call.keywords)
+        routes.append(Route(prefix.value, viewset.id, arguments,
+                            "." + module if module.startswith(".") else module))
+        removed.append(node)
+
+    urlpatterns = _urlpatterns(tree)
+    if urlpatterns is None or not isinstance(urlpatterns.value, ast.List):
+        raise ValueError("urlpatterns is not a list")
+    kept = [element for element in urlpatterns.value.elts
+            if not _names(element) & set(routers)]
+    dropped = [element for element in urlpatterns.value.elts if element not in kept]
+
+    skipped = {id(node) for node in removed + dropped}
+    for node in _walk_skipping(tree, skipped):
+        if isinstance(node, ast.Name) and node.id in routers:
+            raise ValueError(f"'{node.id}' is used on line {node.lineno}")
+
+    # Imports only the removed statements used: the router class, the
+    # viewsets, path(). The shards need include() and re_path().
+    candidates = set().union(*(_names(node) for node in removed + dropped)) - set(routers)
+    candidates -= {"include", "re_path"}
+    still_used = {node.id for node in _walk_skipping(tree, skipped)
+                  if isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Store)}
+    unused = candidates - still_used
+
+    editor = SourceEditor(source)
+    for node in removed:
+        editor.replace(node.lineno, node.end_lineno, _REMOVED)
+    for node in tree.body:
+        if not isinstance(node, ast.ImportFrom):
+            continue
+        names = [(alias.name, alias.asname) for alias in node.names]
+        remaining = [(name, asname) for name, asname in names if (asname or name) not in unused]
+        if remaining == names:
+            continue
+        module = "." * node.level + (node.module or "")
+        editor.replace(node.lineno, node.end_lineno,
+                       format_import_from(module, remaining) if remaining else _REMOVED)
+
+    keys = sorted({route.shard for route in routes})
+    if any(not key for key in keys):
+        raise ValueError("a viewset is registered with an empty prefix")
+    for route in routes:
+        if not _LITERAL_SEGMENT.fullmatch(route.shard):
+            raise ValueError(f"the prefix '{route.prefix}' does not start with a literal path segment")
+    elements = [ast.get_source_segment(source, element) for element in kept]
+    root_view = any(_has_root_view(node.value) for node in routers.values())
+    if root_view:
+        elements.append(API_ROOT_ENTRY)
+    elements += [shard_include(app_name, key) for key in keys]
+    editor.replace(urlpatterns.lineno, urlpatterns.end_lineno, "urlpatterns = [\n" + "".join(
+        f"    {element},\n" for element in elements) + "]")
+    # A removed block takes the blank lines around it along, but one.
+    source = _REMOVED_BLOCK.sub(
+        lambda match: "\n" if match.group().count("\n") > match.group().count(_REMOVED) else "",
+        editor.apply())
+    # Against the trimmed imports, which may have lost include().
+    editor = SourceEditor(source)
+    merge_imports(editor, ModuleIndex.from_source(source),
+                  URLS_IMPORTS + ("\n" + API_ROOT_IMPORT if root_view else ""))
+    return editor.apply(), routes
+
+
+class ShardedUrlsMixin:
+    """Writes routes to the shards of an app. Expects FileHandlingMixin."""
+
+    def _register_sharded_routes(self, app_config, routes: Sequence[Route]) -> List[Tuple[Route, Path]]:
+        """Add ``routes`` to their shard modules and include new shards in urls.py.
+
+        Returns the routes added with the path of their shard module; the
+        others were already registered.
+        """
+        package = Path(app_config.path) / SHARD_PACKAGE
+        init_path = package / "__init__.py"
+        if not self._file_exists(init_path):
+            self._write_file(init_path, CodeTemplates.URLS_SHARDS_PACKAGE)
+
+        shards: Dict[str, List[Route]] = {}
+        for route in routes:
+            shards.setdefault(route.shard, []).append(route)
+        registered: List[Tuple[Route, Path]] = []
+        for key, shard_routes in shards.items():
+            shard_path = package / f"{shard_module(key)}.py"
+            if not self._file_exists(shard_path):
+                self._write_file(shard_path, CodeTemplates.URLS_SHARD)
+            try:
+                source, added = add_routes(
+                    self._read_file(shard_path), self._get_index(shard_path), shard_routes)
+            except ValueError as e:
+                raise command_error(f"Cannot register routes in {shard_path}: {e}.")
+            if added:
+                self._write_file(shard_path, source)
+            registered.extend((route, shard_path) for route in added)
+
+        urls_path = self._get_file_path(app_config, "urls")
+        if not self._file_exists(urls_path):
+            self._write_file(urls_path, CodeTemplates.URLS_SHARDED_INITIAL)
+        included = included_shards(self._get_index(urls_path).includes, app_config.name)
+        entries = [shard_include(app_config.name, key) for key in sorted(shards)
+                   if shard_module(key) not in included]
+        if entries:
+            source = self._read_file(urls_path)
+            editor = SourceEditor(source)
+            merge_imports(editor, self._get_index(urls_path), URLS_IMPORTS)
+            add_includes(editor, source, entries)
+            self._write_file(urls_path, editor.apply())
+        return registered
+
+
+def _urlpatterns(tree: ast.Module) -> Optional[ast.Assign]:
+    found = None
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+                isinstance(target, ast.Name) and target.id == "urlpatterns" for target in node.targets):
+            found = node
+    return found
+
+
+def _has_trailing_comma(lines: List[str], value: ast.List) -> bool:
+    last = value.elts[-1]
+    if last.end_lineno == value.end_lineno:
+        text = lines[last.end_lineno - 1].encode("utf-8")[last.end_col_offset:value.end_col_offset - 1]
+        return b"," in text
+    text = lines[last.end_lineno - 1].encode("utf-8")[last.end_col_offset:].decode("utf-8")
+    following = lines[last.end_lineno:value.end_lineno - 1]
+    # Only commas, comments and whitespace can follow the last entry.
+    return any("," in line.split("#", 1)[0] for line in [text, *following])
+
+
+def _has_root_view(call: ast.Call) -> bool:
+    """Whether the router built by ``call`` serves an API root view."""
+    if not _call_name(call).endswith("DefaultRouter"):
+        return False
+    return not any(
+        keyword.arg == "include_root_view" and isinstance(keyword.value, ast.Constant)
+        and not keyword.value.value for keyword in call.keywords)
+
+
+def _call_name(call: ast.Call) -> str:
+    func, parts = call.func, []
+    while isinstance(func, ast.Attribute):
+        parts.append(func.attr)
+        func = func.value
+    if isinstance(func, ast.Name):
+        parts.append(func.id)
+    return ".".join(reversed(parts))
+
+
+def _names(node: ast.AST) -> Set[str]:
+    return {child.id for child in ast.walk(node) if isinstance(child, ast.Name)}
+
+
+def _walk_skipping(tree: ast.AST, skipped: Set[int]):
+    """``ast.walk`` without the subtrees of the nodes whose id is in ``skipped``."""
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if id(node) in skipped:
+            continue
+        yield node
+        stack.extend(ast.iter_child_nodes(node))
+
+
+__all__ = [
+    "API_ROOT_ENTRY",
+    "API_ROOT_IMPORT",
+    "LAYOUTS",
+    "Route",
+    "SHARD_PACKAGE",
+    "ShardedUrlsMixin",
+    "URLS_IMPORTS",
+    "add_includes",
+    "add_routes",
+    "included_shards",
+    "reshard",
+    "shard_include",
+    "shard_module",
+]
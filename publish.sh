@@ -1,2 +1,3 @@
+python -m dj_cli_tools.cli pack_templates
 python -m build
 twine upload dist/*
\ No newline at end of file